@@ -10,9 +10,13 @@ import logging
     CN-Wheat computes the CN exchanges in a wheat architecture. See:
     
         * :mod:`cnwheat.simulation`: the simulator (front-end) to run the model,
+        * :mod:`cnwheat.sweep`: the runner of many scenarios in parallel,
         * :mod:`cnwheat.model`: the state and the equations of the model,
         * :mod:`cnwheat.parameters`: the parameters of the model,
         * :mod:`cnwheat.postprocessing`: the post-processing and graph functions,
+        * :mod:`cnwheat.forcings`: the store of the forcings applied to the population at each step,
+        * :mod:`cnwheat.io`: the sinks which write the outputs to files while a simulation runs,
+        * :mod:`cnwheat.schema`: the dtypes of the columns of the outputs and post-processing dataframes,
         * :mod:`cnwheat.tools`: tools to help for the validation of the outputs,
         * and :mod:`cnwheat.converter`: functions to convert CN-Wheat inputs/outputs to/from Pandas dataframes.
 
@@ -3,7 +3,7 @@
 import numpy as np
 import pandas as pd
 
-from cnwheat import model, simulation
+from cnwheat import model, schema, simulation
 
 """
     cnwheat.converter
@@ -68,6 +68,9 @@ def from_dataframes(axes_inputs=None, organs_inputs=None, hiddenzones_inputs=Non
     :param pandas.DataFrame elements_inputs: Elements inputs, with one line by element.
     :param pandas.DataFrame soils_inputs: Soils inputs, with one line by soil.
     :param dict update_parameters: A dictionary with the parameters to update, should have the form {'Organ_label1': {'param1': value1, 'param2': value2}, ...}.
+           The parameters of the axes are updated with key 'axis'.
+           The updated parameters are frozen parameters sets referenced by the created objects only (see :meth:`parameters.Parameters.derive`):
+           the default parameters of the model are not modified.
 
 
     :return:
@@ -85,15 +88,33 @@ def from_dataframes(axes_inputs=None, organs_inputs=None, hiddenzones_inputs=Non
     convert_dataframes_to_population = organs_inputs is not None and hiddenzones_inputs is not None and elements_inputs is not None
     convert_dataframe_to_soils_dict = soils_inputs is not None
 
+    def index_first_rows(inputs, indexes, attributes_names):
+        # index the values of `attributes_names` in the first row of each group of `inputs`, by the values of `indexes`
+        first_rows = inputs.drop_duplicates(subset=indexes, keep='first')
+        keys = first_rows[indexes].itertuples(index=False, name=None)
+        return {key: dict(zip(attributes_names, values)) for key, values in zip(keys, first_rows[attributes_names].values.tolist())}
+
     if convert_dataframes_to_population:
 
+        # index each input dataframe once, instead of filtering the dataframes for each plant, axis, phytomer and organ
+        axes_labels = {}
+        for plant_index, axis_label in organs_inputs[['plant', 'axis']].drop_duplicates().itertuples(index=False, name=None):
+            axes_labels.setdefault(plant_index, []).append(axis_label)
+        organs_rows = index_first_rows(organs_inputs, simulation.Simulation.ORGANS_INDEXES, organs_inputs.columns.tolist())
+        hiddenzones_rows = index_first_rows(hiddenzones_inputs, simulation.Simulation.HIDDENZONE_INDEXES, simulation.Simulation.HIDDENZONE_STATE)
+        elements_rows = index_first_rows(elements_inputs, simulation.Simulation.ELEMENTS_INDEXES, simulation.Simulation.ELEMENTS_STATE)
+        elements_organs = set(key[:-1] for key in elements_rows)
+        metamers_indexes_for_hiddenzones, metamers_indexes_for_elements = {}, {}
+        for metamers_indexes, rows in ((metamers_indexes_for_hiddenzones, hiddenzones_rows), (metamers_indexes_for_elements, elements_rows)):
+            for key in rows:
+                metamers_indexes.setdefault(key[:2], set()).add(key[2])
+
         population = model.Population()
 
-        for plant_index in organs_inputs.plant.unique():
+        for plant_index, curr_axes_labels in axes_labels.items():
             # create a new plant
             plant = model.Plant(plant_index)
             population.plants.append(plant)
-            curr_axes_labels = organs_inputs[organs_inputs['plant'] == plant_index].axis.unique()
             for axis_label in curr_axes_labels:
                 # create a new axis
                 axis = model.Axis(axis_label)
@@ -102,28 +123,27 @@ def from_dataframes(axes_inputs=None, organs_inputs=None, hiddenzones_inputs=Non
                 axis_attributes_values = axis_row[axis_attributes_names].tolist()
                 axis_attributes = dict(zip(axis_attributes_names, axis_attributes_values))
                 axis.__dict__.update(axis_attributes)
-                curr_organs_inputs = organs_inputs[(organs_inputs['plant'] == plant_index) & (organs_inputs['axis'] == axis_label)]
+                # Update parameters if specified
+                if 'axis' in update_parameters:
+                    axis.PARAMETERS = axis.PARAMETERS.derive(update_parameters['axis'])
                 for axis_attribute_name, axis_attribute_class in (('roots', model.Roots), ('phloem', model.Phloem), ('grains', model.Grains), ('endosperm', model.Endosperm)):
                     organ_label = CNWHEAT_CLASSES_TO_DATAFRAME_ORGANS_MAPPING[axis_attribute_class]
-                    organ_inputs = curr_organs_inputs[curr_organs_inputs['organ'] == organ_label]
-                    if not organ_inputs.empty:
+                    organ_row = organs_rows.get((plant_index, axis_label, organ_label))
+                    if organ_row is not None:
                         # create a new organ
                         organ = axis_attribute_class(organ_label)
-                        organ_attributes_names = [state_var_name for state_var_name in simulation.Simulation.ORGANS_STATE if hasattr(organ, state_var_name)]
-                        organ_row = organ_inputs.loc[organ_inputs.first_valid_index()]
-                        organ_attributes_values = organ_row[organ_attributes_names].tolist()
-                        organ_attributes = dict(zip(organ_attributes_names, organ_attributes_values))
+                        organ_attributes = {state_var_name: organ_row[state_var_name] for state_var_name in simulation.Simulation.ORGANS_STATE if hasattr(organ, state_var_name)}
                         organ.__dict__.update(organ_attributes)
                         # Update parameters if specified
                         if organ_label in update_parameters:
-                            organ.PARAMETERS.__dict__.update(update_parameters[organ_label])
+                            organ.PARAMETERS = organ.PARAMETERS.derive(update_parameters[organ_label])
 
                         organ.initialize()
                         setattr(axis, axis_attribute_name, organ)
 
-                curr_metamers_indexes_for_hiddenzones = hiddenzones_inputs[(hiddenzones_inputs['plant'] == plant_index) & (hiddenzones_inputs['axis'] == axis_label)].metamer.unique()
-                curr_metamers_indexes_for_elements = elements_inputs[(elements_inputs['plant'] == plant_index) & (elements_inputs['axis'] == axis_label)].metamer.unique()
-                curr_metamers_indexes = np.unique(np.concatenate((curr_metamers_indexes_for_hiddenzones, curr_metamers_indexes_for_elements)))
+                curr_metamers_indexes_for_hiddenzones = metamers_indexes_for_hiddenzones.get((plant_index, axis_label), set())
+                curr_metamers_indexes_for_elements = metamers_indexes_for_elements.get((plant_index, axis_label), set())
+                curr_metamers_indexes = sorted(curr_metamers_indexes_for_hiddenzones | curr_metamers_indexes_for_elements)
                 for metamer_index in curr_metamers_indexes:
                     # create a new phytomer
                     phytomer = model.Phytomer(metamer_index)
@@ -138,48 +158,37 @@ def from_dataframes(axes_inputs=None, organs_inputs=None, hiddenzones_inputs=Non
 
                         organ_label = CNWHEAT_CLASSES_TO_DATAFRAME_ORGANS_MAPPING[phytomer_attribute_class]
 
-                        if metamer_index in curr_metamers_indexes_for_elements:
-                            curr_elements_inputs = elements_inputs[(elements_inputs['plant'] == plant_index) & (elements_inputs['axis'] == axis_label) & (elements_inputs['metamer'] == metamer_index) &
-                                                                   (elements_inputs['organ'] == organ_label)]
-                            if organ_label not in curr_elements_inputs.organ.values:
-                                continue
+                        if (plant_index, axis_label, metamer_index, organ_label) in elements_organs:
                             # create a new organ
                             organ = phytomer_attribute_class(organ_label)
 
                             # Update parameters if specified
                             if 'PhotosyntheticOrgan' in update_parameters:
-                                organ.PARAMETERS.__dict__.update(update_parameters['PhotosyntheticOrgan'])
+                                organ.PARAMETERS = organ.PARAMETERS.derive(update_parameters['PhotosyntheticOrgan'])
 
                             organ.initialize()
                             setattr(phytomer, phytomer_attribute_name, organ)
 
                             for mtg_element_label, cnwheat_element_name in DATAFRAME_TO_CNWHEAT_ELEMENTS_NAMES_MAPPING.items():
-                                element_inputs = curr_elements_inputs[curr_elements_inputs['element'] == mtg_element_label]
-                                if len(element_inputs) == 0:
+                                element_dict = elements_rows.get((plant_index, axis_label, metamer_index, organ_label, mtg_element_label))
+                                if element_dict is None:
                                     continue
-                                element_inputs = element_inputs.loc[:, simulation.Simulation.ELEMENTS_STATE]
-                                element_dict = element_inputs.loc[element_inputs.first_valid_index()].to_dict()
                                 # create a new element
                                 element = phytomer_attribute_element_class(mtg_element_label, **element_dict)
 
-                                # Add parameters from organ scale
-                                element.PARAMETERS.__dict__.update(organ.PARAMETERS.__dict__)
+                                # Add parameters from organ scale, without modifying the parameters of the other elements
+                                element.PARAMETERS = element.PARAMETERS.derive(dict(organ.PARAMETERS.items()))
 
                                 setattr(organ, cnwheat_element_name, element)
 
-                    if metamer_index in curr_metamers_indexes_for_hiddenzones:
-                        hiddenzone_inputs = hiddenzones_inputs[(hiddenzones_inputs['plant'] == plant_index) & (hiddenzones_inputs['axis'] == axis_label) &
-                                                               (hiddenzones_inputs['metamer'] == metamer_index)]
-                        if len(hiddenzone_inputs) == 0:
-                            continue
-                        hiddenzone_inputs = hiddenzone_inputs.loc[:, simulation.Simulation.HIDDENZONE_STATE]
-                        hiddenzone_dict = hiddenzone_inputs.loc[hiddenzone_inputs.first_valid_index()].to_dict()
+                    hiddenzone_dict = hiddenzones_rows.get((plant_index, axis_label, metamer_index))
+                    if hiddenzone_dict is not None:
                         # create a new hidden zone
                         hiddenzone = model.HiddenZone(CNWHEAT_CLASSES_TO_DATAFRAME_ORGANS_MAPPING[model.HiddenZone], **hiddenzone_dict)
 
                         # Update parameters if specified
                         if hiddenzone.label in update_parameters:
-                            hiddenzone.PARAMETERS.__dict__.update(update_parameters[hiddenzone.label])
+                            hiddenzone.PARAMETERS = hiddenzone.PARAMETERS.derive(update_parameters[hiddenzone.label])
 
                         hiddenzone.initialize()
                         phytomer.hiddenzone = hiddenzone
@@ -208,6 +217,8 @@ def to_dataframes(population=None, soils=None):
     If `population` is not None, convert `population` to Pandas dataframes.
     If `soils` is not None, convert `soils` to Pandas dataframe.
 
+    The indexes of the dataframes have the dtypes of :mod:`cnwheat.schema`.
+
     :param model.Population population: The CN-Wheat population to convert.
     :param dict soils: The soils to convert.
 
@@ -238,72 +249,54 @@ def to_dataframes(population=None, soils=None):
     convert_population_to_dataframes = population is not None
     convert_soils_to_dataframe = soils is not None
 
-    def append_row(model_object, indexes, attributes_names, inputs_df):
-        # function to append a row to a dataframe
-        attributes_values = []
-        for attribute_name in attributes_names:
-            attributes_values.append(getattr(model_object, attribute_name, np.nan))
-        inputs_df.loc[len(inputs_df), :] = indexes + attributes_values
+    def get_row(model_object, indexes, attributes_names):
+        # function to get the row of a model object
+        return tuple(indexes) + tuple(getattr(model_object, attribute_name, np.nan) for attribute_name in attributes_names)
+
+    def to_dataframe(rows, columns, nb_indexes):
+        # function to create a dataframe from the rows of a scale, sorted by indexes
+        rows.sort(key=lambda row: row[:nb_indexes])
+        return pd.DataFrame.from_records(rows, columns=columns)
 
     if convert_population_to_dataframes:
-        # initialize the dataframes
-        all_plants_df = pd.DataFrame(columns=PLANTS_VARIABLES)
-        all_axes_df = pd.DataFrame(columns=AXES_VARIABLES)
-        all_phytomers_df = pd.DataFrame(columns=PHYTOMERS_VARIABLES)
-        all_organs_df = pd.DataFrame(columns=ORGANS_VARIABLES)
-        all_hiddenzones_df = pd.DataFrame(columns=HIDDENZONE_OUTPUTS_VARIABLES)
-        all_elements_df = pd.DataFrame(columns=ELEMENTS_OUTPUTS_VARIABLES)
-
-        # run through the population tree and fill the dataframes
+        plants_rows, axes_rows, phytomers_rows, organs_rows, hiddenzones_rows, elements_rows = [], [], [], [], [], []
+
+        # run through the population tree and fill the rows of the dataframes
         for plant in population.plants:
-            append_row(plant, [plant.index], simulation.Simulation.PLANTS_RUN_VARIABLES, all_plants_df)
+            plants_rows.append(get_row(plant, [plant.index], simulation.Simulation.PLANTS_RUN_VARIABLES))
             for axis in plant.axes:
-                append_row(axis, [plant.index, axis.label], simulation.Simulation.AXES_RUN_VARIABLES, all_axes_df)
+                axes_rows.append(get_row(axis, [plant.index, axis.label], simulation.Simulation.AXES_RUN_VARIABLES))
                 for organ in (axis.roots, axis.phloem, axis.grains, axis.endosperm):
                     if organ is not None:
-                        append_row(organ, [plant.index, axis.label, organ.label], simulation.Simulation.ORGANS_RUN_VARIABLES, all_organs_df)
+                        organs_rows.append(get_row(organ, [plant.index, axis.label, organ.label], simulation.Simulation.ORGANS_RUN_VARIABLES))
                 for phytomer in axis.phytomers:
-                    append_row(phytomer, [plant.index, axis.label, phytomer.index], simulation.Simulation.PHYTOMERS_RUN_VARIABLES, all_phytomers_df)
+                    phytomers_rows.append(get_row(phytomer, [plant.index, axis.label, phytomer.index], simulation.Simulation.PHYTOMERS_RUN_VARIABLES))
                     if phytomer.hiddenzone is not None:
-                        append_row(phytomer.hiddenzone, [plant.index, axis.label, phytomer.index], HIDDENZONE_OUTPUTS_RUN_VARIABLES, all_hiddenzones_df)
+                        hiddenzones_rows.append(get_row(phytomer.hiddenzone, [plant.index, axis.label, phytomer.index], HIDDENZONE_OUTPUTS_RUN_VARIABLES))
                     for organ in (phytomer.chaff, phytomer.peduncle, phytomer.lamina, phytomer.internode, phytomer.sheath):
                         if organ is None:
                             continue
                         for element in (organ.exposed_element, organ.enclosed_element):
                             if element is None:
                                 continue
-                            append_row(element, [plant.index, axis.label, phytomer.index, organ.label, element.label], ELEMENTS_OUTPUTS_RUN_VARIABLES, all_elements_df)
-
-        # sort the rows of the dataframes by columns
-        all_plants_df.sort_values(by=PLANTS_VARIABLES, inplace=True)
-        all_axes_df.sort_values(by=AXES_VARIABLES, inplace=True)
-        all_phytomers_df.sort_values(by=PHYTOMERS_VARIABLES, inplace=True)
-        all_organs_df.sort_values(by=ORGANS_VARIABLES, inplace=True)
-        all_hiddenzones_df.sort_values(by=HIDDENZONE_OUTPUTS_VARIABLES, inplace=True)
-        all_elements_df.sort_values(by=ELEMENTS_OUTPUTS_VARIABLES, inplace=True)
-
-        # convert the indexes of plants, metamers and elements to integers in the dataframes
-        all_plants_df['plant'] = all_plants_df['plant'].astype(int)
-        all_axes_df['plant'] = all_axes_df['plant'].astype(int)
-        all_phytomers_df[['plant', 'metamer']] = all_phytomers_df[['plant', 'metamer']].astype(int)
-        all_organs_df['plant'] = all_organs_df['plant'].astype(int)
-        all_hiddenzones_df[['plant', 'metamer']] = all_hiddenzones_df[['plant', 'metamer']].astype(int)
-        all_elements_df[['plant', 'metamer']] = all_elements_df[['plant', 'metamer']].astype(int)
-
-        all_plants_df.reset_index(drop=True, inplace=True)
-        all_axes_df.reset_index(drop=True, inplace=True)
-        all_phytomers_df.reset_index(drop=True, inplace=True)
-        all_organs_df.reset_index(drop=True, inplace=True)
-        all_hiddenzones_df.reset_index(drop=True, inplace=True)
-        all_elements_df.reset_index(drop=True, inplace=True)
+                            elements_rows.append(get_row(element, [plant.index, axis.label, phytomer.index, organ.label, element.label], ELEMENTS_OUTPUTS_RUN_VARIABLES))
+
+        # create each dataframe at once, with the rows sorted by indexes
+        all_plants_df = to_dataframe(plants_rows, PLANTS_VARIABLES, len(simulation.Simulation.PLANTS_INDEXES))
+        all_axes_df = to_dataframe(axes_rows, AXES_VARIABLES, len(simulation.Simulation.AXES_INDEXES))
+        all_phytomers_df = to_dataframe(phytomers_rows, PHYTOMERS_VARIABLES, len(simulation.Simulation.PHYTOMERS_INDEXES))
+        all_organs_df = to_dataframe(organs_rows, ORGANS_VARIABLES, len(simulation.Simulation.ORGANS_INDEXES))
+        all_hiddenzones_df = to_dataframe(hiddenzones_rows, HIDDENZONE_OUTPUTS_VARIABLES, len(simulation.Simulation.HIDDENZONE_INDEXES))
+        all_elements_df = to_dataframe(elements_rows, ELEMENTS_OUTPUTS_VARIABLES, len(simulation.Simulation.ELEMENTS_INDEXES))
+
+        # convert the indexes to the dtypes of the schema
+        for dataframe in (all_plants_df, all_axes_df, all_phytomers_df, all_organs_df, all_hiddenzones_df, all_elements_df):
+            schema.apply_schema(dataframe)
 
     if convert_soils_to_dataframe:
-        all_soils_df = pd.DataFrame(columns=SOILS_VARIABLES)
-        for soil_id, soil in soils.items():
-            append_row(soil, list(soil_id), simulation.Simulation.SOILS_RUN_VARIABLES, all_soils_df)
-        all_soils_df.sort_values(by=SOILS_VARIABLES, inplace=True)
-        all_soils_df['plant'] = all_soils_df['plant'].astype(int)
-        all_soils_df.reset_index(drop=True, inplace=True)
+        soils_rows = [get_row(soil, list(soil_id), simulation.Simulation.SOILS_RUN_VARIABLES) for soil_id, soil in soils.items()]
+        all_soils_df = to_dataframe(soils_rows, SOILS_VARIABLES, len(simulation.Simulation.SOILS_INDEXES))
+        schema.apply_schema(all_soils_df)
 
     if convert_population_to_dataframes and convert_soils_to_dataframe:
         return all_plants_df, all_axes_df, all_phytomers_df, all_organs_df, all_hiddenzones_df, all_elements_df, all_soils_df
@@ -0,0 +1,544 @@
+# -*- coding: latin-1 -*-
+
+from __future__ import division  # use "//" to do integer division
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import interpolate
+
+from cnwheat import simulation
+
+"""
+    cnwheat.forcings
+    ~~~~~~~~~~~~~~~~
+
+    The module :mod:`cnwheat.forcings` stores the forcings of a simulation (e.g. the photosynthesis and the senescence of the elements,
+    the growth and the senescence of the roots), and applies them to a population at each step.
+
+    The forcings tables are loaded once in a :class:`ForcingsStore`, as dense arrays indexed by time step and by model object.
+    Then, applying the forcings of a step does not need to group, filter or convert the tables: the values of the step
+    are taken from the arrays for all the model objects at once, and set to the model objects bound to the store.
+    A :class:`ForcingsStore` can be passed as `forcings_provider` to :meth:`Simulation.run_until <cnwheat.simulation.Simulation.run_until>`.
+    With an interpolation kernel (see :attr:`INTERPOLATION_KERNELS`), a :class:`ForcingsStore` gives the forcings at any time,
+    and can be passed as `forcings_interpolator` to :class:`Simulation <cnwheat.simulation.Simulation>`: the forcings are then
+    interpolated at each evaluation of the derivatives, whatever the time step of the forcings and of the simulation.
+
+    The large tables of forcings or meteo data can be converted once to a binary cache, then opened with :func:`open_cached_table`:
+    the columns are memory-mapped, so that opening the cache is immediate and only the rows of the time window used
+    (see :meth:`CachedTable.window` and :meth:`CachedTable.values_at`) are read from the disk.
+
+    :copyright: Copyright 2014-2017 INRA-ECOSYS, see AUTHORS.
+    :license: CeCILL-C, see LICENSE for details.
+
+    **Acknowledgments**: The research leading these results has received funding through the
+    Investment for the Future programme managed by the Research National Agency
+    (BreedWheat project ANR-10-BTBR-03).
+
+    .. seealso:: Barillot et al. 2016.
+"""
+
+#: the indexes of the forcings of the roots
+ROOTS_FORCINGS_INDEXES = simulation.Simulation.AXES_INDEXES
+
+#: the indexes of the forcings of the photosynthetic organ elements
+ELEMENTS_FORCINGS_INDEXES = simulation.Simulation.ELEMENTS_INDEXES
+
+
+class ForcingsError(Exception):
+    """
+    Exception raised when the forcings are missing or misused.
+    """
+    pass
+
+
+def _iter_roots(population):
+    """Yield the index (see :attr:`ROOTS_FORCINGS_INDEXES`) and the roots of each axis of `population`."""
+    for plant in population.plants:
+        for axis in plant.axes:
+            yield (plant.index, axis.label), axis.roots
+
+
+def _iter_elements(population):
+    """Yield the index (see :attr:`ELEMENTS_FORCINGS_INDEXES`) and the photosynthetic organ element of each element of `population`."""
+    for plant in population.plants:
+        for axis in plant.axes:
+            for phytomer in axis.phytomers:
+                for organ in (phytomer.chaff, phytomer.peduncle, phytomer.lamina, phytomer.internode, phytomer.sheath):
+                    if organ is None:
+                        continue
+                    for element in (organ.exposed_element, organ.enclosed_element):
+                        if element is None:
+                            continue
+                        yield (plant.index, axis.label, phytomer.index, organ.label, element.label), element
+
+
+class InterpolationKernel(object):
+    """
+    The base class of the kernels which interpolate the forcings between the time steps of the forcings tables (see :attr:`INTERPOLATION_KERNELS`).
+
+    A kernel interpolates all the slots of a forced variable at once.
+
+    :param numpy.ndarray times: the time steps of the forcings, sorted, at least 2.
+    :param numpy.ndarray values: the values of the forced variable, as a float array of shape (number of time steps, number of slots).
+    """
+
+    def __init__(self, times, values):
+        self.times = times  #: the time steps of the forcings
+        self.values = values  #: the values of the forced variable at the time steps
+
+    def __call__(self, t_position, t):
+        """Return the values of all the slots at `t`.
+
+        :param int t_position: the position in :attr:`times` of the last time step before `t`, such that `times[t_position] <= t < times[t_position + 1]`.
+        :param float t: the time.
+
+        :return: The values of the slots at `t`.
+        :rtype: numpy.ndarray
+        """
+        raise NotImplementedError()
+
+
+class PreviousKernel(InterpolationKernel):
+    """
+    Piecewise constant interpolation: the forcings keep their values until the next time step of the forcings.
+    """
+
+    def __call__(self, t_position, t):
+        return self.values[t_position]
+
+
+class LinearKernel(InterpolationKernel):
+    """
+    Linear interpolation between the time steps of the forcings.
+    """
+
+    def __call__(self, t_position, t):
+        weight = (t - self.times[t_position]) / (self.times[t_position + 1] - self.times[t_position])
+        return self.values[t_position] + weight * (self.values[t_position + 1] - self.values[t_position])
+
+
+class MonotoneCubicKernel(InterpolationKernel):
+    """
+    Monotone cubic interpolation (PCHIP, see :class:`scipy.interpolate.PchipInterpolator`): the interpolated forcings are smooth,
+    and do not overshoot the values of the forcings tables (e.g. the photosynthesis does not become negative).
+    """
+
+    def __init__(self, times, values):
+        super(MonotoneCubicKernel, self).__init__(times, values)
+        self.interpolator = interpolate.PchipInterpolator(times, values, axis=0)  #: the interpolator of all the slots
+
+    def __call__(self, t_position, t):
+        return self.interpolator(t)
+
+
+#: the interpolation kernels, by name ; a subclass of :class:`InterpolationKernel` can also be passed to :class:`ForcingsStore`
+INTERPOLATION_KERNELS = {'previous': PreviousKernel, 'linear': LinearKernel, 'monotone_cubic': MonotoneCubicKernel}
+
+
+class _DenseForcings(object):
+    """
+    The forcings of a table, stored in arrays with a row per time step and a column per model object (a slot).
+
+    For each row of the table, the values given (i.e. not NaN) are forced. If the table has several rows for the same time step and model object,
+    the first row with a value given is used.
+
+    :param pandas.DataFrame forcings_df: the forcings, with the time `t`, the columns `indexes` and the forced variables.
+    :param list indexes: the columns which identify the model objects.
+    :param list variables: the variables which can be forced ; the other columns of `forcings_df` are ignored.
+    :param function iter_model_objects: a function which yields the index and the model object of each model object of a population.
+    :param interpolation: the interpolation kernel, a key of :attr:`INTERPOLATION_KERNELS` or a subclass of :class:`InterpolationKernel` ;
+           default is `None` (the forcings are applied at the time steps of the table only).
+    """
+
+    def __init__(self, forcings_df, indexes, variables, iter_model_objects, interpolation=None):
+        self.iter_model_objects = iter_model_objects  #: the function which yields the indexes and the model objects of a population
+        self.variables_names = [column for column in forcings_df.columns if column in variables]  #: the forced variables
+        forcings_df = forcings_df.dropna(how='all', subset=self.variables_names).drop_duplicates(simulation.Simulation.T_INDEX + list(indexes), keep='first')
+
+        self.times = np.unique(forcings_df['t'].values)  #: the time steps of the forcings, sorted
+        rows_keys = pd.MultiIndex.from_frame(forcings_df[list(indexes)])
+        self.keys = rows_keys.unique()  #: the indexes of the model objects, by slot
+        rows_times_positions = np.searchsorted(self.times, forcings_df['t'].values)
+        rows_slots = self.keys.get_indexer(rows_keys)
+        shape = (len(self.times), len(self.keys))
+
+        self.values = {}  #: the values of the forcings, by variable: an array of shape (number of time steps, number of slots)
+        self.is_forced = {}  #: the values given in the table, by variable: a boolean array of shape (number of time steps, number of slots)
+        for variable_name in self.variables_names:
+            column = forcings_df[variable_name]
+            is_given = column.notnull().values
+            dtype = column.dtype if isinstance(column.dtype, np.dtype) else np.dtype(object)
+            values = np.zeros(shape, dtype=dtype)
+            values[rows_times_positions[is_given], rows_slots[is_given]] = column.values[is_given]
+            is_forced = np.zeros(shape, dtype=bool)
+            is_forced[rows_times_positions[is_given], rows_slots[is_given]] = True
+            self.values[variable_name] = values
+            self.is_forced[variable_name] = is_forced
+
+        self.model_objects = []  #: the model objects bound to the slots, or None for the slots without model object
+        self.has_model_object = np.zeros(len(self.keys), dtype=bool)  #: whether a model object is bound to each slot
+
+        self.kernels = {}  #: the interpolation kernels, by variable
+        self.was_forced = {}  #: the slots forced at or before each time step, by variable: a boolean array of shape (number of time steps, number of slots)
+        if interpolation is not None:
+            self._init_kernels(interpolation)
+
+    def _init_kernels(self, interpolation):
+        """Create the interpolation kernels of the forced variables.
+
+        Between two values given in the table, a slot is interpolated ; after the last value given, it keeps this value,
+        as when the forcings are applied at the time steps of the table only. The slots are not forced before their first value given.
+        """
+        kernel_class = INTERPOLATION_KERNELS.get(interpolation, interpolation) if isinstance(interpolation, str) else interpolation
+        if not isinstance(kernel_class, type) or not issubclass(kernel_class, InterpolationKernel):
+            raise ForcingsError('Unknown interpolation: {}. Use one of {} or a subclass of InterpolationKernel.'.format(interpolation, sorted(INTERPOLATION_KERNELS)))
+        if len(self.times) < 2:
+            kernel_class = PreviousKernel
+        for variable_name in self.variables_names:
+            if not np.issubdtype(self.values[variable_name].dtype, np.number):
+                raise ForcingsError('The forcings of `{}` cannot be interpolated: they are not numbers.'.format(variable_name))
+            values = np.where(self.is_forced[variable_name], self.values[variable_name], np.nan).astype(float)
+            # fill the time steps without value given, so that the kernels interpolate between the values given
+            values = pd.DataFrame(values).ffill().bfill().values
+            self.kernels[variable_name] = kernel_class(self.times, values)
+            self.was_forced[variable_name] = np.logical_or.accumulate(self.is_forced[variable_name], axis=0)
+
+    def bind(self, population):
+        """Bind the model objects of `population` to the slots of the forcings.
+
+        :param model.Population population: the population.
+        """
+        self.model_objects = [None] * len(self.keys)
+        model_objects_keys, model_objects = [], []
+        for model_object_key, model_object in self.iter_model_objects(population):
+            model_objects_keys.append(model_object_key)
+            model_objects.append(model_object)
+        if model_objects_keys:
+            slots = self.keys.get_indexer(pd.MultiIndex.from_tuples(model_objects_keys))
+            for slot, model_object in zip(slots.tolist(), model_objects):
+                if slot != -1:
+                    self.model_objects[slot] = model_object
+        self.has_model_object = np.array([model_object is not None for model_object in self.model_objects], dtype=bool)
+
+    def time_position(self, t):
+        """Return the position of the time step `t` in :attr:`times`.
+
+        :param float t: the time step.
+
+        :return: The position of `t`.
+        :rtype: int
+        """
+        t_position = np.searchsorted(self.times, t)
+        if t_position == len(self.times) or self.times[t_position] != t:
+            raise ForcingsError('No forcings at t={}.'.format(t))
+        return int(t_position)
+
+    def apply(self, t):
+        """Set the forcings at `t` to the bound model objects.
+
+        :param float t: the time step ; any time after the first time step of the table if the forcings are interpolated.
+        """
+        if self.kernels:
+            self._apply_interpolated(t)
+            return
+        t_position = self.time_position(t)
+        model_objects = self.model_objects
+        for variable_name in self.variables_names:
+            slots = np.flatnonzero(self.is_forced[variable_name][t_position] & self.has_model_object)
+            for slot, value in zip(slots.tolist(), self.values[variable_name][t_position, slots].tolist()):
+                setattr(model_objects[slot], variable_name, value)
+
+    def interpolate(self, t):
+        """Interpolate the forcings at `t`, for the slots bound to a model object.
+
+        :param float t: any time after the first time step of the table.
+
+        :return: The slots forced at `t` and their values, per variable, as a dictionary {variable_name: (slots, values), ...}.
+        :rtype: dict
+        """
+        t_position = int(np.searchsorted(self.times, t, side='right')) - 1
+        if t_position < 0:
+            raise ForcingsError('No forcings at t={}: the forcings start at t={}.'.format(t, self.times[0]))
+        interpolated_forcings = {}
+        for variable_name in self.variables_names:
+            slots = np.flatnonzero(self.was_forced[variable_name][t_position] & self.has_model_object)
+            kernel = self.kernels[variable_name]
+            if t_position == len(self.times) - 1:
+                values = kernel.values[t_position]
+            else:
+                values = kernel(t_position, t)
+            interpolated_forcings[variable_name] = (slots, values[slots])
+        return interpolated_forcings
+
+    def _apply_interpolated(self, t):
+        """Set the forcings interpolated at `t` to the bound model objects."""
+        model_objects = self.model_objects
+        for variable_name, (slots, values) in self.interpolate(t).items():
+            for slot, value in zip(slots.tolist(), values.tolist()):
+                setattr(model_objects[slot], variable_name, value)
+
+
+class ForcingsStore(object):
+    """
+    The forcings of the roots and of the photosynthetic organ elements of a population, loaded once and applied at each step.
+
+    The forced variables are the columns of the forcings tables which are state variables of the model objects
+    (see :attr:`Simulation.ORGANS_STATE <cnwheat.simulation.Simulation.ORGANS_STATE>` and
+    :attr:`Simulation.ELEMENTS_STATE <cnwheat.simulation.Simulation.ELEMENTS_STATE>`). At each step, the values given in the tables
+    (i.e. not NaN) are set to the model objects ; the model objects without forcings at this step are left unchanged.
+
+    The model objects are bound to the forcings when the store is applied to a population for the first time. Call :meth:`bind`
+    again if the topology of the population changes.
+
+    An instance can be passed as `forcings_provider` to :meth:`Simulation.run_until <cnwheat.simulation.Simulation.run_until>`.
+
+    With an `interpolation`, the forcings can be applied at any time after the first time step of the tables, for example at each evaluation
+    of the derivatives when the store is passed as `forcings_interpolator` to :class:`Simulation <cnwheat.simulation.Simulation>`.
+    The time steps of the tables do not need to be regular, nor related to the time step of the simulation.
+
+    :param pandas.DataFrame roots_forcings: the forcings of the roots, indexed by `t` and :attr:`ROOTS_FORCINGS_INDEXES` ; default is `None` (no forcing).
+    :param list elements_forcings: the tables of forcings of the photosynthetic organ elements, indexed by `t` and :attr:`ELEMENTS_FORCINGS_INDEXES`,
+           applied in this order (e.g. the senescence, then the photosynthesis) ; default is `()` (no forcing).
+    :param interpolation: the interpolation of the forcings between the time steps of the tables, a key of :attr:`INTERPOLATION_KERNELS`
+           or a subclass of :class:`InterpolationKernel` ; default is `None` (the forcings are applied at the time steps of the tables only).
+    """
+
+    def __init__(self, roots_forcings=None, elements_forcings=(), interpolation=None):
+        self.forcings = []  #: the forcings tables, in the order in which they are applied
+        if roots_forcings is not None:
+            self.forcings.append(_DenseForcings(roots_forcings, ROOTS_FORCINGS_INDEXES, simulation.Simulation.ORGANS_STATE, _iter_roots, interpolation))
+        for elements_forcings_df in elements_forcings:
+            self.forcings.append(_DenseForcings(elements_forcings_df, ELEMENTS_FORCINGS_INDEXES, simulation.Simulation.ELEMENTS_STATE, _iter_elements, interpolation))
+        self.population = None  #: the population bound to the forcings
+
+    def __call__(self, t, population, soils):
+        """Force the population at `t`.
+
+        :param float t: the time step.
+        :param model.Population population: the population.
+        :param dict soils: the soils.
+        """
+        self.apply(t, population)
+
+    def bind(self, population):
+        """Bind the model objects of `population` to the forcings.
+
+        :param model.Population population: the population.
+        """
+        for forcings in self.forcings:
+            forcings.bind(population)
+        self.population = population
+
+    def apply(self, t, population):
+        """Set the forcings at `t` to the model objects of `population`.
+
+        :param float t: the time step.
+        :param model.Population population: the population.
+        """
+        if population is not self.population:
+            self.bind(population)
+        for forcings in self.forcings:
+            forcings.apply(t)
+
+    def interpolate(self, t, population):
+        """Interpolate the forcings at `t` for the model objects of `population`, without setting them to the model objects.
+
+        The vectorized engine of :class:`Simulation <cnwheat.simulation.Simulation>` writes these values into its packed arrays
+        instead of calling :meth:`apply` at each evaluation of the derivatives.
+
+        :param float t: any time after the first time step of the tables.
+        :param model.Population population: the population.
+
+        :return: The forcings interpolated at `t`, in the order in which they are applied, as a list [(model_objects, variable_name, slots, values), ...],
+                 where `model_objects` are the model objects bound to the slots of a table, and `values` the values of `variable_name` for the model objects at `slots`.
+        :rtype: list
+        """
+        if population is not self.population:
+            self.bind(population)
+        interpolated_forcings = []
+        for forcings in self.forcings:
+            if not forcings.kernels:
+                raise ForcingsError('The forcings cannot be interpolated: the store has no interpolation.')
+            for variable_name, (slots, values) in forcings.interpolate(t).items():
+                interpolated_forcings.append((forcings.model_objects, variable_name, slots, values))
+        return interpolated_forcings
+
+
+#: the version of the format of the caches written by :func:`open_cached_table`
+CACHE_FORMAT_VERSION = 1
+
+#: the name of the file which describes a cache
+CACHE_METADATA_FILENAME = 'metadata.json'
+
+
+def _cache_column_filepath(cache_dirpath, column_position):
+    """Return the path of the file of the column at position `column_position` in the cache `cache_dirpath`."""
+    return os.path.join(cache_dirpath, 'column_{}.npy'.format(column_position))
+
+
+def _source_signature(csv_filepath):
+    """Return the size and the modification time of the file `csv_filepath`, which tell whether a cache is up to date."""
+    stat = os.stat(csv_filepath)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _write_cache(csv_filepath, cache_dirpath, chunk_rows):
+    """Convert the CSV file `csv_filepath` to the cache `cache_dirpath`, reading `chunk_rows` rows at once.
+
+    The CSV file is read twice: the first time to get the number of rows, the dtype and the categories of each column,
+    the second time to fill the memory-mapped columns. The columns of strings are stored as integer codes of their categories.
+    If the rows are not sorted by `t`, the columns are sorted one after the other.
+    """
+    # first pass: the number of rows, the dtypes and the categories of the columns
+    nb_rows = 0
+    columns, dtypes, categories = None, {}, {}
+    is_sorted, last_t = True, -np.inf
+    for chunk in pd.read_csv(csv_filepath, chunksize=chunk_rows):
+        if columns is None:
+            columns = list(chunk.columns)
+            if 't' not in columns:
+                raise ForcingsError('The table {} has no column `t`.'.format(csv_filepath))
+        for column in columns:
+            if not pd.api.types.is_numeric_dtype(chunk[column].dtype):
+                categories.setdefault(column, set()).update(chunk[column].dropna().unique().tolist())
+            elif column not in categories:
+                dtypes[column] = np.result_type(dtypes.get(column, chunk[column].dtype), chunk[column].dtype)
+        chunk_t = chunk['t'].values
+        if len(chunk_t):
+            is_sorted = is_sorted and last_t <= chunk_t[0] and bool(np.all(chunk_t[:-1] <= chunk_t[1:]))
+            last_t = chunk_t[-1]
+        nb_rows += len(chunk)
+    if columns is None:
+        raise ForcingsError('The table {} is empty.'.format(csv_filepath))
+    categories = {column: sorted(column_categories, key=str) for column, column_categories in categories.items()}
+    for column in categories:
+        dtypes[column] = np.dtype('int32')
+
+    # second pass: fill the memory-mapped columns
+    if not os.path.isdir(cache_dirpath):
+        os.makedirs(cache_dirpath)
+    arrays = [np.lib.format.open_memmap(_cache_column_filepath(cache_dirpath, column_position), mode='w+', dtype=dtypes[column], shape=(nb_rows,))
+              for column_position, column in enumerate(columns)]
+    categories_positions = {column: pd.Index(column_categories) for column, column_categories in categories.items()}
+    row_start = 0
+    for chunk in pd.read_csv(csv_filepath, chunksize=chunk_rows):
+        row_end = row_start + len(chunk)
+        for column, array in zip(columns, arrays):
+            if column in categories:
+                array[row_start:row_end] = categories_positions[column].get_indexer(chunk[column])
+            else:
+                array[row_start:row_end] = chunk[column].values
+        row_start = row_end
+
+    t_position = columns.index('t')
+    if not is_sorted:
+        order = np.argsort(arrays[t_position], kind='stable')
+        for array in arrays:
+            array[:] = array[order]
+    times = np.unique(arrays[t_position])
+    rows_starts = np.searchsorted(arrays[t_position], times, side='left')
+    for array in arrays:
+        array.flush()
+    del arrays
+    np.save(os.path.join(cache_dirpath, 'times.npy'), times)
+    np.save(os.path.join(cache_dirpath, 'rows_starts.npy'), np.append(rows_starts, nb_rows))
+
+    # the metadata are written last, so that an interrupted conversion is detected as an outdated cache
+    metadata = {'version': CACHE_FORMAT_VERSION, 'source': _source_signature(csv_filepath), 'columns': columns, 'categories': categories}
+    with open(os.path.join(cache_dirpath, CACHE_METADATA_FILENAME), 'w') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+
+class CachedTable(object):
+    """
+    A table of forcings or meteo data stored in a cache written by :func:`open_cached_table`, with its rows sorted by `t`.
+
+    The columns are memory-mapped: they are read from the disk only for the rows which are used.
+
+    :param str cache_dirpath: the path of the directory of the cache.
+    """
+
+    def __init__(self, cache_dirpath):
+        with open(os.path.join(cache_dirpath, CACHE_METADATA_FILENAME)) as metadata_file:
+            metadata = json.load(metadata_file)
+        self.cache_dirpath = cache_dirpath  #: the path of the directory of the cache
+        self.columns = metadata['columns']  #: the names of the columns, in the order of the CSV file
+        self.categories = {column: np.array(column_categories, dtype=object) for column, column_categories in metadata['categories'].items()}  #: the categories of the columns of strings
+        self.times = np.load(os.path.join(cache_dirpath, 'times.npy'))  #: the time steps of the table, sorted
+        self.rows_starts = np.load(os.path.join(cache_dirpath, 'rows_starts.npy'))  #: the position of the first row of each time step, followed by the number of rows
+        self.arrays = {column: np.load(_cache_column_filepath(cache_dirpath, column_position), mmap_mode='r')
+                       for column_position, column in enumerate(self.columns)}  #: the memory-mapped columns
+
+    def _rows(self, row_start, row_end, columns):
+        """Return the rows from position `row_start` to position `row_end` (excluded) of `columns` in a dataframe."""
+        data = {}
+        for column in columns:
+            values = np.array(self.arrays[column][row_start:row_end])
+            if column in self.categories:
+                codes = values
+                values = np.full(len(codes), np.nan, dtype=object)
+                values[codes != -1] = self.categories[column][codes[codes != -1]]
+            data[column] = values
+        return pd.DataFrame(data, columns=columns)
+
+    def window(self, t_start, t_end, columns=None):
+        """Return the rows of the table from `t_start` to `t_end` (both included).
+
+        :param float t_start: the first time step of the window.
+        :param float t_end: the last time step of the window.
+        :param list columns: the columns to return ; default is `None` (all the columns).
+
+        :return: The rows of the window, sorted by `t`.
+        :rtype: pandas.DataFrame
+        """
+        first_time_position = np.searchsorted(self.times, t_start, side='left')
+        last_time_position = np.searchsorted(self.times, t_end, side='right')
+        return self._rows(self.rows_starts[first_time_position], self.rows_starts[last_time_position], self.columns if columns is None else columns)
+
+    def values_at(self, t, columns=None):
+        """Return the values of the first row of the table at `t`, like `meteo.loc[t, columns]` on a table indexed by `t`.
+
+        :param float t: the time step.
+        :param list columns: the columns to return ; default is `None` (all the columns except `t`).
+
+        :return: The values of `columns` at `t`.
+        :rtype: pandas.Series
+        """
+        t_position = np.searchsorted(self.times, t)
+        if t_position == len(self.times) or self.times[t_position] != t:
+            raise ForcingsError('No row at t={} in the table cached in {}.'.format(t, self.cache_dirpath))
+        if columns is None:
+            columns = [column for column in self.columns if column != 't']
+        row_start = self.rows_starts[t_position]
+        return self._rows(row_start, row_start + 1, columns).iloc[0]
+
+
+def open_cached_table(csv_filepath, cache_dirpath=None, chunk_rows=100000):
+    """Open the table of forcings or meteo data `csv_filepath` from its binary cache.
+
+    The cache is written at the first call, then each time the CSV file is modified. The following calls open the cache
+    without reading the CSV file.
+
+    :param str csv_filepath: the path of the CSV file, with a column `t`.
+    :param str cache_dirpath: the path of the directory of the cache ; default is `None`, i.e. `csv_filepath` followed by `.cache`.
+    :param int chunk_rows: the number of rows of the CSV file read at once when the cache is written ; default is `100000`.
+
+    :return: The table.
+    :rtype: CachedTable
+    """
+    if cache_dirpath is None:
+        cache_dirpath = csv_filepath + '.cache'
+    metadata_filepath = os.path.join(cache_dirpath, CACHE_METADATA_FILENAME)
+    is_up_to_date = False
+    if os.path.isfile(metadata_filepath):
+        with open(metadata_filepath) as metadata_file:
+            metadata = json.load(metadata_file)
+        is_up_to_date = metadata.get('version') == CACHE_FORMAT_VERSION and metadata.get('source') == _source_signature(csv_filepath)
+    if not is_up_to_date:
+        if os.path.isfile(metadata_filepath):
+            os.remove(metadata_filepath)
+        _write_cache(csv_filepath, cache_dirpath, chunk_rows)
+    return CachedTable(cache_dirpath)
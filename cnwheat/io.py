@@ -0,0 +1,397 @@
+# -*- coding: latin-1 -*-
+
+from __future__ import division  # use "//" to do integer division
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from cnwheat import converter, schema
+
+"""
+    cnwheat.io
+    ~~~~~~~~~~
+
+    The module :mod:`cnwheat.io` defines the sinks which write the outputs of a simulation to files while the simulation runs.
+
+    An :class:`OutputsSink` appends the rows of a table at each step to preallocated column buffers, and flushes the buffers
+    in chunks to a CSV, Parquet, Feather or HDF5 file every `flush_interval` steps. Thus, the memory used to store the outputs does not grow
+    with the length of the simulation, and the outputs of the steps already flushed are on disk if the simulation crashes.
+    A :class:`PopulationOutputsSink` writes the outputs of a population and soils at each scale, and can be passed
+    as `output_sink` to :meth:`Simulation.run_until <cnwheat.simulation.Simulation.run_until>`.
+
+    The functions :func:`write_outputs` and :func:`read_outputs` write and read a whole table of outputs or postprocessing,
+    and :func:`iter_outputs` reads a table in chunks of rows, for the outputs which do not fit in memory.
+
+    The binary formats store the floats without loss of precision, and are much faster to write and read than CSV.
+    The columnar formats Parquet and Feather also store the indexes with the compact dtypes of :mod:`cnwheat.schema`,
+    and :func:`read_outputs` returns the indexes with these dtypes whatever the format.
+    Parquet and Feather need the optional package `pyarrow`, and HDF5 needs the optional package `tables`.
+
+    :copyright: Copyright 2014-2017 INRA-ECOSYS, see AUTHORS.
+    :license: CeCILL-C, see LICENSE for details.
+
+    **Acknowledgments**: The research leading these results has received funding through the
+    Investment for the Future programme managed by the Research National Agency
+    (BreedWheat project ANR-10-BTBR-03).
+
+    .. seealso:: Barillot et al. 2016.
+"""
+
+#: the formats of the outputs files, indexed by the extension of the files
+FORMATS_EXTENSIONS = {'.csv': 'csv', '.parquet': 'parquet', '.feather': 'feather', '.h5': 'hdf5', '.hdf5': 'hdf5'}
+
+#: the columnar formats, written by :class:`OutputsSink` as a directory of part files
+COLUMNAR_FORMATS = ('parquet', 'feather')
+
+#: the scales of the outputs, in the order of the dataframes returned by :func:`converter.to_dataframes`
+SCALES = ('plants', 'axes', 'phytomers', 'organs', 'hiddenzones', 'elements', 'soils')
+
+
+class OutputsSinkError(Exception):
+    """
+    Exception raised when an outputs sink is misconfigured or misused.
+    """
+    pass
+
+
+def _get_format(filepath, format_):
+    """Return the format of `filepath`: `format_` if it is not `None`, else the format found from the extension of `filepath`."""
+    if format_ is None:
+        extension = os.path.splitext(filepath)[1].lower()
+        if extension not in FORMATS_EXTENSIONS:
+            raise OutputsSinkError('Cannot find the format of {} from its extension: use one of {} or set the format explicitly.'.format(filepath,
+                                                                                                                                      sorted(FORMATS_EXTENSIONS)))
+        format_ = FORMATS_EXTENSIONS[extension]
+    if format_ not in FORMATS_EXTENSIONS.values():
+        raise OutputsSinkError('Unknown format {}: use one of {}.'.format(format_, sorted(set(FORMATS_EXTENSIONS.values()))))
+    return format_
+
+
+def _write_columnar(dataframe, filepath, format_):
+    """Write `dataframe` to `filepath` in the columnar format `format_`, with the indexes converted to the dtypes of :mod:`cnwheat.schema`."""
+    dataframe = schema.apply_schema(dataframe.reset_index(drop=True))
+    if format_ == 'parquet':
+        dataframe.to_parquet(filepath, index=False)
+    else:
+        dataframe.to_feather(filepath)
+
+
+def _read_columnar(filepath, format_):
+    """Read the file `filepath` in the columnar format `format_`."""
+    if format_ == 'parquet':
+        return pd.read_parquet(filepath)
+    return pd.read_feather(filepath)
+
+
+class _ColumnsBuffer(object):
+    """
+    Preallocated arrays storing the values of the columns of a table, row after row.
+
+    The capacity of the arrays is doubled when they are full, and the arrays are reused after :meth:`clear`.
+    A numeric array is upcasted when the appended values need it (e.g. NaN in an integer column).
+    The other columns are stored in arrays of objects.
+    """
+    def __init__(self, columns, capacity):
+        self.columns = list(columns)  #: the names of the columns
+        self.capacity = max(capacity, 1)  #: the number of rows which can be stored without reallocating the arrays
+        self.size = 0  #: the number of rows stored
+        self.arrays = None  #: the arrays of the columns, allocated at the first append
+
+    @staticmethod
+    def _buffer_dtype(values):
+        dtype = values.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+            return dtype
+        return np.dtype(object)
+
+    def append(self, dataframe):
+        """Append the rows of `dataframe` to the buffers.
+
+        :param pandas.DataFrame dataframe: the rows to append, with at least the columns of the buffer.
+        """
+        nb_rows = len(dataframe)
+        if self.arrays is None:
+            self.arrays = {column: np.empty(self.capacity, dtype=self._buffer_dtype(dataframe[column])) for column in self.columns}
+        if self.size + nb_rows > self.capacity:
+            self.capacity = max(2 * self.capacity, self.size + nb_rows)
+            for column, array in self.arrays.items():
+                new_array = np.empty(self.capacity, dtype=array.dtype)
+                new_array[:self.size] = array[:self.size]
+                self.arrays[column] = new_array
+        for column in self.columns:
+            values = dataframe[column]
+            array = self.arrays[column]
+            values_dtype = self._buffer_dtype(values)
+            if array.dtype != object:
+                upcasted_dtype = np.dtype(object) if values_dtype == object else np.result_type(array.dtype, values_dtype)
+                if upcasted_dtype != array.dtype:
+                    array = self.arrays[column] = array.astype(upcasted_dtype)
+            array[self.size:self.size + nb_rows] = values.to_numpy(dtype=None if array.dtype == object else array.dtype)
+        self.size += nb_rows
+
+    def to_dataframe(self):
+        """Return the rows stored in the buffers.
+
+        :return: The rows stored in the buffers.
+        :rtype: pandas.DataFrame
+        """
+        if self.arrays is None:
+            return pd.DataFrame(columns=self.columns)
+        return pd.DataFrame({column: self.arrays[column][:self.size] for column in self.columns}, columns=self.columns)
+
+    def clear(self):
+        """Remove the rows stored in the buffers, keeping the arrays allocated."""
+        self.size = 0
+
+
+class OutputsSink(object):
+    """
+    Write the time series of a table of outputs to a file, in chunks.
+
+    :param str filepath: the path of the outputs file. For the columnar formats (see :attr:`COLUMNAR_FORMATS`), `filepath` is a directory
+           in which each chunk is written to a file `part-<chunk>.<format>`, so that the chunks already written remain readable if the simulation
+           crashes. Read the outputs with :func:`read_outputs`. An existing outputs file is overwritten.
+    :param str format_: the format of the outputs file, one of `'csv'`, `'parquet'`, `'feather'` and `'hdf5'` ; default is `None` (find the format
+           from the extension of `filepath`, see :attr:`FORMATS_EXTENSIONS`).
+    :param list columns: the columns of the outputs, without the time column `t` ; default is `None` (use the columns of the first
+           appended dataframe). The rows appended later are reindexed with these columns.
+    :param int flush_interval: the number of steps stored in memory before writing them to the file ; default is `24`.
+    :param int precision: the number of decimals of the floats written to the CSV files ; default is `6`.
+    :param str hdf5_key: the key of the table in the HDF5 file ; default is `'outputs'`.
+    :param int hdf5_min_itemsize: the minimum size of the strings stored in the HDF5 file ; default is `64`.
+    """
+
+    def __init__(self, filepath, format_=None, columns=None, flush_interval=24, precision=6, hdf5_key='outputs', hdf5_min_itemsize=64):
+        if flush_interval < 1:
+            raise OutputsSinkError('The flush interval must be at least 1 step: {}.'.format(flush_interval))
+        self.filepath = filepath  #: the path of the outputs file
+        self.format_ = _get_format(filepath, format_)  #: the format of the outputs file
+        self.columns = None if columns is None else ['t'] + [column for column in columns if column != 't']  #: the columns of the outputs
+        self.flush_interval = flush_interval  #: the number of steps stored in memory before writing them to the file
+        self.precision = precision  #: the number of decimals of the floats written to the CSV files
+        self.hdf5_key = hdf5_key  #: the key of the table in the HDF5 file
+        self.hdf5_min_itemsize = hdf5_min_itemsize  #: the minimum size of the strings stored in the HDF5 file
+        self.buffer = None  #: the buffer of the steps not yet written to the file
+        self.nb_buffered_steps = 0  #: the number of steps in :attr:`buffer`
+        self.nb_chunks = 0  #: the number of chunks already written to the file
+        self.closed = False  #: a boolean flag which indicates if the sink is closed
+
+        if self.format_ in COLUMNAR_FORMATS:
+            if not os.path.isdir(self.filepath):
+                os.makedirs(self.filepath)
+            for part_filepath in glob.glob(os.path.join(self.filepath, 'part-*.{}'.format(self.format_))):
+                os.remove(part_filepath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, t, dataframe):
+        """Append the rows of `dataframe` at time `t`, and write the stored steps to the file every :attr:`flush_interval` steps.
+
+        :param float t: the time of the step, or `None` to append the rows of several steps, with the time of each row in the column `t` of `dataframe`.
+        :param pandas.DataFrame dataframe: the outputs at `t`, as returned by :func:`converter.to_dataframes`.
+        """
+        if self.closed:
+            raise OutputsSinkError('Cannot append outputs to the closed sink of {}.'.format(self.filepath))
+        if self.columns is None:
+            self.columns = ['t'] + [column for column in dataframe.columns if column != 't']
+        nb_steps = 1 if t is not None else max(dataframe['t'].nunique(), 1)
+        if self.buffer is None:
+            # preallocate the buffer for the steps of a chunk, assuming the number of rows is roughly the same at each step
+            self.buffer = _ColumnsBuffer(self.columns, len(dataframe) // nb_steps * self.flush_interval)
+        dataframe = dataframe.reindex(columns=self.columns)
+        if t is not None:
+            dataframe['t'] = t
+        self.buffer.append(dataframe)
+        self.nb_buffered_steps += nb_steps
+        if self.nb_buffered_steps >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write the stored steps to the file."""
+        if self.buffer is None or self.buffer.size == 0:
+            return
+        chunk = self.buffer.to_dataframe()
+        if self.format_ == 'csv':
+            chunk.to_csv(self.filepath, mode='w' if self.nb_chunks == 0 else 'a', header=self.nb_chunks == 0, na_rep='NA', index=False,
+                         float_format='%.{}f'.format(self.precision))
+        elif self.format_ in COLUMNAR_FORMATS:
+            _write_columnar(chunk, os.path.join(self.filepath, 'part-{:05d}.{}'.format(self.nb_chunks, self.format_)), self.format_)
+        else:
+            strings_columns = []
+            for column in chunk.columns:
+                if chunk[column].dtype != object:
+                    continue
+                try:
+                    # the variables not computed yet are None, and the other values are floats
+                    chunk[column] = chunk[column].astype(float)
+                except (TypeError, ValueError):
+                    strings_columns.append(column)
+            chunk[strings_columns] = chunk[strings_columns].astype(str)
+            with pd.HDFStore(self.filepath, mode='w' if self.nb_chunks == 0 else 'a') as store:
+                store.append(self.hdf5_key, chunk, format='table', index=False, min_itemsize={column: self.hdf5_min_itemsize for column in strings_columns})
+        self.nb_chunks += 1
+        self.buffer.clear()
+        self.nb_buffered_steps = 0
+
+    def close(self):
+        """Write the remaining steps to the file and close the sink."""
+        if self.closed:
+            return
+        self.flush()
+        if self.nb_chunks == 0 and self.format_ == 'csv' and self.columns is not None:
+            # no step was appended: write the header only
+            pd.DataFrame(columns=self.columns).to_csv(self.filepath, index=False)
+        self.closed = True
+
+
+class PopulationOutputsSink(object):
+    """
+    Write the outputs of a population and soils at each scale, in an :class:`OutputsSink` per scale.
+
+    An instance can be passed as `output_sink` to :meth:`Simulation.run_until <cnwheat.simulation.Simulation.run_until>`.
+
+    :param dict filepaths: the paths of the outputs files, indexed by scale (see :attr:`SCALES`). The scales not in `filepaths` are not written.
+    :param sinks_options: the options of the sinks, passed to :class:`OutputsSink` (e.g. `flush_interval` or `format_`).
+    """
+
+    def __init__(self, filepaths, **sinks_options):
+        unknown_scales = set(filepaths).difference(SCALES)
+        if unknown_scales:
+            raise OutputsSinkError('Unknown scales {}: use some of {}.'.format(sorted(unknown_scales), SCALES))
+        self.sinks = {scale: OutputsSink(filepath, **sinks_options) for scale, filepath in filepaths.items()}  #: the sinks, indexed by scale
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __call__(self, t, population, soils):
+        """Append the outputs of `population` and `soils` at time `t`.
+
+        :param float t: the time of the step.
+        :param model.Population population: the population.
+        :param dict soils: the soils.
+        """
+        self.append(t, converter.to_dataframes(population, soils))
+
+    def append(self, t, dataframes):
+        """Append the outputs at time `t`, already converted to dataframes.
+
+        :param float t: the time of the step.
+        :param tuple dataframes: the outputs at each scale, in the order of :attr:`SCALES` (as returned by :func:`converter.to_dataframes`).
+        """
+        for scale, dataframe in zip(SCALES, dataframes):
+            if scale in self.sinks:
+                self.sinks[scale].append(t, dataframe)
+
+    def flush(self):
+        """Write the stored steps of all the scales to the files."""
+        for sink in self.sinks.values():
+            sink.flush()
+
+    def close(self):
+        """Write the remaining steps of all the scales to the files and close the sinks."""
+        for sink in self.sinks.values():
+            sink.close()
+
+
+def write_outputs(dataframe, filepath, format_=None, precision=6, hdf5_key='outputs'):
+    """Write a whole table of outputs or postprocessing at once.
+
+    :param pandas.DataFrame dataframe: the table to write.
+    :param str filepath: the path of the file.
+    :param str format_: the format of the file, one of `'csv'`, `'parquet'`, `'feather'` and `'hdf5'` ; default is `None` (find the format
+           from the extension of `filepath`, see :attr:`FORMATS_EXTENSIONS`).
+    :param int precision: the number of decimals of the floats written to the CSV files ; default is `6`.
+    :param str hdf5_key: the key of the table in the HDF5 file ; default is `'outputs'`.
+    """
+    format_ = _get_format(filepath, format_)
+    if format_ == 'csv':
+        dataframe.to_csv(filepath, na_rep='NA', index=False, float_format='%.{}f'.format(precision))
+    elif format_ in COLUMNAR_FORMATS:
+        _write_columnar(dataframe, filepath, format_)
+    else:
+        dataframe.to_hdf(filepath, key=hdf5_key, mode='w', format='table', index=False)
+
+
+def read_outputs(filepath, format_=None, hdf5_key='outputs', variables_dtype=None):
+    """Read the outputs written by an :class:`OutputsSink` or by :func:`write_outputs`.
+
+    :param str filepath: the path of the file, or of the directory of part files written by an :class:`OutputsSink` in a columnar format.
+    :param str format_: the format of the file ; default is `None` (find the format from the extension of `filepath`).
+    :param str hdf5_key: the key of the table in the HDF5 file ; default is `'outputs'`.
+    :param str variables_dtype: the dtype of the variables, one of `'float32'` and `'float64'` ; default is `None` (keep the dtypes read from the file).
+
+    :return: The outputs, with the indexes converted to the dtypes of :mod:`cnwheat.schema` (see :func:`cnwheat.schema.apply_schema`).
+    :rtype: pandas.DataFrame
+    """
+    format_ = _get_format(filepath, format_)
+    if format_ == 'csv':
+        outputs = pd.read_csv(filepath)
+    elif format_ in COLUMNAR_FORMATS:
+        if os.path.isdir(filepath):
+            parts_filepaths = sorted(glob.glob(os.path.join(filepath, 'part-*.{}'.format(format_))))
+            outputs = pd.concat([_read_columnar(part_filepath, format_) for part_filepath in parts_filepaths], ignore_index=True) if parts_filepaths else pd.DataFrame()
+        else:
+            outputs = _read_columnar(filepath, format_)
+    else:
+        # each chunk appended by an :class:`OutputsSink` was stored with its own index
+        outputs = pd.read_hdf(filepath, hdf5_key).reset_index(drop=True)
+    return schema.apply_schema(outputs, variables_dtype)
+
+
+def _iter_columnar(filepath, format_, chunk_rows):
+    """Iterate over the rows of the file or directory of part files `filepath` in the columnar format `format_`, in chunks of at most `chunk_rows` rows."""
+    import pyarrow  # optional dependency, imported here so that the other formats do not need it
+    if os.path.isdir(filepath):
+        filepaths = sorted(glob.glob(os.path.join(filepath, 'part-*.{}'.format(format_))))
+    else:
+        filepaths = [filepath]
+    for part_filepath in filepaths:
+        if format_ == 'parquet':
+            import pyarrow.parquet
+            batches = pyarrow.parquet.ParquetFile(part_filepath).iter_batches(batch_size=chunk_rows)
+            for batch in batches:
+                yield batch.to_pandas()
+        else:
+            import pyarrow.ipc
+            with pyarrow.memory_map(part_filepath) as source:
+                reader = pyarrow.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    for offset in range(0, batch.num_rows, chunk_rows):
+                        yield batch.slice(offset, chunk_rows).to_pandas()
+
+
+def iter_outputs(filepath, format_=None, chunk_rows=100000, hdf5_key='outputs', variables_dtype=None):
+    """Iterate over the rows of the outputs written by an :class:`OutputsSink` or by :func:`write_outputs`, in chunks, without reading the whole file in memory.
+
+    The chunks are returned in the order of the rows in the file, thus in the order of the time steps for the outputs written by a simulation.
+
+    :param str filepath: the path of the file, or of the directory of part files written by an :class:`OutputsSink` in a columnar format.
+    :param str format_: the format of the file ; default is `None` (find the format from the extension of `filepath`).
+    :param int chunk_rows: the maximum number of rows of a chunk ; default is `100000`.
+    :param str hdf5_key: the key of the table in the HDF5 file ; default is `'outputs'`.
+    :param str variables_dtype: the dtype of the variables, one of `'float32'` and `'float64'` ; default is `None` (keep the dtypes read from the file).
+
+    :return: A generator of the chunks of the outputs, with the indexes converted to the dtypes of :mod:`cnwheat.schema`.
+    :rtype: generator
+    """
+    if chunk_rows < 1:
+        raise OutputsSinkError('The number of rows of a chunk must be at least 1: {}.'.format(chunk_rows))
+    format_ = _get_format(filepath, format_)
+    if format_ == 'csv':
+        chunks = pd.read_csv(filepath, chunksize=chunk_rows)
+    elif format_ in COLUMNAR_FORMATS:
+        chunks = _iter_columnar(filepath, format_, chunk_rows)
+    else:
+        chunks = pd.read_hdf(filepath, hdf5_key, chunksize=chunk_rows, iterator=True)
+    for chunk in chunks:
+        yield schema.apply_schema(chunk.reset_index(drop=True), variables_dtype)
@@ -23,6 +23,44 @@ from cnwheat import parameters
 """
 
 
+def _maximum(x1, x2):
+    """Maximum of `x1` and `x2`, element-wise if one of them is an array.
+
+    The methods of the model are called with floats by the Python engine, and with arrays by the vectorized engine
+    (see :attr:`Simulation.DERIVATIVES_ENGINES <cnwheat.simulation.Simulation.DERIVATIVES_ENGINES>`).
+    The builtin functions are kept for the floats, as they are faster than NumPy on scalars.
+    """
+    if isinstance(x1, np.ndarray) or isinstance(x2, np.ndarray):
+        return np.maximum(x1, x2)
+    return max(x1, x2)
+
+
+def _minimum(x1, x2):
+    """Minimum of `x1` and `x2`, element-wise if one of them is an array (see :func:`_maximum`).
+    """
+    if isinstance(x1, np.ndarray) or isinstance(x2, np.ndarray):
+        return np.minimum(x1, x2)
+    return min(x1, x2)
+
+
+def _where(condition, x1, x2):
+    """`x1` where `condition` is True, and `x2` elsewhere, element-wise if `condition` is an array (see :func:`_maximum`).
+    Both `x1` and `x2` are computed, so they must be defined even where they are not selected.
+    """
+    if isinstance(condition, np.ndarray):
+        return np.where(condition, x1, x2)
+    return x1 if condition else x2
+
+
+def _ratio(numerator, denominator):
+    """`numerator` / `denominator` where `denominator` is positive, and 0 elsewhere, element-wise if `denominator` is an array (see :func:`_maximum`).
+    """
+    if isinstance(denominator, np.ndarray):
+        is_positive = denominator > 0
+        return np.where(is_positive, numerator, 0.) / np.where(is_positive, denominator, 1.)
+    return numerator / denominator if denominator > 0 else 0.
+
+
 class EcophysiologicalConstants:
     """
     Ecophysiological constants.
@@ -335,15 +373,13 @@ class Endosperm(Organ):
         :return: Correction to apply to endosperm remobilisation (dimensionless)
         :rtype: float
         """
-        return self.modified_Arrhenius_equation(Tair) / Grains.PARAMETERS.Arrhenius_ref
+        return self.modified_Arrhenius_equation(Tair) / self.PARAMETERS.Arrhenius_ref
 
-    @staticmethod
-    def calculate_moistening():
-        return Endosperm.PARAMETERS.MOISTENING_RATE * parameters.SECOND_TO_HOUR_RATE_CONVERSION
+    def calculate_moistening(self):
+        return self.PARAMETERS.MOISTENING_RATE * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
     # FLUXES
-    @staticmethod
-    def calculate_D_starch(starch, T_effect_Vmax):
+    def calculate_D_starch(self, starch, T_effect_Vmax):
         """Rate of starch degradation from seed endosperm (mol` C starch h-1).
         First order kinetic.
 
@@ -353,11 +389,10 @@ class Endosperm(Organ):
         :return: Starch degradation (mol` C h-1)
         :rtype: float
         """
-        return max(0., min(starch, Endosperm.PARAMETERS.K_STARCH * (Endosperm.PARAMETERS.STARCH_MAX - starch) * (starch - Endosperm.PARAMETERS.STARCH_MIN) * \
+        return max(0., min(starch, self.PARAMETERS.K_STARCH * (self.PARAMETERS.STARCH_MAX - starch) * (starch - self.PARAMETERS.STARCH_MIN) * \
             parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax))
 
-    @staticmethod
-    def calculate_D_proteins(proteins, T_effect_Vmax):
+    def calculate_D_proteins(self, proteins, T_effect_Vmax):
         """Protein degradation in seed endosperm.
 
         :param float proteins: Protein amount in endosperm (mol` N)
@@ -366,7 +401,7 @@ class Endosperm(Organ):
         :return: Proteins degradation (mol` N h-1)
         :rtype: float
         """
-        return max(0., min(proteins, Endosperm.PARAMETERS.K_PROTEINS * (Endosperm.PARAMETERS.PROTEINS_MAX - proteins) * (proteins - Endosperm.PARAMETERS.PROTEINS_MIN) * \
+        return max(0., min(proteins, self.PARAMETERS.K_PROTEINS * (self.PARAMETERS.PROTEINS_MAX - proteins) * (proteins - self.PARAMETERS.PROTEINS_MIN) * \
             parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax))
 
     # COMPARTMENTS
@@ -480,7 +515,7 @@ class HiddenZone(Organ):
         """
         conc_sucrose_phloem = (sucrose_phloem / mstruct_axis)
         conc_sucrose_HZ = (sucrose / self.mstruct)
-        conductance = HiddenZone.PARAMETERS.SIGMA * HiddenZone.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity  # TODO: choix valeurs paramq par rapport flux phloem-hgz
+        conductance = self.PARAMETERS.SIGMA * self.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity  # TODO: choix valeurs paramq par rapport flux phloem-hgz
 
         return (conc_sucrose_phloem - conc_sucrose_HZ) * conductance * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
@@ -498,7 +533,7 @@ class HiddenZone(Organ):
         """
         conc_amino_acids_phloem = (amino_acids_phloem / mstruct_axis)
         conc_amino_acids_HZ = (amino_acids / self.mstruct)
-        conductance = HiddenZone.PARAMETERS.SIGMA * HiddenZone.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
+        conductance = self.PARAMETERS.SIGMA * self.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
         return (conc_amino_acids_phloem - conc_amino_acids_HZ) * conductance * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
     def calculate_S_proteins(self, amino_acids, T_effect_Vmax):
@@ -511,8 +546,8 @@ class HiddenZone(Organ):
         :return: Rate of Protein synthesis (mol` N g-1 mstruct h-1)
         :rtype: float
         """
-        vmax = HiddenZone.PARAMETERS.VMAX_SPROTEINS_EMZ * (1 - self.ratio_DZ) + HiddenZone.PARAMETERS.VMAX_SPROTEINS_DZ * self.ratio_DZ  #: 'Mean' Vmax for the whole hidden zone
-        return ((vmax * max(0, (amino_acids / self.mstruct))) / (HiddenZone.PARAMETERS.K_SPROTEINS + max(0, (amino_acids / self.mstruct)))) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        vmax = self.PARAMETERS.VMAX_SPROTEINS_EMZ * (1 - self.ratio_DZ) + self.PARAMETERS.VMAX_SPROTEINS_DZ * self.ratio_DZ  #: 'Mean' Vmax for the whole hidden zone
+        return ((vmax * _maximum(0, (amino_acids / self.mstruct))) / (self.PARAMETERS.K_SPROTEINS + _maximum(0, (amino_acids / self.mstruct)))) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
 
     def calculate_D_Proteins(self, proteins, T_effect_Vmax):
         """Rate of protein degradation (mol` N proteins h-1 g-1 MS).
@@ -524,7 +559,7 @@ class HiddenZone(Organ):
         :return: Rate of Protein degradation (mol` N g-1 mstruct h-1)
         :rtype: float
         """
-        return max(0, (HiddenZone.PARAMETERS.delta_Dproteins * (proteins / self.mstruct))) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        return _maximum(0, (self.PARAMETERS.delta_Dproteins * (proteins / self.mstruct))) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
 
     def calculate_Regul_S_Fructan(self, Unloading_Sucrose):
         """Regulating function for fructan maximal rate of synthesis.
@@ -536,14 +571,12 @@ class HiddenZone(Organ):
         :rtype: float
         """
 
-        if Unloading_Sucrose >= 0:
-            Vmax_Sfructans = HiddenZone.PARAMETERS.VMAX_SFRUCTAN_POT
-        else:  # Regulation by sucrose unloading if hidden zone is a source for C
-            rate_Loading_Sucrose_massic = -Unloading_Sucrose / self.mstruct / parameters.SECOND_TO_HOUR_RATE_CONVERSION
-            Vmax_Sfructans = HiddenZone.PARAMETERS.VMAX_SFRUCTAN_POT * (HiddenZone.PARAMETERS.K_REGUL_SFRUCTAN ** HiddenZone.PARAMETERS.N_REGUL_SFRUCTAN /
-                                                                        (max(0., rate_Loading_Sucrose_massic ** HiddenZone.PARAMETERS.N_REGUL_SFRUCTAN) +
-                                                                         HiddenZone.PARAMETERS.K_REGUL_SFRUCTAN ** HiddenZone.PARAMETERS.N_REGUL_SFRUCTAN))
-        return Vmax_Sfructans
+        # Regulation by sucrose unloading if hidden zone is a source for C ; the loading rate is null otherwise
+        rate_Loading_Sucrose_massic = _maximum(0., -Unloading_Sucrose) / self.mstruct / parameters.SECOND_TO_HOUR_RATE_CONVERSION
+        Vmax_Sfructans_regulated = self.PARAMETERS.VMAX_SFRUCTAN_POT * (self.PARAMETERS.K_REGUL_SFRUCTAN ** self.PARAMETERS.N_REGUL_SFRUCTAN /
+                                                                        (_maximum(0., rate_Loading_Sucrose_massic ** self.PARAMETERS.N_REGUL_SFRUCTAN) +
+                                                                         self.PARAMETERS.K_REGUL_SFRUCTAN ** self.PARAMETERS.N_REGUL_SFRUCTAN))
+        return _where(Unloading_Sucrose >= 0, self.PARAMETERS.VMAX_SFRUCTAN_POT, Vmax_Sfructans_regulated)
 
     def calculate_S_Fructan(self, sucrose, Regul_S_Fructan, T_effect_Vmax):
         """Rate of fructan synthesis (mol` C fructan g-1 mstruct h-1).
@@ -556,8 +589,8 @@ class HiddenZone(Organ):
         :return: Rate of Fructan synthesis (mol` C g-1 mstruct)
         :rtype: float
         """
-        return ((max(0., sucrose) / self.mstruct) * HiddenZone.PARAMETERS.VMAX_SFRUCTAN_RELATIVE * Regul_S_Fructan) / \
-            ((max(0., sucrose) / self.mstruct) + HiddenZone.PARAMETERS.K_SFRUCTAN) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        return ((_maximum(0., sucrose) / self.mstruct) * self.PARAMETERS.VMAX_SFRUCTAN_RELATIVE * Regul_S_Fructan) / \
+            ((_maximum(0., sucrose) / self.mstruct) + self.PARAMETERS.K_SFRUCTAN) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
 
     def calculate_D_Fructan(self, sucrose, fructan, T_effect_Vmax):
         """Rate of fructan degradation (mol` C fructan g-1 mstruct h-1).
@@ -570,9 +603,9 @@ class HiddenZone(Organ):
         :return: Rate of Fructan degradation (mol` C g-1 mstruct)
         :rtype: float
         """
-        d_potential = ((HiddenZone.PARAMETERS.K_DFRUCTAN * HiddenZone.PARAMETERS.VMAX_DFRUCTAN * T_effect_Vmax) /
-                       ((max(0., sucrose) / self.mstruct) + HiddenZone.PARAMETERS.K_DFRUCTAN)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION
-        d_actual = min(d_potential, max(0., fructan))
+        d_potential = ((self.PARAMETERS.K_DFRUCTAN * self.PARAMETERS.VMAX_DFRUCTAN * T_effect_Vmax) /
+                       ((_maximum(0., sucrose) / self.mstruct) + self.PARAMETERS.K_DFRUCTAN)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION
+        d_actual = _minimum(d_potential, _maximum(0., fructan))
         return d_actual
 
     # COMPARTMENTS
@@ -661,7 +694,7 @@ class Phloem(Organ):
             elif isinstance(contributor, Grains):
                 sucrose_derivative -= contributor.S_grain_structure + (contributor.S_grain_starch * contributor.structural_dry_mass)
             elif isinstance(contributor, Roots):
-                sucrose_derivative -= contributor.Unloading_Sucrose * contributor.mstruct * contributor.__class__.PARAMETERS.ALPHA
+                sucrose_derivative -= contributor.Unloading_Sucrose * contributor.mstruct * contributor.PARAMETERS.ALPHA
             elif isinstance(contributor, HiddenZone):
                 sucrose_derivative -= contributor.Unloading_Sucrose * contributor.nb_replications
             elif isinstance(contributor, Endosperm):
@@ -685,7 +718,7 @@ class Phloem(Organ):
             elif isinstance(contributor, Grains):
                 amino_acids_derivative -= contributor.S_Proteins
             elif isinstance(contributor, Roots):
-                amino_acids_derivative -= contributor.Unloading_Amino_Acids * contributor.mstruct * contributor.__class__.PARAMETERS.ALPHA
+                amino_acids_derivative -= contributor.Unloading_Amino_Acids * contributor.mstruct * contributor.PARAMETERS.ALPHA
             elif isinstance(contributor, HiddenZone):
                 amino_acids_derivative -= contributor.Unloading_Amino_Acids * contributor.nb_replications
             elif isinstance(contributor, Endosperm):
@@ -732,6 +765,11 @@ class Grains(Organ):
         """
         self.structural_dry_mass = self.calculate_structural_dry_mass(self.structure)
 
+    def calculate_aggregated_variables(self):
+        """Calculate the integrative variables of the grains.
+        """
+        self.structural_dry_mass = self.calculate_structural_dry_mass(self.structure)
+
     # VARIABLES
     @staticmethod
     def calculate_structural_dry_mass(structure):
@@ -785,11 +823,11 @@ class Grains(Organ):
         :return: Correction to apply to RGR Structure of the grains (dimensionless)
         :rtype: float
         """
-        return self.modified_Arrhenius_equation(SAM_temperature) / Grains.PARAMETERS.Arrhenius_ref
+        return self.modified_Arrhenius_equation(SAM_temperature) / self.PARAMETERS.Arrhenius_ref
 
     # FLUXES
 
-    def calculate_S_grain_structure(self, prec_structure, sucrose_phloem, mstruct_axis, T_effect_growth):
+    def calculate_S_grain_structure(self, prec_structure, sucrose_phloem, mstruct_axis, T_effect_growth, ALPHA_axis):
         """Rate of grain structure synthesis (mol` C structure h-1).
         Exponential function, RGR regulated by sucrose concentration in the phloem.
 
@@ -797,33 +835,34 @@ class Grains(Organ):
         :param float sucrose_phloem: Sucrose amount in phloem (mol` C)
         :param float mstruct_axis: The structural dry mass of the axis (g)
         :param float T_effect_growth: Effect of the temperature on the growth rate at 20C (AU)
+        :param float ALPHA_axis: Proportion of the structural mass of the axis containing the substrates (dimensionless)
 
         :return: Rate of Synthesis of grain structure (mol` C h-1)
         :rtype: float
         """
-        if self.age_from_flowering <= Grains.PARAMETERS.FILLING_INIT:  #: Grain enlargment
-            RGR_Structure = ((max(0., sucrose_phloem) / (mstruct_axis * Axis.PARAMETERS.ALPHA)) * Grains.PARAMETERS.VMAX_RGR) / \
-                            ((max(0., sucrose_phloem) / (mstruct_axis * Axis.PARAMETERS.ALPHA)) + Grains.PARAMETERS.K_RGR) * T_effect_growth
+        if self.age_from_flowering <= self.PARAMETERS.FILLING_INIT:  #: Grain enlargment
+            RGR_Structure = ((max(0., sucrose_phloem) / (mstruct_axis * ALPHA_axis)) * self.PARAMETERS.VMAX_RGR) / \
+                            ((max(0., sucrose_phloem) / (mstruct_axis * ALPHA_axis)) + self.PARAMETERS.K_RGR) * T_effect_growth
             S_grain_structure = prec_structure * RGR_Structure * parameters.SECOND_TO_HOUR_RATE_CONVERSION
         else:  #: Grain filling
             S_grain_structure = 0
         return S_grain_structure
 
-    def calculate_S_grain_starch(self, sucrose_phloem, mstruct_axis, T_effect_Vmax):
+    def calculate_S_grain_starch(self, sucrose_phloem, mstruct_axis, T_effect_Vmax, ALPHA_axis):
         """Rate of starch synthesis in grains (i.e. grain filling) (mol` C starch g-1 mstruct h-1).
         Michaelis-Menten function of sucrose concentration in the phloem.
 
         :param float sucrose_phloem: Sucrose amount in phloem (mol` C)
         :param float mstruct_axis: The structural dry mass of the axis (g)
         :param float T_effect_Vmax: Correction to apply to enzyme activity
-
+        :param float ALPHA_axis: Proportion of the structural mass of the axis containing the substrates (dimensionless)
 
         :return: Rate of Synthesis of grain starch (mol` C g-1 mstruct h-1)
         :rtype: float
         """
-        if Grains.PARAMETERS.FILLING_INIT <= self.age_from_flowering < Grains.PARAMETERS.FILLING_END:  #: Between grain enlargment and grain maturity
-            S_grain_starch = (((max(0., sucrose_phloem) / (mstruct_axis * Axis.PARAMETERS.ALPHA)) * Grains.PARAMETERS.VMAX_STARCH) /
-                              ((max(0., sucrose_phloem) / (mstruct_axis * Axis.PARAMETERS.ALPHA)) + Grains.PARAMETERS.K_STARCH)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        if self.PARAMETERS.FILLING_INIT <= self.age_from_flowering < self.PARAMETERS.FILLING_END:  #: Between grain enlargment and grain maturity
+            S_grain_starch = (((max(0., sucrose_phloem) / (mstruct_axis * ALPHA_axis)) * self.PARAMETERS.VMAX_STARCH) /
+                              ((max(0., sucrose_phloem) / (mstruct_axis * ALPHA_axis)) + self.PARAMETERS.K_STARCH)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
         else:
             S_grain_starch = 0
         return S_grain_starch
@@ -967,7 +1006,7 @@ class Roots(Organ):
 
     # FLUXES
 
-    def calculate_Unloading_Sucrose(self, sucrose_roots, sucrose_phloem, mstruct_axis, T_effect_conductivity, nb_leaves):
+    def calculate_Unloading_Sucrose(self, sucrose_roots, sucrose_phloem, mstruct_axis, T_effect_conductivity, nb_leaves, ALPHA_axis):
         """Rate of sucrose Unloading from phloem to roots (mol` C sucrose unloaded g-1 mstruct h-1).
 
 
@@ -975,33 +1014,36 @@ class Roots(Organ):
         :param float sucrose_phloem: Sucrose concentration in phloem (mol` C g-1 mstruct)
         :param float mstruct_axis: The structural dry mass of the axis (g)
         :param float T_effect_conductivity: Effect of the temperature on the conductivity rate at 20C (AU)
+        :param int nb_leaves: The number of leaves of the axis
+        :param float ALPHA_axis: Proportion of the structural mass of the axis containing the substrates (dimensionless)
 
         :return: Rate of Sucrose Unloading (mol` C g-1 mstruct h-1)
         :rtype: float
         """
-        conc_sucrose_roots = sucrose_roots / (self.mstruct * self.__class__.PARAMETERS.ALPHA)
-        conc_sucrose_phloem = sucrose_phloem / (mstruct_axis * parameters.AXIS_PARAMETERS.ALPHA)
+        conc_sucrose_roots = sucrose_roots / (self.mstruct * self.PARAMETERS.ALPHA)
+        conc_sucrose_phloem = sucrose_phloem / (mstruct_axis * ALPHA_axis)
         #: Driving compartment (mol` C g-1 mstruct)
-        driving_sucrose_compartment = max(conc_sucrose_roots, conc_sucrose_phloem)
+        driving_sucrose_compartment = _maximum(conc_sucrose_roots, conc_sucrose_phloem)
         #: Gradient of sucrose between the roots and the phloem (mol` C g-1 mstruct)
         diff_sucrose = conc_sucrose_phloem - conc_sucrose_roots
 
         #: Conductance depending on mstruct (g2 mol`-1 s-1)
-        SIGMA_SUCROSE = max(Roots.PARAMETERS.SIGMA_SUCROSE_MIN,
-                            ((Roots.PARAMETERS.SIGMA_SUCROSE_MAX * Roots.PARAMETERS.SIGMA_SUCROSE_K ** Roots.PARAMETERS.SIGMA_SUCROSE_N) /
-                             (max(0, nb_leaves ** Roots.PARAMETERS.SIGMA_SUCROSE_N) + Roots.PARAMETERS.SIGMA_SUCROSE_K ** Roots.PARAMETERS.SIGMA_SUCROSE_N)))
-        conductance = SIGMA_SUCROSE * Roots.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
+        SIGMA_SUCROSE = _maximum(self.PARAMETERS.SIGMA_SUCROSE_MIN,
+                            ((self.PARAMETERS.SIGMA_SUCROSE_MAX * self.PARAMETERS.SIGMA_SUCROSE_K ** self.PARAMETERS.SIGMA_SUCROSE_N) /
+                             (_maximum(0, nb_leaves ** self.PARAMETERS.SIGMA_SUCROSE_N) + self.PARAMETERS.SIGMA_SUCROSE_K ** self.PARAMETERS.SIGMA_SUCROSE_N)))
+        conductance = SIGMA_SUCROSE * self.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
 
         return driving_sucrose_compartment * diff_sucrose * conductance * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
     #@staticmethod
-    def calculate_Unloading_Amino_Acids(self, amino_acids_roots, amino_acids_phloem, sucrose_phloem,Unloading_Sucrose,  mstruct_axis, T_effect_conductivity, nb_leaves):
+    def calculate_Unloading_Amino_Acids(self, amino_acids_roots, amino_acids_phloem, sucrose_phloem,Unloading_Sucrose,  mstruct_axis, T_effect_conductivity, nb_leaves, ALPHA_axis):
         """Unloading of amino_acids from phloem to roots.
         Amino acids are assumed to be co-transported along with the unloaded sucrose from phloem (using the ratio amino acids:sucrose of phloem).
 
         :param float Unloading_Sucrose: Sucrose Unloading (mol` C g-1 mstruct)
         :param float sucrose_phloem: Sucrose concentration in phloem (mol` C g-1 mstruct)
         :param float amino_acids_phloem: Amino acids concentration in phloem (mol` N g-1 mstruct)
+        :param float ALPHA_axis: Proportion of the structural mass of the axis containing the substrates (dimensionless)
 
         :return: Amino acids Unloading (mol` N g-1 mstruct)
         :rtype: float
@@ -1013,14 +1055,14 @@ class Roots(Organ):
         #     Unloading_Amino_Acids = Unloading_Sucrose * (amino_acids_phloem / sucrose_phloem)
         # return Unloading_Amino_Acids
 
-        conc_amino_acids_roots = amino_acids_roots / (self.mstruct * self.__class__.PARAMETERS.ALPHA)
-        conc_amino_acids_phloem = amino_acids_phloem / (mstruct_axis * parameters.AXIS_PARAMETERS.ALPHA)
+        conc_amino_acids_roots = amino_acids_roots / (self.mstruct * self.PARAMETERS.ALPHA)
+        conc_amino_acids_phloem = amino_acids_phloem / (mstruct_axis * ALPHA_axis)
         #: Driving compartment (mol` N g-1 mstruct)
-        driving_amino_acids_compartment = max(conc_amino_acids_roots, conc_amino_acids_phloem)
+        driving_amino_acids_compartment = _maximum(conc_amino_acids_roots, conc_amino_acids_phloem)
         #: Gradient of sucrose between the roots and the phloem (mol` C g-1 mstruct)
         diff_amino_acids = conc_amino_acids_phloem - conc_amino_acids_roots
         #: Conductance depending on mstruct (g2 mol`-1 s-1)
-        conductance = Roots.PARAMETERS.SIGMA_AMINO_ACIDS * Roots.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
+        conductance = self.PARAMETERS.SIGMA_AMINO_ACIDS * self.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
 
         return driving_amino_acids_compartment * diff_amino_acids * conductance * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
@@ -1042,14 +1084,14 @@ class Roots(Organ):
         conc_nitrates_roots = nitrates_roots / self.mstruct
 
         #: High Affinity Transport System (HATS)
-        VMAX_HATS_MAX = max(0.,
-                            Roots.PARAMETERS.A_VMAX_HATS * conc_nitrates_roots + Roots.PARAMETERS.B_VMAX_HATS)  #: Maximal rate of nitrates influx at saturating soil N concentration;HATS (mol` N nitrates g-1 mstruct s-1)
-        K_HATS = max(0.,
-                     Roots.PARAMETERS.A_K_HATS * conc_nitrates_roots + Roots.PARAMETERS.B_K_HATS)  #: Affinity coefficient of nitrates influx at saturating soil N concentration;HATS (mol` m-3)
+        VMAX_HATS_MAX = _maximum(0.,
+                            self.PARAMETERS.A_VMAX_HATS * conc_nitrates_roots + self.PARAMETERS.B_VMAX_HATS)  #: Maximal rate of nitrates influx at saturating soil N concentration;HATS (mol` N nitrates g-1 mstruct s-1)
+        K_HATS = _maximum(0.,
+                     self.PARAMETERS.A_K_HATS * conc_nitrates_roots + self.PARAMETERS.B_K_HATS)  #: Affinity coefficient of nitrates influx at saturating soil N concentration;HATS (mol` m-3)
         HATS = (VMAX_HATS_MAX * Conc_Nitrates_Soil) / (K_HATS + Conc_Nitrates_Soil)  #: Rate of nitrate influx by HATS (mol` N nitrates uptake s-1 g-1 mstruct)
 
         #: Low Affinity Transport System (LATS)
-        K_LATS = max(0., Roots.PARAMETERS.A_LATS * conc_nitrates_roots + Roots.PARAMETERS.B_LATS)  #: Rate constant for nitrates influx at low soil N concentration; LATS (m3 g-1 mstruct s-1)
+        K_LATS = _maximum(0., self.PARAMETERS.A_LATS * conc_nitrates_roots + self.PARAMETERS.B_LATS)  #: Rate constant for nitrates influx at low soil N concentration; LATS (m3 g-1 mstruct s-1)
         LATS = (K_LATS * Conc_Nitrates_Soil)  #: Rate of nitrate influx by LATS (mol` N nitrates g-1 mstruct)
 
         #: Nitrate influx (mol` N)
@@ -1057,11 +1099,9 @@ class Roots(Organ):
         nitrate_influx = HATS_LATS * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax * self.mstruct
 
         # Regulations
-        regul_C = (sucrose_roots / self.mstruct) * Roots.PARAMETERS.RELATIVE_VMAX_N_UPTAKE / ((sucrose_roots / self.mstruct) + Roots.PARAMETERS.K_C)  #: Nitrate uptake regulation by root C
-        if HATS_LATS < Roots.PARAMETERS.MIN_INFLUX_FOR_UPTAKE:
-            net_nitrate_uptake = 0
-        else:
-            net_nitrate_uptake = nitrate_influx * Roots.PARAMETERS.NET_INFLUX_UPTAKE_RATIO * regul_C  #: Net nitrate uptake (mol` N nitrates uptaked by roots)
+        regul_C = (sucrose_roots / self.mstruct) * self.PARAMETERS.RELATIVE_VMAX_N_UPTAKE / ((sucrose_roots / self.mstruct) + self.PARAMETERS.K_C)  #: Nitrate uptake regulation by root C
+        net_nitrate_uptake = _where(HATS_LATS < self.PARAMETERS.MIN_INFLUX_FOR_UPTAKE, 0.,
+                                    nitrate_influx * self.PARAMETERS.NET_INFLUX_UPTAKE_RATIO * regul_C)  #: Net nitrate uptake (mol` N nitrates uptaked by roots)
         return net_nitrate_uptake, nitrate_influx
 
     def calculate_S_amino_acids(self, nitrates, sucrose, T_effect_Vmax):
@@ -1076,8 +1116,8 @@ class Roots(Organ):
         :return: Amino acids synthesis (mol` N g-1 mstruct h-1)
         :rtype: float
         """
-        return T_effect_Vmax * Roots.PARAMETERS.VMAX_AMINO_ACIDS / ((1 + Roots.PARAMETERS.K_AMINO_ACIDS_NITRATES / (nitrates / (self.mstruct * Roots.PARAMETERS.ALPHA))) *
-                                                                    (1 + Roots.PARAMETERS.K_AMINO_ACIDS_SUCROSE / (sucrose / (self.mstruct * Roots.PARAMETERS.ALPHA)))
+        return T_effect_Vmax * self.PARAMETERS.VMAX_AMINO_ACIDS / ((1 + self.PARAMETERS.K_AMINO_ACIDS_NITRATES / (nitrates / (self.mstruct * self.PARAMETERS.ALPHA))) *
+                                                                    (1 + self.PARAMETERS.K_AMINO_ACIDS_SUCROSE / (sucrose / (self.mstruct * self.PARAMETERS.ALPHA)))
                                                                     ) * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
     def calculate_Export_Nitrates(self, nitrates, regul_transpiration):
@@ -1091,9 +1131,9 @@ class Roots(Organ):
         :rtype: float
         """
 
-        f_nitrates = (nitrates / (self.mstruct * Roots.PARAMETERS.ALPHA)) * Roots.PARAMETERS.K_NITRATE_EXPORT  #: mol` g-1 s-1
+        f_nitrates = (nitrates / (self.mstruct * self.PARAMETERS.ALPHA)) * self.PARAMETERS.K_NITRATE_EXPORT  #: mol` g-1 s-1
         Export_Nitrates = f_nitrates * self.mstruct * regul_transpiration * parameters.SECOND_TO_HOUR_RATE_CONVERSION  #: Nitrate export regulation by transpiration (mol` N)
-        return max(min(Export_Nitrates, nitrates), 0.)
+        return _maximum(_minimum(Export_Nitrates, nitrates), 0.)
 
     def calculate_Export_Amino_Acids(self, amino_acids, regul_transpiration):
         """Total export of amino acids from roots to shoot organs
@@ -1107,12 +1147,11 @@ class Roots(Organ):
         :Returns Type:
             :class:`float`
         """
-        f_amino_acids = (amino_acids / (self.mstruct * Roots.PARAMETERS.ALPHA)) * Roots.PARAMETERS.K_AMINO_ACIDS_EXPORT  #: mol` g-1 s-1
+        f_amino_acids = (amino_acids / (self.mstruct * self.PARAMETERS.ALPHA)) * self.PARAMETERS.K_AMINO_ACIDS_EXPORT  #: mol` g-1 s-1
         Export_Amino_Acids = f_amino_acids * self.mstruct * regul_transpiration * parameters.SECOND_TO_HOUR_RATE_CONVERSION  #: Amino acids export regulation by plant transpiration (mol` N)
-        return max(min(Export_Amino_Acids, amino_acids), 0.)
+        return _maximum(_minimum(Export_Amino_Acids, amino_acids), 0.)
 
-    @staticmethod
-    def calculate_exudation(Unloading_Sucrose, sucrose_roots, amino_acids_roots, amino_acids_phloem):
+    def calculate_exudation(self, Unloading_Sucrose, sucrose_roots, amino_acids_roots, amino_acids_phloem):
         """C sucrose and N amino acids lost by root exudation (mol` C or N g-1 mstruct).
             - C exudation is calculated as a fraction of C Unloading from phloem
             - N exudation is calculated from C exudation using the ratio amino acids:sucrose of the phloem
@@ -1125,14 +1164,10 @@ class Roots(Organ):
         :return: Rates of C exudated (mol` C g-1 mstruct h-1) and N_exudation (mol` N g-1 mstruct h-1)
         :rtype: (float, float)
         """
-        if sucrose_roots <= 0 or Unloading_Sucrose <= 0:
-            C_exudation = 0
-        else:
-            C_exudation = min(sucrose_roots, Unloading_Sucrose * Roots.PARAMETERS.C_EXUDATION)  #: C exudated (mol` g-1 mstruct)
-        if amino_acids_phloem <= 0 or amino_acids_roots <= 0 or sucrose_roots <= 0:
-            N_exudation = 0
-        else:
-            N_exudation = min((amino_acids_roots / sucrose_roots), Roots.PARAMETERS.N_EXUDATION_MAX) * C_exudation
+        C_exudation = _where((sucrose_roots <= 0) | (Unloading_Sucrose <= 0), 0.,
+                             _minimum(sucrose_roots, Unloading_Sucrose * self.PARAMETERS.C_EXUDATION))  #: C exudated (mol` g-1 mstruct)
+        N_exudation = _where((amino_acids_phloem <= 0) | (amino_acids_roots <= 0) | (sucrose_roots <= 0), 0.,
+                             _minimum(_ratio(amino_acids_roots, sucrose_roots), self.PARAMETERS.N_EXUDATION_MAX) * C_exudation)
         return C_exudation, N_exudation  # TODO: C_exudation and N_exudation should be renamed as the exudation of AA result in a loss of both C and N
 
     def calculate_S_cytokinins(self, sucrose_roots, nitrates_roots, T_effect_Vmax):
@@ -1147,14 +1182,14 @@ class Roots(Organ):
         :return: Rate of Cytokinin synthesis (AU g-1 mstruct h-1)
         :rtype: float
         """
-        conc_sucrose = max(0, (sucrose_roots / self.mstruct))
-        conc_Nitrates = max(0, (nitrates_roots / self.mstruct))
+        conc_sucrose = _maximum(0, (sucrose_roots / self.mstruct))
+        conc_Nitrates = _maximum(0, (nitrates_roots / self.mstruct))
 
-        f_sucrose = conc_sucrose ** Roots.PARAMETERS.N_SUC_CYTOKININS / (conc_sucrose ** Roots.PARAMETERS.N_SUC_CYTOKININS + Roots.PARAMETERS.K_SUCROSE_CYTOKININS ** Roots.PARAMETERS.N_SUC_CYTOKININS)
-        f_nitrates = conc_Nitrates ** Roots.PARAMETERS.N_NIT_CYTOKININS / (
-                conc_Nitrates ** Roots.PARAMETERS.N_NIT_CYTOKININS + Roots.PARAMETERS.K_NITRATES_CYTOKININS ** Roots.PARAMETERS.N_NIT_CYTOKININS)
+        f_sucrose = conc_sucrose ** self.PARAMETERS.N_SUC_CYTOKININS / (conc_sucrose ** self.PARAMETERS.N_SUC_CYTOKININS + self.PARAMETERS.K_SUCROSE_CYTOKININS ** self.PARAMETERS.N_SUC_CYTOKININS)
+        f_nitrates = conc_Nitrates ** self.PARAMETERS.N_NIT_CYTOKININS / (
+                conc_Nitrates ** self.PARAMETERS.N_NIT_CYTOKININS + self.PARAMETERS.K_NITRATES_CYTOKININS ** self.PARAMETERS.N_NIT_CYTOKININS)
 
-        S_cytokinins = Roots.PARAMETERS.VMAX_S_CYTOKININS * f_sucrose * f_nitrates * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        S_cytokinins = self.PARAMETERS.VMAX_S_CYTOKININS * f_sucrose * f_nitrates * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
         return S_cytokinins
 
     def calculate_Export_cytokinins(self, cytokinins, regul_transpiration):
@@ -1167,10 +1202,10 @@ class Roots(Organ):
         :return: Rate of Cytokinin export (AU h-1)
         :rtype: float
         """
-        f_cytokinins = (cytokinins / (self.mstruct * Roots.PARAMETERS.ALPHA)) * Roots.PARAMETERS.K_CYTOKININS_EXPORT  #: AU g-1 s-1
+        f_cytokinins = (cytokinins / (self.mstruct * self.PARAMETERS.ALPHA)) * self.PARAMETERS.K_CYTOKININS_EXPORT  #: AU g-1 s-1
         Export_cytokinins = f_cytokinins * self.mstruct * regul_transpiration * parameters.SECOND_TO_HOUR_RATE_CONVERSION  #: Cytokinin export regulation by plant transpiration (AU)
 
-        return max(min(Export_cytokinins, cytokinins), 0.)
+        return _maximum(_minimum(Export_cytokinins, cytokinins), 0.)
 
     # COMPARTMENTS
 
@@ -1227,10 +1262,9 @@ class Roots(Organ):
         :return: delta root cytokinins (AU cytokinins)
         :rtype: float
         """
-        if not empty_endosperm:
-            return (Roots.PARAMETERS.ROOT_INIT_CONC_CYTOKININS * self.mstruct) - cytokinins
-        else:
-             return S_cytokinins * self.mstruct - Export_cytokinins
+        return _where(empty_endosperm,
+                      S_cytokinins * self.mstruct - Export_cytokinins,
+                      (self.PARAMETERS.ROOT_INIT_CONC_CYTOKININS * self.mstruct) - cytokinins)
 
 
 class PhotosyntheticOrgan(Organ):
@@ -1444,15 +1478,12 @@ class PhotosyntheticOrganElement(object):
         :return: Maximal rate of fructan synthesis (mol` C g-1 mstruct h-1)
         :rtype: float
         """
-        if Loading_Sucrose <= 0:
-            Vmax_Sfructans = self.__class__.PARAMETERS.VMAX_SFRUCTAN_POT
-        else:  # Regulation by sucrose loading
-            rate_Loading_Sucrose_massic = Loading_Sucrose / self.mstruct / parameters.SECOND_TO_HOUR_RATE_CONVERSION
-            Vmax_Sfructans = ((self.__class__.PARAMETERS.VMAX_SFRUCTAN_POT * self.__class__.PARAMETERS.K_REGUL_SFRUCTAN ** self.__class__.PARAMETERS.N_REGUL_SFRUCTAN) /
-                              (max(0, rate_Loading_Sucrose_massic ** self.__class__.PARAMETERS.N_REGUL_SFRUCTAN) +
-                               self.__class__.PARAMETERS.K_REGUL_SFRUCTAN ** self.__class__.PARAMETERS.N_REGUL_SFRUCTAN))
-        return Vmax_Sfructans
-
+        # Regulation by sucrose loading ; the loading rate is null if the element does not load sucrose
+        rate_Loading_Sucrose_massic = _maximum(0., Loading_Sucrose) / self.mstruct / parameters.SECOND_TO_HOUR_RATE_CONVERSION
+        Vmax_Sfructans_regulated = ((self.PARAMETERS.VMAX_SFRUCTAN_POT * self.PARAMETERS.K_REGUL_SFRUCTAN ** self.PARAMETERS.N_REGUL_SFRUCTAN) /
+                                    (_maximum(0, rate_Loading_Sucrose_massic ** self.PARAMETERS.N_REGUL_SFRUCTAN) +
+                                     self.PARAMETERS.K_REGUL_SFRUCTAN ** self.PARAMETERS.N_REGUL_SFRUCTAN))
+        return _where(Loading_Sucrose <= 0, self.PARAMETERS.VMAX_SFRUCTAN_POT, Vmax_Sfructans_regulated)
     @staticmethod
     def calculate_Total_Organic_Nitrogen(amino_acids, proteins, Nstruct):
         """Total amount of organic N (amino acids + proteins + Nstruct).
@@ -1479,11 +1510,9 @@ class PhotosyntheticOrganElement(object):
         :return: Rate of Starch synthesis (mol` C g-1 mstruct h-1)
         :rtype: float
         """
-        if triosesP <= 0:
-            S_Starch = 0
-        else:
-            S_Starch = (((triosesP / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) * self.__class__.PARAMETERS.VMAX_STARCH) /
-                        ((triosesP / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) + self.__class__.PARAMETERS.K_STARCH)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        conc_triosesP = _maximum(0., triosesP) / (self.mstruct * self.PARAMETERS.ALPHA)  #: Null if there is no triose phosphates
+        S_Starch = ((conc_triosesP * self.PARAMETERS.VMAX_STARCH) /
+                    (conc_triosesP + self.PARAMETERS.K_STARCH)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
         return S_Starch
 
     def calculate_D_Starch(self, starch, T_effect_Vmax):
@@ -1496,7 +1525,7 @@ class PhotosyntheticOrganElement(object):
         :return: Starch degradation (mol` C g-1 mstruct h-1)
         :rtype: float
         """
-        return max(0, self.__class__.PARAMETERS.DELTA_DSTARCH * (starch / (self.mstruct * self.__class__.PARAMETERS.ALPHA))) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        return _maximum(0, self.PARAMETERS.DELTA_DSTARCH * (starch / (self.mstruct * self.PARAMETERS.ALPHA))) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
 
     def calculate_S_Sucrose(self, triosesP, T_effect_Vmax):
         """Rate of sucrose synthesis (mol` C sucrose g-1 mstruct h-1).
@@ -1508,14 +1537,12 @@ class PhotosyntheticOrganElement(object):
         :return: Rate of Sucrose synthesis (mol` C g-1 mstruct h-1)
         :rtype: float
         """
-        if triosesP <= 0:
-            S_Sucrose = 0
-        else:
-            S_Sucrose = (((triosesP / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) * self.__class__.PARAMETERS.VMAX_SUCROSE) /
-                         ((triosesP / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) + self.__class__.PARAMETERS.K_SUCROSE)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        conc_triosesP = _maximum(0., triosesP) / (self.mstruct * self.PARAMETERS.ALPHA)  #: Null if there is no triose phosphates
+        S_Sucrose = ((conc_triosesP * self.PARAMETERS.VMAX_SUCROSE) /
+                     (conc_triosesP + self.PARAMETERS.K_SUCROSE)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
         return S_Sucrose
 
-    def calculate_Loading_Sucrose(self, sucrose, sucrose_phloem, mstruct_axis, T_effect_conductivity):
+    def calculate_Loading_Sucrose(self, sucrose, sucrose_phloem, mstruct_axis, T_effect_conductivity, ALPHA_axis):
         """Rate of sucrose loading to phloem (mol` C sucrose h-1).
         Transport-resistance model.
 
@@ -1523,22 +1550,23 @@ class PhotosyntheticOrganElement(object):
         :param float sucrose_phloem: Amount of sucrose in the phloem (mol` C)
         :param float mstruct_axis: Structural dry mass of the axis (g)
         :param float T_effect_conductivity: Effect of the temperature on the conductivity rate at 20C (AU)
+        :param float ALPHA_axis: Proportion of the structural mass of the axis containing the substrates (dimensionless)
 
         :return: Rate of Sucrose loading (mol` C h-1)
         :rtype: float
         """
-        conc_sucrose_element = sucrose / (self.mstruct * self.__class__.PARAMETERS.ALPHA)
-        conc_sucrose_phloem = sucrose_phloem / (mstruct_axis * parameters.AXIS_PARAMETERS.ALPHA)
+        conc_sucrose_element = sucrose / (self.mstruct * self.PARAMETERS.ALPHA)
+        conc_sucrose_phloem = sucrose_phloem / (mstruct_axis * ALPHA_axis)
         #: Driving compartment (mol` C g-1 mstruct)
-        driving_sucrose_compartment = max(conc_sucrose_element, conc_sucrose_phloem)
+        driving_sucrose_compartment = _maximum(conc_sucrose_element, conc_sucrose_phloem)
         #: Gradient of sucrose between the element and the phloem (mol` C g-1 mstruct)
         diff_sucrose = conc_sucrose_element - conc_sucrose_phloem
         #: Conductance depending on mstruct (g2 mol`-1 s-1)
-        conductance = self.__class__.PARAMETERS.SIGMA_SUCROSE * self.__class__.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
+        conductance = self.PARAMETERS.SIGMA_SUCROSE * self.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
 
         return driving_sucrose_compartment * diff_sucrose * conductance * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
-    def calculate_export_sucrose(self, sucrose, sucrose_hiddenzone, mstruct_hiddenzone, T_effect_conductivity):
+    def calculate_export_sucrose(self, sucrose, sucrose_hiddenzone, mstruct_hiddenzone, T_effect_conductivity, SIGMA_hiddenzone):
         """Rate of sucrose exportation to hidden zone (mol` C sucrose h-1).
         Transport-resistance model.
 
@@ -1546,17 +1574,18 @@ class PhotosyntheticOrganElement(object):
         :param float sucrose_hiddenzone: Sucrose amount in the hidden zone (mol` C)
         :param float mstruct_hiddenzone: mstruct of the hidden zone (g)
         :param float T_effect_conductivity: Effect of the temperature on the conductivity rate at 20C (AU)
+        :param float SIGMA_hiddenzone: Coefficient of surface diffusion of the hidden zone (g m-2 s-1)
 
 
         :return: Rate of Sucrose export (mol` C h-1)
         :rtype: float
         """
-        conc_sucrose_element = sucrose / (self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        conc_sucrose_element = sucrose / (self.mstruct * self.PARAMETERS.ALPHA)
         conc_sucrose_hiddenzone = sucrose_hiddenzone / mstruct_hiddenzone
         #: Gradient of sucrose between the element and the hidden zone (mol` C g-1 mstruct)
         diff_sucrose = conc_sucrose_element - conc_sucrose_hiddenzone
         #: Conductance depending on mstruct
-        conductance = HiddenZone.PARAMETERS.SIGMA * self.__class__.PARAMETERS.BETA * mstruct_hiddenzone ** (2 / 3) * T_effect_conductivity
+        conductance = SIGMA_hiddenzone * self.PARAMETERS.BETA * mstruct_hiddenzone ** (2 / 3) * T_effect_conductivity
 
         return diff_sucrose * conductance * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
@@ -1571,8 +1600,8 @@ class PhotosyntheticOrganElement(object):
         :return: Rate of Fructan synthesis (mol` C g-1 mstruct h-1)
         :rtype: float
         """
-        return ((max(0., sucrose) / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) * Regul_S_Fructan) / \
-            ((max(0., sucrose) / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) + self.__class__.PARAMETERS.K_SFRUCTAN) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        return ((_maximum(0., sucrose) / (self.mstruct * self.PARAMETERS.ALPHA)) * Regul_S_Fructan) / \
+            ((_maximum(0., sucrose) / (self.mstruct * self.PARAMETERS.ALPHA)) + self.PARAMETERS.K_SFRUCTAN) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
 
     def calculate_D_Fructan(self, sucrose, fructan, T_effect_Vmax):
         """Rate of fructan degradation (mol` C fructan g-1 mstruct h-1).
@@ -1585,9 +1614,9 @@ class PhotosyntheticOrganElement(object):
         :return: Rate of Fructan degradation (mol` C g-1 mstruct h-1)
         :rtype: float
         """
-        d_potential = ((self.__class__.PARAMETERS.K_DFRUCTAN * self.__class__.PARAMETERS.VMAX_DFRUCTAN) /
-                       ((max(0., sucrose) / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) + self.__class__.PARAMETERS.K_DFRUCTAN)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
-        d_actual = min(d_potential, max(0., fructan))
+        d_potential = ((self.PARAMETERS.K_DFRUCTAN * self.PARAMETERS.VMAX_DFRUCTAN) /
+                       ((_maximum(0., sucrose) / (self.mstruct * self.PARAMETERS.ALPHA)) + self.PARAMETERS.K_DFRUCTAN)) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        d_actual = _minimum(d_potential, _maximum(0., fructan))
         return d_actual
 
     @staticmethod
@@ -1602,10 +1631,8 @@ class PhotosyntheticOrganElement(object):
         :return: Total nitrates import (mol` N nitrates)
         :rtype: float
         """
-        if Total_Transpiration > 0:
-            Nitrates_import = Export_Nitrates * (element_transpiration / Total_Transpiration)  #: Proportion of exported nitrates from roots to element
-        else:  # Avoids further float division by zero error
-            Nitrates_import = 0
+        # The proportion is null if there is no transpiration, which avoids a division by zero
+        Nitrates_import = Export_Nitrates * _ratio(element_transpiration, Total_Transpiration)  #: Proportion of exported nitrates from roots to element
         return Nitrates_import
 
     @staticmethod
@@ -1620,10 +1647,7 @@ class PhotosyntheticOrganElement(object):
         :return: Total amino acids import (mol` N amino acids)
         :rtype: float
         """
-        if Total_Transpiration > 0:
-            Amino_Acids_import = roots_exported_amino_acids * (element_transpiration / Total_Transpiration)  #: Proportion of exported amino acids from roots to organ
-        else:
-            Amino_Acids_import = 0
+        Amino_Acids_import = roots_exported_amino_acids * _ratio(element_transpiration, Total_Transpiration)  #: Proportion of exported amino acids from roots to organ
         return Amino_Acids_import
 
     def calculate_S_amino_acids(self, nitrates, triosesP, T_effect_Vmax):
@@ -1637,13 +1661,11 @@ class PhotosyntheticOrganElement(object):
         :return: Rate of Amino acids synthesis (mol` N h-1 g-1 mstruct)
         :rtype: float
         """
-        if nitrates <= 0 or triosesP <= 0:
-            calculate_S_amino_acids = 0
-        else:
-            calculate_S_amino_acids = self.__class__.PARAMETERS.VMAX_AMINO_ACIDS / \
-                                      ((1 + self.__class__.PARAMETERS.K_AMINO_ACIDS_NITRATES / (nitrates / (self.mstruct * self.__class__.PARAMETERS.ALPHA))) *
-                                       (1 + self.__class__.PARAMETERS.K_AMINO_ACIDS_TRIOSESP / (triosesP / (self.mstruct * self.__class__.PARAMETERS.ALPHA)))) * \
-                                      parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        calculate_S_amino_acids = _where((nitrates <= 0) | (triosesP <= 0), 0.,
+                                         self.PARAMETERS.VMAX_AMINO_ACIDS /
+                                         ((1 + _ratio(self.PARAMETERS.K_AMINO_ACIDS_NITRATES, nitrates / (self.mstruct * self.PARAMETERS.ALPHA))) *
+                                          (1 + _ratio(self.PARAMETERS.K_AMINO_ACIDS_TRIOSESP, triosesP / (self.mstruct * self.PARAMETERS.ALPHA)))) *
+                                         parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax)
         return calculate_S_amino_acids
 
     def calculate_S_proteins(self, amino_acids, T_effect_Vmax):
@@ -1656,8 +1678,8 @@ class PhotosyntheticOrganElement(object):
         :return: Protein synthesis (mol` N h-1 g-1 mstruct)
         :rtype: float
         """
-        calculate_S_proteins = (((max(0., amino_acids) / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) * self.__class__.PARAMETERS.VMAX_SPROTEINS) /
-                                ((max(0., amino_acids) / (self.mstruct * self.__class__.PARAMETERS.ALPHA)) + self.__class__.PARAMETERS.K_SPROTEINS)
+        calculate_S_proteins = (((_maximum(0., amino_acids) / (self.mstruct * self.PARAMETERS.ALPHA)) * self.PARAMETERS.VMAX_SPROTEINS) /
+                                ((_maximum(0., amino_acids) / (self.mstruct * self.PARAMETERS.ALPHA)) + self.PARAMETERS.K_SPROTEINS)
                                 ) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
         return calculate_S_proteins
 
@@ -1672,16 +1694,16 @@ class PhotosyntheticOrganElement(object):
         :return: Rate of protein degradation (mol` N g-1 mstruct)
         :rtype: float
         """
-        conc_proteins = proteins / (self.mstruct * self.__class__.PARAMETERS.ALPHA)
-        conc_cytokinins = max(0, cytokinins / self.mstruct)
+        conc_proteins = proteins / (self.mstruct * self.PARAMETERS.ALPHA)
+        conc_cytokinins = _maximum(0, cytokinins / self.mstruct)
 
-        regul_cytokinins = (self.__class__.PARAMETERS.VMAX_DPROTEINS_CYTOK * self.__class__.PARAMETERS.K_DPROTEINS_CYTOK ** self.__class__.PARAMETERS.N_DPROTEINS) / \
-                           (conc_cytokinins ** self.__class__.PARAMETERS.N_DPROTEINS + self.__class__.PARAMETERS.K_DPROTEINS_CYTOK ** self.__class__.PARAMETERS.N_DPROTEINS)
+        regul_cytokinins = (self.PARAMETERS.VMAX_DPROTEINS_CYTOK * self.PARAMETERS.K_DPROTEINS_CYTOK ** self.PARAMETERS.N_DPROTEINS) / \
+                           (conc_cytokinins ** self.PARAMETERS.N_DPROTEINS + self.PARAMETERS.K_DPROTEINS_CYTOK ** self.PARAMETERS.N_DPROTEINS)
 
-        return max(0, (conc_proteins * self.__class__.PARAMETERS.VMAX_DPROTEINS / (conc_proteins + self.__class__.PARAMETERS.K_DPROTEINS)) *
+        return _maximum(0, (conc_proteins * self.PARAMETERS.VMAX_DPROTEINS / (conc_proteins + self.PARAMETERS.K_DPROTEINS)) *
                    parameters.SECOND_TO_HOUR_RATE_CONVERSION * regul_cytokinins * T_effect_Vmax)
 
-    def calculate_Loading_Amino_Acids(self, amino_acids, amino_acids_phloem, mstruct_axis, T_effect_conductivity):
+    def calculate_Loading_Amino_Acids(self, amino_acids, amino_acids_phloem, mstruct_axis, T_effect_conductivity, ALPHA_axis):
         """Rate of amino acids loading to phloem (mol` N amino acids h-1).
         Transport-resistance model.
 
@@ -1689,22 +1711,23 @@ class PhotosyntheticOrganElement(object):
         :param float amino_acids_phloem: Amount of amino acids in the phloem (mol` N)
         :param float mstruct_axis: Structural dry mass of the axis (g)
         :param float T_effect_conductivity: Effect of the temperature on the conductivity rate at 20C (AU)
+        :param float ALPHA_axis: Proportion of the structural mass of the axis containing the substrates (dimensionless)
 
         :return: Amino acids loading (mol` N h-1)
         :rtype: float
         """
-        Conc_Amino_Acids_element = amino_acids / (self.mstruct * self.__class__.PARAMETERS.ALPHA)
-        Conc_Amino_Acids_phloem = amino_acids_phloem / (mstruct_axis * parameters.AXIS_PARAMETERS.ALPHA)
+        Conc_Amino_Acids_element = amino_acids / (self.mstruct * self.PARAMETERS.ALPHA)
+        Conc_Amino_Acids_phloem = amino_acids_phloem / (mstruct_axis * ALPHA_axis)
         #: Driving compartment (mol` N g-1 mstruct)
-        driving_amino_acids_compartment = max(Conc_Amino_Acids_element, Conc_Amino_Acids_phloem)
+        driving_amino_acids_compartment = _maximum(Conc_Amino_Acids_element, Conc_Amino_Acids_phloem)
         #: Gradient of amino acids between the element and the phloem (mol` N g-1 mstruct)
         diff_amino_acids = Conc_Amino_Acids_element - Conc_Amino_Acids_phloem
         #: Conductance depending on mstruct (g2 mol`-1 s-1)
-        conductance = self.__class__.PARAMETERS.SIGMA_AMINO_ACIDS * self.__class__.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
+        conductance = self.PARAMETERS.SIGMA_AMINO_ACIDS * self.PARAMETERS.BETA * self.mstruct ** (2 / 3) * T_effect_conductivity
 
         return driving_amino_acids_compartment * diff_amino_acids * conductance * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
-    def calculate_Export_Amino_Acids(self, amino_acids, amino_acids_hiddenzone, mstruct_hiddenzone, T_effect_conductivity):
+    def calculate_Export_Amino_Acids(self, amino_acids, amino_acids_hiddenzone, mstruct_hiddenzone, T_effect_conductivity, SIGMA_hiddenzone):
         """Rate of amino acids exportation to hidden zone (mol` N amino acids h-1).
         Transport-resistance model.
 
@@ -1712,16 +1735,17 @@ class PhotosyntheticOrganElement(object):
         :param float amino_acids_hiddenzone: Amino acids amount in the hidden zone (mol` N)
         :param float mstruct_hiddenzone: mstruct of the hidden zone (g)
         :param float T_effect_conductivity: Effect of the temperature on the conductivity rate at 20C (AU)
+        :param float SIGMA_hiddenzone: Coefficient of surface diffusion of the hidden zone (g m-2 s-1)
 
         :return: Rate of Amino acids export (mol` N h-1)
         :rtype: float
         """
-        Conc_Amino_Acids_element = amino_acids / (self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        Conc_Amino_Acids_element = amino_acids / (self.mstruct * self.PARAMETERS.ALPHA)
         Conc_Amino_Acids_hiddenzone = amino_acids_hiddenzone / mstruct_hiddenzone
         #: Gradient of amino acids between the element and the hidden zone (mol` N g-1 mstruct)
         diff_amino_acids = Conc_Amino_Acids_element - Conc_Amino_Acids_hiddenzone
         #: Conductance depending on mstruct
-        conductance = HiddenZone.PARAMETERS.SIGMA * self.__class__.PARAMETERS.BETA * mstruct_hiddenzone ** (2 / 3) * T_effect_conductivity
+        conductance = SIGMA_hiddenzone * self.PARAMETERS.BETA * mstruct_hiddenzone ** (2 / 3) * T_effect_conductivity
 
         return diff_amino_acids * conductance * parameters.SECOND_TO_HOUR_RATE_CONVERSION
 
@@ -1737,10 +1761,7 @@ class PhotosyntheticOrganElement(object):
         :return: Cytokinin import (AU)
         :rtype: float
         """
-        if Total_Transpiration > 0:
-            cytokinins_import = roots_exported_cytokinins * (element_transpiration / Total_Transpiration)
-        else:
-            cytokinins_import = 0
+        cytokinins_import = roots_exported_cytokinins * _ratio(element_transpiration, Total_Transpiration)
 
         return cytokinins_import
 
@@ -1754,7 +1775,7 @@ class PhotosyntheticOrganElement(object):
         :return: Rate of Cytokinin degradation (AU g-1 mstruct h-1)
         :rtype: float
         """
-        return max(0, self.__class__.PARAMETERS.DELTA_D_CYTOKININS * (cytokinins / (self.mstruct * self.__class__.PARAMETERS.ALPHA))) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
+        return _maximum(0, self.PARAMETERS.DELTA_D_CYTOKININS * (cytokinins / (self.mstruct * self.PARAMETERS.ALPHA))) * parameters.SECOND_TO_HOUR_RATE_CONVERSION * T_effect_Vmax
 
     # COMPARTMENTS
 
@@ -1771,7 +1792,7 @@ class PhotosyntheticOrganElement(object):
         """
         #: Contribution of triosesP to the synthesis of amino_acids
         triosesP_consumption_AA = (S_Amino_Acids / EcophysiologicalConstants.AMINO_ACIDS_N_RATIO) * EcophysiologicalConstants.AMINO_ACIDS_C_RATIO
-        return Photosynthesis - (S_Sucrose + S_Starch + triosesP_consumption_AA) * (self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        return Photosynthesis - (S_Sucrose + S_Starch + triosesP_consumption_AA) * (self.mstruct * self.PARAMETERS.ALPHA)
 
     def calculate_starch_derivative(self, S_Starch, D_Starch):
         """delta starch of element.
@@ -1782,7 +1803,7 @@ class PhotosyntheticOrganElement(object):
         :return: delta starch (mol` C starch)
         :rtype: float
         """
-        return (S_Starch - D_Starch) * (self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        return (S_Starch - D_Starch) * (self.mstruct * self.PARAMETERS.ALPHA)
 
     def calculate_sucrose_derivative(self, S_Sucrose, D_Starch, Loading_Sucrose, S_Fructan, D_Fructan, sum_respi):
         """delta sucrose of element.
@@ -1808,7 +1829,7 @@ class PhotosyntheticOrganElement(object):
         :return: delta fructan (mol` C fructan)
         :rtype: float
         """
-        return (S_Fructan - D_Fructan) * (self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        return (S_Fructan - D_Fructan) * (self.mstruct * self.PARAMETERS.ALPHA)
 
     def calculate_nitrates_derivative(self, Nitrates_import, S_Amino_Acids):
         """delta nitrates of element.
@@ -1820,7 +1841,7 @@ class PhotosyntheticOrganElement(object):
         :rtype: float
         """
         nitrate_reduction_AA = S_Amino_Acids  #: Contribution of nitrates to the synthesis of amino_acids
-        return Nitrates_import - (nitrate_reduction_AA * self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        return Nitrates_import - (nitrate_reduction_AA * self.mstruct * self.PARAMETERS.ALPHA)
 
     def calculate_amino_acids_derivative(self, Amino_Acids_import, S_Amino_Acids, S_Proteins, D_Proteins, Loading_Amino_Acids):
         """delta amino acids of element.
@@ -1834,7 +1855,7 @@ class PhotosyntheticOrganElement(object):
         :return: delta amino acids (mol` N amino acids)
         :rtype: float
         """
-        return Amino_Acids_import - Loading_Amino_Acids + (S_Amino_Acids + D_Proteins - S_Proteins) * (self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        return Amino_Acids_import - Loading_Amino_Acids + (S_Amino_Acids + D_Proteins - S_Proteins) * (self.mstruct * self.PARAMETERS.ALPHA)
 
     def calculate_proteins_derivative(self, S_Proteins, D_Proteins):
         """delta proteins of element.
@@ -1845,7 +1866,7 @@ class PhotosyntheticOrganElement(object):
         :return: delta proteins (mol` N proteins)
         :rtype: float
         """
-        return (S_Proteins - D_Proteins) * (self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        return (S_Proteins - D_Proteins) * (self.mstruct * self.PARAMETERS.ALPHA)
 
     def calculate_cytokinins_derivative(self, import_cytokinins, D_cytokinins, phyto_id, cytokinins):
         """delta cytokinins of element.
@@ -1858,10 +1879,9 @@ class PhotosyntheticOrganElement(object):
         :return: delta cytokinins (AU cytokinins)
         :rtype: float
         """
-        if phyto_id in (1, 2):
-            return (self.__class__.PARAMETERS.ELEMENT_INIT_CONC_CYTOKININS * self.mstruct) - cytokinins
-        else:
-            return import_cytokinins - D_cytokinins * (self.mstruct * self.__class__.PARAMETERS.ALPHA)
+        return _where((phyto_id == 1) | (phyto_id == 2),
+                      (self.PARAMETERS.ELEMENT_INIT_CONC_CYTOKININS * self.mstruct) - cytokinins,
+                      import_cytokinins - D_cytokinins * (self.mstruct * self.PARAMETERS.ALPHA))
 
 
 class ChaffElement(PhotosyntheticOrganElement):
@@ -1973,7 +1993,7 @@ class Soil(object):
         :return: Nitrate concentration (mol` nitrates m-3)
         :rtype: float
         """
-        return max(0, (nitrates / self.volume))
+        return _maximum(0, (nitrates / self.volume))
 
     # FLUX
     @staticmethod
@@ -2001,10 +2021,9 @@ class Soil(object):
         :return: delta nitrates (mol` N nitrates)
         :rtype: float
         """
-        delta_Nitrates = 0
-        if not constant_Conc_Nitrates:
-            Uptake_Nitrates = 0
-            for root_uptake, plant_id in soil_contributors:
-                Uptake_Nitrates += root_uptake * culm_density[plant_id]  # TODO: temporary, will be removed in next version
-            delta_Nitrates = mineralisation - Uptake_Nitrates
-        return delta_Nitrates
+        if np.all(constant_Conc_Nitrates):
+            return 0
+        Uptake_Nitrates = 0
+        for root_uptake, plant_id in soil_contributors:
+            Uptake_Nitrates += root_uptake * culm_density[plant_id]  # TODO: temporary, will be removed in next version
+        return _where(constant_Conc_Nitrates, 0, mineralisation - Uptake_Nitrates)
@@ -1,5 +1,7 @@
 # -*- coding: latin-1 -*-
 
+import weakref
+
 import pandas as pd
 
 """
@@ -51,10 +53,78 @@ def to_dataframe(object_):
     :Returns Type:
         :class:`pandas.DataFrame`
     """
-    return pd.DataFrame(object_.__dict__, index=[0]).sort_index(axis=1)
+    attributes = {name: value for name, value in object_.__dict__.items() if not name.startswith('_')}
+    return pd.DataFrame(attributes, index=[0]).sort_index(axis=1)
+
+
+#: The frozen parameters sets created by :meth:`Parameters.derive`, keyed by their class and values.
+#: The same values give the same parameters set, as long as it is referenced by a model object.
+_FROZEN_PARAMETERS = weakref.WeakValueDictionary()
 
 
-class PopulationParameters(object):
+class Parameters(object):
+    """
+    Base class of the internal parameters.
+
+    The instances defined in this module (e.g. :data:`ROOTS_PARAMETERS`) are the default parameters of the model classes,
+    shared by all the model objects of the current process. Method :meth:`derive` creates a frozen copy of a parameters set,
+    with some updated values, which can be referenced by some model objects only (e.g. the objects of a genotype).
+    Frozen parameters sets cannot be modified, and are hashable: two frozen parameters sets with the same class and the same values
+    are the same object.
+    """
+
+    _frozen = False  #: whether the parameters set can be modified
+    _key = None  #: the class and the values of a frozen parameters set
+
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise AttributeError('Cannot set parameter {} of a frozen parameters set'.format(name))
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if self._frozen and isinstance(other, Parameters) and other._frozen:
+            return self._key == other._key
+        return self is other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        if self._frozen:
+            return hash(self._key)
+        return object.__hash__(self)
+
+    def items(self):
+        """Return the names and the values of the parameters, sorted by name.
+
+        :return: The names and the values of the parameters.
+        :rtype: tuple [(str, object)]
+        """
+        return tuple(sorted((name, value) for name, value in self.__dict__.items() if not name.startswith('_')))
+
+    def derive(self, update_parameters=None):
+        """Return a frozen copy of this parameters set, with the values of `update_parameters`.
+        The frozen parameters sets are cached: deriving the same values twice returns the same object.
+
+        :param dict update_parameters: The names and the new values of the parameters to update or to add.
+
+        :return: The frozen parameters set.
+        :rtype: Parameters
+        """
+        values = dict(self.items())
+        if update_parameters is not None:
+            values.update(update_parameters)
+        key = (self.__class__, tuple(sorted(values.items())))
+        frozen_parameters = _FROZEN_PARAMETERS.get(key)
+        if frozen_parameters is None:
+            frozen_parameters = self.__class__.__new__(self.__class__)
+            frozen_parameters.__dict__.update(values)
+            frozen_parameters.__dict__.update(_frozen=True, _key=key)
+            _FROZEN_PARAMETERS[key] = frozen_parameters
+        return frozen_parameters
+
+
+class PopulationParameters(Parameters):
     """
     Internal parameters of populations.
     """
@@ -66,7 +136,7 @@ class PopulationParameters(object):
 POPULATION_PARAMETERS = PopulationParameters()
 
 
-class PlantParameters(object):
+class PlantParameters(Parameters):
     """
     Internal parameters of plants.
     """
@@ -78,7 +148,7 @@ class PlantParameters(object):
 PLANT_PARAMETERS = PlantParameters()
 
 
-class AxisParameters(object):
+class AxisParameters(Parameters):
     """
     Internal parameters of axes.
     """
@@ -106,7 +176,7 @@ class AxisInitCompartments(object):
 AXIS_INIT_COMPARTMENTS = AxisInitCompartments()
 
 
-class EndospermParameters(object):
+class EndospermParameters(Parameters):
     """
     Internal parameters of seed endosperm.
     """
@@ -120,12 +190,14 @@ class EndospermParameters(object):
         self.PROTEINS_MIN = 0           #: Maximal protein content of the endosperm (mol C)
         self.PROTEINS_MAX = 60          #: Minimal protein content of the endosperm (mol C)
 
+        self.Arrhenius_ref = 1.7399e-11  #: Value of the modified Arrhenius equation at 20C, the reference of the effect of the temperature on the remobilisation (the same as the grains)
+
 
 #: The instance of class :class:`cnwheat.parameters.SeedParameters` for current process
 ENDOSPERM_PARAMETERS = EndospermParameters()
 
 
-class PhytomerParameters(object):
+class PhytomerParameters(Parameters):
     """
     Internal parameters of phytomers.
     """
@@ -137,7 +209,7 @@ class PhytomerParameters(object):
 PHYTOMER_PARAMETERS = PhytomerParameters()
 
 
-class HiddenZoneParameters(object):
+class HiddenZoneParameters(Parameters):
     """
     Internal parameters of hidden growing zones.
     """
@@ -180,7 +252,7 @@ class HiddenZoneInitCompartments(object):
 HIDDEN_ZONE_INIT_COMPARTMENTS = HiddenZoneInitCompartments()
 
 
-class PhloemParameters(object):
+class PhloemParameters(Parameters):
     """
     Internal parameters of phloems.
     """
@@ -205,7 +277,7 @@ class PhloemInitCompartments(object):
 PHLOEM_INIT_COMPARTMENTS = PhloemInitCompartments()
 
 
-class GrainsParameters(object):
+class GrainsParameters(Parameters):
     """
     Internal parameters of grains.
     """
@@ -244,7 +316,7 @@ class GrainsInitCompartments(object):
 GRAINS_INIT_COMPARTMENTS = GrainsInitCompartments()
 
 
-class RootsParameters(object):
+class RootsParameters(Parameters):
     """
     Internal parameters of roots.
     """
@@ -319,7 +391,7 @@ class RootsInitCompartments(object):
 ROOTS_INIT_COMPARTMENTS = RootsInitCompartments()
 
 
-class PhotosyntheticOrganParameters(object):
+class PhotosyntheticOrganParameters(Parameters):
     """
     Internal parameters of photosynthetic organs.
     """
@@ -429,7 +501,7 @@ class SheathParameters(PhotosyntheticOrganParameters):
 SHEATH_PARAMETERS = SheathParameters()
 
 
-class PhotosyntheticOrganElementParameters(object):
+class PhotosyntheticOrganElementParameters(Parameters):
     """
     Internal parameters of photosynthetic organs elements.
     """
@@ -535,7 +607,7 @@ class SheathElementParameters(PhotosyntheticOrganElementParameters):
 SHEATH_ELEMENT_PARAMETERS = SheathElementParameters()
 
 
-class SoilParameters(object):
+class SoilParameters(Parameters):
     """
     Internal parameters of soil.
     """
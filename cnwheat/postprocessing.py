@@ -1,13 +1,17 @@
 # -*- coding: latin-1 -*-
 
 from __future__ import division  # use "//" to do integer division
+import hashlib
+import json
+import multiprocessing
 import os
 
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from cnwheat import simulation as cnwheat_simulation, model as cnwheat_model, parameters as cnwheat_parameters, tools as cnwheat_tools
+from cnwheat import simulation as cnwheat_simulation, model as cnwheat_model, tools as cnwheat_tools
+from cnwheat import converter, io as cnwheat_io, schema
 from respiwheat import model as respiwheat_model
 
 """
@@ -18,7 +22,10 @@ from respiwheat import model as respiwheat_model
     on CN-Wheat outputs, and provides a front-end to automatize the generation of graphs
     for validation of the outputs.
 
-    Please use front-ends :func:`postprocessing` and :func:`generate_graphs`.
+    Please use front-ends :func:`postprocessing` and :func:`generate_graphs`. Use :func:`parallel_postprocessing`
+    to compute the post-processing of large outputs in worker processes, :class:`StreamingPostprocessing`
+    to compute the post-processing at each step of a simulation, while it runs, and :func:`postprocessing_from_files`
+    to compute the post-processing of outputs files which do not fit in memory.
 
     :copyright: Copyright 2014-2017 INRA-ECOSYS, see AUTHORS.
     :license: CeCILL-C, see LICENSE for details.
@@ -109,6 +116,9 @@ SOILS_POSTPROCESSING_VARIABLES = []
 #: concatenation of :attr:`SOILS_T_INDEXES`, :attr:`SOILS_RUN_VARIABLES <cnwheat.simulation.Simulation.SOILS_RUN_VARIABLES>` and :attr:`SOILS_POSTPROCESSING_VARIABLES`
 SOILS_RUN_POSTPROCESSING_VARIABLES = SOILS_T_INDEXES + cnwheat_simulation.Simulation.SOILS_RUN_VARIABLES + SOILS_POSTPROCESSING_VARIABLES
 
+#: the scales of the post-processing, in the order of the dataframes returned by :func:`postprocessing`
+POSTPROCESSING_SCALES = ('plants', 'phytomers', 'organs', 'elements', 'hiddenzones', 'axes', 'soils')
+
 
 # -------------------------------------------------
 # ----------- POST-PROCESSING FUNCTIONS -----------
@@ -818,6 +828,36 @@ class Element:
 # -----------------------------------------------------------------------------
 
 
+def _float_column(dataframe, column):
+    """Return a writable array with the values of `column` in `dataframe` as floats, or filled with NaN if `dataframe` has no column `column`."""
+    if column in dataframe.columns:
+        return dataframe[column].to_numpy(dtype=float, copy=True)
+    return np.full(len(dataframe), np.nan)
+
+
+def _sum_by_axis(dataframe, variables):
+    """Sum the `variables` of `dataframe` by time step and axis (see :attr:`AXES_T_INDEXES`), with a single grouping for all the variables."""
+    return dataframe.groupby(AXES_T_INDEXES, observed=True)[variables].sum()
+
+
+def _join_postprocessing_columns(outputs_df, postprocessing_columns, run_postprocessing_variables):
+    """Join `postprocessing_columns` to `outputs_df` in one go, and keep the columns `run_postprocessing_variables` only.
+
+    The post-processing columns replace the columns of `outputs_df` with the same name.
+    The columns of `run_postprocessing_variables` found neither in `outputs_df` nor in `postprocessing_columns` are filled with NaN.
+
+    :param pandas.DataFrame outputs_df: the outputs.
+    :param dict postprocessing_columns: the values of the post-processing, by column, aligned on `outputs_df`.
+    :param set run_postprocessing_variables: the columns of the returned dataframe.
+
+    :return: The outputs and the post-processing.
+    :rtype: pandas.DataFrame
+    """
+    outputs_columns = [column for column in outputs_df.columns if column in run_postprocessing_variables and column not in postprocessing_columns]
+    postprocessing_df = pd.DataFrame(postprocessing_columns, index=outputs_df.index)
+    return pd.concat([outputs_df[outputs_columns], postprocessing_df], axis=1).reindex(columns=run_postprocessing_variables)
+
+
 def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_df=None, organs_df=None, elements_df=None, soils_df=None, delta_t=1):
     """
     Compute post-processing from CN-Wheat outputs, and format the post-processing to :class:`dataframes <pandas.DataFrame>`.
@@ -830,7 +870,7 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
           :attr:`AXES_RUN_POSTPROCESSING_VARIABLES`, :attr:`PHYTOMERS_RUN_POSTPROCESSING_VARIABLES`,
           :attr:`ORGANS_RUN_POSTPROCESSING_VARIABLES`, :attr:`HIDDENZONE_RUN_POSTPROCESSING_VARIABLES`,
           :attr:`ELEMENTS_RUN_POSTPROCESSING_VARIABLES` and :attr:`SOILS_RUN_POSTPROCESSING_VARIABLES`,
-        * and convert the indexes of plants and metamers to integers (if relevant).
+        * and convert the indexes to the dtypes of :mod:`cnwheat.schema` (if relevant).
 
     :param pandas.DataFrame plants_df: CN-Wheat outputs at plant scale (see :attr:`simulation.Simulation.PLANTS_RUN_VARIABLES`)
     :param pandas.DataFrame axes_df: CN-Wheat outputs at axis scale (see :attr:`simulation.Simulation.AXES_RUN_VARIABLES`)
@@ -859,18 +899,16 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
 
     # plants
     if plants_df is not None:
-        pp_plants_df = pd.concat([plants_df, pd.DataFrame(columns=PLANTS_POSTPROCESSING_VARIABLES)], sort=False)
-        pp_plants_df = pp_plants_df.reindex(PLANTS_RUN_POSTPROCESSING_VARIABLES, axis=1, copy=False)
-        pp_plants_df['plant'] = pp_plants_df['plant'].astype(int)
+        pp_plants_df = _join_postprocessing_columns(plants_df, {}, PLANTS_RUN_POSTPROCESSING_VARIABLES)
+        schema.apply_schema(pp_plants_df)
         returned_dataframes.append(pp_plants_df)
     else:
         returned_dataframes.append(pd.DataFrame({'A': []}))
 
     # metamers
     if metamers_df is not None:
-        pp_metamers_df = pd.concat([metamers_df, pd.DataFrame(columns=PHYTOMERS_POSTPROCESSING_VARIABLES)], sort=False)
-        pp_metamers_df = pp_metamers_df.reindex(PHYTOMERS_RUN_POSTPROCESSING_VARIABLES, axis=1, copy=False)
-        pp_metamers_df[['plant', 'metamer']] = pp_metamers_df[['plant', 'metamer']].astype(int)
+        pp_metamers_df = _join_postprocessing_columns(metamers_df, {}, PHYTOMERS_RUN_POSTPROCESSING_VARIABLES)
+        schema.apply_schema(pp_metamers_df)
         returned_dataframes.append(pp_metamers_df)
     else:
         returned_dataframes.append(pd.DataFrame({'A': []}))
@@ -879,155 +917,137 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
     if organs_df is not None and axes_df is not None:
         axes_df = axes_df[axes_df['axis'] == 'MS'].copy()  # TODO : Temporary !
 
-        pp_organs_df = pd.concat([organs_df, pd.DataFrame(columns=ORGANS_POSTPROCESSING_VARIABLES)], sort=False)
-
-        organs_df['sum_dry_mass'] = (((organs_df.fillna(0)['structure'] + organs_df.fillna(0)[
+        organs_filled_df = organs_df[['structure', 'starch', 'sucrose', 'nitrates', 'amino_acids', 'proteins', 'mstruct', 'Nstruct']].fillna(0)
+        organs_df['sum_dry_mass'] = (((organs_filled_df['structure'] + organs_filled_df[
             'starch']) * 1E-6 * cnwheat_model.EcophysiologicalConstants.C_MOLAR_MASS / cnwheat_model.EcophysiologicalConstants.HEXOSE_MOLAR_MASS_C_RATIO) +
-                                     (organs_df.fillna(0)[
+                                     (organs_filled_df[
                                           'sucrose'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.C_MOLAR_MASS) / cnwheat_model.EcophysiologicalConstants.HEXOSE_MOLAR_MASS_C_RATIO +
-                                     (organs_df.fillna(0)['starch'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.C_MOLAR_MASS) / cnwheat_model.EcophysiologicalConstants.HEXOSE_MOLAR_MASS_C_RATIO +
-                                     (organs_df.fillna(0)[
+                                     (organs_filled_df['starch'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.C_MOLAR_MASS) / cnwheat_model.EcophysiologicalConstants.HEXOSE_MOLAR_MASS_C_RATIO +
+                                     (organs_filled_df[
                                           'nitrates'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) / cnwheat_model.EcophysiologicalConstants.NITRATES_MOLAR_MASS_N_RATIO +
-                                     (organs_df.fillna(0)[
+                                     (organs_filled_df[
                                           'amino_acids'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) / cnwheat_model.EcophysiologicalConstants.AMINO_ACIDS_MOLAR_MASS_N_RATIO +
-                                     (organs_df.fillna(0)[
+                                     (organs_filled_df[
                                           'proteins'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) / cnwheat_model.EcophysiologicalConstants.AMINO_ACIDS_MOLAR_MASS_N_RATIO +
-                                     organs_df.fillna(0)['mstruct'])
-        organs_df['C_g'] = ((organs_df.fillna(0)['sucrose'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.C_MOLAR_MASS) +
-                            (organs_df.fillna(0)['starch'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.C_MOLAR_MASS) +
-                            (organs_df.fillna(0)[
+                                     organs_filled_df['mstruct'])
+        organs_df['C_g'] = ((organs_filled_df['sucrose'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.C_MOLAR_MASS) +
+                            (organs_filled_df['starch'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.C_MOLAR_MASS) +
+                            (organs_filled_df[
                                  'amino_acids'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) * cnwheat_model.EcophysiologicalConstants.AMINO_ACIDS_MOLAR_MASS_C_RATIO /
-                            cnwheat_model.EcophysiologicalConstants.AMINO_ACIDS_MOLAR_MASS_N_RATIO + (organs_df.fillna(0)['proteins'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) *
+                            cnwheat_model.EcophysiologicalConstants.AMINO_ACIDS_MOLAR_MASS_N_RATIO + (organs_filled_df['proteins'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) *
                             cnwheat_model.EcophysiologicalConstants.AMINO_ACIDS_MOLAR_MASS_C_RATIO / cnwheat_model.EcophysiologicalConstants.AMINO_ACIDS_MOLAR_MASS_N_RATIO +
-                            organs_df.fillna(0)['mstruct'] * cnwheat_model.EcophysiologicalConstants.RATIO_C_mstruct)
-        organs_df['N_g'] = ((organs_df.fillna(0)['nitrates'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) +
-                            (organs_df.fillna(0)['amino_acids'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) +
-                            (organs_df.fillna(0)['proteins'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) +
-                            organs_df.fillna(0)['Nstruct'])
+                            organs_filled_df['mstruct'] * cnwheat_model.EcophysiologicalConstants.RATIO_C_mstruct)
+        organs_df['N_g'] = ((organs_filled_df['nitrates'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) +
+                            (organs_filled_df['amino_acids'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) +
+                            (organs_filled_df['proteins'] * 1E-6 * cnwheat_model.EcophysiologicalConstants.N_MOLAR_MASS) +
+                            organs_filled_df['Nstruct'])
 
-        pp_organs_df['N_tot'] = organs_df['N_g']
+        pp_organs_columns = {variable: _float_column(organs_df, variable) for variable in ORGANS_POSTPROCESSING_VARIABLES + ['R_residual']}
+        pp_organs_columns['N_tot'] = organs_df['N_g'].values
+        organs_labels = organs_df['organ'].values
 
         # roots
-        roots_df = organs_df[organs_df.organ == 'roots'].copy()
-        pp_organs_df.loc[pp_organs_df.organ == 'roots', 'WSC_g'] = Roots.calculate_WSC_g(roots_df['sucrose'])
-        pp_organs_df.loc[pp_organs_df.organ == 'roots', 'Conc_Nitrates'] = Roots.calculate_Conc_Nitrates(roots_df['nitrates'], roots_df['mstruct'])
-        pp_organs_df.loc[pp_organs_df.organ == 'roots', 'Conc_Amino_Acids'] = Roots.calculate_Conc_Amino_Acids(roots_df['amino_acids'], roots_df['mstruct'])
-        pp_organs_df.loc[pp_organs_df.organ == 'roots', 'Conc_Sucrose'] = Roots.calculate_conc_sucrose(roots_df['sucrose'], roots_df['mstruct'])
-        pp_organs_df.loc[pp_organs_df.organ == 'roots', 'Conc_cytokinins'] = Roots.calculate_conc_cytokinins(roots_df['cytokinins'], roots_df['mstruct'])
-        pp_organs_df.loc[pp_organs_df.organ == 'roots', 'Conc_cytokinins'] = Roots.calculate_conc_cytokinins(roots_df['cytokinins'], roots_df['mstruct'])
-        R_residual = np.array(
-            list(map(respiwheat_model.RespirationModel.R_residual, roots_df['sucrose'], roots_df['mstruct'] * cnwheat_model.Roots.PARAMETERS.ALPHA, roots_df['Total_Organic_Nitrogen'],
-                     soils_df['Tsoil'])))
-        pp_organs_df.loc[pp_organs_df.organ == 'roots', 'R_residual'] = R_residual
+        is_roots = organs_labels == 'roots'
+        roots_df = organs_df[is_roots].copy()
+        pp_organs_columns['WSC_g'][is_roots] = Roots.calculate_WSC_g(roots_df['sucrose'].values)
+        pp_organs_columns['Conc_Nitrates'][is_roots] = Roots.calculate_Conc_Nitrates(roots_df['nitrates'].values, roots_df['mstruct'].values)
+        pp_organs_columns['Conc_Amino_Acids'][is_roots] = Roots.calculate_Conc_Amino_Acids(roots_df['amino_acids'].values, roots_df['mstruct'].values)
+        pp_organs_columns['Conc_Sucrose'][is_roots] = Roots.calculate_conc_sucrose(roots_df['sucrose'].values, roots_df['mstruct'].values)
+        pp_organs_columns['Conc_cytokinins'][is_roots] = Roots.calculate_conc_cytokinins(roots_df['cytokinins'].values, roots_df['mstruct'].values)
+        pp_organs_columns['R_residual'][is_roots] = np.vectorize(respiwheat_model.RespirationModel.R_residual, otypes=[float])(
+            roots_df['sucrose'].values, roots_df['mstruct'].values * cnwheat_model.Roots.PARAMETERS.ALPHA, roots_df['Total_Organic_Nitrogen'].values, soils_df['Tsoil'].values)
 
         # phloem
-        phloems_df = organs_df.loc[organs_df.organ == 'phloem']
-        pp_organs_df.loc[pp_organs_df.organ == 'phloem', 'WSC_g'] = Phloem.calculate_WSC_g(phloems_df['sucrose'])
-        pp_organs_df.loc[pp_organs_df.organ == 'phloem', 'Conc_Amino_Acids'] = Phloem.calculate_conc_amino_acids(phloems_df['amino_acids'], axes_df.set_index(phloems_df.index)['mstruct'])
-        pp_organs_df.loc[pp_organs_df.organ == 'phloem', 'Conc_Sucrose'] = Phloem.calculate_conc_sucrose(phloems_df['sucrose'], axes_df.set_index(phloems_df.index)['mstruct'])
+        is_phloem = organs_labels == 'phloem'
+        phloems_df = organs_df[is_phloem]
+        pp_organs_columns['WSC_g'][is_phloem] = Phloem.calculate_WSC_g(phloems_df['sucrose'].values)
+        pp_organs_columns['Conc_Amino_Acids'][is_phloem] = Phloem.calculate_conc_amino_acids(phloems_df['amino_acids'].values, axes_df['mstruct'].values)
+        pp_organs_columns['Conc_Sucrose'][is_phloem] = Phloem.calculate_conc_sucrose(phloems_df['sucrose'].values, axes_df['mstruct'].values)
 
         # grains
-        grains_df = organs_df.loc[organs_df.organ == 'grains']
-        pp_organs_df.loc[pp_organs_df.organ == 'grains', 'Dry_Mass'] = Grains.calculate_dry_mass(grains_df['structure'], grains_df['starch'], grains_df['proteins'])
-        pp_organs_df.loc[pp_organs_df.organ == 'grains', 'WSC_g'] = Grains.calculate_WSC_g(grains_df['sucrose'], grains_df['starch'])
-        pp_organs_df.loc[pp_organs_df.organ == 'grains', 'Proteins_N_Mass'] = Grains.calculate_protein_N_mass(grains_df['proteins'])
+        is_grains = organs_labels == 'grains'
+        grains_df = organs_df[is_grains]
+        pp_organs_columns['Dry_Mass'][is_grains] = Grains.calculate_dry_mass(grains_df['structure'].values, grains_df['starch'].values, grains_df['proteins'].values)
+        pp_organs_columns['WSC_g'][is_grains] = Grains.calculate_WSC_g(grains_df['sucrose'].values, grains_df['starch'].values)
+        pp_organs_columns['Proteins_N_Mass'][is_grains] = Grains.calculate_protein_N_mass(grains_df['proteins'].values)
 
         # endosperm
-        endosperms_df = organs_df.loc[organs_df.organ == 'endosperm']
-        pp_organs_df.loc[pp_organs_df.organ == 'endosperm', 'Dry_Mass'] = Endosperm.calculate_dry_mass(endosperms_df['starch'], endosperms_df['proteins'], endosperms_df['mstruct'])
-        pp_organs_df.loc[pp_organs_df.organ == 'endosperm', 'Starch_g'] = Endosperm.calculate_starch_g(endosperms_df['starch'])
-        pp_organs_df.loc[pp_organs_df.organ == 'endosperm', 'Proteins_N_Mass'] = Endosperm.calculate_protein_N_mass(endosperms_df['proteins'])
-
-        pp_organs_df = pp_organs_df.reindex(columns=ORGANS_RUN_POSTPROCESSING_VARIABLES, copy=False)
-        pp_organs_df['plant'] = pp_organs_df['plant'].astype(int)
+        is_endosperm = organs_labels == 'endosperm'
+        endosperms_df = organs_df[is_endosperm]
+        pp_organs_columns['Dry_Mass'][is_endosperm] = Endosperm.calculate_dry_mass(endosperms_df['starch'].values, endosperms_df['proteins'].values, endosperms_df['mstruct'].values)
+        pp_organs_columns['Starch_g'][is_endosperm] = Endosperm.calculate_starch_g(endosperms_df['starch'].values)
+        pp_organs_columns['Proteins_N_Mass'][is_endosperm] = Endosperm.calculate_protein_N_mass(endosperms_df['proteins'].values)
+
+        pp_organs_df = _join_postprocessing_columns(organs_df, pp_organs_columns, ORGANS_RUN_POSTPROCESSING_VARIABLES)
+        schema.apply_schema(pp_organs_df)
         returned_dataframes.append(pp_organs_df)
     else:
         returned_dataframes.append(pd.DataFrame({'A': []}))
 
     # elements
     if elements_df is not None:
-        elements_df['sum_dry_mass'] = Element.calculate_dry_mass(elements_df.fillna(0)['triosesP'],
-                                                                 elements_df.fillna(0)['sucrose'],
-                                                                 elements_df.fillna(0)['starch'],
-                                                                 elements_df.fillna(0)['fructan'],
-                                                                 elements_df.fillna(0)['nitrates'],
-                                                                 elements_df.fillna(0)['amino_acids'],
-                                                                 elements_df.fillna(0)['proteins'],
+        elements_filled_df = elements_df[['triosesP', 'sucrose', 'starch', 'fructan', 'nitrates', 'amino_acids', 'proteins']].fillna(0)
+        elements_df['sum_dry_mass'] = Element.calculate_dry_mass(elements_filled_df['triosesP'],
+                                                                 elements_filled_df['sucrose'],
+                                                                 elements_filled_df['starch'],
+                                                                 elements_filled_df['fructan'],
+                                                                 elements_filled_df['nitrates'],
+                                                                 elements_filled_df['amino_acids'],
+                                                                 elements_filled_df['proteins'],
                                                                  elements_df['mstruct'])
-        elements_df['sum_dry_mass_total'] = Element.calculate_dry_mass(elements_df.fillna(0)['triosesP'],
-                                                                       elements_df.fillna(0)['sucrose'],
-                                                                       elements_df.fillna(0)['starch'],
-                                                                       elements_df.fillna(0)['fructan'],
-                                                                       elements_df.fillna(0)['nitrates'],
-                                                                       elements_df.fillna(0)['amino_acids'],
-                                                                       elements_df.fillna(0)['proteins'],
+        elements_df['sum_dry_mass_total'] = Element.calculate_dry_mass(elements_filled_df['triosesP'],
+                                                                       elements_filled_df['sucrose'],
+                                                                       elements_filled_df['starch'],
+                                                                       elements_filled_df['fructan'],
+                                                                       elements_filled_df['nitrates'],
+                                                                       elements_filled_df['amino_acids'],
+                                                                       elements_filled_df['proteins'],
                                                                        elements_df['max_mstruct'] + elements_df['Nresidual'])
-        elements_df['C_g'] = Element.calculate_C_g(elements_df.fillna(0)['triosesP'],
-                                                   elements_df.fillna(0)['sucrose'],
-                                                   elements_df.fillna(0)['starch'],
-                                                   elements_df.fillna(0)['fructan'],
-                                                   elements_df.fillna(0)['amino_acids'],
-                                                   elements_df.fillna(0)['proteins'],
+        elements_df['C_g'] = Element.calculate_C_g(elements_filled_df['triosesP'],
+                                                   elements_filled_df['sucrose'],
+                                                   elements_filled_df['starch'],
+                                                   elements_filled_df['fructan'],
+                                                   elements_filled_df['amino_acids'],
+                                                   elements_filled_df['proteins'],
                                                    elements_df['mstruct'])
-        elements_df['N_g'] = Element.calculate_N_g(elements_df.fillna(0)['nitrates'],
-                                                   elements_df.fillna(0)['amino_acids'],
-                                                   elements_df.fillna(0)['proteins'],
+        elements_df['N_g'] = Element.calculate_N_g(elements_filled_df['nitrates'],
+                                                   elements_filled_df['amino_acids'],
+                                                   elements_filled_df['proteins'],
                                                    elements_df['Nstruct'])
-        elements_df['N_g_total'] = Element.calculate_N_g(elements_df.fillna(0)['nitrates'],
-                                                         elements_df.fillna(0)['amino_acids'],
-                                                         elements_df.fillna(0)['proteins'],
+        elements_df['N_g_total'] = Element.calculate_N_g(elements_filled_df['nitrates'],
+                                                         elements_filled_df['amino_acids'],
+                                                         elements_filled_df['proteins'],
                                                          elements_df['Nstruct'] + elements_df['Nresidual'])
-        elements_df['WSC_g'] = Element.calculate_WSC_g(elements_df.fillna(0)['triosesP'],
-                                                       elements_df.fillna(0)['sucrose'],
-                                                       elements_df.fillna(0)['starch'],
-                                                       elements_df.fillna(0)['fructan'], )
-        pp_elements_df = pd.concat([elements_df, pd.DataFrame(columns=ELEMENTS_POSTPROCESSING_VARIABLES)], sort=False)
-        pp_elements_df.loc[:, 'Conc_TriosesP'] = Element.calculate_conc_triosesP(elements_df['triosesP'], elements_df['mstruct'])
-        pp_elements_df.loc[:, 'Conc_Starch'] = Element.calculate_conc_starch(elements_df['starch'], elements_df['mstruct'])
-        pp_elements_df.loc[:, 'Conc_Sucrose'] = Element.calculate_conc_sucrose(elements_df['sucrose'], elements_df['mstruct'])
-        pp_elements_df.loc[:, 'Conc_Fructan'] = Element.calculate_conc_fructan(elements_df['fructan'], elements_df['mstruct'])
-        pp_elements_df.loc[:, 'Conc_Nitrates'] = Element.calculate_Conc_Nitrates(elements_df['nitrates'], elements_df['mstruct'])
-        pp_elements_df.loc[:, 'Conc_Amino_Acids'] = Element.calculate_Conc_Amino_Acids(elements_df['amino_acids'], elements_df['mstruct'])
-        pp_elements_df.loc[:, 'Conc_Proteins'] = Element.calculate_conc_proteins(elements_df['proteins'], elements_df['mstruct'])
-        pp_elements_df.loc[:, 'Conc_cytokinins'] = Element.calculate_conc_cytokinins(elements_df['cytokinins'], elements_df['mstruct'])
-        pp_elements_df.loc[:, 'Cont_Fructan_DM'] = Element.calculate_fructan_g(elements_df['fructan']) / elements_df['sum_dry_mass'] * 100
-        pp_elements_df.loc[:, 'Cont_WSC_DM'] = elements_df['WSC_g'] / elements_df['sum_dry_mass'] * 100
-        pp_elements_df.loc[:, 'Surfacic_NS'] = Element.calculate_surfacic_non_structural(elements_df['sum_dry_mass'],
-                                                                                         elements_df['mstruct'], elements_df['green_area'])
-        pp_elements_df.loc[:, 'NS'] = Element.calculate_ratio_non_structural(elements_df['sum_dry_mass'],
-                                                                             elements_df['mstruct'])
-        pp_elements_df.loc[:, 'N_content'] = elements_df['N_g'] / elements_df['sum_dry_mass'] * 100
-        pp_elements_df.loc[:, 'N_content_total_DM'] = elements_df['N_g_total'] / elements_df['sum_dry_mass_total'] * 100
-        pp_elements_df.loc[:, 'N_tot'] = elements_df['N_g_total']
-        pp_elements_df.loc[:, 'SLN'] = Element.calculate_SLN(elements_df['nitrates'], elements_df['amino_acids'], elements_df['proteins'],
-                                                             elements_df['Nstruct'], elements_df['green_area'])
-        pp_elements_df.loc[pp_elements_df['is_growing'] == 1., 'SLN'] = np.nan
-        pp_elements_df.loc[:, 'SLN_nonstruct'] = Element.calculate_SLN_nonstruct(elements_df['nitrates'], elements_df['amino_acids'], elements_df['proteins'],
-                                                                                 elements_df['green_area'])
-        pp_elements_df.loc[pp_elements_df['is_growing'] == 1., 'SLN_nonstruct'] = np.nan
-        pp_elements_df.loc[:, 'SLA'] = Element.calculate_SLA(elements_df['sum_dry_mass'], elements_df['green_area'])
-        pp_elements_df.loc[pp_elements_df['is_growing'] == 1., 'SLA'] = np.nan
-        pp_elements_df.loc[:, 'Photosynthetic_efficiency'] = elements_df['Ag'] / elements_df['PARa']
-
-        grouped = elements_df.groupby('organ')
-        for organ_type, parameters_class in \
-                (('ear', cnwheat_parameters.CHAFF_ELEMENT_PARAMETERS),
-                 ('blade', cnwheat_parameters.LAMINA_ELEMENT_PARAMETERS),
-                 ('internode', cnwheat_parameters.INTERNODE_ELEMENT_PARAMETERS),
-                 ('peduncle', cnwheat_parameters.PEDUNCLE_ELEMENT_PARAMETERS),
-                 ('sheath', cnwheat_parameters.SHEATH_ELEMENT_PARAMETERS)):
-            if organ_type not in grouped.groups:
-                continue
-            group = grouped.get_group(organ_type)
-            if len(group) == 0:  # TODO: faire mm tri que dans simulation de cnwheat (surface nulle)
-                continue
-            curr_organ_elements_df = elements_df.loc[group.index]
-            pp_curr_organ_elements_df = pp_elements_df.loc[group.index]
-            R_residual = np.vectorize(respiwheat_model.RespirationModel.R_residual)(curr_organ_elements_df['sucrose'], curr_organ_elements_df['mstruct'] * parameters_class.ALPHA,
-                                                                                    curr_organ_elements_df['Total_Organic_Nitrogen'], curr_organ_elements_df['Ts'])
-            pp_curr_organ_elements_df.loc[:, 'R_residual'] = R_residual
-        pp_elements_df = pp_elements_df.reindex(columns=ELEMENTS_RUN_POSTPROCESSING_VARIABLES, copy=False)
-        pp_elements_df[['plant', 'metamer']] = pp_elements_df[['plant', 'metamer']].astype(int)
+        elements_df['WSC_g'] = Element.calculate_WSC_g(elements_filled_df['triosesP'],
+                                                       elements_filled_df['sucrose'],
+                                                       elements_filled_df['starch'],
+                                                       elements_filled_df['fructan'], )
+
+        is_growing = elements_df['is_growing'] == 1.
+        pp_elements_columns = {
+            'Conc_TriosesP': Element.calculate_conc_triosesP(elements_df['triosesP'], elements_df['mstruct']),
+            'Conc_Starch': Element.calculate_conc_starch(elements_df['starch'], elements_df['mstruct']),
+            'Conc_Sucrose': Element.calculate_conc_sucrose(elements_df['sucrose'], elements_df['mstruct']),
+            'Conc_Fructan': Element.calculate_conc_fructan(elements_df['fructan'], elements_df['mstruct']),
+            'Conc_Nitrates': Element.calculate_Conc_Nitrates(elements_df['nitrates'], elements_df['mstruct']),
+            'Conc_Amino_Acids': Element.calculate_Conc_Amino_Acids(elements_df['amino_acids'], elements_df['mstruct']),
+            'Conc_Proteins': Element.calculate_conc_proteins(elements_df['proteins'], elements_df['mstruct']),
+            'Conc_cytokinins': Element.calculate_conc_cytokinins(elements_df['cytokinins'], elements_df['mstruct']),
+            'Cont_Fructan_DM': Element.calculate_fructan_g(elements_df['fructan']) / elements_df['sum_dry_mass'] * 100,
+            'Cont_WSC_DM': elements_df['WSC_g'] / elements_df['sum_dry_mass'] * 100,
+            'Surfacic_NS': Element.calculate_surfacic_non_structural(elements_df['sum_dry_mass'], elements_df['mstruct'], elements_df['green_area']),
+            'NS': Element.calculate_ratio_non_structural(elements_df['sum_dry_mass'], elements_df['mstruct']),
+            'N_content': elements_df['N_g'] / elements_df['sum_dry_mass'] * 100,
+            'N_content_total_DM': elements_df['N_g_total'] / elements_df['sum_dry_mass_total'] * 100,
+            'N_tot': elements_df['N_g_total'],
+            'SLN': Element.calculate_SLN(elements_df['nitrates'], elements_df['amino_acids'], elements_df['proteins'],
+                                         elements_df['Nstruct'], elements_df['green_area']).mask(is_growing),
+            'SLN_nonstruct': Element.calculate_SLN_nonstruct(elements_df['nitrates'], elements_df['amino_acids'], elements_df['proteins'],
+                                                             elements_df['green_area']).mask(is_growing),
+            'SLA': Element.calculate_SLA(elements_df['sum_dry_mass'], elements_df['green_area']).mask(is_growing),
+            'Photosynthetic_efficiency': elements_df['Ag'] / elements_df['PARa']}
+        pp_elements_df = _join_postprocessing_columns(elements_df, pp_elements_columns, ELEMENTS_RUN_POSTPROCESSING_VARIABLES)
+        schema.apply_schema(pp_elements_df)
         returned_dataframes.append(pp_elements_df)
     else:
         returned_dataframes.append(pd.DataFrame({'A': []}))
@@ -1037,36 +1057,41 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
 
         # hiddenzones_df = hiddenzones_df.merge(nb_replications_df, on='metamer')
 
-        hiddenzones_df['sum_dry_mass'] = HiddenZone.calculate_dry_mass(hiddenzones_df.fillna(0)['sucrose'],
-                                                                       hiddenzones_df.fillna(0)['fructan'],
-                                                                       hiddenzones_df.fillna(0)['amino_acids'],
-                                                                       hiddenzones_df.fillna(0)['proteins'],
+        hiddenzones_filled_df = hiddenzones_df[['sucrose', 'fructan', 'amino_acids', 'proteins']].fillna(0)
+        hiddenzones_df['sum_dry_mass'] = HiddenZone.calculate_dry_mass(hiddenzones_filled_df['sucrose'],
+                                                                       hiddenzones_filled_df['fructan'],
+                                                                       hiddenzones_filled_df['amino_acids'],
+                                                                       hiddenzones_filled_df['proteins'],
                                                                        hiddenzones_df['mstruct'])
-        hiddenzones_df['C_g'] = HiddenZone.calculate_C_g(hiddenzones_df.fillna(0)['sucrose'],
+        hiddenzones_df['C_g'] = HiddenZone.calculate_C_g(hiddenzones_filled_df['sucrose'],
                                                          0,  # hiddenzones_df.fillna(0)['starch'],
-                                                         hiddenzones_df.fillna(0)['fructan'],
-                                                         hiddenzones_df.fillna(0)['amino_acids'],
-                                                         hiddenzones_df.fillna(0)['proteins'],
+                                                         hiddenzones_filled_df['fructan'],
+                                                         hiddenzones_filled_df['amino_acids'],
+                                                         hiddenzones_filled_df['proteins'],
                                                          hiddenzones_df['mstruct'])
-        hiddenzones_df['N_g'] = HiddenZone.calculate_N_g(hiddenzones_df.fillna(0)['amino_acids'],
-                                                         hiddenzones_df.fillna(0)['proteins'],
+        hiddenzones_df['N_g'] = HiddenZone.calculate_N_g(hiddenzones_filled_df['amino_acids'],
+                                                         hiddenzones_filled_df['proteins'],
                                                          hiddenzones_df['leaf_enclosed_Nstruct'] + hiddenzones_df['internode_enclosed_Nstruct'])
-        hiddenzones_df['WSC_g'] = HiddenZone.calculate_WSC_g(hiddenzones_df.fillna(0)['sucrose'],
-                                                             hiddenzones_df.fillna(0)['fructan'])
-        pp_hiddenzones_df = pd.concat([hiddenzones_df, pd.DataFrame(columns=HIDDENZONE_POSTPROCESSING_VARIABLES)], sort=False)
-        pp_hiddenzones_df.loc[:, 'Conc_Amino_Acids'] = HiddenZone.calculate_Conc_Amino_Acids(hiddenzones_df['amino_acids'], hiddenzones_df['mstruct'])
-        pp_hiddenzones_df.loc[:, 'Conc_Fructan'] = HiddenZone.calculate_conc_fructan(hiddenzones_df['fructan'], hiddenzones_df['mstruct'])
-        pp_hiddenzones_df.loc[:, 'Conc_Proteins'] = HiddenZone.calculate_conc_protein(hiddenzones_df['proteins'], hiddenzones_df['mstruct'])
-        pp_hiddenzones_df.loc[:, 'Conc_Sucrose'] = HiddenZone.calculate_conc_sucrose(hiddenzones_df['sucrose'], hiddenzones_df['mstruct'])
-        pp_hiddenzones_df.loc[:, 'Cont_Fructan_DM'] = HiddenZone.calculate_fructan_g(hiddenzones_df['fructan']) / hiddenzones_df['sum_dry_mass'] * 100
-        pp_hiddenzones_df.loc[:, 'Cont_Proteins_DM'] = HiddenZone.calculate_proteins_g(hiddenzones_df['proteins']) / hiddenzones_df['sum_dry_mass'] * 100
-        pp_hiddenzones_df.loc[:, 'Cont_WSC_DM'] = hiddenzones_df['WSC_g'] / hiddenzones_df['sum_dry_mass'] * 100
-        pp_hiddenzones_df.loc[:, 'N_content'] = pp_hiddenzones_df['N_g'] / pp_hiddenzones_df['sum_dry_mass'] * 100
-        if set(hiddenzones_df.columns).issuperset(['delta_leaf_L', 'leaf_L']):
+        hiddenzones_df['WSC_g'] = HiddenZone.calculate_WSC_g(hiddenzones_filled_df['sucrose'],
+                                                             hiddenzones_filled_df['fructan'])
+        pp_hiddenzones_columns = {
+            'Conc_Amino_Acids': HiddenZone.calculate_Conc_Amino_Acids(hiddenzones_df['amino_acids'], hiddenzones_df['mstruct']),
+            'Conc_Fructan': HiddenZone.calculate_conc_fructan(hiddenzones_df['fructan'], hiddenzones_df['mstruct']),
+            'Conc_Proteins': HiddenZone.calculate_conc_protein(hiddenzones_df['proteins'], hiddenzones_df['mstruct']),
+            'Conc_Sucrose': HiddenZone.calculate_conc_sucrose(hiddenzones_df['sucrose'], hiddenzones_df['mstruct']),
+            'Cont_Fructan_DM': HiddenZone.calculate_fructan_g(hiddenzones_df['fructan']) / hiddenzones_df['sum_dry_mass'] * 100,
+            'Cont_Proteins_DM': HiddenZone.calculate_proteins_g(hiddenzones_df['proteins']) / hiddenzones_df['sum_dry_mass'] * 100,
+            'Cont_WSC_DM': hiddenzones_df['WSC_g'] / hiddenzones_df['sum_dry_mass'] * 100,
+            'N_content': hiddenzones_df['N_g'] / hiddenzones_df['sum_dry_mass'] * 100}
+        if 'leaf_L' in hiddenzones_df.columns and 'delta_leaf_L' not in hiddenzones_df.columns:
+            # the outputs are in chronological order: the delta of leaf length of each hidden zone is the difference with its previous output
+            pp_hiddenzones_columns['delta_leaf_L'] = hiddenzones_df.groupby(HIDDENZONE_INDEXES, observed=True)['leaf_L'].diff()
+        if 'leaf_L' in hiddenzones_df.columns:
             # this is temporary: those post-processing should be done in model "elong-wheat"
-            pp_hiddenzones_df.loc[:, 'RER'] = HiddenZone.calculate_RER(hiddenzones_df['delta_leaf_L'], hiddenzones_df['leaf_L'], delta_t)
-        pp_hiddenzones_df = pp_hiddenzones_df.reindex(columns=HIDDENZONE_RUN_POSTPROCESSING_VARIABLES, copy=False)
-        pp_hiddenzones_df[['plant', 'metamer']] = pp_hiddenzones_df[['plant', 'metamer']].astype(int)
+            delta_leaf_L = pp_hiddenzones_columns['delta_leaf_L'] if 'delta_leaf_L' in pp_hiddenzones_columns else hiddenzones_df['delta_leaf_L']
+            pp_hiddenzones_columns['RER'] = HiddenZone.calculate_RER(delta_leaf_L, hiddenzones_df['leaf_L'], delta_t)
+        pp_hiddenzones_df = _join_postprocessing_columns(hiddenzones_df, pp_hiddenzones_columns, HIDDENZONE_RUN_POSTPROCESSING_VARIABLES)
+        schema.apply_schema(pp_hiddenzones_df)
         returned_dataframes.append(pp_hiddenzones_df)
     else:
         returned_dataframes.append(pd.DataFrame({'A': []}))
@@ -1074,7 +1099,8 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
     # axes
     if axes_df is not None:
         axes_df = axes_df[axes_df['axis'] == 'MS'].copy()  # TODO : Temporary !
-        pp_axes_df = pd.concat([axes_df, pd.DataFrame(columns=AXES_POSTPROCESSING_VARIABLES)], sort=False)
+        pp_axes_df = axes_df
+        pp_axes_columns = {}
 
         # Integrated variables TODO : Homogeneiser la structure de ce bout de code
         if (hiddenzones_df is not None) and (organs_df is not None) and (elements_df is not None):
@@ -1083,24 +1109,43 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
             pp_axes_df = pp_axes_df.merge(axes_row_keys, how='outer', on=AXES_T_INDEXES)
             pp_axes_df.sort_values(AXES_T_INDEXES, inplace=True)  # Make sure axes_df is sorted
             pp_axes_df.reset_index(drop=True, inplace=True)
+            axes_time_steps = pp_axes_df['t'].unique()
 
-            # Roots
-            dry_mass_roots = organs_df[(organs_df['organ'] == 'roots')].groupby(['t', 'plant', 'axis'])['sum_dry_mass'].agg('sum')
+            # sum the variables of the organs, hidden zones and elements by axis, once for all
+            roots_sums = _sum_by_axis(organs_df[organs_df['organ'] == 'roots'], ['sum_dry_mass', 'mstruct'])
+            phloems_sums = _sum_by_axis(organs_df[organs_df['organ'] == 'phloem'], ['sum_dry_mass', 'N_g', 'C_g'])
+            organs_MS_sums = _sum_by_axis(organs_df[organs_df['axis'] == 'MS'], ['N_g', 'C_g'])
+            organs_WSC_g = _sum_by_axis(pp_organs_df, 'WSC_g')
+            roots_WSC_g = _sum_by_axis(pp_organs_df[organs_df['organ'] == 'roots'], 'WSC_g')
+            phloems_WSC_g = _sum_by_axis(pp_organs_df[organs_df['organ'] == 'phloem'], 'WSC_g')
 
-            # Total mstruct shoot and root
             hz_df_MS = hiddenzones_df[hiddenzones_df['axis'] == 'MS'].copy()
             elt_df_MS = elements_df[elements_df['axis'] == 'MS'].copy()
-            hz_df_MS['mstruct_tillers'] = hz_df_MS['mstruct'] * hz_df_MS['nb_replications']
-            elt_df_MS['mstruct_tillers'] = elt_df_MS['mstruct'] * elt_df_MS['nb_replications']
-            sum_mstruct_shoot = hz_df_MS.groupby(['t', 'plant', 'axis'])['mstruct_tillers'].agg('sum') + elt_df_MS.groupby(['t', 'plant', 'axis'])['mstruct_tillers'].agg('sum')
+            for tillers_variable, variable in (('mstruct_tillers', 'mstruct'), ('sum_dry_mass_tillers', 'sum_dry_mass'), ('N_g_tillers', 'N_g'),
+                                               ('WSC_g_tillers', 'WSC_g'), ('C_g_tillers', 'C_g')):
+                hz_df_MS[tillers_variable] = hz_df_MS[variable] * hz_df_MS['nb_replications']
+                elt_df_MS[tillers_variable] = elt_df_MS[variable] * elt_df_MS['nb_replications']
+            elt_df_MS['sum_dry_mass_total_tillers'] = elt_df_MS['sum_dry_mass_total'] * elt_df_MS['nb_replications']
+            elt_df_MS['N_g_total_tillers'] = elt_df_MS['N_g_total'] * elt_df_MS['nb_replications']
+            hz_sums = _sum_by_axis(hz_df_MS, ['mstruct_tillers', 'sum_dry_mass_tillers', 'N_g_tillers', 'WSC_g_tillers', 'C_g_tillers'])
+            elt_sums = _sum_by_axis(elt_df_MS, ['mstruct_tillers', 'sum_dry_mass_tillers', 'sum_dry_mass_total_tillers', 'N_g_tillers', 'N_g_total_tillers', 'WSC_g_tillers', 'C_g_tillers'])
+            is_laminae = elt_df_MS.element == 'LeafElement1'
+            laminae_sums = _sum_by_axis(elt_df_MS[is_laminae], ['mstruct_tillers', 'sum_dry_mass_tillers', 'WSC_g_tillers'])
+            stem_elements_WSC_g = _sum_by_axis(elt_df_MS[~is_laminae], 'WSC_g_tillers')
+
+            # Roots
+            dry_mass_roots = roots_sums['sum_dry_mass']
+
+            # Total mstruct shoot and root
+            sum_mstruct_shoot = hz_sums['mstruct_tillers'] + elt_sums['mstruct_tillers']
             sum_mstruct_shoot.fillna(0, inplace=True)
             if not elements_df.empty:
-                sum_mstruct_laminae = elt_df_MS[elt_df_MS.element == 'LeafElement1'].groupby(['t', 'plant', 'axis'])['mstruct_tillers'].agg('sum')
+                sum_mstruct_laminae = laminae_sums['mstruct_tillers']
                 if sum_mstruct_laminae.empty:
                     sum_mstruct_laminae = pd.Series([0] * len(axes_df.index), index=sum_mstruct_shoot.index)
                     sum_mstruct_stem = sum_mstruct_shoot
                 else:
-                    mux = (pd.MultiIndex.from_product((range(0, sum_mstruct_laminae.index.get_level_values(0).max() + 1),
+                    mux = (pd.MultiIndex.from_product((axes_time_steps,
                                                        sum_mstruct_laminae.index.get_level_values(1).unique(), sum_mstruct_laminae.index.get_level_values(2).unique())))
                     sum_mstruct_laminae = sum_mstruct_laminae.reindex(mux, fill_value=0)
                     sum_mstruct_stem = sum_mstruct_shoot - sum_mstruct_laminae
@@ -1108,45 +1153,37 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
             else:
                 sum_mstruct_laminae = pd.Series([0] * len(axes_df.index))
                 sum_mstruct_stem = sum_mstruct_shoot
-            sum_mstruct_roots = organs_df[(organs_df['organ'] == 'roots')].groupby(['t', 'plant', 'axis'])['mstruct'].agg('sum')
+            sum_mstruct_roots = roots_sums['mstruct']
 
             shoot_roots_mstruct_ratio = sum_mstruct_shoot / sum_mstruct_roots
 
             # Phloem
             phloem_shoot_root = 1 / (1 + 1 / shoot_roots_mstruct_ratio)
             phloem_stem = sum_mstruct_stem / (sum_mstruct_shoot + sum_mstruct_roots)
-            sum_dry_mass_phloem = organs_df[(organs_df['organ'] == 'phloem')].groupby(['t', 'plant', 'axis'])['sum_dry_mass'].agg('sum')
+            sum_dry_mass_phloem = phloems_sums['sum_dry_mass']
             sum_dry_mass_phloem_shoot = sum_dry_mass_phloem * phloem_shoot_root
             sum_dry_mass_phloem_roots = sum_dry_mass_phloem * (1 - phloem_shoot_root)
-            sum_N_g_phloem_shoot = organs_df[(organs_df['organ'] == 'phloem')].groupby(['t', 'plant', 'axis'])['N_g'].agg('sum') * phloem_shoot_root
-            sum_C_g_phloem_shoot = organs_df[(organs_df['organ'] == 'phloem')].groupby(['t', 'plant', 'axis'])['C_g'].agg('sum') * phloem_shoot_root
-            sum_WSC_g_phloem_shoot = pp_organs_df[(organs_df['organ'] == 'phloem')].groupby(['t', 'plant', 'axis'])['WSC_g'].agg('sum') * phloem_shoot_root
-            sum_WSC_g_phloem_stem = pp_organs_df[(organs_df['organ'] == 'phloem')].groupby(['t', 'plant', 'axis'])['WSC_g'].agg('sum') * phloem_stem
-            sum_WSC_g_phloem_roots = pp_organs_df[(organs_df['organ'] == 'phloem')].groupby(['t', 'plant', 'axis'])['WSC_g'].agg('sum') * (1 - phloem_shoot_root)
+            sum_N_g_phloem_shoot = phloems_sums['N_g'] * phloem_shoot_root
+            sum_C_g_phloem_shoot = phloems_sums['C_g'] * phloem_shoot_root
+            sum_WSC_g_phloem_shoot = phloems_WSC_g * phloem_shoot_root
+            sum_WSC_g_phloem_stem = phloems_WSC_g * phloem_stem
+            sum_WSC_g_phloem_roots = phloems_WSC_g * (1 - phloem_shoot_root)
 
             if not elements_df.empty:
                 phloem_laminae = sum_mstruct_laminae / (sum_mstruct_shoot + sum_mstruct_roots)
                 sum_dry_mass_phloem_laminae = sum_dry_mass_phloem * phloem_laminae
-                sum_WSC_g_phloem_laminae = pp_organs_df[(organs_df['organ'] == 'phloem')].groupby(['t', 'plant', 'axis'])['WSC_g'].agg('sum') * phloem_laminae
+                sum_WSC_g_phloem_laminae = phloems_WSC_g * phloem_laminae
 
             # Total shoot
-            hz_df_MS['sum_dry_mass_tillers'] = hz_df_MS['sum_dry_mass'] * hz_df_MS['nb_replications']
-            elt_df_MS['sum_dry_mass_tillers'] = elt_df_MS['sum_dry_mass'] * elt_df_MS['nb_replications']
-            elt_df_MS['sum_dry_mass_total_tillers'] = elt_df_MS['sum_dry_mass_total'] * elt_df_MS['nb_replications']
-            sum_dry_mass_shoot = sum_dry_mass_phloem_shoot + \
-                                 hz_df_MS.groupby(['t', 'plant', 'axis'])['sum_dry_mass_tillers'].agg('sum') + \
-                                 elt_df_MS.groupby(['t', 'plant', 'axis'])['sum_dry_mass_tillers'].agg('sum')
+            sum_dry_mass_shoot = sum_dry_mass_phloem_shoot + hz_sums['sum_dry_mass_tillers'] + elt_sums['sum_dry_mass_tillers']
             if not elements_df.empty:
-                sum_dry_mass_laminae = sum_dry_mass_phloem_laminae + \
-                                       elt_df_MS[elt_df_MS.element == 'LeafElement1'].groupby(['t', 'plant', 'axis'])['sum_dry_mass_tillers'].agg('sum')
+                sum_dry_mass_laminae = sum_dry_mass_phloem_laminae + laminae_sums['sum_dry_mass_tillers']
                 sum_dry_mass_laminae.fillna(0, inplace=True)
                 sum_dry_mass_stem = sum_dry_mass_shoot - sum_dry_mass_laminae
             else:
                 sum_dry_mass_laminae = pd.Series([0] * len(axes_df.index))
                 sum_dry_mass_stem = sum_dry_mass_shoot
-            sum_dry_mass_total_shoot = sum_dry_mass_phloem_shoot + \
-                                       hz_df_MS.groupby(['t', 'plant', 'axis'])['sum_dry_mass_tillers'].agg('sum') + \
-                                       elt_df_MS.groupby(['t', 'plant', 'axis'])['sum_dry_mass_total_tillers'].agg('sum')
+            sum_dry_mass_total_shoot = sum_dry_mass_phloem_shoot + hz_sums['sum_dry_mass_tillers'] + elt_sums['sum_dry_mass_total_tillers']
             # Total root
             sum_dry_mass_roots = sum_dry_mass_phloem_roots + dry_mass_roots
 
@@ -1155,21 +1192,12 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
             sum_mstruct = sum_mstruct_roots + sum_mstruct_shoot
 
             # N content
-            hz_df_MS['N_g_tillers'] = hz_df_MS['N_g'] * hz_df_MS['nb_replications']
-            elt_df_MS['N_g_tillers'] = elt_df_MS['N_g'] * elt_df_MS['nb_replications']
-            elt_df_MS['N_g_total_tillers'] = elt_df_MS['N_g_total'] * elt_df_MS['nb_replications']
-            sum_N_g = (organs_df[organs_df['axis'] == 'MS'].groupby(['t', 'plant', 'axis'])['N_g'].agg('sum') +
-                       hz_df_MS.groupby(['t', 'plant', 'axis'])['N_g_tillers'].agg('sum') +
-                       elt_df_MS.groupby(['t', 'plant', 'axis'])['N_g_tillers'].agg('sum'))
+            sum_N_g = organs_MS_sums['N_g'] + hz_sums['N_g_tillers'] + elt_sums['N_g_tillers']
             N_content = sum_N_g / sum_dry_mass * 100
             N_content_mstruct = sum_N_g / sum_mstruct * 100
 
-            sum_N_g_shoot = (sum_N_g_phloem_shoot +
-                             hz_df_MS.groupby(['t', 'plant', 'axis'])['N_g_tillers'].agg('sum') +
-                             elt_df_MS.groupby(['t', 'plant', 'axis'])['N_g_tillers'].agg('sum')).fillna(0)
-            sum_N_g_total_shoot = (sum_N_g_phloem_shoot +
-                                   hz_df_MS.groupby(['t', 'plant', 'axis'])['N_g_tillers'].agg('sum') +
-                                   elt_df_MS.groupby(['t', 'plant', 'axis'])['N_g_total_tillers'].agg('sum'))
+            sum_N_g_shoot = (sum_N_g_phloem_shoot + hz_sums['N_g_tillers'] + elt_sums['N_g_tillers']).fillna(0)
+            sum_N_g_total_shoot = sum_N_g_phloem_shoot + hz_sums['N_g_tillers'] + elt_sums['N_g_total_tillers']
             N_content_shoot = sum_N_g_shoot / sum_dry_mass_shoot * 100
             N_content_total_DM_shoot = sum_N_g_total_shoot / sum_dry_mass_total_shoot * 100
             N_content_mstruct_shoot = sum_N_g_shoot / sum_mstruct_shoot * 100
@@ -1178,35 +1206,19 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
             N_content_mstruct_roots = (N_content_mstruct * sum_mstruct - N_content_mstruct_shoot * sum_mstruct_shoot) / sum_mstruct_roots
 
             # WSC
-            hz_df_MS['WSC_g_tillers'] = hz_df_MS['WSC_g'] * hz_df_MS['nb_replications']
-            elt_df_MS['WSC_g_tillers'] = elt_df_MS['WSC_g'] * elt_df_MS['nb_replications']
-
-            WSC_g_plant = hz_df_MS.groupby(['t', 'plant', 'axis'])['WSC_g_tillers'].agg('sum') + elt_df_MS.groupby(['t', 'plant', 'axis'])['WSC_g_tillers'].agg('sum') + \
-                          pp_organs_df.groupby(['t', 'plant', 'axis'])['WSC_g'].agg('sum')
+            WSC_g_plant = hz_sums['WSC_g_tillers'] + elt_sums['WSC_g_tillers'] + organs_WSC_g
 
-            sum_WSC_g_shoot = (sum_WSC_g_phloem_shoot +
-                               hz_df_MS.groupby(['t', 'plant', 'axis'])['WSC_g_tillers'].agg('sum') +
-                               elt_df_MS.groupby(['t', 'plant', 'axis'])['WSC_g_tillers'].agg('sum'))
+            sum_WSC_g_shoot = sum_WSC_g_phloem_shoot + hz_sums['WSC_g_tillers'] + elt_sums['WSC_g_tillers']
             if not elements_df.empty:
-                sum_WSC_g_laminae = (sum_WSC_g_phloem_laminae +
-                                     elt_df_MS[elt_df_MS.element == 'LeafElement1'].groupby(['t', 'plant', 'axis'])['WSC_g_tillers'].agg('sum')).fillna(0)
+                sum_WSC_g_laminae = (sum_WSC_g_phloem_laminae + laminae_sums['WSC_g_tillers']).fillna(0)
             else:
                 sum_WSC_g_laminae = pd.Series([0] * len(axes_df.index))
-            sum_WSC_g_stem = (sum_WSC_g_phloem_stem +
-                              hz_df_MS.groupby(['t', 'plant', 'axis'])['WSC_g_tillers'].agg('sum') +
-                              elt_df_MS[~(elt_df_MS.element == 'LeafElement1')].groupby(['t', 'plant', 'axis'])['WSC_g_tillers'].agg('sum'))
-            sum_WSC_g_roots = (sum_WSC_g_phloem_roots + pp_organs_df[(organs_df['organ'] == 'roots')].groupby(['t', 'plant', 'axis'])['WSC_g'].agg('sum'))
+            sum_WSC_g_stem = sum_WSC_g_phloem_stem + hz_sums['WSC_g_tillers'] + stem_elements_WSC_g
+            sum_WSC_g_roots = sum_WSC_g_phloem_roots + roots_WSC_g
 
             # C/N ratio
-            hz_df_MS['C_g_tillers'] = hz_df_MS['C_g'] * hz_df_MS['nb_replications']
-            elt_df_MS['C_g_tillers'] = elt_df_MS['C_g'] * elt_df_MS['nb_replications']
-
-            sum_C_g = (organs_df[organs_df['axis'] == 'MS'].groupby(['t', 'plant', 'axis'])['C_g'].agg('sum') +
-                       hz_df_MS.groupby(['t', 'plant', 'axis'])['C_g_tillers'].agg('sum') +
-                       elt_df_MS.groupby(['t', 'plant', 'axis'])['C_g_tillers'].agg('sum'))
-            sum_C_g_shoot = (sum_C_g_phloem_shoot +
-                             hz_df_MS.groupby(['t', 'plant', 'axis'])['C_g_tillers'].agg('sum') +
-                             elt_df_MS.groupby(['t', 'plant', 'axis'])['C_g_tillers'].agg('sum')).fillna(0)
+            sum_C_g = organs_MS_sums['C_g'] + hz_sums['C_g_tillers'] + elt_sums['C_g_tillers']
+            sum_C_g_shoot = (sum_C_g_phloem_shoot + hz_sums['C_g_tillers'] + elt_sums['C_g_tillers']).fillna(0)
 
             C_N_ratio = sum_C_g / sum_N_g
             C_N_ratio_shoot = sum_C_g_shoot / sum_N_g_shoot
@@ -1218,14 +1230,13 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
             if not elements_df.empty:
                 elements_df['Tillers_Photosynthesis'] = elements_df['Photosynthesis'] * elements_df['nb_replications']
                 elements_df['Tillers_Photosynthesis_An'] = elements_df['An'] * elements_df['green_area'] * 3600 * elements_df['nb_replications']
-                tillers_photosynthesis = elements_df[elements_df['axis'] == 'MS'].groupby(['t', 'plant', 'axis'])['Tillers_Photosynthesis'].agg('sum')  # TEMPORARY : porter au niveau de la plante
-                mux = (pd.MultiIndex.from_product((range(0, tillers_photosynthesis.index.get_level_values(0).max() + 1),
+                photosynthesis_sums = _sum_by_axis(elements_df[elements_df['axis'] == 'MS'], ['Tillers_Photosynthesis', 'Tillers_Photosynthesis_An', 'Photosynthesis'])
+                tillers_photosynthesis = photosynthesis_sums['Tillers_Photosynthesis']  # TEMPORARY : porter au niveau de la plante
+                mux = (pd.MultiIndex.from_product((axes_time_steps,
                                                    tillers_photosynthesis.index.get_level_values(1).unique(), tillers_photosynthesis.index.get_level_values(2).unique())))
                 tillers_photosynthesis = tillers_photosynthesis.reindex(mux, fill_value=0)
-                tillers_photosynthesis_An = elements_df[elements_df['axis'] == 'MS'].groupby(['t', 'plant', 'axis'])['Tillers_Photosynthesis_An'].agg('sum')
-                tillers_photosynthesis_An = tillers_photosynthesis_An.reindex(mux, fill_value=0)
-                tot_photosynthesis = elements_df[elements_df['axis'] == 'MS'].groupby(['t', 'plant', 'axis'])['Photosynthesis'].agg('sum')
-                tot_photosynthesis = tot_photosynthesis.reindex(mux, fill_value=0)
+                tillers_photosynthesis_An = photosynthesis_sums['Tillers_Photosynthesis_An'].reindex(mux, fill_value=0)
+                tot_photosynthesis = photosynthesis_sums['Photosynthesis'].reindex(mux, fill_value=0)
             else:
                 tillers_photosynthesis = pd.Series([0] * len(axes_df.index))
                 tillers_photosynthesis_An = pd.Series([0] * len(axes_df.index))
@@ -1264,65 +1275,63 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
                                           EcophysiologicalConstants.AMINO_ACIDS_N_RATIO) * roots_df.mstruct
             C_exudated_roots = roots_df['sum_C_exudated'].reset_index(drop=True)
 
-            # Add to axes df
-            pp_axes_df.sort_values(AXES_T_INDEXES, inplace=True)  # Make sure axes_df is sorted
-            pp_axes_df.loc[:, 'C_N_ratio'] = C_N_ratio.values
-            pp_axes_df.loc[:, 'C_N_ratio_shoot'] = C_N_ratio_shoot.values
-            pp_axes_df.loc[:, 'N_content'] = N_content.values
-            pp_axes_df.loc[:, 'N_content_shoot'] = N_content_shoot.values
-            pp_axes_df.loc[:, 'N_content_roots'] = N_content_roots.values
-            pp_axes_df.loc[:, 'N_content_mstruct'] = N_content_mstruct.values
-            pp_axes_df.loc[:, 'N_content_mstruct_shoot'] = N_content_mstruct_shoot.values
-            pp_axes_df.loc[:, 'N_content_total_DM_shoot'] = N_content_total_DM_shoot.values
-            pp_axes_df.loc[:, 'N_content_mstruct_roots'] = N_content_mstruct_roots.values
-            pp_axes_df.loc[:, 'sum_N_g'] = sum_N_g.values
-            pp_axes_df.loc[:, 'sum_N_g_shoot'] = sum_N_g_shoot.values
-            pp_axes_df.loc[:, 'sum_dry_mass'] = sum_dry_mass.values
-            pp_axes_df.loc[:, 'sum_dry_mass_shoot'] = sum_dry_mass_shoot.values
-            pp_axes_df.loc[:, 'sum_dry_mass_laminae'] = sum_dry_mass_laminae.values
-            pp_axes_df.loc[:, 'sum_dry_mass_stem'] = sum_dry_mass_stem.values
-            pp_axes_df.loc[:, 'sum_dry_mass_roots'] = sum_dry_mass_roots.values
-            pp_axes_df.loc[:, 'sum_C_g'] = sum_C_g.values
-            pp_axes_df.loc[:, 'sum_NSC_g'] = sum_NSC_g.values
-            pp_axes_df.loc[:, 'dry_mass_phloem'] = sum_dry_mass_phloem.values
-            pp_axes_df.loc[:, 'shoot_roots_ratio'] = pp_axes_df['sum_dry_mass_shoot'] / pp_axes_df['sum_dry_mass_roots']
-            pp_axes_df.loc[:, 'shoot_roots_mstruct_ratio'] = shoot_roots_mstruct_ratio.values
-            pp_axes_df.loc[:, 'Total_Photosynthesis'] = tot_photosynthesis.values
-            pp_axes_df.loc[:, 'Tillers_Photosynthesis'] = tillers_photosynthesis.values
-            pp_axes_df.loc[:, 'Tillers_Photosynthesis_An'] = tillers_photosynthesis_An.values
-            pp_axes_df.loc[:, 'NNI'] = NNI.values
-            pp_axes_df.loc[:, 'NS_roots'] = NS_roots.values
-            pp_axes_df.loc[:, 'NS_shoot'] = NS_shoot.values
-            pp_axes_df.loc[:, 'NS_stem'] = NS_stem.values
-            pp_axes_df.loc[:, 'NS_laminae'] = NS_laminae.values
-            pp_axes_df.loc[:, 'NS'] = NS.values
-            pp_axes_df.loc[:, 'mstruct_shoot'] = sum_mstruct_shoot.values
-            pp_axes_df.loc[:, 'mstruct_laminae'] = sum_mstruct_laminae.values
-            pp_axes_df.loc[:, 'mstruct_stem'] = sum_mstruct_stem.values
-            pp_axes_df.loc[:, 'C_respired_shoot'] = C_respired_shoot
-            pp_axes_df.loc[:, 'C_respired_roots'] = C_respired_roots
-            pp_axes_df.loc[:, 'WSC_g'] = WSC_g_plant.values
-            pp_axes_df.loc[:, 'Cont_WSC_DM'] = pp_axes_df['WSC_g'] / pp_axes_df['sum_dry_mass'] * 100
-            pp_axes_df.loc[:, 'Cont_WSC_DM_shoot'] = sum_WSC_g_shoot.values / sum_dry_mass_shoot.values * 100
-            if sum_dry_mass_laminae.values.sum() != 0:
-                pp_axes_df.loc[:, 'Cont_WSC_DM_laminae'] = sum_WSC_g_laminae.values / sum_dry_mass_laminae.values * 100
-            else:
-                pp_axes_df.loc[:, 'Cont_WSC_DM_laminae'] = [0] * len(pp_axes_df.index)
-            pp_axes_df.loc[:, 'Cont_WSC_DM_stem'] = sum_WSC_g_stem.values / sum_dry_mass_stem.values * 100
-            pp_axes_df.loc[:, 'Cont_WSC_DM_roots'] = sum_WSC_g_roots.values / sum_dry_mass_roots.values * 100
-            pp_axes_df.loc[:, 'C_exudated'] = C_exudated_roots.values
-
-        pp_axes_df = pp_axes_df.reindex(AXES_RUN_POSTPROCESSING_VARIABLES, axis=1, copy=False)
-        pp_axes_df['plant'] = pp_axes_df['plant'].astype(int)
+            # Add to axes df, in one go
+            pp_axes_columns = {'C_N_ratio': C_N_ratio.values,
+                               'C_N_ratio_shoot': C_N_ratio_shoot.values,
+                               'N_content': N_content.values,
+                               'N_content_shoot': N_content_shoot.values,
+                               'N_content_roots': N_content_roots.values,
+                               'N_content_mstruct': N_content_mstruct.values,
+                               'N_content_mstruct_shoot': N_content_mstruct_shoot.values,
+                               'N_content_total_DM_shoot': N_content_total_DM_shoot.values,
+                               'N_content_mstruct_roots': N_content_mstruct_roots.values,
+                               'sum_N_g': sum_N_g.values,
+                               'sum_N_g_shoot': sum_N_g_shoot.values,
+                               'sum_dry_mass': sum_dry_mass.values,
+                               'sum_dry_mass_shoot': sum_dry_mass_shoot.values,
+                               'sum_dry_mass_laminae': sum_dry_mass_laminae.values,
+                               'sum_dry_mass_stem': sum_dry_mass_stem.values,
+                               'sum_dry_mass_roots': sum_dry_mass_roots.values,
+                               'sum_C_g': sum_C_g.values,
+                               'sum_NSC_g': sum_NSC_g.values,
+                               'dry_mass_phloem': sum_dry_mass_phloem.values,
+                               'shoot_roots_ratio': sum_dry_mass_shoot.values / sum_dry_mass_roots.values,
+                               'shoot_roots_mstruct_ratio': shoot_roots_mstruct_ratio.values,
+                               'Total_Photosynthesis': tot_photosynthesis.values,
+                               'Tillers_Photosynthesis': tillers_photosynthesis.values,
+                               'Tillers_Photosynthesis_An': tillers_photosynthesis_An.values,
+                               'NNI': NNI.values,
+                               'NS_roots': NS_roots.values,
+                               'NS_shoot': NS_shoot.values,
+                               'NS_stem': NS_stem.values,
+                               'NS_laminae': NS_laminae.values,
+                               'NS': NS.values,
+                               'mstruct_shoot': sum_mstruct_shoot.values,
+                               'mstruct_laminae': sum_mstruct_laminae.values,
+                               'mstruct_stem': sum_mstruct_stem.values,
+                               # the respiration is indexed by time step
+                               'C_respired_shoot': C_respired_shoot.reindex(pp_axes_df['t']).values,
+                               'C_respired_roots': C_respired_roots.reindex(pp_axes_df.index).values,
+                               'Cont_WSC_DM': WSC_g_plant.values / sum_dry_mass.values * 100,
+                               'Cont_WSC_DM_shoot': sum_WSC_g_shoot.values / sum_dry_mass_shoot.values * 100,
+                               'Cont_WSC_DM_stem': sum_WSC_g_stem.values / sum_dry_mass_stem.values * 100,
+                               'Cont_WSC_DM_roots': sum_WSC_g_roots.values / sum_dry_mass_roots.values * 100,
+                               'C_exudated': C_exudated_roots.values}
+            # the content is null at the steps without laminae, so that it does not depend on the other steps post-processed at once
+            with np.errstate(divide='ignore', invalid='ignore'):
+                Cont_WSC_DM_laminae = sum_WSC_g_laminae.values / sum_dry_mass_laminae.values * 100
+            pp_axes_columns['Cont_WSC_DM_laminae'] = np.where(sum_dry_mass_laminae.values != 0, Cont_WSC_DM_laminae, 0)
+
+        pp_axes_df = _join_postprocessing_columns(pp_axes_df, pp_axes_columns, AXES_RUN_POSTPROCESSING_VARIABLES)
+        schema.apply_schema(pp_axes_df)
         returned_dataframes.append(pp_axes_df)
     else:
         returned_dataframes.append(pd.DataFrame({'A': []}))
 
     # soils
     if soils_df is not None:
-        pp_soils_df = pd.concat([soils_df, pd.DataFrame(columns=SOILS_POSTPROCESSING_VARIABLES)])
-        pp_soils_df = pp_soils_df.reindex(columns=SOILS_RUN_POSTPROCESSING_VARIABLES, copy=False)
-        pp_soils_df[['plant']] = pp_soils_df[['plant']].astype(int)
+        pp_soils_df = _join_postprocessing_columns(soils_df, {}, SOILS_RUN_POSTPROCESSING_VARIABLES)
+        schema.apply_schema(pp_soils_df)
         returned_dataframes.append(pp_soils_df)
     else:
         returned_dataframes.append(pd.DataFrame({'A': []}))
@@ -1330,15 +1339,399 @@ def postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_d
     return tuple(returned_dataframes)
 
 
+def _postprocess_time_chunk(time_chunk):
+    """Compute the post-processing of the outputs of a chunk of time steps in a worker process.
+
+    :param tuple time_chunk: the outputs of the chunk, as the keyword arguments of :func:`postprocessing`, and the delta t between 2 outputs.
+
+    :return: The post-processing of the chunk, as returned by :func:`postprocessing`.
+    :rtype: tuple [pandas.DataFrame]
+    """
+    outputs, delta_t = time_chunk
+    return postprocessing(delta_t=delta_t, **outputs)
+
+
+def parallel_postprocessing(plants_df=None, axes_df=None, metamers_df=None, hiddenzones_df=None, organs_df=None, elements_df=None, soils_df=None, delta_t=1,
+                            processes=None, nb_chunks=None):
+    """
+    Compute the same post-processing as :func:`postprocessing`, in parallel.
+
+    The time steps of the outputs are split in `nb_chunks` ranges, and the post-processing of each range are computed by :func:`postprocessing`
+    in a worker process. All the scales of a range are post-processed in the same worker process, so that the aggregations at axis scale, which depend
+    on the organs, hidden zones and elements at the same step, are computed as in :func:`postprocessing`. The delta of leaf length, which depends
+    on the previous step, is computed on the whole outputs before the split. The post-processing of the ranges are then concatenated.
+    Thus, for outputs sorted by time as returned by a simulation, the post-processing are the same as those computed by :func:`postprocessing`.
+    Unlike :func:`postprocessing`, the outputs given are not modified.
+
+    :param pandas.DataFrame plants_df: CN-Wheat outputs at plant scale.
+    :param pandas.DataFrame axes_df: CN-Wheat outputs at axis scale.
+    :param pandas.DataFrame metamers_df: CN-Wheat outputs at phytomer scale.
+    :param pandas.DataFrame hiddenzones_df: CN-Wheat outputs at hidden zone scale.
+    :param pandas.DataFrame organs_df: CN-Wheat outputs at organ scale.
+    :param pandas.DataFrame elements_df: CN-Wheat outputs at element scale.
+    :param pandas.DataFrame soils_df: CN-Wheat outputs at soil scale.
+    :param float delta_t: Delta t between 2 outputs (in seconds).
+    :param int processes: the number of worker processes ; default is `None` (use the number of CPUs).
+    :param int nb_chunks: the number of ranges of time steps ; default is `None` (one range per worker process).
+
+    :return: post-processing for each scale, as returned by :func:`postprocessing`.
+    :rtype: tuple [pandas.DataFrame]
+    """
+    outputs = {'plants_df': plants_df, 'axes_df': axes_df, 'metamers_df': metamers_df, 'hiddenzones_df': hiddenzones_df,
+               'organs_df': organs_df, 'elements_df': elements_df, 'soils_df': soils_df}
+    outputs = {name: outputs_df for name, outputs_df in outputs.items() if outputs_df is not None}
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if nb_chunks is None:
+        nb_chunks = processes
+    time_steps = np.unique(np.concatenate([outputs_df['t'].values for outputs_df in outputs.values()])) if outputs else np.array([])
+    time_chunks = [time_chunk for time_chunk in np.array_split(time_steps, nb_chunks) if len(time_chunk) != 0]
+    if len(time_chunks) <= 1 or processes <= 1:
+        return postprocessing(delta_t=delta_t, **{name: outputs_df.copy() for name, outputs_df in outputs.items()})
+
+    if 'hiddenzones_df' in outputs and 'leaf_L' in hiddenzones_df.columns and 'delta_leaf_L' not in hiddenzones_df.columns:
+        hiddenzones_df = outputs['hiddenzones_df'] = hiddenzones_df.copy()
+        hiddenzones_df['delta_leaf_L'] = hiddenzones_df.groupby(HIDDENZONE_INDEXES, observed=True)['leaf_L'].diff()
+
+    # the index of the range of time steps of each row of the outputs
+    time_chunks_ends = np.array([time_chunk[-1] for time_chunk in time_chunks])
+    rows_time_chunks = {name: np.searchsorted(time_chunks_ends, outputs_df['t'].values) for name, outputs_df in outputs.items()}
+    time_chunks_outputs = [({name: outputs_df[rows_time_chunks[name] == i] for name, outputs_df in outputs.items()}, delta_t)
+                           for i in range(len(time_chunks))]
+
+    pool = multiprocessing.Pool(processes=processes)
+    try:
+        time_chunks_postprocessing = pool.map(_postprocess_time_chunk, time_chunks_outputs)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    returned_dataframes = []
+    for i, scale in enumerate(POSTPROCESSING_SCALES):
+        postprocessing_dfs = [chunk_postprocessing[i] for chunk_postprocessing in time_chunks_postprocessing]
+        if 't' not in postprocessing_dfs[0].columns:
+            returned_dataframes.append(postprocessing_dfs[0])  # the outputs needed by this scale were not given
+            continue
+        # the post-processing keep the index of the outputs, except the axes which are re-indexed after being sorted by time
+        postprocessing_df = pd.concat(postprocessing_dfs, ignore_index=scale == 'axes')
+        returned_dataframes.append(schema.apply_schema(postprocessing_df))
+
+    return tuple(returned_dataframes)
+
+
+class StreamingPostprocessing(object):
+    """
+    Compute the post-processing of the outputs at each step of a simulation, as soon as the outputs of the step are produced,
+    and append them to a file per scale.
+
+    Most of the post-processing only depends on the outputs of the same step. Thus, the post-processing of each step are computed
+    by :func:`postprocessing` from the outputs of this step only. The few post-processing which depend on the previous steps
+    are computed from a small rolling state: the length of the leaves at the previous step, to compute the delta of leaf length
+    used by the Relative Extension Rate when the outputs do not provide it. Thus, neither the outputs nor the post-processing
+    of the whole simulation are held in memory.
+
+    An instance can be passed as `output_sink` to :meth:`Simulation.run_until <cnwheat.simulation.Simulation.run_until>`.
+
+    :param dict filepaths: the paths of the post-processing files, indexed by scale (see :attr:`POSTPROCESSING_SCALES`). The scales not
+           in `filepaths` are not written ; default is `None` (write no file, e.g. to only display :attr:`last_postprocessing` while the simulation runs).
+    :param float delta_t: Delta t between 2 outputs (in seconds).
+    :param cnwheat.io.PopulationOutputsSink outputs_sink: a sink to append the outputs of each step to, so that the population is converted
+           to dataframes only once for both the outputs and the post-processing ; default is `None`.
+    :param sinks_options: the options of the sinks of the post-processing, passed to :class:`cnwheat.io.OutputsSink` (e.g. `flush_interval` or `format_`).
+    """
+
+    def __init__(self, filepaths=None, delta_t=1, outputs_sink=None, **sinks_options):
+        filepaths = filepaths or {}
+        unknown_scales = set(filepaths).difference(POSTPROCESSING_SCALES)
+        if unknown_scales:
+            raise cnwheat_io.OutputsSinkError('Unknown scales {}: use some of {}.'.format(sorted(unknown_scales), POSTPROCESSING_SCALES))
+        self.sinks = {scale: cnwheat_io.OutputsSink(filepath, **sinks_options) for scale, filepath in filepaths.items()}  #: the sinks of the post-processing, indexed by scale
+        self.delta_t = delta_t  #: Delta t between 2 outputs (in seconds)
+        self.outputs_sink = outputs_sink  #: the sink of the outputs
+        self.previous_leaf_L = None  #: the length of the leaves of the hidden zones at the previous step, indexed by :attr:`HIDDENZONE_INDEXES`
+        self.last_postprocessing = {}  #: the post-processing of the last step, indexed by scale
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __call__(self, t, population, soils):
+        """Compute the post-processing of `population` and `soils` at time `t`, and append them to the files.
+
+        :param float t: the time of the step.
+        :param model.Population population: the population.
+        :param dict soils: the soils.
+        """
+        outputs = converter.to_dataframes(population, soils)
+        if self.outputs_sink is not None:
+            self.outputs_sink.append(t, outputs)
+        plants_df, axes_df, phytomers_df, organs_df, hiddenzones_df, elements_df, soils_df = outputs
+        self.postprocess(t, plants_df=plants_df, axes_df=axes_df, metamers_df=phytomers_df, hiddenzones_df=hiddenzones_df,
+                         organs_df=organs_df, elements_df=elements_df, soils_df=soils_df)
+
+    def postprocess(self, t, plants_df=None, axes_df=None, metamers_df=None, hiddenzones_df=None, organs_df=None, elements_df=None, soils_df=None):
+        """Compute the post-processing of the outputs at time `t`, and append them to the files.
+
+        The outputs are those of a single step, with or without the time column `t`, and are not modified.
+        The post-processing are the same as those computed by :func:`postprocessing` on the outputs of the whole simulation.
+
+        :param float t: the time of the step.
+        :param pandas.DataFrame plants_df: CN-Wheat outputs at plant scale.
+        :param pandas.DataFrame axes_df: CN-Wheat outputs at axis scale.
+        :param pandas.DataFrame metamers_df: CN-Wheat outputs at phytomer scale.
+        :param pandas.DataFrame hiddenzones_df: CN-Wheat outputs at hidden zone scale.
+        :param pandas.DataFrame organs_df: CN-Wheat outputs at organ scale.
+        :param pandas.DataFrame elements_df: CN-Wheat outputs at element scale.
+        :param pandas.DataFrame soils_df: CN-Wheat outputs at soil scale.
+
+        :return: The post-processing of the step, indexed by scale (see :attr:`POSTPROCESSING_SCALES`).
+        :rtype: dict
+        """
+        outputs = {'plants_df': plants_df, 'axes_df': axes_df, 'metamers_df': metamers_df, 'hiddenzones_df': hiddenzones_df,
+                   'organs_df': organs_df, 'elements_df': elements_df, 'soils_df': soils_df}
+        for name, outputs_df in outputs.items():
+            if outputs_df is None:
+                continue
+            outputs_df = outputs_df.copy()  # postprocessing adds columns to the outputs
+            if 't' in outputs_df.columns:
+                outputs_df['t'] = t
+            else:
+                outputs_df.insert(0, 't', t)
+            outputs[name] = outputs_df
+        return self._postprocess(t, outputs)
+
+    def postprocess_steps(self, plants_df=None, axes_df=None, metamers_df=None, hiddenzones_df=None, organs_df=None, elements_df=None, soils_df=None):
+        """Compute the post-processing of the outputs of several consecutive steps, and append them to the files.
+
+        The outputs have the time column `t`, are sorted by time, and are not modified. All the outputs given must cover the same steps,
+        because the post-processing of a scale can depend on the outputs of another scale at the same step (e.g. the concentrations in the phloem
+        depend on the structural mass of the axis). The steps must follow the steps already post-processed.
+
+        :param pandas.DataFrame plants_df: CN-Wheat outputs at plant scale.
+        :param pandas.DataFrame axes_df: CN-Wheat outputs at axis scale.
+        :param pandas.DataFrame metamers_df: CN-Wheat outputs at phytomer scale.
+        :param pandas.DataFrame hiddenzones_df: CN-Wheat outputs at hidden zone scale.
+        :param pandas.DataFrame organs_df: CN-Wheat outputs at organ scale.
+        :param pandas.DataFrame elements_df: CN-Wheat outputs at element scale.
+        :param pandas.DataFrame soils_df: CN-Wheat outputs at soil scale.
+
+        :return: The post-processing of the steps, indexed by scale (see :attr:`POSTPROCESSING_SCALES`).
+        :rtype: dict
+        """
+        outputs = {'plants_df': plants_df, 'axes_df': axes_df, 'metamers_df': metamers_df, 'hiddenzones_df': hiddenzones_df,
+                   'organs_df': organs_df, 'elements_df': elements_df, 'soils_df': soils_df}
+        outputs = {name: None if outputs_df is None else outputs_df.copy() for name, outputs_df in outputs.items()}  # postprocessing adds columns to the outputs
+        return self._postprocess(None, outputs)
+
+    def _postprocess(self, t, outputs):
+        """Compute the post-processing of `outputs`, and append them to the sinks with the time `t` (`None` to keep the time of each row)."""
+        hiddenzones_df = outputs['hiddenzones_df']
+        if hiddenzones_df is not None and 'leaf_L' in hiddenzones_df.columns and 'delta_leaf_L' not in hiddenzones_df.columns:
+            # the delta within the steps, then the delta between the first step of each hidden zone and the last step already post-processed
+            delta_leaf_L = hiddenzones_df.groupby(HIDDENZONE_INDEXES, observed=True)['leaf_L'].diff().to_numpy(copy=True)
+            is_first_step = ~hiddenzones_df.duplicated(HIDDENZONE_INDEXES).values
+            if self.previous_leaf_L is not None:
+                first_steps_df = hiddenzones_df[is_first_step]
+                first_steps_index = pd.MultiIndex.from_frame(first_steps_df[HIDDENZONE_INDEXES].astype(object))
+                delta_leaf_L[is_first_step] = first_steps_df['leaf_L'].values - self.previous_leaf_L.reindex(first_steps_index).values
+            hiddenzones_df['delta_leaf_L'] = delta_leaf_L
+            last_steps_df = hiddenzones_df.drop_duplicates(HIDDENZONE_INDEXES, keep='last')
+            last_leaf_L = pd.Series(last_steps_df['leaf_L'].values, index=pd.MultiIndex.from_frame(last_steps_df[HIDDENZONE_INDEXES].astype(object)))
+            self.previous_leaf_L = last_leaf_L if self.previous_leaf_L is None else last_leaf_L.combine_first(self.previous_leaf_L)
+
+        self.last_postprocessing = {}
+        for scale, postprocessing_df in zip(POSTPROCESSING_SCALES, postprocessing(delta_t=self.delta_t, **outputs)):
+            if 't' not in postprocessing_df.columns:
+                continue  # the outputs needed by this scale were not given
+            self.last_postprocessing[scale] = postprocessing_df
+            if scale in self.sinks:
+                self.sinks[scale].append(t, postprocessing_df)
+        return self.last_postprocessing
+
+    def flush(self):
+        """Write the stored steps of all the scales to the files."""
+        for sink in self.sinks.values():
+            sink.flush()
+        if self.outputs_sink is not None:
+            self.outputs_sink.flush()
+
+    def close(self):
+        """Write the remaining steps of all the scales to the files and close the sinks, including :attr:`outputs_sink`."""
+        for sink in self.sinks.values():
+            sink.close()
+        if self.outputs_sink is not None:
+            self.outputs_sink.close()
+
+
+class _TimeStepsReader(object):
+    """
+    Read the rows of an outputs file sorted by time, step after step, without reading the whole file in memory.
+
+    :param str filepath: the path of the outputs file.
+    :param options: the options of the reading, passed to :func:`cnwheat.io.iter_outputs`.
+    """
+
+    def __init__(self, filepath, **options):
+        self.chunks = cnwheat_io.iter_outputs(filepath, **options)  #: the chunks of rows of the file
+        self.pending_rows = None  #: the rows read from the file and not yet returned
+        self.exhausted = False  #: a boolean flag which indicates if all the rows of the file have been read
+
+    def _read_chunk(self):
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+        elif self.pending_rows is None:
+            self.pending_rows = chunk
+        else:
+            self.pending_rows = pd.concat([self.pending_rows, chunk], ignore_index=True)
+
+    def next_t_end(self, nb_steps):
+        """Return the time of the last of the `nb_steps` next steps, or `None` if all the rows have been returned.
+
+        :param int nb_steps: the number of steps.
+
+        :return: The time of the last of the `nb_steps` next steps.
+        :rtype: float
+        """
+        # read until the step following the `nb_steps` next steps is reached, so that the last of these steps is complete
+        while not self.exhausted and (self.pending_rows is None or self.pending_rows['t'].nunique() <= nb_steps):
+            self._read_chunk()
+        if self.pending_rows is None or len(self.pending_rows) == 0:
+            return None
+        time_steps = pd.unique(self.pending_rows['t'])
+        return time_steps[min(nb_steps, len(time_steps)) - 1]
+
+    def read_until(self, t_end):
+        """Return the next rows with a time lower than or equal to `t_end`.
+
+        :param float t_end: the time of the last step to return.
+
+        :return: The rows of the steps until `t_end`, or `None` if there is no such row.
+        :rtype: pandas.DataFrame
+        """
+        while not self.exhausted and (self.pending_rows is None or self.pending_rows['t'].iloc[-1] <= t_end):
+            self._read_chunk()
+        if self.pending_rows is None:
+            return None
+        is_read = self.pending_rows['t'].values <= t_end
+        if not is_read.any():
+            return None
+        rows = self.pending_rows[is_read].reset_index(drop=True)
+        self.pending_rows = self.pending_rows[~is_read].reset_index(drop=True)
+        # the categories of the axes can differ between the chunks of the file
+        return schema.apply_schema(rows)
+
+
+#: the names of the arguments of :func:`postprocessing`, indexed by scale of the outputs (see :attr:`cnwheat.io.SCALES`)
+OUTPUTS_SCALES_ARGUMENTS = {'plants': 'plants_df', 'axes': 'axes_df', 'phytomers': 'metamers_df', 'organs': 'organs_df',
+                            'hiddenzones': 'hiddenzones_df', 'elements': 'elements_df', 'soils': 'soils_df'}
+
+
+def postprocessing_from_files(outputs_filepaths, postprocessing_filepaths, delta_t=1, steps_per_chunk=24, chunk_rows=100000, hdf5_key='outputs', **sinks_options):
+    """
+    Compute the post-processing of outputs files which do not fit in memory, and write them to a file per scale.
+
+    The outputs files are read in chunks of `steps_per_chunk` steps, the post-processing of each chunk are computed
+    by a :class:`StreamingPostprocessing`, and appended to the post-processing files. The chunks of all the scales cover the same steps,
+    so that the post-processing which depend on several scales at the same step (the aggregations at axis scale, the concentrations
+    in the phloem, the residual respiration of the roots) are the same as those computed by :func:`postprocessing` on the whole outputs.
+    Thus, the memory used does not depend on the length of the simulation.
+
+    The outputs files must be sorted by time, as written by :class:`cnwheat.io.OutputsSink` or :func:`cnwheat.io.write_outputs`.
+
+    :param dict outputs_filepaths: the paths of the outputs files, indexed by scale (see :attr:`cnwheat.io.SCALES`).
+    :param dict postprocessing_filepaths: the paths of the post-processing files, indexed by scale (see :attr:`POSTPROCESSING_SCALES`).
+    :param float delta_t: Delta t between 2 outputs (in seconds).
+    :param int steps_per_chunk: the number of steps post-processed at once ; default is `24`.
+    :param int chunk_rows: the maximum number of rows read at once from each outputs file ; default is `100000`.
+    :param str hdf5_key: the key of the tables in the HDF5 outputs files ; default is `'outputs'`.
+    :param sinks_options: the options of the sinks of the post-processing, passed to :class:`cnwheat.io.OutputsSink` (e.g. `format_`).
+    """
+    unknown_scales = set(outputs_filepaths).difference(OUTPUTS_SCALES_ARGUMENTS)
+    if unknown_scales:
+        raise cnwheat_io.OutputsSinkError('Unknown scales {}: use some of {}.'.format(sorted(unknown_scales), cnwheat_io.SCALES))
+    if steps_per_chunk < 1:
+        raise cnwheat_io.OutputsSinkError('The number of steps of a chunk must be at least 1: {}.'.format(steps_per_chunk))
+    if not outputs_filepaths:
+        return
+
+    readers = {scale: _TimeStepsReader(outputs_filepaths[scale], chunk_rows=chunk_rows, hdf5_key=hdf5_key)
+               for scale in cnwheat_io.SCALES if scale in outputs_filepaths}
+    # the steps of the chunks are given by the first scale ; the other scales are read until the same step
+    steps_reader = readers.get('axes', next(iter(readers.values())))
+
+    with StreamingPostprocessing(postprocessing_filepaths, delta_t=delta_t, **sinks_options) as streaming_postprocessing:
+        while True:
+            t_end = steps_reader.next_t_end(steps_per_chunk)
+            if t_end is None:
+                t_end = np.inf  # the steps of the other scales after the last step of the first scale, if any
+            outputs = {OUTPUTS_SCALES_ARGUMENTS[scale]: reader.read_until(t_end) for scale, reader in readers.items()}
+            if all(outputs_df is None for outputs_df in outputs.values()):
+                break
+            streaming_postprocessing.postprocess_steps(**outputs)
+
+
+#: the name of the file which stores the hash of the graphs generated by :func:`generate_graphs` in the graphs directory
+GRAPHS_CACHE_FILENAME = '.graphs_cache.json'
+
+
+def _graph_hash(graph_df, *graph_parameters):
+    """Return the hash of the data `graph_df` and the parameters `graph_parameters` of a graph."""
+    graph_hash = hashlib.sha1(pd.util.hash_pandas_object(graph_df, index=False).values.tobytes())
+    graph_hash.update(repr((list(graph_df.columns),) + graph_parameters).encode('utf-8'))
+    return graph_hash.hexdigest()
+
+
+def _init_graphs_worker():
+    """Use the non-interactive backend of matplotlib in a worker process which renders graphs."""
+    plt.switch_backend('Agg')
+
+
+def _render_graph(graph):
+    """Render a graph.
+
+    :param tuple graph: the function which renders the graph, and its keyword arguments.
+    """
+    plot_function, plot_arguments = graph
+    plot_function(**plot_arguments)
+
+
+def _plot_soils_nitrates(soils_nitrates_df, plot_filepath):
+    """Plot the concentration of nitrates in the soil.
+
+    :param pandas.DataFrame soils_nitrates_df: the time `t` and the concentration of nitrates `Conc_Nitrates_Soil` of the soil.
+    :param str plot_filepath: The file path to save the plot.
+    """
+    _, (ax1) = plt.subplots(1)
+    Conc_Nitrates_soil = soils_nitrates_df['Conc_Nitrates_Soil'] * 14E-6
+    ax1.plot(soils_nitrates_df['t'], Conc_Nitrates_soil)
+    ax1.set_ylabel(u'[Nitrates] (g m$^{-3}$)')
+    ax1.set_xlabel('Time (hour)')
+    ax1.set_title = 'Conc Nitrates Soil'
+    ax1.set_ylim(bottom=0)
+    plt.savefig(plot_filepath, format='PNG', bbox_inches='tight')
+    plt.close()
+
+
 # -----------------------------------------------------------
 # --------------- GRAPHS GENERATION FRONT-END ---------------
 # -- PLEASE USE THIS FUNCTION FOR THE GENERATION OF GRAPHS --
 # -----------------------------------------------------------
 
-def generate_graphs(axes_df=None, hiddenzones_df=None, organs_df=None, elements_df=None, soils_df=None, meteo_data=None, graphs_dirpath='.'):
+def generate_graphs(axes_df=None, hiddenzones_df=None, organs_df=None, elements_df=None, soils_df=None, meteo_data=None, graphs_dirpath='.',
+                    processes=None, use_cache=True):
     """
     Generate graphs to validate the outputs of CN-Wheat, and save them in directory `graphs_dirpath`.
 
+    The outputs are filtered and grouped once for all the variables plotted with the same filters (see :class:`cnwheat.tools.GroupedOutputs`),
+    and the graphs are rendered in worker processes with the non-interactive backend `Agg`. If `use_cache` is `True`, the hash of the data
+    and the labels of each graph are stored in the file :attr:`GRAPHS_CACHE_FILENAME` of `graphs_dirpath`, and the graphs which data and labels
+    did not change since the previous generation are not rendered again.
+
     :param pandas.DataFrame axes_df: CN-Wheat outputs and post-processing at axis scale (see :attr:`PLANTS_RUN_POSTPROCESSING_VARIABLES`)
     :param pandas.DataFrame hiddenzones_df: CN-Wheat outputs at hidden zone scale (see :attr:`HIDDENZONE_RUN_POSTPROCESSING_VARIABLES`)
     :param pandas.DataFrame organs_df: CN-Wheat outputs at organ scale (see :attr:`ORGANS_RUN_POSTPROCESSING_VARIABLES`)
@@ -1346,6 +1739,8 @@ def generate_graphs(axes_df=None, hiddenzones_df=None, organs_df=None, elements_
     :param pandas.DataFrame soils_df: CN-Wheat outputs at soil scale (see :attr:`SOILS_RUN_POSTPROCESSING_VARIABLES`)
     :param pandas.DataFrame meteo_data: the meteo dataframe having the mapping between t (hours) and calendar dates
     :param str graphs_dirpath: the path of the directory to save the generated graphs in
+    :param int processes: the number of worker processes ; default is `None` (use the number of CPUs). If `1`, render the graphs in the current process.
+    :param bool use_cache: if `True` (default), do not render again the graphs which data and labels did not change since the previous generation.
     """
 
     x_name = 't'
@@ -1354,6 +1749,19 @@ def generate_graphs(axes_df=None, hiddenzones_df=None, organs_df=None, elements_
     colors = ['blue', 'darkorange', 'green', 'red', 'darkviolet', 'gold', 'magenta', 'brown', 'darkcyan', 'grey', 'lime']
     colors = colors + colors + colors + colors + colors
 
+    # the graphs to render: the name of the graph file, the function which renders it, and the arguments of the function
+    graphs = []
+    meteo_data_hash = None if meteo_data is None else _graph_hash(meteo_data)
+
+    def add_outputs_graphs(grouped_outputs, graph_variables, graph_name_suffix, graph_colors):
+        for variable_name, variable_label in graph_variables.items():
+            graph_name = variable_name + graph_name_suffix + '.PNG'
+            graph_outputs = grouped_outputs.select(variable_name)
+            graph_hash = _graph_hash(graph_outputs.outputs, variable_label, graph_colors, meteo_data_hash)
+            graphs.append((graph_name, graph_hash, cnwheat_tools.plot_cnwheat_ouputs,
+                           dict(outputs=graph_outputs, x_name=x_name, y_name=variable_name, x_label=x_label, y_label=variable_label, colors=graph_colors,
+                                plot_filepath=os.path.join(graphs_dirpath, graph_name), meteo_data=meteo_data, explicit_label=False)))
+
     # 1) Photosynthetic organs
     if elements_df is not None:
         elements_df = elements_df.loc[elements_df['mstruct'] != 0]
@@ -1377,19 +1785,10 @@ def generate_graphs(axes_df=None, hiddenzones_df=None, organs_df=None, elements_
                                        'SLN_nonstruct': u'Surfacic Leaf Non-structural Nitrogen (g.m$^{-2}$)', 'length': u'Length (m)',
                                        'Photosynthetic_efficiency': u'Photosynthetic yield (mol C/mol PARa)'}
 
+        elements_colors = [colors[i - 1] for i in elements_df.metamer.unique().tolist()]
         for org_ph in (['blade'], ['sheath'], ['internode'], ['peduncle', 'ear']):
-            for variable_name, variable_label in graph_variables_ph_elements.items():
-                graph_name = variable_name + '_' + '_'.join(org_ph) + '.PNG'
-                cnwheat_tools.plot_cnwheat_ouputs(elements_df,
-                                                  x_name=x_name,
-                                                  y_name=variable_name,
-                                                  x_label=x_label,
-                                                  y_label=variable_label,
-                                                  colors=[colors[i - 1] for i in elements_df.metamer.unique().tolist()],
-                                                  filters={'axis': 'MS', 'organ': org_ph},
-                                                  plot_filepath=os.path.join(graphs_dirpath, graph_name),
-                                                  meteo_data=meteo_data,
-                                                  explicit_label=False)
+            grouped_elements = cnwheat_tools.GroupedOutputs(elements_df, x_name, filters={'axis': 'MS', 'organ': org_ph})
+            add_outputs_graphs(grouped_elements, graph_variables_ph_elements, '_' + '_'.join(org_ph), elements_colors)
 
     # 2) Roots, grains, endosperm and phloem
     if organs_df is not None:
@@ -1410,30 +1809,14 @@ def generate_graphs(axes_df=None, hiddenzones_df=None, organs_df=None, elements_
                                   'senesced_mstruct': u'Cumulated senesced mstruct (g)', 'synthetized_mstruct': u'Cumulated synthetized mstruct (g)', }
 
         for org in (['roots'], ['grains'], ['phloem'], ['endosperm']):
-            for variable_name, variable_label in graph_variables_organs.items():
-                graph_name = variable_name + '_' + '_'.join(org) + '.PNG'
-                cnwheat_tools.plot_cnwheat_ouputs(organs_df,
-                                                  x_name=x_name,
-                                                  y_name=variable_name,
-                                                  x_label=x_label,
-                                                  y_label=variable_label,
-                                                  colors=['blue'],
-                                                  filters={'organ': org},
-                                                  plot_filepath=os.path.join(graphs_dirpath, graph_name),
-                                                  meteo_data=meteo_data,
-                                                  explicit_label=False)
+            grouped_organs = cnwheat_tools.GroupedOutputs(organs_df, x_name, filters={'organ': org})
+            add_outputs_graphs(grouped_organs, graph_variables_organs, '_' + '_'.join(org), ['blue'])
 
     # 3) Soil
     if soils_df is not None:
-        _, (ax1) = plt.subplots(1)
-        Conc_Nitrates_soil = soils_df['Conc_Nitrates_Soil'] * 14E-6
-        ax1.plot(soils_df['t'], Conc_Nitrates_soil)
-        ax1.set_ylabel(u'[Nitrates] (g m$^{-3}$)')
-        ax1.set_xlabel('Time (hour)')
-        ax1.set_title = 'Conc Nitrates Soil'
-        ax1.set_ylim(bottom=0)
-        plt.savefig(os.path.join(graphs_dirpath, 'Conc_Nitrates_Soil.PNG'), format='PNG', bbox_inches='tight')
-        plt.close()
+        soils_nitrates_df = soils_df[['t', 'Conc_Nitrates_Soil']]
+        graphs.append(('Conc_Nitrates_Soil.PNG', _graph_hash(soils_nitrates_df), _plot_soils_nitrates,
+                       dict(soils_nitrates_df=soils_nitrates_df, plot_filepath=os.path.join(graphs_dirpath, 'Conc_Nitrates_Soil.PNG'))))
 
     # 4) Hidden zones
     if hiddenzones_df is not None:
@@ -1444,47 +1827,64 @@ def generate_graphs(axes_df=None, hiddenzones_df=None, organs_df=None, elements_
                                        'leaf_L': u'Leaf length in hz (m)', 'delta_leaf_L': u'delta of leaf length (m)', 'internode_L': u'Internode length in hz (m)',
                                        'leaf_pseudostem_length': u'leaf pseudostem length (m)'}
 
-        for variable_name, variable_label in graph_variables_hiddenzones.items():
-            graph_name = variable_name + '_hz' + '.PNG'
-            cnwheat_tools.plot_cnwheat_ouputs(hiddenzones_df,
-                                              x_name=x_name,
-                                              y_name=variable_name,
-                                              x_label=x_label,
-                                              y_label=variable_label,
-                                              colors=[colors[i - 1] for i in hiddenzones_df.metamer.unique().tolist()],
-                                              filters={'plant': 1, 'axis': 'MS'},
-                                              plot_filepath=os.path.join(graphs_dirpath, graph_name),
-                                              meteo_data=meteo_data,
-                                              explicit_label=False)
+        grouped_hiddenzones = cnwheat_tools.GroupedOutputs(hiddenzones_df, x_name, filters={'plant': 1, 'axis': 'MS'})
+        add_outputs_graphs(grouped_hiddenzones, graph_variables_hiddenzones, '_hz', [colors[i - 1] for i in hiddenzones_df.metamer.unique().tolist()])
 
     # 4) Axes
-    graph_variables_axes = {'mstruct': 'Axis mstruct (g)',
-                            'C_N_ratio': u'C/N mass ratio', 'C_N_ratio_shoot': u'C/N mass ratio of the shoot',
-                            'N_content': u'N content in the axis (% DM)', 'N_content_shoot': u'N content in the shoot (% DM)',
-                            'N_content_total_DM_shoot': u'N content in the shoot acounting for partly senesced leaves (% DM)',
-                            'N_content_roots': u'N content in the roots (% DM)',
-                            'N_content_mstruct': u'N content in the axis (% mstruct)', 'N_content_mstruct_shoot': u'N content in the shoot (% mstruct)',
-                            'N_content_mstruct_roots': u'N content in the roots (% mstruct)',
-                            'sum_N_g': u'N mass (g)', 'sum_N_g_shoot': u'N mass in the shoot (g)',
-                            'shoot_roots_ratio': u'Shoot/Roots dry mass ratio',
-                            'shoot_roots_mstruct_ratio': u'Shoot/Roots mstruct ratio',
-                            'sum_dry_mass': u'Total dry mass (g)', 'sum_dry_mass_shoot': u'Dry mass of the shoot (g)',
-                            'sum_dry_mass_roots': u'Dry mass of the roots (g)', 'dry_mass_phloem': u'Dry mass of the phloem (g)',
-                            'NNI': u'Nitrogen Nutrition Index',
-                            'NS_shoot': u'Ratio of Non Structural Mass in the shoot', 'NS_roots': u'Ratio of Non Structural Mass in the roots',
-                            'NS': u'Ratio of Non Structural Mass for the plant',
-                            'mstruct_shoot': u'Structural Mass of the shoot (g)',
-                            'Cont_WSC_DM': u'WSC content (% DM)'}
-
-    for variable_name, variable_label in graph_variables_axes.items():
-        graph_name = variable_name + '_axis' + '.PNG'
-        cnwheat_tools.plot_cnwheat_ouputs(axes_df,
-                                          x_name=x_name,
-                                          y_name=variable_name,
-                                          x_label=x_label,
-                                          y_label=variable_label,
-                                          colors=['blue'],
-                                          filters={'plant': 1, 'axis': 'MS'},
-                                          plot_filepath=os.path.join(graphs_dirpath, graph_name),
-                                          meteo_data=meteo_data,
-                                          explicit_label=False)
+    if axes_df is not None:
+        graph_variables_axes = {'mstruct': 'Axis mstruct (g)',
+                                'C_N_ratio': u'C/N mass ratio', 'C_N_ratio_shoot': u'C/N mass ratio of the shoot',
+                                'N_content': u'N content in the axis (% DM)', 'N_content_shoot': u'N content in the shoot (% DM)',
+                                'N_content_total_DM_shoot': u'N content in the shoot acounting for partly senesced leaves (% DM)',
+                                'N_content_roots': u'N content in the roots (% DM)',
+                                'N_content_mstruct': u'N content in the axis (% mstruct)', 'N_content_mstruct_shoot': u'N content in the shoot (% mstruct)',
+                                'N_content_mstruct_roots': u'N content in the roots (% mstruct)',
+                                'sum_N_g': u'N mass (g)', 'sum_N_g_shoot': u'N mass in the shoot (g)',
+                                'shoot_roots_ratio': u'Shoot/Roots dry mass ratio',
+                                'shoot_roots_mstruct_ratio': u'Shoot/Roots mstruct ratio',
+                                'sum_dry_mass': u'Total dry mass (g)', 'sum_dry_mass_shoot': u'Dry mass of the shoot (g)',
+                                'sum_dry_mass_roots': u'Dry mass of the roots (g)', 'dry_mass_phloem': u'Dry mass of the phloem (g)',
+                                'NNI': u'Nitrogen Nutrition Index',
+                                'NS_shoot': u'Ratio of Non Structural Mass in the shoot', 'NS_roots': u'Ratio of Non Structural Mass in the roots',
+                                'NS': u'Ratio of Non Structural Mass for the plant',
+                                'mstruct_shoot': u'Structural Mass of the shoot (g)',
+                                'Cont_WSC_DM': u'WSC content (% DM)'}
+
+        grouped_axes = cnwheat_tools.GroupedOutputs(axes_df, x_name, filters={'plant': 1, 'axis': 'MS'})
+        add_outputs_graphs(grouped_axes, graph_variables_axes, '_axis', ['blue'])
+
+    # 5) Render the graphs which changed since the previous generation
+    graphs_cache_filepath = os.path.join(graphs_dirpath, GRAPHS_CACHE_FILENAME)
+    graphs_cache = {}
+    if use_cache and os.path.isfile(graphs_cache_filepath):
+        with open(graphs_cache_filepath) as graphs_cache_file:
+            graphs_cache = json.load(graphs_cache_file)
+    graphs_to_render = []
+    for graph_name, graph_hash, plot_function, plot_arguments in graphs:
+        graph_filepath = os.path.join(graphs_dirpath, graph_name)
+        if graphs_cache.get(graph_name) == graph_hash and os.path.isfile(graph_filepath):
+            continue
+        if os.path.isfile(graph_filepath):
+            os.remove(graph_filepath)  # do not keep an obsolete graph if there is nothing to plot anymore
+        graphs_to_render.append((plot_function, plot_arguments))
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes <= 1 or len(graphs_to_render) <= 1:
+        for graph in graphs_to_render:
+            _render_graph(graph)
+    else:
+        pool = multiprocessing.Pool(processes=processes, initializer=_init_graphs_worker)
+        try:
+            for _ in pool.imap_unordered(_render_graph, graphs_to_render):
+                pass
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    if use_cache:
+        # keep the hash of the graphs saved ; the graphs with nothing to plot are not saved, thus are checked again at the next generation
+        graphs_cache = {graph_name: graph_hash for graph_name, graph_hash, _, _ in graphs if os.path.isfile(os.path.join(graphs_dirpath, graph_name))}
+        with open(graphs_cache_filepath, 'w') as graphs_cache_file:
+            json.dump(graphs_cache, graphs_cache_file, indent=0, sort_keys=True)
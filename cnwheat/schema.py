@@ -0,0 +1,98 @@
+# -*- coding: latin-1 -*-
+
+from __future__ import division  # use "//" to do integer division
+
+import numpy as np
+import pandas as pd
+
+"""
+    cnwheat.schema
+    ~~~~~~~~~~~~~~
+
+    The module :mod:`cnwheat.schema` defines the dtypes of the columns of the CN-Wheat outputs and post-processing dataframes.
+
+    The indexes `plant` and `metamer` are stored as small integers, and the labels `axis`, `organ` and `element` as categories,
+    which use much less memory than strings and make the selections and the groupings faster.
+    The organs and elements have fixed categories (see :attr:`ORGANS_LABELS` and :attr:`ELEMENTS_LABELS`), so that the dataframes of different
+    time steps or files can be concatenated without losing the categories. The variables can be stored in simple precision to halve
+    the memory used by the outputs of large simulations.
+
+    Use :func:`apply_schema` to convert a dataframe to these dtypes.
+
+    :copyright: Copyright 2014-2017 INRA-ECOSYS, see AUTHORS.
+    :license: CeCILL-C, see LICENSE for details.
+
+    **Acknowledgments**: The research leading these results has received funding through the
+    Investment for the Future programme managed by the Research National Agency
+    (BreedWheat project ANR-10-BTBR-03).
+
+    .. seealso:: Barillot et al. 2016.
+"""
+
+#: the labels of the organs in the dataframes (see :attr:`converter.CNWHEAT_CLASSES_TO_DATAFRAME_ORGANS_MAPPING <cnwheat.converter.CNWHEAT_CLASSES_TO_DATAFRAME_ORGANS_MAPPING>`)
+ORGANS_LABELS = ('blade', 'ear', 'endosperm', 'grains', 'hiddenzone', 'internode', 'peduncle', 'phloem', 'roots', 'sheath')
+
+#: the labels of the elements in the dataframes (see :attr:`converter.DATAFRAME_TO_CNWHEAT_ELEMENTS_NAMES_MAPPING <cnwheat.converter.DATAFRAME_TO_CNWHEAT_ELEMENTS_NAMES_MAPPING>`)
+ELEMENTS_LABELS = ('HiddenElement', 'LeafElement1', 'StemElement')
+
+#: the dtypes of the indexes, by column. The labels of the axes are open-ended, thus their categories are the labels found in the dataframe.
+INDEXES_DTYPES = {'plant': np.dtype(np.int32),
+                  'axis': 'category',
+                  'metamer': np.dtype(np.int16),
+                  'organ': pd.CategoricalDtype(ORGANS_LABELS),
+                  'element': pd.CategoricalDtype(ELEMENTS_LABELS)}
+
+#: the dtypes allowed for the variables
+VARIABLES_DTYPES = (np.dtype(np.float32), np.dtype(np.float64))
+
+
+def _categorical_dtype(column, dtype):
+    """Return the categorical `dtype` of `column`, with the categories extended to the labels of `column` which are not in `dtype`."""
+    if not isinstance(dtype, pd.CategoricalDtype):
+        return dtype
+    labels = pd.unique(column.dropna())
+    unknown_labels = sorted(set(labels).difference(dtype.categories))
+    if unknown_labels:
+        # never lose a label: keep the fixed categories first and append the unknown ones
+        dtype = pd.CategoricalDtype(list(dtype.categories) + unknown_labels)
+    return dtype
+
+
+def apply_schema(dataframe, variables_dtype=None):
+    """Convert the columns of `dataframe` to the dtypes of the schema, in place.
+
+    The indexes present in `dataframe` are converted to :attr:`INDEXES_DTYPES`. An integer index with missing values
+    is left unchanged. If `variables_dtype` is not `None`, the float columns other than the indexes and the time `t` are converted
+    to `variables_dtype`.
+
+    :param pandas.DataFrame dataframe: the dataframe to convert.
+    :param str variables_dtype: the dtype of the variables, one of `'float32'` and `'float64'` ; default is `None` (keep the dtypes of the variables).
+
+    :return: `dataframe`, with the columns converted.
+    :rtype: pandas.DataFrame
+    """
+    if variables_dtype is not None:
+        variables_dtype = np.dtype(variables_dtype)
+        if variables_dtype not in VARIABLES_DTYPES:
+            raise ValueError('Unknown dtype of the variables {}: use one of {}.'.format(variables_dtype, [str(dtype) for dtype in VARIABLES_DTYPES]))
+
+    for column, dtype in INDEXES_DTYPES.items():
+        if column not in dataframe.columns:
+            continue
+        values = dataframe[column]
+        if isinstance(dtype, np.dtype):
+            if values.dtype == dtype or values.isnull().any():
+                continue
+        else:
+            dtype = _categorical_dtype(values, dtype)
+            if values.dtype == dtype:
+                continue
+        dataframe[column] = values.astype(dtype)
+
+    if variables_dtype is not None:
+        variables_columns = [column for column, dtype in dataframe.dtypes.items()
+                             if column not in INDEXES_DTYPES and column != 't' and isinstance(dtype, np.dtype) and dtype.kind == 'f' and dtype != variables_dtype]
+        if variables_columns:
+            dataframe[variables_columns] = dataframe[variables_columns].astype(variables_dtype)
+
+    return dataframe
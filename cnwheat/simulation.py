@@ -2,12 +2,14 @@
 
 from __future__ import division  # use "//" to do integer division
 import logging
+import time
 
 import numpy as np
 from scipy.integrate import solve_ivp
-from scipy import interpolate
+from scipy import sparse
 
 from cnwheat import model
+from cnwheat import parameters
 from cnwheat import tools
 
 """
@@ -15,7 +17,8 @@ from cnwheat import tools
     ~~~~~~~~~~~~~~~~~~
 
     The module :mod:`cnwheat.simulation` is the front-end to run the model CN-Wheat.
-    The public API consists of methods :meth:`initialize` and :meth:`run`.
+    The public API consists of methods :meth:`initialize`, :meth:`run`, :meth:`run_until` and :meth:`run_adaptive`,
+    and of class :class:`EnsembleSimulation` to run many independent simulations together.
 
     :copyright: Copyright 2014-2017 INRA-ECOSYS, see AUTHORS.
     :license: CeCILL-C, see LICENSE for details.
@@ -59,12 +62,137 @@ class SimulationRunError(SimulationError):
     pass
 
 
+class SolverConfiguration(object):
+    """
+    The configuration of the solver used by :meth:`Simulation.run` to integrate the system of differential equations.
+
+    :param str method: the integration method, one of :attr:`Simulation.SOLVER_METHODS` ; default is `'BDF'`.
+    :param float rtol: the relative tolerance of the solver ; default is `1e-3`.
+    :param float atol: the absolute tolerance of the solver, for the compartments not found in `compartments_atol` ; default is `1e-6`.
+    :param dict compartments_atol: the absolute tolerances per compartment type, as a dictionary {prefix: atol, (prefix, compartment_name): atol, ...},
+           where prefixes and compartments names are those of :attr:`Simulation.INDEXES_TABLES` (e.g. `{'soil': 1e-3, ('element', 'starch'): 1e-4}`).
+           A tolerance set for a compartment overrides the one set for its prefix. Default is `None` (use `atol` for all the compartments).
+    :param float max_step: the maximum step size of the solver (in hours) ; default is `numpy.inf`.
+    :param float first_step: the initial step size of the solver (in hours) ; default is `None` (the solver chooses the initial step size).
+    :param bool jacobian_reuse: if True, the Jacobian computed during a run is reused at the beginning of the next run,
+           and recomputed only when the solver does not converge with it. Default is `False` (the solver computes a new Jacobian at each run).
+    :param bool persistent_integrator: if True, the :class:`scipy.integrate.BDF` integrator of each run is warm-started with the Jacobian
+           reached at the previous run, as with `jacobian_reuse`. The forcings change between two runs (see :meth:`Simulation.initialize`),
+           so the past steps and the order of the previous integrator are not consistent with the derivatives of the new run:
+           each run restarts at order 1, from a first step selected by the solver. Only available with method `'BDF'`.
+           Default is `False` (each run starts with a new Jacobian).
+
+    The relative tolerance cannot be set per compartment type, because the solvers of :mod:`scipy.integrate` use a scalar relative tolerance
+    to control the convergence of their Newton iterations.
+    """
+    def __init__(self, method='BDF', rtol=1e-3, atol=1e-6, compartments_atol=None, max_step=np.inf, first_step=None, jacobian_reuse=False,
+                 persistent_integrator=False):
+        self.method = method  #: the integration method
+        self.rtol = rtol  #: the relative tolerance
+        self.atol = atol  #: the default absolute tolerance
+        self.compartments_atol = {} if compartments_atol is None else compartments_atol  #: the absolute tolerances per compartment type
+        self.max_step = max_step  #: the maximum step size (in hours)
+        self.first_step = first_step  #: the initial step size (in hours)
+        self.jacobian_reuse = jacobian_reuse  #: a boolean flag which indicates if the Jacobian is reused from one run to the next one
+        self.persistent_integrator = persistent_integrator  #: a boolean flag which indicates if the integrator is kept from one run to the next one
+
+
+class AdaptiveStepping(object):
+    """
+    The configuration of the adaptive time steps of :meth:`Simulation.run_adaptive`.
+
+    After each step, the next time step is chosen so that the compartments and the forcings are expected to change by less than
+    `state_tolerance` and `forcings_tolerance` over the step, from their rates of change over the previous steps. The change of the compartments
+    or of the forcings is the root mean square of their relative changes.
+    The time steps are multiples of `min_time_step`, so that the forcings can be read at the same times as with fixed steps of `min_time_step`.
+
+    :param float min_time_step: the smallest time step (in hours) ; default is `1`.
+    :param float max_time_step: the largest time step (in hours), a multiple of `min_time_step` ; default is `8`.
+    :param float state_tolerance: the largest relative change of the compartments expected over a step ; default is `0.1`.
+    :param float forcings_tolerance: the largest relative change of the forcings expected over a step ; default is `0.1`.
+    :param float forcings_atol: the absolute tolerance of the relative change of the forcings, so that the forcings close to zero
+           (e.g. the photosynthesis at night) do not reduce the time steps ; default is `1e-3`.
+    :param float growth_factor: the largest ratio between a time step and the previous one ; default is `2`.
+    """
+    def __init__(self, min_time_step=1, max_time_step=8, state_tolerance=0.1, forcings_tolerance=0.1, forcings_atol=1e-3, growth_factor=2):
+        self.min_time_step = min_time_step  #: the smallest time step (in hours)
+        self.max_time_step = max_time_step  #: the largest time step (in hours)
+        self.state_tolerance = state_tolerance  #: the largest relative change of the compartments expected over a step
+        self.forcings_tolerance = forcings_tolerance  #: the largest relative change of the forcings expected over a step
+        self.forcings_atol = forcings_atol  #: the absolute tolerance of the relative change of the forcings
+        self.growth_factor = growth_factor  #: the largest ratio between a time step and the previous one
+
+
+class _PackedParameters(object):
+    """
+    The parameters of some model objects referencing different parameters sets, packed as arrays for the vectorized engine.
+    Each attribute is the array of the values of a parameter, in the order of the model objects.
+    """
+    def __init__(self, parameters_arrays):
+        self.__dict__.update(parameters_arrays)
+
+    @staticmethod
+    def pack(model_objects, default_parameters):
+        """Pack the parameters of `model_objects`.
+
+        :param list model_objects: the model objects, or `None` for the missing ones.
+        :param parameters.Parameters default_parameters: the parameters set used for the missing model objects.
+
+        :return: The parameters set shared by all the model objects, or the packed parameters if the model objects reference different parameters sets.
+        :rtype: parameters.Parameters or _PackedParameters
+        """
+        parameters_sets = [default_parameters if model_object is None else model_object.PARAMETERS for model_object in model_objects]
+        if len(set(parameters_sets)) <= 1:
+            # the common case: the parameters are used as scalars
+            return parameters_sets[0] if parameters_sets else default_parameters
+        parameters_names = [parameter_name for parameter_name, _ in parameters_sets[0].items()]
+        return _PackedParameters({parameter_name: np.array([getattr(parameters_set, parameter_name) for parameters_set in parameters_sets])
+                                  for parameter_name in parameters_names})
+
+    @staticmethod
+    def take(parameters_set, positions):
+        """Select the parameters of the model objects at `positions`.
+
+        :param parameters.Parameters or _PackedParameters parameters_set: the parameters returned by :meth:`pack`.
+        :param numpy.ndarray positions: the positions of the model objects.
+
+        :return: The parameters of the selected model objects.
+        :rtype: parameters.Parameters or _PackedParameters
+        """
+        if not isinstance(parameters_set, _PackedParameters):
+            return parameters_set
+        return _PackedParameters({parameter_name: parameter_values[positions] for parameter_name, parameter_values in parameters_set.__dict__.items()})
+
+
+class _PackedModelObjects(object):
+    """
+    Some model objects of a same class, packed as arrays so that the vectorized engine applies the methods of their class to all of them at once,
+    e.g. `model.Roots.calculate_Export_Nitrates(packed_roots, nitrates, regul_transpiration)`.
+    Attribute `PARAMETERS` holds the parameters of the model objects (see :class:`_PackedParameters`), and each other attribute
+    is the array of the values of a state parameter used by the methods, in the order of the model objects.
+    """
+    def __init__(self, PARAMETERS, **state_parameters):
+        self.PARAMETERS = PARAMETERS
+        self.__dict__.update(state_parameters)
+
+    def take(self, positions):
+        """Select the model objects at `positions`.
+
+        :param numpy.ndarray positions: the positions of the model objects, or a boolean mask.
+
+        :return: The selected model objects.
+        :rtype: _PackedModelObjects
+        """
+        return _PackedModelObjects(_PackedParameters.take(self.PARAMETERS, positions),
+                                   **{name: values[positions] for name, values in self.__dict__.items() if name != 'PARAMETERS'})
+
+
 class Simulation(object):
     """
     The Simulation class permits to initialize and run the model.
 
     User should use method :meth:`initialize` to initialize the model, and method
-    :meth:`run` to run the model.
+    :meth:`run` to run the model over one time step, or method :meth:`run_until` to run the model over many time steps.
 
     :param class respiration_model: the model of respiration to use.
           This model must define a class implementing these functions:
@@ -137,6 +265,22 @@ class Simulation(object):
           For example, if `interpolate_forcings` is `True` and `delta_t==3600`, then `photosynthesis_forcings_delta_t` must be greater or equal to `3600`, that is for example `7200`.
 
     :param bool external_soil_model: whether an external soil model is coupled to cnwheat. If True, cnwheat will skip calculations made in soil and uptake N by roots
+
+    :param forcings_interpolator: an object with a method `apply(t, population)` which sets the forcings of the population at any time `t` (in hours),
+           e.g. a :class:`cnwheat.forcings.ForcingsStore` with an interpolation kernel ; default is `None`.
+           If not `None`, the forcings are set at each evaluation of the derivatives, at the time of the evaluation (:attr:`t` plus the time inside the step).
+           Thus, the time steps of the forcings are independent of `delta_t`: for example, daily forcings can be interpolated with a monotone cubic kernel
+           inside steps of several hours. `forcings_interpolator` cannot be used with `interpolate_forcings`.
+           With the 'vectorized' engine, if `forcings_interpolator` also has a method `interpolate(t, population)` (see :meth:`cnwheat.forcings.ForcingsStore.interpolate`),
+           the interpolated values are written into the packed arrays of the engine instead of the population.
+
+    :param SolverConfiguration solver_configuration: the configuration of the solver (see :class:`SolverConfiguration`) ;
+           default is `None` (use the default configuration of :class:`SolverConfiguration`).
+    :param str derivatives_engine: the engine used to compute the derivatives of the system, one of :attr:`DERIVATIVES_ENGINES`:
+            * 'python': the population is walked organ by organ at each evaluation of the derivatives (see :meth:`_calculate_all_derivatives`). This is the default.
+            * 'vectorized': the photosynthetic organ elements, the hidden zones, the roots and the soils are packed into arrays at initialization,
+              and the methods of :mod:`model` are applied to these arrays at each evaluation of the derivatives (see :meth:`_calculate_all_derivatives_vectorized`).
+              This engine is much faster on large populations, and gives the same results as the 'python' engine up to the solver tolerance.
     """
 
     #: the name of the compartments attributes in the model, for objects of types
@@ -329,6 +473,26 @@ class Simulation(object):
     #: the names of the elements photosynthesis and scenescence forcings
     ELEMENTS_FORCINGS = ELEMENTS_PHOTOSYNTHESIS_FORCINGS + ELEMENTS_SENESCENCE_FORCINGS
 
+    #: the engines available to compute the derivatives of the system (see :class:`Simulation`)
+    DERIVATIVES_ENGINES = ('python', 'vectorized')
+
+    #: the integration methods of :func:`scipy.integrate.solve_ivp` which can be used to run the model (see :class:`SolverConfiguration`)
+    SOLVER_METHODS = ('BDF', 'LSODA', 'Radau')
+
+    #: the index tables built at initialization (see :meth:`_init_indexes_tables`): for each type of object, the prefix of the tables
+    #: and the names of the indexed compartments. The indexes in :attr:`initial_conditions` of the compartment `starch` of all the
+    #: photosynthetic organ elements are for example stored in attribute `element_starch_idx`.
+    INDEXES_TABLES = (('soil', ('nitrates',)),
+                      ('roots', ('amino_acids', 'cytokinins', 'nitrates', 'sucrose')),
+                      ('phloem', ('amino_acids', 'sucrose')),
+                      ('grains', ('age_from_flowering', 'proteins', 'starch', 'structure')),
+                      ('endosperm', ('moistening', 'proteins', 'starch')),
+                      ('hiddenzone', ('amino_acids', 'fructan', 'proteins', 'sucrose')),
+                      ('element', ('amino_acids', 'cytokinins', 'fructan', 'nitrates', 'proteins', 'starch', 'sucrose', 'triosesP')))
+
+    #: the classes of the model objects whose parameters are packed for the vectorized engine (see :meth:`_pack_parameters`)
+    PACKED_PARAMETERS_CLASSES = (model.Soil, model.Axis, model.Roots, model.HiddenZone, model.PhotosyntheticOrganElement)
+
     #: the name of the loggers for compartments and derivatives
     LOGGERS_NAMES = {'compartments': {model.Plant: 'cnwheat.compartments.plants',
                                       model.Axis: 'cnwheat.compartments.axes',
@@ -345,7 +509,8 @@ class Simulation(object):
                                      model.PhotosyntheticOrganElement: 'cnwheat.derivatives.elements',
                                      model.Soil: 'cnwheat.derivatives.soils'}}
 
-    def __init__(self, respiration_model, delta_t=1, culm_density=None, interpolate_forcings=False, senescence_forcings_delta_t=None, photosynthesis_forcings_delta_t=None, external_soil_model=False):
+    def __init__(self, respiration_model, delta_t=1, culm_density=None, interpolate_forcings=False, senescence_forcings_delta_t=None, photosynthesis_forcings_delta_t=None, external_soil_model=False,
+                 derivatives_engine='python', solver_configuration=None, forcings_interpolator=None):
 
         self.respiration_model = respiration_model  #: the model of respiration to use
 
@@ -360,6 +525,31 @@ class Simulation(object):
         self.initial_conditions = []  #: the initial conditions of the compartments in the population and soils
         self.initial_conditions_mapping = {}  #: dictionary to map the compartments to their indexes in :attr:`initial_conditions`
 
+        #: the topology of :attr:`population` and :attr:`soils` at the last initialization, as a tuple (soils fingerprint, plants fingerprints)
+        #: (see :meth:`_model_object_fingerprint`)
+        self.topology_fingerprint = None
+        #: the objects which can have compartments and their fingerprints, as a list [(model_object, fingerprint), ...] in the order of :attr:`initial_conditions`
+        self.compartments_objects = []
+        #: the fingerprints of the objects already initialized, as a dictionary {model_object: fingerprint} (see :meth:`_model_object_fingerprint`)
+        self.compartments_fingerprints = {}
+
+        #: the index tables of the compartments, as a dictionary {(prefix, compartment_name): array of indexes in :attr:`initial_conditions`}
+        #: (see :attr:`INDEXES_TABLES`). Each table is also available as attribute `<prefix>_<compartment_name>_idx`.
+        self.compartments_indexes = {}
+        self.indexed_objects = {}  #: the objects located by the index tables, as a dictionary {prefix: list of objects ordered as the tables}
+        self.compartments_positions = {}  #: the position of each indexed object in the index tables of its type
+
+        #: the sparsity pattern of the Jacobian of the system, derived from the topology of :attr:`population` (see :meth:`_init_jacobian_sparsity`)
+        self.jacobian_sparsity = None
+        #: the sparsity patterns of the Jacobian of the plants, relative to the first compartment of each plant,
+        #: as a dictionary {plant fingerprint: (rows, columns)} (see :meth:`_init_jacobian_sparsity`)
+        self.plants_jacobian_patterns = {}
+        for prefix, compartments_names in Simulation.INDEXES_TABLES:
+            self.indexed_objects[prefix] = []
+            for compartment_name in compartments_names:
+                self.compartments_indexes[(prefix, compartment_name)] = np.array([], dtype=int)
+                setattr(self, '{}_{}_idx'.format(prefix, compartment_name), self.compartments_indexes[(prefix, compartment_name)])
+
         self.progressbar = tools.ProgressBar(title='Solver progress')  #: progress bar to show the progress of the solver
         self.show_progressbar = False  #: True: show the progress bar ; False: DO NOT show the progress bar
 
@@ -369,10 +559,14 @@ class Simulation(object):
 
         self.time_grid = np.array([0.0, self.time_step])  #: the time grid of the simulation (in hours)
 
+        self.t = 0.0  #: the time of the simulation (in hours), advanced by :attr:`time_step` at each run (see :meth:`run_until`)
+
         self.culm_density = culm_density  #: culm density (culm m-2)
 
         self.interpolate_forcings = interpolate_forcings  #: a boolean flag which indicates if we want to interpolate or not the forcings (True: interpolate, False: do not interpolate)
 
+        self.forcings_interpolator = forcings_interpolator  #: the object which sets the forcings at each evaluation of the derivatives, or None
+
         self.external_soil_model = external_soil_model  #: a boolean flag which indicates if an external soil model is coupled to cnwheat.
 
         # set the loggers for compartments and derivatives
@@ -443,20 +637,94 @@ class Simulation(object):
 
             self.previous_forcings_values = {}  #: previous values of the forcings
             self.new_forcings_values = {}  #: new values of the forcings
-            self.interpolation_functions = {}  #: functions to interpolate the forcings
+            self.interpolated_forcings = []  #: the forcings to interpolate, as a list of tuples (model object, forcing label)
+            self.interpolated_forcings_origins = np.array([])  #: the values of :attr:`interpolated_forcings` at the beginning of :attr:`time_grid`
+            self.interpolated_forcings_slopes = np.array([])  #: the slopes of :attr:`interpolated_forcings` over :attr:`time_grid`
+
+        if interpolate_forcings and forcings_interpolator is not None:
+            message = """The value of `interpolate_forcings` passed to the Simulation constructor is `True`, and a `forcings_interpolator` is given.
+        Please use either `interpolate_forcings` or `forcings_interpolator`."""
+            logger.exception(message)
+            raise SimulationConstructionError(message)
 
         self.nfev_total = 0  #: cumulative number of RHS function evaluations
 
+        if derivatives_engine not in Simulation.DERIVATIVES_ENGINES:
+            message = """The value of `derivatives_engine` passed to the Simulation constructor is `{}`.
+        Please set `derivatives_engine` to one of {}.""".format(derivatives_engine, Simulation.DERIVATIVES_ENGINES)
+            logger.exception(message)
+            raise SimulationConstructionError(message)
+
+        if solver_configuration is None:
+            solver_configuration = SolverConfiguration()
+        elif solver_configuration.method not in Simulation.SOLVER_METHODS:
+            message = """The method of the `solver_configuration` passed to the Simulation constructor is `{}`.
+        Please set the method of the solver to one of {}.""".format(solver_configuration.method, Simulation.SOLVER_METHODS)
+            logger.exception(message)
+            raise SimulationConstructionError(message)
+        elif solver_configuration.persistent_integrator and solver_configuration.method != 'BDF':
+            message = """The `solver_configuration` passed to the Simulation constructor sets `persistent_integrator` with method `{}`.
+        Please set the method of the solver to `BDF` to use a persistent integrator.""".format(solver_configuration.method)
+            logger.exception(message)
+            raise SimulationConstructionError(message)
+
+        self.solver_configuration = solver_configuration  #: the configuration of the solver (see :class:`SolverConfiguration`)
+
+        #: the statistics of the solver at the last run: number of evaluations of the derivatives (`nfev`), number of evaluations of the Jacobian (`njev`),
+        #: number of LU decompositions (`nlu`) and wall time of the integration (`wall_time`, in seconds).
+        #: `nfev` includes the evaluations of the derivatives made to approximate the Jacobian.
+        self.solver_statistics = {'nfev': 0, 'njev': 0, 'nlu': 0, 'wall_time': 0.0}
+        self.derivatives_evaluations = 0  #: the number of evaluations of the derivatives since the beginning of the current run
+        self.jacobian_evaluations = 0  #: the number of Jacobians approximated by :meth:`_approximate_jacobian` since the beginning of the current run
+
+        self.atol = solver_configuration.atol  #: the absolute tolerances of the compartments (see :meth:`_init_solver_tolerances`)
+
+        self.jacobian_groups = None  #: the groups of columns of the Jacobian which can be approximated together (see :meth:`_init_jacobian_groups`)
+        #: the last Jacobian computed when :attr:`SolverConfiguration.jacobian_reuse` or :attr:`SolverConfiguration.persistent_integrator` is True
+        self.reusable_jacobian = None
+        self.jacobian_reused = False  #: a boolean flag which indicates if :attr:`reusable_jacobian` was already reused during the current run
+
+        self.derivatives_engine = derivatives_engine  #: the engine used to compute the derivatives of the system (see :attr:`DERIVATIVES_ENGINES`)
+
+        if derivatives_engine == 'vectorized':
+            #: the population packed into arrays, per scale (see :meth:`_pack_population`)
+            self.packed_population = {}
+            #: the values computed at the last call to :meth:`_calculate_all_derivatives_vectorized`, with the `t` and the `y` of this call
+            self.last_vectorized_evaluation = {}
+            #: the forcings of :attr:`interpolated_forcings` grouped by state parameter of :attr:`packed_population`,
+            #: as a list [(class, forcing label, positions in the arrays of the class, indexes in :attr:`interpolated_forcings`), ...] (see :meth:`_init_packed_interpolated_forcings`)
+            self.packed_interpolated_forcings = []
+            #: the positions in :attr:`packed_population` of the model objects of the forcings tables of :attr:`forcings_interpolator`
+            #: (see :meth:`_get_packed_forcings_positions`)
+            self.packed_forcings_positions = {}
+            #: the functions of the respiration model, vectorized to be applied on the arrays of :attr:`packed_population`
+            self.vectorized_respiration_functions = {'R_phloem': np.vectorize(respiration_model.RespirationModel.R_phloem, otypes=[float, float]),
+                                                     'R_Nnit_red': np.vectorize(respiration_model.RespirationModel.R_Nnit_red, otypes=[float, float], excluded={'root'}),
+                                                     'R_Nnit_upt': np.vectorize(respiration_model.RespirationModel.R_Nnit_upt, otypes=[float]),
+                                                     'R_residual': np.vectorize(respiration_model.RespirationModel.R_residual, otypes=[float])}
+
     def initialize(self, population, soils, Tsoil=12):
         """
         Initialize:
             * :attr:`population`,
             * :attr:`soils`,
             * :attr:`initial_conditions_mapping`,
-            * and :attr:`initial_conditions`
+            * :attr:`initial_conditions`,
+            * the index tables of the compartments (see :meth:`_init_indexes_tables`),
+            * the sparsity pattern of the Jacobian of the system (see :meth:`_init_jacobian_sparsity`),
+            * and the absolute tolerances of the solver (see :meth:`_init_solver_tolerances`)
 
         from `population` and `soils`.
 
+        The topology of `population` and `soils` is summarized in :attr:`topology_fingerprint` (see :meth:`_model_object_fingerprint`).
+        The fingerprint of an object is computed once, at its first initialization, and kept in :attr:`compartments_fingerprints`.
+        When the topology is unchanged since the previous initialization, only the compartments mapping is updated (if the objects
+        of the population were replaced), and the index tables, the Jacobian sparsity and the tolerances are kept.
+        Otherwise, only the plants whose topology changed are checked and coupled in the Jacobian sparsity (see :meth:`_init_jacobian_sparsity`),
+        and the index tables are rebuilt.
+        With the vectorized engine, the parameters are packed at each initialization, since the parameters of an object can be replaced
+        without changing the topology (see :meth:`_pack_parameters`).
+
         :param model.Population population: a population of plants.
         :param dict soils: the soil associated to each axis. `soils` must be a dictionary with the same structure as :attr:`soils`
         :param float Tsoil: soil temperature (C)
@@ -469,156 +737,212 @@ class Simulation(object):
         # clean the attributes of the simulation
         del self.population.plants[:]
         self.soils.clear()
-        del self.initial_conditions[:]
-        self.initial_conditions_mapping.clear()
 
         # create new population and soils
         self.population.plants.extend(population.plants)
         if not self.external_soil_model:
             self.soils.update(soils)
 
-        # check the consistency of population and soils
-        if len(self.population.plants) != 0:  # population must contain at least 1 plant
-            for plant in self.population.plants:
-                if len(plant.axes) != 0:  # each plant must contain at least 1 axis
-                    for axis in plant.axes:
-                        if axis.roots is None:  # each axis must have a "roots"
-                            message = 'No roots found in (plant={},axis={})'.format(plant.index, axis.label)
-                            logger.exception(message)
-                            raise SimulationInitializationError(message)
-                        if axis.phloem is None:  # each axis must have a phloem
-                            message = 'No phloem found in (plant={},axis={})'.format(plant.index, axis.label)
-                            logger.exception(message)
-                            raise SimulationInitializationError(message)
-                        if len(axis.phytomers) != 0:  # each axis must contain at least 1 phytomer
-                            for phytomer in axis.phytomers:
-                                phytomer_organs = (phytomer.lamina, phytomer.internode, phytomer.sheath, phytomer.chaff, phytomer.peduncle)
-                                # each phytomer must contain at least 1 photosynthetic organ or a hidden growing zone
-                                if phytomer_organs.count(None) != len(phytomer_organs) or phytomer.hiddenzone is not None:
-                                    for organ in phytomer_organs:
-                                        if organ is not None:
-                                            organ_elements = (organ.exposed_element, organ.enclosed_element)
-                                            # each photosynthetic organ must contain at least 1 element
-                                            if organ_elements.count(None) != len(organ_elements):
-                                                for element in organ_elements:
-                                                    if element is not None:
-                                                        # an element must belong to an organ of the same type (e.g. a LaminaElement must belong to a Lamina)
-                                                        if organ.__class__.__name__ not in element.__class__.__name__:
-                                                            message = 'In (plant={},axis={},phytomer={}), a {} belongs to a {}'.format(plant.index,
-                                                                                                                                       axis.label,
-                                                                                                                                       phytomer.index,
-                                                                                                                                       element.__class__.__name__,
-                                                                                                                                       organ.__class__.__name__)
-                                                            logger.exception(message)
-                                                            raise SimulationInitializationError(message)
-                                            else:
-                                                message = 'No element found in (plant={},axis={},phytomer={},organ={})'.format(plant.index,
-                                                                                                                               axis.label,
-                                                                                                                               phytomer.index,
-                                                                                                                               organ.label)
-                                                logger.exception(message)
-                                                raise SimulationInitializationError(message)
-                                else:
-                                    message = 'Neither photosynthetic organ nor hidden growing zone found in (plant={},axis={},phytomer={})'.format(plant.index,
-                                                                                                                                                    axis.label,
-                                                                                                                                                    phytomer.index)
-                                    logger.exception(message)
-                                    raise SimulationInitializationError(message)
-                        else:
-                            message = 'No phytomer found in (plant={},axis={})'.format(plant.index,
-                                                                                       axis.label)
-                            logger.exception(message)
-                            raise SimulationInitializationError(message)
-                        if not self.external_soil_model and (plant.index, axis.label) not in self.soils:  # each axis must be associated to a soil if no external soil model declared
-                            message = 'No soil found in (plant={},axis={})'.format(plant.index,
-                                                                                   axis.label)
-                            logger.exception(message)
-                            raise SimulationInitializationError(message)
-                else:
-                    message = 'No axis found in (plant={})'.format(plant.index)
-                    logger.exception(message)
-                    raise SimulationInitializationError(message)
-        else:
-            message = 'No plant found in the population.'
-            logger.exception(message)
-            raise SimulationInitializationError(message)
+        # list the objects which have compartments, in the order of :attr:`initial_conditions`, and summarize the topology
+        compartments_fingerprints = self.compartments_fingerprints
+
+        def get_fingerprint(model_object):
+            fingerprint = compartments_fingerprints.get(model_object)
+            if fingerprint is None:
+                fingerprint = compartments_fingerprints[model_object] = self._model_object_fingerprint(model_object)
+            return fingerprint
+
+        soils_objects = [(soil, get_fingerprint(soil)) for soil in self.soils.values()]
+        plants_objects = [[(model_object, get_fingerprint(model_object)) for model_object in self._iter_plant_model_objects(plant)]
+                          for plant in self.population.plants]
+        soils_fingerprint = (tuple(self.soils.keys()), tuple(fingerprint for _, fingerprint in soils_objects))
+        plants_fingerprints = [tuple(fingerprint for _, fingerprint in plant_objects) for plant_objects in plants_objects]
+        topology_fingerprint = (soils_fingerprint, tuple(plants_fingerprints))
+        compartments_objects = soils_objects + [model_object_fingerprint for plant_objects in plants_objects for model_object_fingerprint in plant_objects]
+
+        if topology_fingerprint != self.topology_fingerprint:
+            # check the consistency of population and soils
+            if len(self.population.plants) == 0:  # population must contain at least 1 plant
+                message = 'No plant found in the population.'
+                logger.exception(message)
+                raise SimulationInitializationError(message)
+            previous_plants_fingerprints = self.topology_fingerprint[1] if self.topology_fingerprint is not None and self.topology_fingerprint[0] == soils_fingerprint else ()
+            for plant_position, plant in enumerate(self.population.plants):
+                if plant_position < len(previous_plants_fingerprints) and previous_plants_fingerprints[plant_position] == plants_fingerprints[plant_position]:
+                    continue  # the topology of this plant was already checked
+                self._check_plant(plant)
+
+            # initialize initial conditions
+            del self.initial_conditions[:]
+            self._init_initial_conditions_mapping(compartments_objects)
+            self.initial_conditions.extend([0] * sum(len(compartments_names) for _, (_, _, compartments_names) in compartments_objects))
+
+            self._init_indexes_tables()
+            previous_jacobian_sparsity = self.jacobian_sparsity
+            self._init_jacobian_sparsity(plants_fingerprints)
+            # the Jacobian of the previous run can be reused only if the topology of the system did not change
+            if previous_jacobian_sparsity is None or previous_jacobian_sparsity.shape != self.jacobian_sparsity.shape or \
+                    (previous_jacobian_sparsity != self.jacobian_sparsity).nnz != 0:
+                self.reusable_jacobian = None
+                if self.solver_configuration.jacobian_reuse or self.solver_configuration.persistent_integrator:
+                    self._init_jacobian_groups()
+            self._init_solver_tolerances()
+            self.topology_fingerprint = topology_fingerprint
+            if self.derivatives_engine == 'vectorized':
+                self._pack_population()
+        elif len(compartments_objects) != len(self.compartments_objects) or \
+                any(model_object is not previous_model_object for (model_object, _), (previous_model_object, _) in zip(compartments_objects, self.compartments_objects)):
+            # same topology, but new objects: map the new objects to the indexes of the previous ones
+            self._init_initial_conditions_mapping(compartments_objects)
+            self._init_indexes_tables()
+            if self.derivatives_engine == 'vectorized':
+                self._pack_population()
+
+        self.compartments_objects = compartments_objects
+        if len(compartments_fingerprints) > len(compartments_objects):
+            # forget the objects removed from the population
+            self.compartments_fingerprints = dict(compartments_objects)
+        if self.derivatives_engine == 'vectorized':
+            self._pack_parameters()
 
         if self.interpolate_forcings:
-            # Save the new value of each forcing and set the state parameters to the previous forcing values.
-            self.new_forcings_values.clear()
-            for plant in self.population.plants:
-                for axis in plant.axes:
-                    if axis.roots is not None:
-                        roots_id = (plant.index, axis.label)
-                        self.new_forcings_values[roots_id] = {}
-                        for forcing_label in Simulation.ROOTS_FORCINGS:
-                            self.new_forcings_values[roots_id][forcing_label] = getattr(axis.roots, forcing_label)
-                            if roots_id in self.previous_forcings_values:
-                                setattr(axis.roots, forcing_label, self.previous_forcings_values[roots_id][forcing_label])
-                    for phytomer in axis.phytomers:
-                        for organ in (phytomer.lamina, phytomer.sheath):
-                            if organ is None:
-                                continue
-                            for element in (organ.exposed_element, organ.enclosed_element):
-                                if element is not None:
-                                    element_id = (plant.index, axis.label, phytomer.index, organ.label, element.label)
-                                    self.new_forcings_values[element_id] = {}
-                                    for forcing_label in Simulation.ELEMENTS_FORCINGS:
-                                        self.new_forcings_values[element_id][forcing_label] = getattr(element, forcing_label)
-                                        if element_id in self.previous_forcings_values:
-                                            setattr(element, forcing_label, self.previous_forcings_values[element_id][forcing_label])
+            self._save_new_forcings_values()
 
         # Update soil and air temperature using weather data
         for soil_id, soil_inputs in self.soils.items():
             self.soils[soil_id].Tsoil = Tsoil
 
-        # initialize initial conditions
-        def _init_initial_conditions(model_object, index):
-            class_ = model_object.__class__
-            if issubclass(class_, model.HiddenZone):
-                class_ = model.HiddenZone
-            elif issubclass(class_, model.Organ):
-                class_ = model.Organ
-            elif issubclass(class_, model.PhotosyntheticOrganElement):
-                class_ = model.PhotosyntheticOrganElement
-            compartments_names = Simulation.MODEL_COMPARTMENTS_NAMES[class_]
-            self.initial_conditions_mapping[model_object] = {}
-            for compartment_name in compartments_names:
-                if hasattr(model_object, compartment_name):
-                    self.initial_conditions_mapping[model_object][compartment_name] = index
-                    self.initial_conditions.append(0)
-                    index += 1
-            return index
+        self.population.calculate_aggregated_variables()
 
-        i = 0
+        if self.derivatives_engine == 'vectorized':
+            self.last_vectorized_evaluation.clear()
 
-        for soil in self.soils.values():
-            i = _init_initial_conditions(soil, i)
+        logger.info('Initialization of the simulation DONE')
 
-        for plant in self.population.plants:
-            i = _init_initial_conditions(plant, i)
-            for axis in plant.axes:
-                i = _init_initial_conditions(axis, i)
-                for organ in (axis.roots, axis.phloem, axis.grains, axis.endosperm):
+    @staticmethod
+    def _iter_plant_model_objects(plant):
+        """Iterate over `plant` and the objects of `plant` which can have compartments, in the order of :attr:`initial_conditions`.
+
+        :param model.Plant plant: a plant of the population.
+        """
+        yield plant
+        for axis in plant.axes:
+            yield axis
+            for organ in (axis.roots, axis.phloem, axis.grains, axis.endosperm):
+                if organ is not None:
+                    yield organ
+            for phytomer in axis.phytomers:
+                yield phytomer
+                for organ in (phytomer.chaff, phytomer.peduncle, phytomer.lamina, phytomer.internode, phytomer.sheath, phytomer.hiddenzone):
                     if organ is None:
                         continue
-                    i = _init_initial_conditions(organ, i)
-                for phytomer in axis.phytomers:
-                    i = _init_initial_conditions(phytomer, i)
-                    for organ in (phytomer.chaff, phytomer.peduncle, phytomer.lamina, phytomer.internode, phytomer.sheath, phytomer.hiddenzone):
-                        if organ is None:
-                            continue
-                        i = _init_initial_conditions(organ, i)
-                        if organ is phytomer.hiddenzone:
-                            continue
-                        for element in (organ.exposed_element, organ.enclosed_element):
-                            if element is None:
-                                continue
-                            i = _init_initial_conditions(element, i)
+                    yield organ
+                    if organ is phytomer.hiddenzone:
+                        continue
+                    for element in (organ.exposed_element, organ.enclosed_element):
+                        if element is not None:
+                            yield element
 
-        self.population.calculate_aggregated_variables()
+    @staticmethod
+    def _model_object_fingerprint(model_object):
+        """Summarize the place of `model_object` in the topology of the system: its class, its index or label,
+        and the names of its compartments (see :attr:`MODEL_COMPARTMENTS_NAMES`).
 
-        logger.info('Initialization of the simulation DONE')
+        :param object model_object: a plant, an axis, a phytomer, an organ, a photosynthetic organ element or a soil.
+
+        :return: The fingerprint of `model_object`.
+        :rtype: (type, object, tuple)
+        """
+        class_ = model_object.__class__
+        if issubclass(class_, model.HiddenZone):
+            compartments_class = model.HiddenZone
+        elif issubclass(class_, model.Organ):
+            compartments_class = model.Organ
+        elif issubclass(class_, model.PhotosyntheticOrganElement):
+            compartments_class = model.PhotosyntheticOrganElement
+        else:
+            compartments_class = class_
+        label = getattr(model_object, 'index', None) if class_ in (model.Plant, model.Phytomer) else getattr(model_object, 'label', None)
+        compartments_names = tuple(compartment_name for compartment_name in Simulation.MODEL_COMPARTMENTS_NAMES[compartments_class]
+                                   if hasattr(model_object, compartment_name))
+        return class_, label, compartments_names
+
+    def _init_initial_conditions_mapping(self, compartments_objects):
+        """Build :attr:`initial_conditions_mapping` from `compartments_objects`.
+
+        :param list compartments_objects: the objects which can have compartments and their fingerprints, as a list
+               [(model_object, fingerprint), ...] in the order of :attr:`initial_conditions` (see :meth:`_model_object_fingerprint`).
+        """
+        self.initial_conditions_mapping.clear()
+        index = 0
+        for model_object, (_, _, compartments_names) in compartments_objects:
+            self.initial_conditions_mapping[model_object] = dict(zip(compartments_names, range(index, index + len(compartments_names))))
+            index += len(compartments_names)
+
+    def _check_plant(self, plant):
+        """Check the consistency of `plant` ; raise a :class:`SimulationInitializationError` if `plant` is not consistent.
+
+        :param model.Plant plant: a plant of the population.
+        """
+        logger = logging.getLogger(__name__)
+        if len(plant.axes) != 0:  # each plant must contain at least 1 axis
+            for axis in plant.axes:
+                if axis.roots is None:  # each axis must have a "roots"
+                    message = 'No roots found in (plant={},axis={})'.format(plant.index, axis.label)
+                    logger.exception(message)
+                    raise SimulationInitializationError(message)
+                if axis.phloem is None:  # each axis must have a phloem
+                    message = 'No phloem found in (plant={},axis={})'.format(plant.index, axis.label)
+                    logger.exception(message)
+                    raise SimulationInitializationError(message)
+                if len(axis.phytomers) != 0:  # each axis must contain at least 1 phytomer
+                    for phytomer in axis.phytomers:
+                        phytomer_organs = (phytomer.lamina, phytomer.internode, phytomer.sheath, phytomer.chaff, phytomer.peduncle)
+                        # each phytomer must contain at least 1 photosynthetic organ or a hidden growing zone
+                        if phytomer_organs.count(None) != len(phytomer_organs) or phytomer.hiddenzone is not None:
+                            for organ in phytomer_organs:
+                                if organ is not None:
+                                    organ_elements = (organ.exposed_element, organ.enclosed_element)
+                                    # each photosynthetic organ must contain at least 1 element
+                                    if organ_elements.count(None) != len(organ_elements):
+                                        for element in organ_elements:
+                                            if element is not None:
+                                                # an element must belong to an organ of the same type (e.g. a LaminaElement must belong to a Lamina)
+                                                if organ.__class__.__name__ not in element.__class__.__name__:
+                                                    message = 'In (plant={},axis={},phytomer={}), a {} belongs to a {}'.format(plant.index,
+                                                                                                                               axis.label,
+                                                                                                                               phytomer.index,
+                                                                                                                               element.__class__.__name__,
+                                                                                                                               organ.__class__.__name__)
+                                                    logger.exception(message)
+                                                    raise SimulationInitializationError(message)
+                                    else:
+                                        message = 'No element found in (plant={},axis={},phytomer={},organ={})'.format(plant.index,
+                                                                                                                       axis.label,
+                                                                                                                       phytomer.index,
+                                                                                                                       organ.label)
+                                        logger.exception(message)
+                                        raise SimulationInitializationError(message)
+                        else:
+                            message = 'Neither photosynthetic organ nor hidden growing zone found in (plant={},axis={},phytomer={})'.format(plant.index,
+                                                                                                                                            axis.label,
+                                                                                                                                            phytomer.index)
+                            logger.exception(message)
+                            raise SimulationInitializationError(message)
+                else:
+                    message = 'No phytomer found in (plant={},axis={})'.format(plant.index,
+                                                                               axis.label)
+                    logger.exception(message)
+                    raise SimulationInitializationError(message)
+                if not self.external_soil_model and (plant.index, axis.label) not in self.soils:  # each axis must be associated to a soil if no external soil model declared
+                    message = 'No soil found in (plant={},axis={})'.format(plant.index,
+                                                                           axis.label)
+                    logger.exception(message)
+                    raise SimulationInitializationError(message)
+        else:
+            message = 'No axis found in (plant={})'.format(plant.index)
+            logger.exception(message)
+            raise SimulationInitializationError(message)
 
     def run(self, show_progressbar=False):
         """
@@ -629,6 +953,60 @@ class Simulation(object):
         logger = logging.getLogger(__name__)
         logger.info('Run of CN-Wheat...')
 
+        derivatives_function = self._prepare_run(show_progressbar)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Run the solver with delta_t = %s", self.time_step)
+
+        solver_configuration = self.solver_configuration
+        solver_options = {'rtol': solver_configuration.rtol, 'atol': self.atol, 'max_step': solver_configuration.max_step, 'first_step': solver_configuration.first_step}
+        if solver_configuration.jacobian_reuse or solver_configuration.persistent_integrator:
+            self.jacobian_reused = False
+            solver_options['jac'] = self._calculate_jacobian
+        elif solver_configuration.method != 'LSODA':  # LSODA only handles banded Jacobians
+            solver_options['jac_sparsity'] = self.jacobian_sparsity
+
+        # call :func:`scipy.integrate.solve_ivp` to integrate the system during 1 time step ;
+        # :func:`scipy.integrate.solve_ivp` computes the derivatives of each function by calling :meth:`_calculate_all_derivatives`
+        # (or :meth:`_calculate_all_derivatives_vectorized`)
+        wall_time_start = time.time()
+        sol = solve_ivp(fun=derivatives_function, t_span=self.time_grid, y0=self.initial_conditions,
+                        method=solver_configuration.method, t_eval=np.array([self.time_step]), dense_output=False, **solver_options)
+        success, solver_message, njev, nlu = sol.success, sol.message, sol.njev, sol.nlu
+        # the solver does not count the evaluations of the derivatives made to approximate the Jacobian, and counts
+        # each call to :meth:`_calculate_jacobian` as a new Jacobian even when the previous one is reused
+        nfev = self.derivatives_evaluations
+        if solver_configuration.jacobian_reuse or solver_configuration.persistent_integrator:
+            njev = self.jacobian_evaluations
+
+        self.solver_statistics['nfev'] = int(nfev)
+        self.solver_statistics['njev'] = int(njev)
+        self.solver_statistics['nlu'] = int(nlu)
+        self.solver_statistics['wall_time'] = time.time() - wall_time_start
+        self.nfev_total += nfev
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Run of the solver DONE: nfev = %s, njev = %s, nlu = %s, wall time = %s s", nfev, njev, nlu, self.solver_statistics['wall_time'])
+
+        # check the integration ; raise an exception if the integration failed
+        if not success:
+            message = "Integration failed: {}".format(solver_message)
+            logger.exception(message)
+            raise SimulationRunError(message)
+
+        self._finish_run()
+
+        logger.info('Run of CN-Wheat DONE')
+
+    def _prepare_run(self, show_progressbar=False):
+        """Prepare the integration of the system over :attr:`delta_t`: interpolate the forcings, update :attr:`initial_conditions`
+        from :attr:`population` and :attr:`soils`, and gather the state parameters used by the vectorized engine.
+
+        :param bool show_progressbar: True: show the progress bar of the solver ; False: do not show the progress bar (default).
+
+        :return: The function which computes the derivatives of the system.
+        :rtype: function
+        """
         if self.interpolate_forcings:
             # interpolate the forcings
             self._interpolate_forcings()
@@ -640,32 +1018,524 @@ class Simulation(object):
 
         self._update_initial_conditions()
 
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug("Run the solver with delta_t = %s", self.time_step)
+        if self.derivatives_engine == 'vectorized':
+            self._gather_state_parameters()
+            if self.interpolate_forcings:
+                self._init_packed_interpolated_forcings()
+            self.last_vectorized_evaluation.clear()
+        derivatives_function = self._get_derivatives_function()
 
-        # call :func:`scipy.integrate.solve_ivp` to integrate the system during 1 time step ;
-        # :func:`scipy.integrate.solve_ivp` computes the derivatives of each function by calling :meth:`_calculate_all_derivatives`
-        sol = solve_ivp(fun=self._calculate_all_derivatives, t_span=self.time_grid, y0=self.initial_conditions,
-                        method='BDF', t_eval=np.array([self.time_step]), dense_output=False)
+        # count the evaluations of the derivatives, including those of the solver to approximate the Jacobian
+        self.derivatives_evaluations = 0
+        self.jacobian_evaluations = 0
 
-        self.nfev_total += sol.nfev
+        def calculate_all_derivatives(t, y):
+            self.derivatives_evaluations += 1
+            return derivatives_function(t, y)
+        return calculate_all_derivatives
 
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug("Run of the solver DONE")
+    def _get_derivatives_function(self):
+        """Return the method which computes the derivatives of the system with :attr:`derivatives_engine`.
 
-        # check the integration ; raise an exception if the integration failed
-        if not sol.success:
-            message = "Integration failed: {}".format(sol.message)
-            logger.exception(message)
-            raise SimulationRunError(message)
+        :return: :meth:`_calculate_all_derivatives_vectorized` or :meth:`_calculate_all_derivatives`.
+        :rtype: function
+        """
+        if self.derivatives_engine == 'vectorized':
+            return self._calculate_all_derivatives_vectorized
+        return self._calculate_all_derivatives
+
+    def _finish_run(self):
+        """Update :attr:`population` at the end of a successful integration over :attr:`delta_t`, and advance :attr:`t`.
+        """
+        if self.derivatives_engine == 'vectorized':
+            # set the population to the values computed at the last evaluation of the derivatives, as done by the Python engine
+            self._update_population_from_vectorized_evaluation()
 
         # Re-compute integrative variables
         self.population.calculate_aggregated_variables()
 
+        logger = logging.getLogger(__name__)
         if logger.isEnabledFor(logging.DEBUG):
             self.t_offset += self.time_step
 
-        logger.info('Run of CN-Wheat DONE')
+        self.t += self.time_step
+
+    def run_until(self, t_end, forcings_provider=None, output_sink=None, outputs_time_step=None, show_progressbar=False):
+        """
+        Run the simulation from :attr:`t` to `t_end`, by steps of :attr:`time_step`.
+
+        Before each step, `forcings_provider` is called to update the forcings of :attr:`population` and :attr:`soils` in place
+        (e.g. photosynthesis, senescence, soil temperature). The forcings are then taken into account without re-initializing
+        the simulation: the compartments, the index tables and the Jacobian sparsity computed by :meth:`initialize` are kept.
+        Thus `forcings_provider` must not change the topology of the population ; otherwise, call :meth:`initialize` and :meth:`run` instead.
+
+        :param float t_end: the time at which the simulation stops (in hours).
+        :param function forcings_provider: a function `forcings_provider(t, population, soils)` which updates the forcings
+               at the beginning of the step `t` ; default is `None` (the forcings are constant).
+        :param function output_sink: a function `output_sink(t, population, soils)` called with the state of the simulation
+               every `outputs_time_step` hours ; default is `None` (no output).
+        :param float outputs_time_step: the time step of the outputs (in hours), a multiple of :attr:`time_step` ;
+               default is `None` (send the outputs at each step).
+        :param bool show_progressbar: True: show the progress bar of the solver ; False: do not show the progress bar (default).
+        """
+        logger = logging.getLogger(__name__)
+
+        steps_number = int(round((t_end - self.t) / self.time_step))
+        if outputs_time_step is None:
+            outputs_steps = 1
+        else:
+            outputs_steps = int(round(outputs_time_step / self.time_step))
+            if outputs_steps < 1 or not np.isclose(outputs_steps * self.time_step, outputs_time_step):
+                message = 'The outputs time step {} is not a multiple of the time step of the simulation {}.'.format(outputs_time_step, self.time_step)
+                logger.exception(message)
+                raise SimulationRunError(message)
+
+        for step in range(1, steps_number + 1):
+            if forcings_provider is not None:
+                forcings_provider(self.t, self.population, self.soils)
+                if self.interpolate_forcings:
+                    self._save_new_forcings_values()
+                self.population.calculate_aggregated_variables()
+            self.run(show_progressbar=show_progressbar)
+            if output_sink is not None and step % outputs_steps == 0:
+                output_sink(self.t, self.population, self.soils)
+
+    def set_delta_t(self, delta_t):
+        """Change the delta t of the simulation between two runs.
+
+        :param float delta_t: the new delta t of the simulation (in seconds).
+        """
+        if self.interpolate_forcings:
+            message = """The delta t of the simulation cannot be changed when `interpolate_forcings` is `True`, because the forcings are interpolated
+        from the ratio between the delta t of the forcings and the delta t of the simulation. Please use a `forcings_interpolator` instead."""
+            logger = logging.getLogger(__name__)
+            logger.exception(message)
+            raise SimulationRunError(message)
+        self.delta_t = delta_t
+        self.time_step = self.delta_t / 3600.0
+        self.time_grid = np.array([0.0, self.time_step])
+
+    def run_adaptive(self, t_end, forcings_provider=None, output_sink=None, outputs_time_step=None, stepping=None, show_progressbar=False):
+        """
+        Run the simulation from :attr:`t` to `t_end`, by time steps adapted to the rates of change of the compartments and of the forcings
+        (see :class:`AdaptiveStepping`): several steps are merged when the system is quiet (e.g. at night), and the steps are shortened
+        around the transitions (e.g. at sunrise).
+
+        As in :meth:`run_until`, `forcings_provider` is called at the beginning of each step, and must not change the topology of the population.
+        The forcings given at the beginning of a step are kept during the whole step, unless a `forcings_interpolator` was passed to the constructor.
+        Before each step longer than the smallest time step, `forcings_provider` (or the `forcings_interpolator`) is also called at the times
+        inside the step, so that the step ends before a fast change of the forcings (e.g. a sunrise) instead of jumping over it
+        (see :meth:`_look_ahead_forcings`): it must set the forcings from `t` only, whatever the previous calls.
+
+        The outputs are sent on the fixed grid of `outputs_time_step`, whatever the time steps:
+
+            * if `output_sink` has a method `append(t, dataframes)` (e.g. a :class:`cnwheat.io.PopulationOutputsSink`), the outputs at the times
+              of the grid inside a step are linearly interpolated between the outputs at the beginning and at the end of the step,
+            * otherwise, `output_sink(t, population, soils)` is called, and the steps are shortened so that they end on the times of the grid.
+
+        :attr:`delta_t` is restored at the end of the run.
+
+        :param float t_end: the time at which the simulation stops (in hours).
+        :param function forcings_provider: a function `forcings_provider(t, population, soils)` which updates the forcings
+               at the beginning of the step `t` ; default is `None` (the forcings are constant).
+        :param output_sink: the sink of the outputs ; default is `None` (no output).
+        :param float outputs_time_step: the time step of the outputs (in hours), a multiple of the smallest time step of `stepping` ;
+               default is `None` (the smallest time step of `stepping`).
+        :param AdaptiveStepping stepping: the configuration of the time steps ; default is `None` (use the default configuration of :class:`AdaptiveStepping`).
+        :param bool show_progressbar: True: show the progress bar of the solver ; False: do not show the progress bar (default).
+
+        :return: The time steps of the run (in hours).
+        :rtype: list [float]
+        """
+        logger = logging.getLogger(__name__)
+
+        if stepping is None:
+            stepping = AdaptiveStepping()
+        if outputs_time_step is None:
+            outputs_time_step = stepping.min_time_step
+        outputs_steps = int(round(outputs_time_step / stepping.min_time_step))
+        if outputs_steps < 1 or not np.isclose(outputs_steps * stepping.min_time_step, outputs_time_step):
+            message = 'The outputs time step {} is not a multiple of the smallest time step {}.'.format(outputs_time_step, stepping.min_time_step)
+            logger.exception(message)
+            raise SimulationRunError(message)
+        max_steps_number = max(1, int(round(stepping.max_time_step / stepping.min_time_step)))
+
+        resample_outputs = output_sink is not None and hasattr(output_sink, 'append')
+        if resample_outputs:
+            from cnwheat import converter  # imported here because the module converter imports this module
+            previous_outputs = converter.to_dataframes(self.population, self.soils)
+
+        initial_delta_t = self.delta_t
+        t_start = self.t
+        outputs_number = 1
+        steps_number = 1  # the number of smallest time steps of the next step
+        previous_forcings_t, previous_forcings = None, None
+        time_steps = []
+        try:
+            while self.t < t_end - 1e-9 * stepping.min_time_step:
+                t = self.t
+                if forcings_provider is not None:
+                    forcings_provider(t, self.population, self.soils)
+                    self.population.calculate_aggregated_variables()
+
+                # shorten the step if the forcings change fast
+                forcings = self._gather_forcings_values()
+                if previous_forcings is not None and len(forcings) == len(previous_forcings):
+                    forcings_change = Simulation._relative_change(previous_forcings, forcings, stepping.forcings_atol)
+                    if forcings_change > 0:
+                        forcings_rate = forcings_change / (t - previous_forcings_t)
+                        steps_number = min(steps_number, int(stepping.forcings_tolerance / (forcings_rate * stepping.min_time_step)))
+                previous_forcings_t, previous_forcings = t, forcings
+
+                steps_number = min(max(steps_number, 1), max_steps_number)
+                if steps_number > 1 and (forcings_provider is not None or self.forcings_interpolator is not None):
+                    steps_number = self._look_ahead_forcings(t, t_end, steps_number, forcings, forcings_provider, stepping)
+                if output_sink is not None and not resample_outputs:
+                    steps_number = min(steps_number, int(round((t_start + outputs_number * outputs_time_step - t) / stepping.min_time_step)))
+                time_step = min(steps_number * stepping.min_time_step, t_end - t)
+
+                self._update_initial_conditions()
+                y_start = np.array(self.initial_conditions, dtype=float)
+                self.set_delta_t(time_step * 3600.0)
+                self.run(show_progressbar=show_progressbar)
+                self._update_initial_conditions()
+                y_end = np.array(self.initial_conditions, dtype=float)
+                time_steps.append(time_step)
+
+                # send the outputs on the grid of the outputs
+                if output_sink is not None:
+                    if resample_outputs:
+                        outputs = converter.to_dataframes(self.population, self.soils)
+                    while t_start + outputs_number * outputs_time_step <= self.t + 1e-9 * stepping.min_time_step:
+                        output_t = t_start + outputs_number * outputs_time_step
+                        if not resample_outputs:
+                            output_sink(self.t, self.population, self.soils)
+                        elif np.isclose(output_t, self.t):
+                            output_sink.append(self.t, outputs)
+                        else:
+                            output_sink.append(output_t, Simulation._resample_outputs(previous_outputs, outputs, (output_t - t) / time_step))
+                        outputs_number += 1
+                    if resample_outputs:
+                        previous_outputs = outputs
+
+                # choose the next step from the change of the compartments over this step
+                state_change = Simulation._relative_change(y_start, y_end, self.atol)
+                growth_steps_number = int(steps_number * stepping.growth_factor)
+                if state_change > 0:
+                    steps_number = min(growth_steps_number, int(stepping.state_tolerance * steps_number / state_change))
+                else:
+                    steps_number = growth_steps_number
+                logger.debug('Adaptive step from t = %s to t = %s: state change = %s', t, self.t, state_change)
+        finally:
+            self.set_delta_t(initial_delta_t)
+
+        return time_steps
+
+    def _look_ahead_forcings(self, t, t_end, steps_number, forcings, forcings_provider, stepping):
+        """Shorten the step starting at `t`, so that the forcings inside the step change by less than the forcings tolerance of `stepping`
+        from their values at `t`. The forcings are set by `forcings_provider`, or by :attr:`forcings_interpolator`, at each smallest time step inside the step,
+        then the forcings of :attr:`population` are restored to their values at `t`.
+
+        :param float t: the beginning of the step (in hours).
+        :param float t_end: the time at which the simulation stops (in hours).
+        :param int steps_number: the number of smallest time steps of the step.
+        :param numpy.ndarray forcings: the values of the forcings at `t` (see :meth:`_gather_forcings_values`).
+        :param function forcings_provider: the function which updates the forcings (see :meth:`run_adaptive`), or `None`.
+        :param AdaptiveStepping stepping: the configuration of the time steps.
+
+        :return: The number of smallest time steps of the shortened step.
+        :rtype: int
+        """
+        forcings_values = [(model_object, forcing_label, getattr(model_object, forcing_label)) for model_object, forcing_label in self._iter_forcings()]
+        try:
+            for ahead_steps_number in range(1, steps_number + 1):
+                ahead_t = t + ahead_steps_number * stepping.min_time_step
+                if ahead_t > t_end + 1e-9 * stepping.min_time_step:
+                    break
+                if forcings_provider is not None:
+                    forcings_provider(ahead_t, self.population, self.soils)
+                else:
+                    self.forcings_interpolator.apply(ahead_t, self.population)
+                ahead_forcings = self._gather_forcings_values()
+                if len(ahead_forcings) == len(forcings) and \
+                        Simulation._relative_change(forcings, ahead_forcings, stepping.forcings_atol) > stepping.forcings_tolerance:
+                    # end the step before the change
+                    return max(ahead_steps_number - 1, 1)
+            return steps_number
+        finally:
+            if forcings_provider is not None:
+                forcings_provider(t, self.population, self.soils)
+            for model_object, forcing_label, forcing_value in forcings_values:
+                setattr(model_object, forcing_label, forcing_value)
+
+    @staticmethod
+    def _relative_change(previous_values, values, atol):
+        """Compute the relative change between `previous_values` and `values`, as the root mean square of the relative changes of the values,
+        like the error norm of the solvers of :mod:`scipy.integrate`. The values which are not finite are ignored.
+
+        :param numpy.ndarray previous_values: the previous values.
+        :param numpy.ndarray values: the new values.
+        :param atol: the absolute tolerance, a float or an array of the size of `values`.
+
+        :return: The relative change, 0 if no value is finite.
+        :rtype: float
+        """
+        relative_changes = np.abs(values - previous_values) / (np.maximum(np.abs(previous_values), np.abs(values)) + atol)
+        relative_changes = relative_changes[np.isfinite(relative_changes)]
+        if len(relative_changes) == 0:
+            return 0
+        return float(np.sqrt(np.mean(relative_changes ** 2)))
+
+    @staticmethod
+    def _resample_outputs(previous_outputs, outputs, weight):
+        """Linearly interpolate the outputs between `previous_outputs` and `outputs`.
+
+        The rows of the outputs are matched by position, as the topology of the population does not change between the two outputs.
+        The floats are interpolated, including the columns of dtype object which hold floats and missing values only
+        (e.g. the variables not computed for some model objects) ; the other columns are taken from `previous_outputs`.
+
+        :param tuple previous_outputs: the outputs at the beginning of the step, as returned by :func:`converter.to_dataframes`.
+        :param tuple outputs: the outputs at the end of the step.
+        :param float weight: the position of the resampled outputs in the step, from 0 (`previous_outputs`) to 1 (`outputs`).
+
+        :return: The resampled outputs.
+        :rtype: tuple [pandas.DataFrame]
+        """
+        resampled_outputs = []
+        for previous_outputs_df, outputs_df in zip(previous_outputs, outputs):
+            resampled_outputs_df = previous_outputs_df.copy()
+            float_columns = [column for column in outputs_df.columns
+                             if column in previous_outputs_df.columns and Simulation._is_float_column(previous_outputs_df[column]) and Simulation._is_float_column(outputs_df[column])]
+            previous_values = previous_outputs_df[float_columns].to_numpy(dtype=float, na_value=np.nan)
+            resampled_outputs_df[float_columns] = previous_values + weight * (outputs_df[float_columns].to_numpy(dtype=float, na_value=np.nan) - previous_values)
+            resampled_outputs.append(resampled_outputs_df)
+        return tuple(resampled_outputs)
+
+    @staticmethod
+    def _is_float_column(column_values):
+        """Check whether a column of outputs holds floats: either a column of dtype float, or a column of dtype object
+        whose values are floats or missing values.
+
+        :param pandas.Series column_values: the values of the column.
+
+        :return: True if the column holds floats.
+        :rtype: bool
+        """
+        dtype = column_values.dtype
+        if not isinstance(dtype, np.dtype):
+            return False
+        if np.issubdtype(dtype, np.floating):
+            return True
+        if dtype != object:
+            return False
+        values = column_values.dropna()
+        return len(values) > 0 and all(isinstance(value, (float, np.floating)) for value in values)
+
+    def _iter_forcings(self):
+        """Iterate over the forcings of :attr:`population` (see :attr:`ROOTS_FORCINGS` and :attr:`ELEMENTS_FORCINGS`).
+
+        :return: The model object and the label of each forcing.
+        :rtype: generator [(object, str)]
+        """
+        for plant in self.population.plants:
+            for axis in plant.axes:
+                if axis.roots is not None:
+                    for forcing_label in Simulation.ROOTS_FORCINGS:
+                        yield axis.roots, forcing_label
+                for phytomer in axis.phytomers:
+                    for organ in (phytomer.lamina, phytomer.sheath):
+                        if organ is None:
+                            continue
+                        for element in (organ.exposed_element, organ.enclosed_element):
+                            if element is not None:
+                                for forcing_label in Simulation.ELEMENTS_FORCINGS:
+                                    yield element, forcing_label
+
+    def _gather_forcings_values(self):
+        """Gather the values of the forcings of :attr:`population` (see :attr:`ROOTS_FORCINGS` and :attr:`ELEMENTS_FORCINGS`).
+
+        :return: The values of the forcings.
+        :rtype: numpy.ndarray
+        """
+        return np.array([getattr(model_object, forcing_label) for model_object, forcing_label in self._iter_forcings()], dtype=float)
+
+    def _init_indexes_tables(self):
+        """Build the index tables of the compartments from :attr:`initial_conditions_mapping` (see :attr:`INDEXES_TABLES`).
+
+        The objects of each type are listed in :attr:`indexed_objects`, in the order of :attr:`initial_conditions`.
+        For each compartment, the indexes in :attr:`initial_conditions` of the compartment of these objects are stored in an
+        array of integers, so that the values of a compartment are gathered from `y` with a single fancy-indexing
+        operation, e.g. `y[self.element_starch_idx]`.
+        """
+        indexed_objects = dict((prefix, []) for prefix, _ in Simulation.INDEXES_TABLES)
+        indexed_objects['soil'].extend(self.soils.values())
+        for plant in self.population.plants:
+            for axis in plant.axes:
+                indexed_objects['roots'].append(axis.roots)
+                indexed_objects['phloem'].append(axis.phloem)
+                if axis.grains is not None:
+                    indexed_objects['grains'].append(axis.grains)
+                if axis.endosperm is not None:
+                    indexed_objects['endosperm'].append(axis.endosperm)
+                for phytomer in axis.phytomers:
+                    for organ in (phytomer.chaff, phytomer.peduncle, phytomer.lamina, phytomer.internode, phytomer.sheath):
+                        if organ is None:
+                            continue
+                        for element in (organ.exposed_element, organ.enclosed_element):
+                            if element is None:
+                                continue
+                            indexed_objects['element'].append(element)
+                    if phytomer.hiddenzone is not None:
+                        indexed_objects['hiddenzone'].append(phytomer.hiddenzone)
+
+        self.compartments_indexes.clear()
+        self.indexed_objects.clear()
+        self.compartments_positions.clear()
+        for prefix, compartments_names in Simulation.INDEXES_TABLES:
+            model_objects = indexed_objects[prefix]
+            self.indexed_objects[prefix] = model_objects
+            self.compartments_positions.update((model_object, position) for position, model_object in enumerate(model_objects))
+            for compartment_name in compartments_names:
+                compartment_indexes = np.array([self.initial_conditions_mapping[model_object][compartment_name] for model_object in model_objects], dtype=int)
+                self.compartments_indexes[(prefix, compartment_name)] = compartment_indexes
+                setattr(self, '{}_{}_idx'.format(prefix, compartment_name), compartment_indexes)
+
+    def _init_jacobian_sparsity(self, plants_fingerprints):
+        """Build the sparsity pattern of the Jacobian of the system from the topology of :attr:`population` and :attr:`soils`,
+        and store it in :attr:`jacobian_sparsity`.
+
+        The compartments of an object are all coupled together, and the objects are coupled locally (see :meth:`_calculate_all_derivatives`):
+            * a photosynthetic organ element exchanges sucrose and amino acids with the phloem of its axis or with the hidden zone
+              of its phytomer, and imports nitrates, amino acids and cytokinins from the roots of its axis,
+            * a hidden zone exchanges sucrose and amino acids with the phloem of its axis and with the photosynthetic organ elements of its phytomer,
+            * the roots exchange sucrose and amino acids with the phloem of their axis, and take up the nitrates of the soils,
+            * the grains and the endosperm exchange with the phloem of their axis,
+            * and the soils are depleted by the roots of all the axes.
+
+        The pattern of a plant depends on its fingerprint only: it is computed relative to the first compartment of the plant, and kept
+        in :attr:`plants_jacobian_patterns`, so only the plants whose topology changed are coupled again.
+        The couplings between the soils and the roots are computed again at each call.
+
+        The pattern is passed to :func:`scipy.integrate.solve_ivp` as `jac_sparsity`, so that the solver approximates
+        the Jacobian with a few evaluations of the derivatives only, instead of one evaluation per compartment.
+
+        :param list plants_fingerprints: the fingerprint of each plant of :attr:`population` (see :meth:`initialize`).
+        """
+        rows = []
+        columns = []
+        soils = list(self.soils.values())
+        all_roots = []
+        plants_jacobian_patterns = {}
+        plant_start = sum(len(self.initial_conditions_mapping[soil]) for soil in soils)
+        for plant, plant_fingerprint in zip(self.population.plants, plants_fingerprints):
+            plant_pattern = plants_jacobian_patterns.get(plant_fingerprint, self.plants_jacobian_patterns.get(plant_fingerprint))
+            if plant_pattern is None:
+                plant_rows, plant_columns = [], []
+                self._couple_plant_compartments(plant, plant_rows, plant_columns)
+                plant_pattern = (np.concatenate(plant_rows) - plant_start, np.concatenate(plant_columns) - plant_start) if plant_rows else \
+                    (np.array([], dtype=int), np.array([], dtype=int))
+            plants_jacobian_patterns[plant_fingerprint] = plant_pattern
+            rows.append(plant_pattern[0] + plant_start)
+            columns.append(plant_pattern[1] + plant_start)
+            all_roots.extend(axis.roots for axis in plant.axes)
+            plant_start += sum(len(compartments_names) for _, _, compartments_names in plant_fingerprint)
+        self.plants_jacobian_patterns = plants_jacobian_patterns
+
+        self._couple_compartments(rows, columns, all_roots, soils, ('nitrates',))
+        self._couple_compartments(rows, columns, soils, soils + all_roots)
+
+        nb_compartments = len(self.initial_conditions)
+        rows = np.concatenate(rows) if rows else np.array([], dtype=int)
+        columns = np.concatenate(columns) if columns else np.array([], dtype=int)
+        self.jacobian_sparsity = sparse.coo_matrix((np.ones(len(rows), dtype=bool), (rows, columns)), shape=(nb_compartments, nb_compartments)).tocsc()
+
+    def _couple_compartments(self, rows, columns, model_objects, coupled_model_objects, compartments_names=None):
+        """Append to `rows` and `columns` the non-zero entries of the Jacobian where the derivatives of the compartments of `model_objects`
+        depend on the compartments `compartments_names` of `coupled_model_objects` (see :meth:`_init_jacobian_sparsity`).
+
+        :param list rows: the rows of the non-zero entries, as a list of arrays.
+        :param list columns: the columns of the non-zero entries, as a list of arrays.
+        :param list model_objects: the objects whose derivatives depend on `coupled_model_objects`.
+        :param list coupled_model_objects: the objects on which the derivatives depend.
+        :param tuple compartments_names: the names of the compartments of `coupled_model_objects` ; default is `None` (all their compartments).
+        """
+        objects_indexes = [index for model_object in model_objects for index in self.initial_conditions_mapping[model_object].values()]
+        coupled_objects_indexes = [index for model_object in coupled_model_objects for compartment_name, index in self.initial_conditions_mapping[model_object].items()
+                                   if compartments_names is None or compartment_name in compartments_names]
+        rows.append(np.repeat(np.array(objects_indexes, dtype=int), len(coupled_objects_indexes)))
+        columns.append(np.tile(np.array(coupled_objects_indexes, dtype=int), len(objects_indexes)))
+
+    def _couple_plant_compartments(self, plant, rows, columns):
+        """Append to `rows` and `columns` the non-zero entries of the Jacobian between the compartments of `plant` (see :meth:`_init_jacobian_sparsity`).
+
+        :param model.Plant plant: a plant of the population.
+        :param list rows: the rows of the non-zero entries, as a list of arrays.
+        :param list columns: the columns of the non-zero entries, as a list of arrays.
+        """
+        exchanged_compartments_names = ('amino_acids', 'sucrose')
+
+        def couple(model_objects, coupled_model_objects, compartments_names=None):
+            self._couple_compartments(rows, columns, model_objects, coupled_model_objects, compartments_names)
+
+        for axis in plant.axes:
+            couple([axis.roots], [axis.roots])
+            couple([axis.roots], [axis.phloem], exchanged_compartments_names)
+            couple([axis.phloem], [axis.phloem, axis.roots])
+            for organ in (axis.grains, axis.endosperm):
+                if organ is None:
+                    continue
+                couple([organ], [organ])
+                couple([organ], [axis.phloem], exchanged_compartments_names)
+                couple([axis.phloem], [organ])
+            for phytomer in axis.phytomers:
+                phytomer_elements = []
+                for organ in (phytomer.chaff, phytomer.peduncle, phytomer.lamina, phytomer.internode, phytomer.sheath):
+                    if organ is None:
+                        continue
+                    for element in (organ.exposed_element, organ.enclosed_element):
+                        if element is None:
+                            continue
+                        phytomer_elements.append(element)
+                hiddenzones = [] if phytomer.hiddenzone is None else [phytomer.hiddenzone]
+                for element in phytomer_elements:
+                    couple([element], [element])
+                    couple([element], [axis.phloem] + hiddenzones, exchanged_compartments_names)
+                    couple([element], [axis.roots], ('amino_acids', 'cytokinins', 'nitrates'))
+                couple(hiddenzones, hiddenzones)
+                couple(hiddenzones, [axis.phloem] + phytomer_elements, exchanged_compartments_names)
+                couple([axis.phloem], hiddenzones + phytomer_elements, exchanged_compartments_names)
+
+    def _init_jacobian_groups(self):
+        """Group the columns of the Jacobian which do not share any non-zero row in :attr:`jacobian_sparsity`, and store
+        the group of each column in :attr:`jacobian_groups`. The columns of a group are approximated together by :meth:`_approximate_jacobian`.
+        """
+        nb_compartments = self.jacobian_sparsity.shape[1]
+        columns_rows = np.split(self.jacobian_sparsity.indices, self.jacobian_sparsity.indptr[1:-1])
+        rows_groups = [set() for _ in range(self.jacobian_sparsity.shape[0])]
+        self.jacobian_groups = np.empty(nb_compartments, dtype=int)
+        for column, column_rows in enumerate(columns_rows):
+            column_rows = column_rows.tolist()
+            forbidden_groups = set().union(*[rows_groups[row] for row in column_rows])
+            group = 0
+            while group in forbidden_groups:
+                group += 1
+            self.jacobian_groups[column] = group
+            for row in column_rows:
+                rows_groups[row].add(group)
+
+    def _init_solver_tolerances(self):
+        """Build the absolute tolerances of the compartments from :attr:`solver_configuration`, and store them in :attr:`atol`.
+        """
+        compartments_atol = self.solver_configuration.compartments_atol
+        if not compartments_atol:
+            self.atol = self.solver_configuration.atol
+            return
+        self.atol = np.full(len(self.initial_conditions), self.solver_configuration.atol)
+        for prefix, compartments_names in Simulation.INDEXES_TABLES:
+            for compartment_name in compartments_names:
+                compartment_atol = compartments_atol.get((prefix, compartment_name), compartments_atol.get(prefix))
+                if compartment_atol is not None:
+                    self.atol[self.compartments_indexes[(prefix, compartment_name)]] = compartment_atol
 
     def _update_initial_conditions(self):
         """Update the compartments values in :attr:`initial_conditions` from the compartments values of :attr:`population` and :attr:`soils`.
@@ -675,30 +1545,51 @@ class Simulation(object):
             for compartment_name, compartment_index in compartments.items():
                 self.initial_conditions[compartment_index] = getattr(model_object, compartment_name)
 
+    def _save_new_forcings_values(self):
+        """Save the new value of each forcing of :attr:`population` in :attr:`new_forcings_values`,
+        and set the state parameters to the previous forcing values (see :meth:`_interpolate_forcings`).
+        """
+        self.new_forcings_values.clear()
+        for plant in self.population.plants:
+            for axis in plant.axes:
+                if axis.roots is not None:
+                    roots_id = (plant.index, axis.label)
+                    self.new_forcings_values[roots_id] = {}
+                    for forcing_label in Simulation.ROOTS_FORCINGS:
+                        self.new_forcings_values[roots_id][forcing_label] = getattr(axis.roots, forcing_label)
+                        if roots_id in self.previous_forcings_values:
+                            setattr(axis.roots, forcing_label, self.previous_forcings_values[roots_id][forcing_label])
+                for phytomer in axis.phytomers:
+                    for organ in (phytomer.lamina, phytomer.sheath):
+                        if organ is None:
+                            continue
+                        for element in (organ.exposed_element, organ.enclosed_element):
+                            if element is not None:
+                                element_id = (plant.index, axis.label, phytomer.index, organ.label, element.label)
+                                self.new_forcings_values[element_id] = {}
+                                for forcing_label in Simulation.ELEMENTS_FORCINGS:
+                                    self.new_forcings_values[element_id][forcing_label] = getattr(element, forcing_label)
+                                    if element_id in self.previous_forcings_values:
+                                        setattr(element, forcing_label, self.previous_forcings_values[element_id][forcing_label])
+
     def _interpolate_forcings(self):
-        """Create functions to interpolate the forcings of the model to any time inside the time grid (see `self.time_grid`).
+        """Compute the linear interpolation of the forcings of the model to any time inside the time grid (see `self.time_grid`).
 
         If this is the first run of the model, then we consider that the forcings are constant.
-        The interpolation functions are stored in :attr:`interpolation_functions`, and will be used later on and as needed by the SciPy solver.
+        The forcings are stored in :attr:`interpolated_forcings`, with their values at the beginning of the time grid in :attr:`interpolated_forcings_origins`
+        and their slopes in :attr:`interpolated_forcings_slopes`. They will be used later on and as needed by the SciPy solver (see :meth:`_set_interpolated_forcings`).
         """
-        self.interpolation_functions.clear()
-        next_forcings_values = {}
+        interpolated_forcings = []
+        prev_forcings_values = []
+        next_forcings_values = []
+        forcings_ids = []
         for plant in self.population.plants:
             for axis in plant.axes:
                 if axis.roots is not None:
                     roots_id = (plant.index, axis.label)
-                    self.interpolation_functions[roots_id] = {}
-                    next_forcings_values[roots_id] = {}
                     for forcing_label in Simulation.ROOTS_FORCINGS:
-                        if roots_id in self.previous_forcings_values and \
-                                self.previous_forcings_values[roots_id][forcing_label] != self.new_forcings_values[roots_id][forcing_label]:
-                            prev_forcing_value = self.previous_forcings_values[roots_id][forcing_label]
-                            next_forcing_value = prev_forcing_value + (self.new_forcings_values[roots_id][forcing_label] - prev_forcing_value) / self.senescence_forcings_delta_t_ratio
-                        else:
-                            next_forcing_value = self.new_forcings_values[roots_id][forcing_label]
-                            prev_forcing_value = next_forcing_value
-                        self.interpolation_functions[roots_id][forcing_label] = interpolate.interp1d(self.time_grid, [prev_forcing_value, next_forcing_value], assume_sorted=True)
-                        next_forcings_values[roots_id][forcing_label] = next_forcing_value
+                        interpolated_forcings.append((axis.roots, forcing_label))
+                        forcings_ids.append((roots_id, forcing_label, self.senescence_forcings_delta_t_ratio))
                 for phytomer in axis.phytomers:
                     for organ in (phytomer.lamina, phytomer.sheath):
                         if organ is None:
@@ -706,23 +1597,30 @@ class Simulation(object):
                         for element in (organ.exposed_element, organ.enclosed_element):
                             if element is not None:
                                 element_id = (plant.index, axis.label, phytomer.index, organ.label, element.label)
-                                self.interpolation_functions[element_id] = {}
-                                next_forcings_values[element_id] = {}
                                 for (forcing_labels, forcings_delta_t_ratio) in ((Simulation.ELEMENTS_PHOTOSYNTHESIS_FORCINGS, self.photosynthesis_forcings_delta_t_ratio),
                                                                                  (Simulation.ELEMENTS_SENESCENCE_FORCINGS, self.senescence_forcings_delta_t_ratio)):
                                     for forcing_label in forcing_labels:
-                                        if element_id in self.previous_forcings_values and \
-                                                self.previous_forcings_values[element_id][forcing_label] != self.new_forcings_values[element_id][forcing_label]:
-                                            prev_forcing_value = self.previous_forcings_values[element_id][forcing_label]
-                                            next_forcing_value = prev_forcing_value + (self.new_forcings_values[element_id][forcing_label] - prev_forcing_value) / forcings_delta_t_ratio
-                                        else:
-                                            next_forcing_value = self.new_forcings_values[element_id][forcing_label]
-                                            prev_forcing_value = next_forcing_value
-                                        self.interpolation_functions[element_id][forcing_label] = interpolate.interp1d(self.time_grid, [prev_forcing_value, next_forcing_value], assume_sorted=True)
-                                        next_forcings_values[element_id][forcing_label] = next_forcing_value
+                                        interpolated_forcings.append((element, forcing_label))
+                                        forcings_ids.append((element_id, forcing_label, forcings_delta_t_ratio))
+
+        for model_object_id, forcing_label, forcings_delta_t_ratio in forcings_ids:
+            new_forcing_value = self.new_forcings_values[model_object_id][forcing_label]
+            if model_object_id in self.previous_forcings_values and self.previous_forcings_values[model_object_id][forcing_label] != new_forcing_value:
+                prev_forcing_value = self.previous_forcings_values[model_object_id][forcing_label]
+                next_forcing_value = prev_forcing_value + (new_forcing_value - prev_forcing_value) / forcings_delta_t_ratio
+            else:
+                next_forcing_value = new_forcing_value
+                prev_forcing_value = next_forcing_value
+            prev_forcings_values.append(prev_forcing_value)
+            next_forcings_values.append(next_forcing_value)
+
+        self.interpolated_forcings = interpolated_forcings
+        self.interpolated_forcings_origins = np.array(prev_forcings_values, dtype=float)
+        self.interpolated_forcings_slopes = (np.array(next_forcings_values, dtype=float) - self.interpolated_forcings_origins) / (self.time_grid[1] - self.time_grid[0])
 
         self.previous_forcings_values.clear()
-        self.previous_forcings_values.update(next_forcings_values)
+        for (model_object_id, forcing_label, _), next_forcing_value in zip(forcings_ids, next_forcings_values):
+            self.previous_forcings_values.setdefault(model_object_id, {})[forcing_label] = next_forcing_value
 
     def _log_compartments(self, t, y, loggers_names):
         """Log the values in `y` to the loggers in `loggers_names`.
@@ -792,6 +1690,300 @@ class Simulation(object):
             formatted_initial_conditions = row_sep.join([column_sep.join(row) for row in all_rows[class_]])
             compartments_logger.debug(formatted_initial_conditions)
 
+    def _set_compartments(self, y):
+        """Set the compartments of the objects of :attr:`population` and :attr:`soils` to their values in `y`, using the index tables.
+
+        :param numpy.ndarray y: the values of the compartments.
+        """
+        for (prefix, compartment_name), compartment_indexes in self.compartments_indexes.items():
+            for model_object, compartment_value in zip(self.indexed_objects[prefix], y[compartment_indexes].tolist()):
+                setattr(model_object, compartment_name, compartment_value)
+
+    def _set_interpolated_forcings(self, t):
+        """Set the state parameters of :attr:`population` to the values of the forcings interpolated at `t` (see :meth:`_interpolate_forcings`).
+
+        The values of all the forcings are interpolated at once. If a :attr:`forcings_interpolator` is given, it sets the forcings at the time
+        of the simulation :attr:`t` + `t` instead.
+
+        :param float t: the time at which the forcings are interpolated, from the beginning of the step.
+        """
+        if self.forcings_interpolator is not None:
+            self.forcings_interpolator.apply(self.t + t, self.population)
+            return
+        forcings_values = self.interpolated_forcings_slopes * (t - self.time_grid[0]) + self.interpolated_forcings_origins
+        for (model_object, forcing_label), forcing_value in zip(self.interpolated_forcings, forcings_values.tolist()):
+            setattr(model_object, forcing_label, forcing_value)
+
+    def _pack_population(self):
+        """Pack :attr:`population` and :attr:`soils` into the arrays used by the vectorized engine, and store them in :attr:`packed_population`.
+
+        Each soil, axis, hidden zone, photosynthetic organ element, grains and endosperm is given a position in the arrays of its class, in the order
+        of the index tables (see :meth:`_init_indexes_tables`). The roots and the phloem of an axis share the position of the axis. For each class, we store
+        the indexes of the compartments in :attr:`initial_conditions`, and the positions of the parent soil, axis or hidden zone. The parameters are packed
+        by :meth:`_pack_parameters`, and the state parameters, which change between two runs, are gathered by :meth:`_gather_state_parameters`.
+        """
+        axes, axes_soils, plants_axes = [], [], {}
+        hiddenzones, hiddenzones_axes, hiddenzones_phytomers = [], [], []
+        elements, elements_axes, elements_hiddenzones, elements_phytomers = [], [], [], []
+        for plant in self.population.plants:
+            for axis in plant.axes:
+                axis_position = len(axes)
+                axes.append(axis)
+                axes_soils.append(self.compartments_positions.get(self.soils.get((plant.index, axis.label)), -1))
+                plants_axes.setdefault(plant.index, []).append(axis_position)
+                for phytomer in axis.phytomers:
+                    hiddenzone_position = -1
+                    if phytomer.hiddenzone is not None:
+                        hiddenzone_position = len(hiddenzones)
+                        hiddenzones.append(phytomer.hiddenzone)
+                        hiddenzones_axes.append(axis_position)
+                        hiddenzones_phytomers.append(phytomer)
+                    for organ in (phytomer.chaff, phytomer.peduncle, phytomer.lamina, phytomer.internode, phytomer.sheath):
+                        if organ is None:
+                            continue
+                        for element in (organ.exposed_element, organ.enclosed_element):
+                            if element is None:
+                                continue
+                            elements.append(element)
+                            elements_axes.append(axis_position)
+                            elements_hiddenzones.append(hiddenzone_position)
+                            elements_phytomers.append(phytomer)
+
+        def get_compartments_indexes(prefix):
+            # the objects are packed in the order of the index tables
+            return {compartment_name: self.compartments_indexes[(prefix, compartment_name)] for compartment_name in dict(Simulation.INDEXES_TABLES)[prefix]}
+
+        axes_positions = {axis: axis_position for axis_position, axis in enumerate(axes)}
+        soils = self.indexed_objects['soil']
+        self.packed_population.clear()
+        self.packed_forcings_positions.clear()
+        self.packed_population[model.Soil] = {'objects': soils,
+                                              'compartments': get_compartments_indexes('soil')}
+        self.packed_population[model.Axis] = {'objects': axes,
+                                              'soils': np.array(axes_soils, dtype=int),
+                                              'plants_axes': [(plant_index, np.array(plant_axes, dtype=int)) for plant_index, plant_axes in plants_axes.items()],
+                                              'phloem': get_compartments_indexes('phloem')}
+        self.packed_population[model.Roots] = {'objects': [axis.roots for axis in axes],
+                                               'compartments': get_compartments_indexes('roots')}
+        for class_, prefix, organ_name in ((model.Grains, 'grains', 'grains'), (model.Endosperm, 'endosperm', 'endosperm')):
+            organs_axes = [axis for axis in axes if getattr(axis, organ_name) is not None]
+            self.packed_population[class_] = {'objects': [getattr(axis, organ_name) for axis in organs_axes],
+                                              'axes': np.array([axes_positions[axis] for axis in organs_axes], dtype=int),
+                                              'compartments': get_compartments_indexes(prefix)}
+        self.packed_population[model.HiddenZone] = {'objects': hiddenzones,
+                                                    'axes': np.array(hiddenzones_axes, dtype=int),
+                                                    'phytomers_objects': hiddenzones_phytomers,
+                                                    'compartments': get_compartments_indexes('hiddenzone')}
+        self.packed_population[model.PhotosyntheticOrganElement] = {'objects': elements,
+                                                                    'axes': np.array(elements_axes, dtype=int),
+                                                                    'hiddenzones': np.array(elements_hiddenzones, dtype=int),
+                                                                    'phytomers': np.array([phytomer.index for phytomer in elements_phytomers]),
+                                                                    'phytomers_objects': elements_phytomers,
+                                                                    'compartments': get_compartments_indexes('element')}
+
+    def _pack_parameters(self):
+        """Pack the parameters of the model objects of :attr:`PACKED_PARAMETERS_CLASSES` in :attr:`packed_population`
+        with :meth:`_PackedParameters.pack`.
+        """
+        for class_ in Simulation.PACKED_PARAMETERS_CLASSES:
+            packed_objects = self.packed_population[class_]
+            packed_objects['parameters'] = _PackedParameters.pack(packed_objects['objects'], class_.PARAMETERS)
+
+    def _gather_state_parameters(self):
+        """Gather the current values of the state parameters of :attr:`population` and :attr:`soils` into :attr:`packed_population`.
+        """
+        def gather(model_objects, parameters_names, dtype=float):
+            return {parameter_name: np.array([getattr(model_object, parameter_name) for model_object in model_objects], dtype=dtype) for parameter_name in parameters_names}
+
+        packed_soils = self.packed_population[model.Soil]
+        packed_soils['state'] = gather(packed_soils['objects'], ('volume', 'Tsoil'))
+        packed_soils['state'].update(gather(packed_soils['objects'], ('constant_Conc_Nitrates',), dtype=bool))
+        packed_axes = self.packed_population[model.Axis]
+        packed_axes['state'] = gather(packed_axes['objects'], Simulation.AXES_STATE_PARAMETERS)
+        packed_roots = self.packed_population[model.Roots]
+        packed_roots['state'] = gather(packed_roots['objects'], ('mstruct', 'Nstruct', 'Total_Organic_Nitrogen'))
+        # the number of replications of the phytomers is used to compute the structural mass of the axes (see :meth:`_calculate_packed_aggregated_variables`)
+        packed_hiddenzones = self.packed_population[model.HiddenZone]
+        packed_hiddenzones['state'] = gather(packed_hiddenzones['objects'], ('mstruct', 'Nstruct', 'ratio_DZ', 'Total_Organic_Nitrogen', 'nb_replications'))
+        packed_hiddenzones['state']['phytomers_nb_replications'] = gather(packed_hiddenzones['phytomers_objects'], ('nb_replications',))['nb_replications']
+        packed_elements = self.packed_population[model.PhotosyntheticOrganElement]
+        packed_elements['state'] = gather(packed_elements['objects'], ('Ag', 'Tr', 'Ts', 'green_area', 'mstruct', 'Nstruct', 'Total_Organic_Nitrogen', 'nb_replications'))
+        packed_elements['state'].update(gather(packed_elements['objects'], ('is_growing',), dtype=bool))
+        packed_elements['state']['phytomers_nb_replications'] = gather(packed_elements['phytomers_objects'], ('nb_replications',))['nb_replications']
+
+    def _init_packed_interpolated_forcings(self):
+        """Group the forcings of :attr:`interpolated_forcings` by state parameter of :attr:`packed_population`, and store them in :attr:`packed_interpolated_forcings`,
+        so that the vectorized engine writes the interpolated values into each state parameter with a single fancy-indexing operation
+        (see :meth:`_set_packed_interpolated_forcings`).
+
+        The forcings of the state parameters which are not packed are not used by the vectorized engine: they are set to :attr:`population` at the end of the run.
+        """
+        forcings_groups = {}
+        for forcing_index, (model_object, forcing_label) in enumerate(self.interpolated_forcings):
+            class_ = model.Roots if isinstance(model_object, model.Roots) else model.PhotosyntheticOrganElement
+            if forcing_label not in self.packed_population[class_]['state']:
+                continue
+            positions, forcings_indexes = forcings_groups.setdefault((class_, forcing_label), ([], []))
+            positions.append(self.compartments_positions[model_object])
+            forcings_indexes.append(forcing_index)
+        self.packed_interpolated_forcings = [(class_, forcing_label, np.array(positions, dtype=int), np.array(forcings_indexes, dtype=int))
+                                             for (class_, forcing_label), (positions, forcings_indexes) in forcings_groups.items()]
+
+    def _get_packed_forcings_positions(self, model_objects):
+        """Locate in :attr:`packed_population` the model objects bound to a forcings table of :attr:`forcings_interpolator`.
+
+        The positions are computed once per list of model objects, and kept in :attr:`packed_forcings_positions` until the population is packed again.
+
+        :param list model_objects: the model objects bound to the slots of the table, or `None` for the slots without model object.
+
+        :return: The class of the model objects in :attr:`packed_population`, and the position of each slot in the arrays of this class (-1 for the slots without model object).
+        :rtype: (class, numpy.ndarray)
+        """
+        packed_forcings_positions = self.packed_forcings_positions.get(id(model_objects))
+        if packed_forcings_positions is None or packed_forcings_positions[0] is not model_objects:
+            class_ = model.PhotosyntheticOrganElement
+            for model_object in model_objects:
+                if model_object is not None:
+                    class_ = model.Roots if isinstance(model_object, model.Roots) else model.PhotosyntheticOrganElement
+                    break
+            positions = np.array([self.compartments_positions.get(model_object, -1) for model_object in model_objects], dtype=int)
+            # keep a reference to the model objects, so that their id is not reused
+            packed_forcings_positions = (model_objects, class_, positions)
+            self.packed_forcings_positions[id(model_objects)] = packed_forcings_positions
+        return packed_forcings_positions[1:]
+
+    def _set_packed_interpolated_forcings(self, t):
+        """Set the state parameters of :attr:`packed_population` to the values of the forcings interpolated at `t`, as :meth:`_set_interpolated_forcings` does for :attr:`population`.
+
+        The interpolated values are written into the packed arrays, without setting the attributes of the model objects.
+        If :attr:`forcings_interpolator` has a method `interpolate(t, population)` (see :meth:`cnwheat.forcings.ForcingsStore.interpolate`),
+        its values are written the same way ; otherwise, the forcings are set to :attr:`population` and gathered again.
+
+        :param float t: the time at which the forcings are interpolated, from the beginning of the step.
+        """
+        if self.forcings_interpolator is None:
+            forcings_values = self.interpolated_forcings_slopes * (t - self.time_grid[0]) + self.interpolated_forcings_origins
+            for class_, forcing_label, positions, forcings_indexes in self.packed_interpolated_forcings:
+                self.packed_population[class_]['state'][forcing_label][positions] = forcings_values[forcings_indexes]
+        elif hasattr(self.forcings_interpolator, 'interpolate'):
+            for model_objects, forcing_label, slots, forcings_values in self.forcings_interpolator.interpolate(self.t + t, self.population):
+                class_, positions = self._get_packed_forcings_positions(model_objects)
+                state = self.packed_population[class_]['state']
+                if forcing_label in state:
+                    state[forcing_label][positions[slots]] = forcings_values
+        else:
+            self.forcings_interpolator.apply(self.t + t, self.population)
+            self._gather_state_parameters()
+
+    def _calculate_packed_aggregated_variables(self, y):
+        """Compute the integrative variables used by the vectorized engine from the compartments in `y` and the state parameters of :attr:`packed_population`,
+        as :meth:`model.Population.calculate_aggregated_variables` does for :attr:`population`: the total amount of organic nitrogen of the roots, the hidden zones
+        and the photosynthetic organ elements, and the structural mass of the axes.
+
+        :param numpy.ndarray y: the values of the compartments.
+        """
+        packed_roots = self.packed_population[model.Roots]
+        roots_state = packed_roots['state']
+        roots_state['Total_Organic_Nitrogen'] = model.Roots.calculate_Total_Organic_Nitrogen(y[packed_roots['compartments']['amino_acids']], roots_state['Nstruct'])
+        nb_axes = len(packed_roots['objects'])
+        axes_mstruct = roots_state['mstruct'].copy()
+        for class_ in (model.HiddenZone, model.PhotosyntheticOrganElement):
+            packed_organs = self.packed_population[class_]
+            organs_state = packed_organs['state']
+            organs_compartments = packed_organs['compartments']
+            organs_state['Total_Organic_Nitrogen'] = class_.calculate_Total_Organic_Nitrogen(y[organs_compartments['amino_acids']], y[organs_compartments['proteins']], organs_state['Nstruct'])
+            axes_mstruct += np.bincount(packed_organs['axes'], weights=organs_state['mstruct'] * organs_state['phytomers_nb_replications'], minlength=nb_axes)
+        packed_grains = self.packed_population[model.Grains]
+        axes_mstruct[packed_grains['axes']] += model.Grains.calculate_structural_dry_mass(y[packed_grains['compartments']['structure']])
+        self.packed_population[model.Axis]['state']['mstruct'] = axes_mstruct
+
+    @staticmethod
+    def _set_attributes(model_objects, positions, values):
+        """Set the attributes of the objects of `model_objects` located at `positions`.
+
+        :param list model_objects: the objects to update.
+        :param numpy.ndarray positions: the positions of the objects to update in `model_objects`.
+        :param dict values: the values of the attributes, as a dictionary {attribute_name: array of values aligned on `positions`}.
+        """
+        attributes_names = list(values.keys())
+        attributes_values = [values[attribute_name].tolist() for attribute_name in attributes_names]
+        for row, position in enumerate(positions.tolist()):
+            model_object = model_objects[position]
+            for attribute_name, attribute_values in zip(attributes_names, attributes_values):
+                setattr(model_object, attribute_name, attribute_values[row])
+
+    def _update_population_from_vectorized_evaluation(self):
+        """Update :attr:`population` and :attr:`soils` with the values computed at the last call to :meth:`_calculate_all_derivatives_vectorized`
+        (see :attr:`last_vectorized_evaluation`), as done by :meth:`_calculate_all_derivatives`: the forcings are set to their values at the `t` of this call,
+        the compartments of all the objects are set to the `y` of this call, and the variables are set for the objects computed at this call only
+        (e.g. not for the senesced elements or the axes before germination).
+        """
+        last_evaluation = self.last_vectorized_evaluation
+        if self.interpolate_forcings or self.forcings_interpolator is not None:
+            # the forcings were interpolated into :attr:`packed_population` only ; they are set before the compartments,
+            # because the compartments forced by a table (e.g. the cytokinins of the roots) are read from `y` by the derivatives
+            self._set_interpolated_forcings(last_evaluation['t'])
+        self._set_compartments(last_evaluation['y'])
+
+        for class_ in (model.PhotosyntheticOrganElement, model.HiddenZone, model.Roots, model.Axis, model.Soil):
+            class_evaluation = last_evaluation[class_]
+            self._set_attributes(self.packed_population[class_]['objects'], class_evaluation['positions'], class_evaluation['variables'])
+
+        axes_evaluation = last_evaluation[model.Axis]
+        self._set_attributes(self.packed_population[model.Axis]['objects'], axes_evaluation['computed_positions'], {'Total_Transpiration': axes_evaluation['Total_Transpiration']})
+        elements_evaluation = last_evaluation[model.PhotosyntheticOrganElement]
+        self._set_attributes(self.packed_population[model.PhotosyntheticOrganElement]['objects'], elements_evaluation['transpiring_positions'],
+                             {'Transpiration': elements_evaluation['Transpiration']})
+
+    def _approximate_jacobian(self, derivatives_function, t, y):
+        """Approximate the Jacobian of `derivatives_function` at (`t`, `y`) by forward finite differences,
+        perturbing together the columns of a same group of :attr:`jacobian_groups`.
+
+        :param function derivatives_function: the function which computes the derivatives of `y` at `t`.
+        :param float t: the time at which the Jacobian is approximated.
+        :param numpy.ndarray y: the values of the compartments at which the Jacobian is approximated.
+
+        :return: The Jacobian, with the sparsity pattern of :attr:`jacobian_sparsity`.
+        :rtype: scipy.sparse.csc_matrix
+        """
+        y = np.asarray(y, dtype=float)
+        y_derivatives = derivatives_function(t, y)
+        steps = np.sqrt(np.finfo(float).eps) * np.maximum(np.abs(y), self.atol)
+        steps = (y + steps) - y  # make the steps exactly representable
+        nb_groups = self.jacobian_groups.max() + 1 if len(self.jacobian_groups) != 0 else 0
+        self.derivatives_evaluations += int(nb_groups) + 1
+        self.jacobian_evaluations += 1
+        differences = np.empty((nb_groups, len(y)))
+        for group in range(nb_groups):
+            differences[group] = derivatives_function(t, y + np.where(self.jacobian_groups == group, steps, 0.0)) - y_derivatives
+        rows = self.jacobian_sparsity.indices
+        columns = np.repeat(np.arange(len(y)), np.diff(self.jacobian_sparsity.indptr))
+        values = differences[self.jacobian_groups[columns], rows] / steps[columns]
+        return sparse.csc_matrix((values, rows, self.jacobian_sparsity.indptr), shape=self.jacobian_sparsity.shape)
+
+    def _calculate_jacobian(self, t, y):
+        """Compute the Jacobian of the system at (`t`, `y`) when :attr:`SolverConfiguration.jacobian_reuse` or :attr:`SolverConfiguration.persistent_integrator` is True.
+
+        :meth:`_calculate_jacobian` is passed as **jac** argument to :func:`solve_ivp(fun, t_span, y0,...) <scipy.integrate.solve_ivp>`.
+        At the first call of a run, the Jacobian of the previous run is returned if any. Otherwise, and at the following calls
+        (i.e. when the solver does not converge with its current Jacobian), a new Jacobian is approximated (see :meth:`_approximate_jacobian`).
+
+        :param float t: The current t at which we want to compute the Jacobian.
+        :param numpy.ndarray y: The current values of y.
+
+        :return: The Jacobian of the system.
+        :rtype: scipy.sparse.csc_matrix or numpy.ndarray
+        """
+        if self.reusable_jacobian is not None and not self.jacobian_reused:
+            jacobian = self.reusable_jacobian
+        else:
+            jacobian = self._approximate_jacobian(self._get_derivatives_function(), t, y)
+            self.reusable_jacobian = jacobian
+        self.jacobian_reused = True
+        if self.solver_configuration.method == 'LSODA':  # LSODA only handles dense Jacobians
+            return jacobian.toarray()
+        return jacobian
+
     def _calculate_all_derivatives(self, t, y):
         """Compute the derivative of `y` at `t`.
 
@@ -825,23 +2017,14 @@ class Simulation(object):
             t_abs = t + self.t_offset
             logger.debug('t = {}'.format(t_abs))
 
-        if self.interpolate_forcings:
+        # Set the compartments of all the objects from `y`, including the objects skipped below, so that the derivatives
+        # depend on `y` only and not on the previous call (see :meth:`_approximate_jacobian`). This is the only place where
+        # the compartments are written during the computation of the derivatives.
+        self._set_compartments(y)
+
+        if self.interpolate_forcings or self.forcings_interpolator is not None:
             # Update state parameters using interpolation functions
-            for plant in self.population.plants:
-                for axis in plant.axes:
-                    if axis.roots is not None:
-                        roots_id = (plant.index, axis.label)
-                        for forcing_label in Simulation.ROOTS_FORCINGS:
-                            setattr(axis.roots, forcing_label, float(self.interpolation_functions[roots_id][forcing_label](t)))
-                    for phytomer in axis.phytomers:
-                        for organ in (phytomer.lamina, phytomer.sheath):
-                            if organ is None:
-                                continue
-                            for element in (organ.exposed_element, organ.enclosed_element):
-                                if element is not None:
-                                    element_id = (plant.index, axis.label, phytomer.index, organ.label, element.label)
-                                    for forcing_label in Simulation.ELEMENTS_FORCINGS:
-                                        setattr(element, forcing_label, float(self.interpolation_functions[element_id][forcing_label](t)))
+            self._set_interpolated_forcings(t)
 
             # Compute integrative variables
             self.population.calculate_aggregated_variables()
@@ -857,37 +2040,40 @@ class Simulation(object):
             logger.exception(message)
             raise SimulationRunError(message)
 
-        y_derivatives = np.zeros_like(y)
-        # TODO: TEMP !!!!
+        # initialize the derivatives of each compartment, using the index tables
+        compartments_derivatives = {}
+        for compartment_key, compartment_indexes in self.compartments_indexes.items():
+            compartments_derivatives[compartment_key] = [0.0] * len(compartment_indexes)
+
+        # Soils: the roots of each axis take up the nitrates of the soil of the axis
         if not self.external_soil_model:
-            soil_contributors = []
-            soil = self.soils[(1, 'MS')]
-            soil.nitrates = y[self.initial_conditions_mapping[soil]['nitrates']]
-            soil.Conc_Nitrates_Soil = soil.calculate_Conc_Nitrates(soil.nitrates)
-            soil.T_effect_Vmax = soil.calculate_temperature_effect_on_Vmax(soil.Tsoil)
-            soil.T_effect_conductivity = soil.calculate_temperature_effect_on_conductivity(soil.Tsoil)
+            soils_contributors = []
+            for soil in self.indexed_objects['soil']:
+                soils_contributors.append([])
+                soil.Conc_Nitrates_Soil = soil.calculate_Conc_Nitrates(soil.nitrates)
+                soil.T_effect_Vmax = soil.calculate_temperature_effect_on_Vmax(soil.Tsoil)
+                soil.T_effect_conductivity = soil.calculate_temperature_effect_on_conductivity(soil.Tsoil)
 
         for plant in self.population.plants:
             for axis in plant.axes:
                 axis.T_effect_conductivity = plant.calculate_temperature_effect_on_conductivity(axis.SAM_temperature)
                 axis.T_effect_Vmax = plant.calculate_temperature_effect_on_Vmax(axis.SAM_temperature)
+                axis_position = self.compartments_positions[axis.roots]
+                if not self.external_soil_model:
+                    soil = self.soils[(plant.index, axis.label)]
 
                 # Phloem
                 phloem_contributors = []
-                axis.phloem.sucrose = y[self.initial_conditions_mapping[axis.phloem]['sucrose']]
-                axis.phloem.amino_acids = y[self.initial_conditions_mapping[axis.phloem]['amino_acids']]
 
                 # Endosperm
                 empty_endosperm = True
                 if axis.endosperm is not None and ((axis.endosperm.starch / axis.endosperm.PARAMETERS.STARCH_MAX) > 0.01 or (axis.endosperm.proteins / axis.endosperm.PARAMETERS.PROTEINS_MAX) > 0.01):
                     empty_endosperm = False
-                    axis.endosperm.moistening = y[self.initial_conditions_mapping[axis.endosperm]['moistening']]
+                    endosperm_position = self.compartments_positions[axis.endosperm]
                     if axis.endosperm.moistening < 1:
-                        y_derivatives[self.initial_conditions_mapping[axis.endosperm]['moistening']] = axis.endosperm.calculate_moistening()
+                        compartments_derivatives[('endosperm', 'moistening')][endosperm_position] = axis.endosperm.calculate_moistening()
                         continue
                     else:
-                        axis.endosperm.starch = y[self.initial_conditions_mapping[axis.endosperm]['starch']]
-                        axis.endosperm.proteins = y[self.initial_conditions_mapping[axis.endosperm]['proteins']]
                         phloem_contributors.append(axis.endosperm)
 
                         # intermediate variables
@@ -901,14 +2087,10 @@ class Simulation(object):
                         axis.endosperm.R_residual = self.respiration_model.RespirationModel.R_endosperm(axis.endosperm.starch, axis.endosperm.mstruct, soil.Tsoil)
                         starch_derivative = axis.endosperm.calculate_starch_derivative(axis.endosperm.D_starch, axis.endosperm.R_residual)
                         proteins_derivative = axis.endosperm.calculate_proteins_derivative(axis.endosperm.D_proteins)
-                        y_derivatives[self.initial_conditions_mapping[axis.endosperm]['starch']] = starch_derivative
-                        y_derivatives[self.initial_conditions_mapping[axis.endosperm]['proteins']] = proteins_derivative
+                        compartments_derivatives[('endosperm', 'starch')][endosperm_position] = starch_derivative
+                        compartments_derivatives[('endosperm', 'proteins')][endosperm_position] = proteins_derivative
 
                 # Roots
-                axis.roots.nitrates = y[self.initial_conditions_mapping[axis.roots]['nitrates']]
-                axis.roots.amino_acids = y[self.initial_conditions_mapping[axis.roots]['amino_acids']]
-                axis.roots.sucrose = y[self.initial_conditions_mapping[axis.roots]['sucrose']]
-                axis.roots.cytokinins = y[self.initial_conditions_mapping[axis.roots]['cytokinins']]
                 phloem_contributors.append(axis.roots)
 
                 # compute total transpiration at t_inf
@@ -929,7 +2111,7 @@ class Simulation(object):
                 # compute the flows from/to the roots to/from photosynthetic organs
                 axis.roots.Uptake_Nitrates, axis.roots.HATS_LATS = axis.roots.calculate_Uptake_Nitrates(soil.Conc_Nitrates_Soil, axis.roots.nitrates, axis.roots.sucrose,
                                                                                                         soil.T_effect_Vmax)
-                soil_contributors.append((axis.roots.Uptake_Nitrates, plant.index))  #: TODO TEMP!!!
+                soils_contributors[self.compartments_positions[soil]].append((axis.roots.Uptake_Nitrates, plant.index))
                 axis.roots.R_Nnit_upt = self.respiration_model.RespirationModel.R_Nnit_upt(axis.roots.Uptake_Nitrates, axis.roots.sucrose)
                 axis.roots.Export_Nitrates = axis.roots.calculate_Export_Nitrates(axis.roots.nitrates, axis.roots.regul_transpiration)
                 axis.roots.Export_Amino_Acids = axis.roots.calculate_Export_Amino_Acids(axis.roots.amino_acids, axis.roots.regul_transpiration)
@@ -940,10 +2122,7 @@ class Simulation(object):
                     # Hidden zone
                     hiddenzone = phytomer.hiddenzone
                     if phytomer.hiddenzone is not None:
-                        hiddenzone.sucrose = y[self.initial_conditions_mapping[hiddenzone]['sucrose']]
-                        hiddenzone.fructan = y[self.initial_conditions_mapping[hiddenzone]['fructan']]
-                        hiddenzone.amino_acids = y[self.initial_conditions_mapping[hiddenzone]['amino_acids']]
-                        hiddenzone.proteins = y[self.initial_conditions_mapping[hiddenzone]['proteins']]
+                        hiddenzone_position = self.compartments_positions[hiddenzone]
                         phloem_contributors.append(hiddenzone)
                         hiddenzone_Loading_Sucrose_contribution = 0
                         hiddenzone_Loading_Amino_Acids_contribution = 0
@@ -956,32 +2135,28 @@ class Simulation(object):
                             if element is None or element.green_area <= 0.25E-6 or element.mstruct <= 0.0:
                                 continue
 
+                            element_position = self.compartments_positions[element]
                             element.T_effect_conductivity = plant.calculate_temperature_effect_on_conductivity(element.Ts)
                             element.T_effect_Vmax = plant.calculate_temperature_effect_on_Vmax(element.Ts)
 
-                            element.starch = y[self.initial_conditions_mapping[element]['starch']]
-                            element.sucrose = y[self.initial_conditions_mapping[element]['sucrose']]
-                            element.triosesP = y[self.initial_conditions_mapping[element]['triosesP']]
-                            element.fructan = y[self.initial_conditions_mapping[element]['fructan']]
-                            element.nitrates = y[self.initial_conditions_mapping[element]['nitrates']]
-                            element.amino_acids = y[self.initial_conditions_mapping[element]['amino_acids']]
-                            element.proteins = y[self.initial_conditions_mapping[element]['proteins']]
-                            element.cytokinins = y[self.initial_conditions_mapping[element]['cytokinins']]
 
                             # intermediate variables
                             element.Photosynthesis = element.calculate_total_Photosynthesis(element.Ag, element.green_area)
 
                             # flows
                             if element.is_growing and phytomer.hiddenzone is not None:  #: Export of sucrose and amino acids towards the HZ. Several growing elements might export toward the HZ at the same time (leaf and internode)
-                                element.Loading_Sucrose = element.calculate_export_sucrose(element.sucrose, hiddenzone.sucrose, hiddenzone.mstruct, element.T_effect_conductivity)
+                                element.Loading_Sucrose = element.calculate_export_sucrose(element.sucrose, hiddenzone.sucrose, hiddenzone.mstruct, element.T_effect_conductivity,
+                                                                                           hiddenzone.PARAMETERS.SIGMA)
                                 hiddenzone_Loading_Sucrose_contribution += element.Loading_Sucrose
-                                element.Loading_Amino_Acids = element.calculate_Export_Amino_Acids(element.amino_acids, hiddenzone.amino_acids, hiddenzone.mstruct, element.T_effect_conductivity)
+                                element.Loading_Amino_Acids = element.calculate_Export_Amino_Acids(element.amino_acids, hiddenzone.amino_acids, hiddenzone.mstruct, element.T_effect_conductivity,
+                                                                                                   hiddenzone.PARAMETERS.SIGMA)
                                 hiddenzone_Loading_Amino_Acids_contribution += element.Loading_Amino_Acids
 
                             else:  #: Loading of sucrose and amino acids towards the phloem
                                 phloem_contributors.append(element)
-                                element.Loading_Sucrose = element.calculate_Loading_Sucrose(element.sucrose, axis.phloem.sucrose, axis.mstruct, element.T_effect_conductivity)
-                                element.Loading_Amino_Acids = element.calculate_Loading_Amino_Acids(element.amino_acids, axis.phloem.amino_acids, axis.mstruct, element.T_effect_conductivity)
+                                element.Loading_Sucrose = element.calculate_Loading_Sucrose(element.sucrose, axis.phloem.sucrose, axis.mstruct, element.T_effect_conductivity, axis.PARAMETERS.ALPHA)
+                                element.Loading_Amino_Acids = element.calculate_Loading_Amino_Acids(element.amino_acids, axis.phloem.amino_acids, axis.mstruct, element.T_effect_conductivity,
+                                                                                                    axis.PARAMETERS.ALPHA)
 
                             element.Regul_S_Fructan = element.calculate_Regul_S_Fructan(element.Loading_Sucrose)
                             element.S_Fructan = element.calculate_S_Fructan(element.sucrose, element.Regul_S_Fructan, element.T_effect_Vmax)
@@ -990,12 +2165,12 @@ class Simulation(object):
                             element.D_Starch = element.calculate_D_Starch(element.starch, element.T_effect_Vmax)
                             element.S_Sucrose = element.calculate_S_Sucrose(element.triosesP, element.T_effect_Vmax)
                             element.R_phloem_loading, element.Loading_Sucrose = self.respiration_model.RespirationModel.R_phloem(element.Loading_Sucrose,
-                                                                                                                                 element.mstruct * element.__class__.PARAMETERS.ALPHA)
+                                                                                                                                 element.mstruct * element.PARAMETERS.ALPHA)
                             element.Nitrates_import = element.calculate_Nitrates_import(axis.roots.Export_Nitrates, element.Transpiration, axis.Total_Transpiration)
                             element.Amino_Acids_import = element.calculate_Amino_Acids_import(axis.roots.Export_Amino_Acids, element.Transpiration, axis.Total_Transpiration)
                             element.S_Amino_Acids = element.calculate_S_amino_acids(element.nitrates, element.triosesP, element.T_effect_Vmax)
                             element.R_Nnit_red, element.S_Amino_Acids = self.respiration_model.RespirationModel.R_Nnit_red(element.S_Amino_Acids, element.sucrose,
-                                                                                                                           element.mstruct * element.__class__.PARAMETERS.ALPHA)
+                                                                                                                           element.mstruct * element.PARAMETERS.ALPHA)
                             element.S_Proteins = element.calculate_S_proteins(element.amino_acids, element.T_effect_Vmax)
                             element.D_Proteins = element.calculate_D_Proteins(element.proteins, element.cytokinins, element.T_effect_Vmax)
                             element.cytokinins_import = element.calculate_cytokinins_import(axis.roots.Export_cytokinins, element.Transpiration, axis.Total_Transpiration)
@@ -1003,7 +2178,7 @@ class Simulation(object):
 
                             # compartments derivatives
                             starch_derivative = element.calculate_starch_derivative(element.S_Starch, element.D_Starch)
-                            element.R_residual = self.respiration_model.RespirationModel.R_residual(element.sucrose, element.mstruct * element.__class__.PARAMETERS.ALPHA,
+                            element.R_residual = self.respiration_model.RespirationModel.R_residual(element.sucrose, element.mstruct * element.PARAMETERS.ALPHA,
                                                                                                     element.Total_Organic_Nitrogen, element.Ts)
                             element_sum_respi = element.R_phloem_loading + element.R_Nnit_red + element.R_residual
                             sucrose_derivative = element.calculate_sucrose_derivative(element.S_Sucrose, element.D_Starch, element.Loading_Sucrose, element.S_Fructan,
@@ -1016,14 +2191,14 @@ class Simulation(object):
                             proteins_derivative = element.calculate_proteins_derivative(element.S_Proteins, element.D_Proteins)
                             cytokinins_derivative = element.calculate_cytokinins_derivative(element.cytokinins_import, element.D_cytokinins, phytomer.index, element.cytokinins)
 
-                            y_derivatives[self.initial_conditions_mapping[element]['starch']] = starch_derivative
-                            y_derivatives[self.initial_conditions_mapping[element]['sucrose']] = sucrose_derivative
-                            y_derivatives[self.initial_conditions_mapping[element]['triosesP']] = triosesP_derivative
-                            y_derivatives[self.initial_conditions_mapping[element]['fructan']] = fructan_derivative
-                            y_derivatives[self.initial_conditions_mapping[element]['nitrates']] = nitrates_derivative
-                            y_derivatives[self.initial_conditions_mapping[element]['amino_acids']] = amino_acids_derivative
-                            y_derivatives[self.initial_conditions_mapping[element]['proteins']] = proteins_derivative
-                            y_derivatives[self.initial_conditions_mapping[element]['cytokinins']] = cytokinins_derivative
+                            compartments_derivatives[('element', 'starch')][element_position] = starch_derivative
+                            compartments_derivatives[('element', 'sucrose')][element_position] = sucrose_derivative
+                            compartments_derivatives[('element', 'triosesP')][element_position] = triosesP_derivative
+                            compartments_derivatives[('element', 'fructan')][element_position] = fructan_derivative
+                            compartments_derivatives[('element', 'nitrates')][element_position] = nitrates_derivative
+                            compartments_derivatives[('element', 'amino_acids')][element_position] = amino_acids_derivative
+                            compartments_derivatives[('element', 'proteins')][element_position] = proteins_derivative
+                            compartments_derivatives[('element', 'cytokinins')][element_position] = cytokinins_derivative
 
                     if phytomer.hiddenzone is not None:
                         # Unloading of sucrose from phloem
@@ -1047,35 +2222,32 @@ class Simulation(object):
 
                         # Residual respiration
                         hiddenzone.R_residual = self.respiration_model.RespirationModel.R_residual(hiddenzone.sucrose,
-                                                                                                   hiddenzone.mstruct * hiddenzone.__class__.PARAMETERS.ALPHA,
+                                                                                                   hiddenzone.mstruct * hiddenzone.PARAMETERS.ALPHA,
                                                                                                    hiddenzone.Total_Organic_Nitrogen,
                                                                                                    axis.SAM_temperature)
 
                         # compute the derivatives of the hidden zone
-                        y_derivatives[self.initial_conditions_mapping[hiddenzone]['sucrose']] = hiddenzone.calculate_sucrose_derivative(hiddenzone.Unloading_Sucrose, hiddenzone.S_Fructan,
+                        compartments_derivatives[('hiddenzone', 'sucrose')][hiddenzone_position] = hiddenzone.calculate_sucrose_derivative(hiddenzone.Unloading_Sucrose, hiddenzone.S_Fructan,
                                                                                                                                         hiddenzone.D_Fructan, hiddenzone_Loading_Sucrose_contribution,
                                                                                                                                         hiddenzone.R_residual)
-                        y_derivatives[self.initial_conditions_mapping[hiddenzone]['amino_acids']] = hiddenzone.calculate_amino_acids_derivative(hiddenzone.Unloading_Amino_Acids, hiddenzone.S_Proteins,
+                        compartments_derivatives[('hiddenzone', 'amino_acids')][hiddenzone_position] = hiddenzone.calculate_amino_acids_derivative(hiddenzone.Unloading_Amino_Acids, hiddenzone.S_Proteins,
                                                                                                                                                 hiddenzone.D_Proteins,
                                                                                                                                                 hiddenzone_Loading_Amino_Acids_contribution)
-                        y_derivatives[self.initial_conditions_mapping[hiddenzone]['fructan']] = hiddenzone.calculate_fructan_derivative(hiddenzone.S_Fructan, hiddenzone.D_Fructan)
-                        y_derivatives[self.initial_conditions_mapping[hiddenzone]['proteins']] = hiddenzone.calculate_proteins_derivative(hiddenzone.S_Proteins, hiddenzone.D_Proteins)
+                        compartments_derivatives[('hiddenzone', 'fructan')][hiddenzone_position] = hiddenzone.calculate_fructan_derivative(hiddenzone.S_Fructan, hiddenzone.D_Fructan)
+                        compartments_derivatives[('hiddenzone', 'proteins')][hiddenzone_position] = hiddenzone.calculate_proteins_derivative(hiddenzone.S_Proteins, hiddenzone.D_Proteins)
 
                 if axis.grains is not None:
                     phloem_contributors.append(axis.grains)
+                    grains_position = self.compartments_positions[axis.grains]
                     # compute the derivative of each compartment of grains
-                    axis.grains.structure = y[self.initial_conditions_mapping[axis.grains]['structure']]
-                    axis.grains.starch = y[self.initial_conditions_mapping[axis.grains]['starch']]
-                    axis.grains.proteins = y[self.initial_conditions_mapping[axis.grains]['proteins']]
-                    axis.grains.age_from_flowering = y[self.initial_conditions_mapping[axis.grains]['age_from_flowering']]
 
                     # intermediate variables
                     T_effect_growth = axis.grains.calculate_temperature_effect_on_growth(axis.SAM_temperature)
                     axis.grains.structural_dry_mass = axis.grains.calculate_structural_dry_mass(axis.grains.structure)
 
                     # flows
-                    axis.grains.S_grain_structure = axis.grains.calculate_S_grain_structure(axis.grains.structure, axis.phloem.sucrose, axis.mstruct, T_effect_growth)
-                    axis.grains.S_grain_starch = axis.grains.calculate_S_grain_starch(axis.phloem.sucrose, axis.mstruct, axis.T_effect_Vmax)
+                    axis.grains.S_grain_structure = axis.grains.calculate_S_grain_structure(axis.grains.structure, axis.phloem.sucrose, axis.mstruct, T_effect_growth, axis.PARAMETERS.ALPHA)
+                    axis.grains.S_grain_starch = axis.grains.calculate_S_grain_starch(axis.phloem.sucrose, axis.mstruct, axis.T_effect_Vmax, axis.PARAMETERS.ALPHA)
                     axis.grains.S_Proteins = axis.grains.calculate_S_proteins(axis.grains.S_grain_structure, axis.grains.S_grain_starch, axis.phloem.amino_acids, axis.phloem.sucrose,
                                                                               axis.grains.structural_dry_mass)
                     # compartments derivatives
@@ -1085,23 +2257,25 @@ class Simulation(object):
                     structure_derivative = axis.grains.calculate_structure_derivative(axis.grains.S_grain_structure, axis.grains.R_grain_growth_struct)
                     starch_derivative = axis.grains.calculate_starch_derivative(axis.grains.S_grain_starch, axis.grains.structural_dry_mass, axis.grains.R_grain_growth_starch)
                     proteins_derivative = axis.grains.calculate_proteins_derivative(axis.grains.S_Proteins)
-                    y_derivatives[self.initial_conditions_mapping[axis.grains]['structure']] = structure_derivative
-                    y_derivatives[self.initial_conditions_mapping[axis.grains]['starch']] = starch_derivative
-                    y_derivatives[self.initial_conditions_mapping[axis.grains]['proteins']] = proteins_derivative
-                    y_derivatives[self.initial_conditions_mapping[axis.grains]['age_from_flowering']] += (self.delta_t * T_effect_growth)  # TODO: create a function
+                    compartments_derivatives[('grains', 'structure')][grains_position] = structure_derivative
+                    compartments_derivatives[('grains', 'starch')][grains_position] = starch_derivative
+                    compartments_derivatives[('grains', 'proteins')][grains_position] = proteins_derivative
+                    compartments_derivatives[('grains', 'age_from_flowering')][grains_position] += (self.delta_t * T_effect_growth)  # TODO: create a function
 
                 # compute the derivative of each compartment of roots
                 # flows
-                axis.roots.Unloading_Sucrose = axis.roots.calculate_Unloading_Sucrose(axis.roots.sucrose, axis.phloem.sucrose, axis.mstruct, axis.T_effect_conductivity, axis.nb_leaves)
-                axis.roots.Unloading_Amino_Acids = axis.roots.calculate_Unloading_Amino_Acids(axis.roots.amino_acids, axis.phloem.amino_acids,  axis.phloem.sucrose, axis.roots.Unloading_Sucrose, axis.mstruct, axis.T_effect_conductivity, axis.nb_leaves)
+                axis.roots.Unloading_Sucrose = axis.roots.calculate_Unloading_Sucrose(axis.roots.sucrose, axis.phloem.sucrose, axis.mstruct, axis.T_effect_conductivity, axis.nb_leaves,
+                                                                                      axis.PARAMETERS.ALPHA)
+                axis.roots.Unloading_Amino_Acids = axis.roots.calculate_Unloading_Amino_Acids(axis.roots.amino_acids, axis.phloem.amino_acids,  axis.phloem.sucrose, axis.roots.Unloading_Sucrose, axis.mstruct, axis.T_effect_conductivity, axis.nb_leaves,
+                                                                                              axis.PARAMETERS.ALPHA)
                 axis.roots.S_Amino_Acids = axis.roots.calculate_S_amino_acids(axis.roots.nitrates, axis.roots.sucrose, soil.T_effect_Vmax)
                 axis.roots.R_Nnit_red, axis.roots.S_Amino_Acids = self.respiration_model.RespirationModel.R_Nnit_red(axis.roots.S_Amino_Acids, axis.roots.sucrose,
-                                                                                                                     axis.roots.mstruct * model.Roots.PARAMETERS.ALPHA, root=True)
+                                                                                                                     axis.roots.mstruct * axis.roots.PARAMETERS.ALPHA, root=True)
                 axis.roots.C_exudation, axis.roots.N_exudation = axis.roots.calculate_exudation(axis.roots.Unloading_Sucrose, axis.roots.sucrose, axis.roots.amino_acids, axis.phloem.amino_acids)
                 axis.roots.S_cytokinins = axis.roots.calculate_S_cytokinins(axis.roots.sucrose, axis.roots.nitrates, soil.T_effect_Vmax)
 
                 # compartments derivatives
-                axis.roots.R_residual = self.respiration_model.RespirationModel.R_residual(axis.roots.sucrose, axis.roots.mstruct * model.Roots.PARAMETERS.ALPHA, axis.roots.Total_Organic_Nitrogen,
+                axis.roots.R_residual = self.respiration_model.RespirationModel.R_residual(axis.roots.sucrose, axis.roots.mstruct * axis.roots.PARAMETERS.ALPHA, axis.roots.Total_Organic_Nitrogen,
                                                                                            soil.Tsoil)
                 axis.roots.sum_respi = axis.roots.R_Nnit_upt + axis.roots.R_Nnit_red + axis.roots.R_residual
                 sucrose_derivative = axis.roots.calculate_sucrose_derivative(axis.roots.Unloading_Sucrose, axis.roots.S_Amino_Acids, axis.roots.C_exudation, axis.roots.sum_respi)
@@ -1109,21 +2283,28 @@ class Simulation(object):
                 amino_acids_derivative = axis.roots.calculate_amino_acids_derivative(axis.roots.Unloading_Amino_Acids, axis.roots.S_Amino_Acids, axis.roots.Export_Amino_Acids, axis.roots.N_exudation)
                 cytokinins_derivative = axis.roots.calculate_cytokinins_derivative(axis.roots.S_cytokinins, axis.roots.Export_cytokinins, axis.roots.cytokinins, empty_endosperm)
 
-                y_derivatives[self.initial_conditions_mapping[axis.roots]['sucrose']] = sucrose_derivative
-                y_derivatives[self.initial_conditions_mapping[axis.roots]['nitrates']] = nitrates_derivative
-                y_derivatives[self.initial_conditions_mapping[axis.roots]['amino_acids']] = amino_acids_derivative
-                y_derivatives[self.initial_conditions_mapping[axis.roots]['cytokinins']] = cytokinins_derivative
+                compartments_derivatives[('roots', 'sucrose')][axis_position] = sucrose_derivative
+                compartments_derivatives[('roots', 'nitrates')][axis_position] = nitrates_derivative
+                compartments_derivatives[('roots', 'amino_acids')][axis_position] = amino_acids_derivative
+                compartments_derivatives[('roots', 'cytokinins')][axis_position] = cytokinins_derivative
 
                 # compute the derivative of each compartment of phloem
                 sucrose_phloem_derivative = axis.phloem.calculate_sucrose_derivative(phloem_contributors)
                 amino_acids_phloem_derivative = axis.phloem.calculate_amino_acids_derivative(phloem_contributors)
-                y_derivatives[self.initial_conditions_mapping[axis.phloem]['sucrose']] = sucrose_phloem_derivative
-                y_derivatives[self.initial_conditions_mapping[axis.phloem]['amino_acids']] = amino_acids_phloem_derivative
+                compartments_derivatives[('phloem', 'sucrose')][axis_position] = sucrose_phloem_derivative
+                compartments_derivatives[('phloem', 'amino_acids')][axis_position] = amino_acids_phloem_derivative
 
         if not self.external_soil_model:
             # compute the derivative of each compartment of soil
-            soil.mineralisation = soil.calculate_mineralisation(soil.T_effect_Vmax)
-            y_derivatives[self.initial_conditions_mapping[soil]['nitrates']] = soil.calculate_nitrates_derivative(soil.mineralisation, soil_contributors, self.culm_density, soil.constant_Conc_Nitrates)
+            for soil_position, (soil, soil_contributors) in enumerate(zip(self.indexed_objects['soil'], soils_contributors)):
+                soil.mineralisation = soil.calculate_mineralisation(soil.T_effect_Vmax)
+                compartments_derivatives[('soil', 'nitrates')][soil_position] = soil.calculate_nitrates_derivative(soil.mineralisation, soil_contributors, self.culm_density,
+                                                                                                                   soil.constant_Conc_Nitrates)
+
+        # scatter the derivatives of each compartment into `y_derivatives`
+        y_derivatives = np.zeros_like(y)
+        for compartment_key, compartment_derivatives in compartments_derivatives.items():
+            y_derivatives[self.compartments_indexes[compartment_key]] = compartment_derivatives
 
         if self.show_progressbar:
             self.progressbar.update(t)
@@ -1132,3 +2313,684 @@ class Simulation(object):
         if logger.isEnabledFor(logging.DEBUG) and derivatives_logger.isEnabledFor(logging.DEBUG):
             self._log_compartments(t_abs, y_derivatives, Simulation.LOGGERS_NAMES['derivatives'])
         return y_derivatives
+
+    def _calculate_all_derivatives_vectorized(self, t, y):
+        """Compute the derivative of `y` at `t` with the vectorized engine.
+
+        :meth:`_calculate_all_derivatives_vectorized` replaces :meth:`_calculate_all_derivatives` when :attr:`derivatives_engine` is 'vectorized'.
+        The methods of :mod:`model` are applied at once to all the photosynthetic organ elements, the hidden zones, the roots and the soils
+        of the population, on the arrays of :attr:`packed_population` (see :class:`_PackedModelObjects`). The grains and the endosperms are computed axis by axis.
+
+        The model objects are not updated at each call: the values computed at the last call are stored in :attr:`last_vectorized_evaluation`,
+        and are copied to the population by :meth:`_update_population_from_vectorized_evaluation` at the end of the run.
+        Likewise, the forcings and the integrative variables are updated in :attr:`packed_population` only
+        (see :meth:`_set_packed_interpolated_forcings` and :meth:`_calculate_packed_aggregated_variables`).
+
+        :param float t: The current t at which we want to compute the derivatives (see :meth:`_calculate_all_derivatives`).
+        :param list [float] y: The current values of y (see :meth:`_calculate_all_derivatives`).
+
+        :return: The derivatives of `y` at `t`.
+        :rtype: list [float]
+        """
+        logger = logging.getLogger(__name__)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            t_abs = t + self.t_offset
+            logger.debug('t = {}'.format(t_abs))
+
+        if self.interpolate_forcings or self.forcings_interpolator is not None:
+            # Update state parameters using interpolation functions
+            self._set_packed_interpolated_forcings(t)
+            # Compute integrative variables from the compartments in `y`
+            self._calculate_packed_aggregated_variables(y)
+
+        compartments_logger = logging.getLogger('cnwheat.compartments')
+        if logger.isEnabledFor(logging.DEBUG) and compartments_logger.isEnabledFor(logging.DEBUG):
+            self._log_compartments(t_abs, y, Simulation.LOGGERS_NAMES['compartments'])
+
+        y_derivatives = self._calculate_packed_derivatives(t, y)
+
+        if self.show_progressbar:
+            self.progressbar.update(t)
+
+        derivatives_logger = logging.getLogger('cnwheat.derivatives')
+        if logger.isEnabledFor(logging.DEBUG) and derivatives_logger.isEnabledFor(logging.DEBUG):
+            self._log_compartments(t_abs, y_derivatives, Simulation.LOGGERS_NAMES['derivatives'])
+        return y_derivatives
+
+    def _calculate_packed_derivatives(self, t, y):
+        """Compute the derivative of `y` at `t` on the arrays of :attr:`packed_population`, and store the values computed at this call
+        in :attr:`last_vectorized_evaluation` (see :meth:`_calculate_all_derivatives_vectorized`).
+
+        The compartments of :attr:`packed_population` are located in `y` by their indexes only, so the packed populations of several
+        simulations can be merged and computed at once (see :class:`EnsembleSimulation`).
+
+        :param float t: The current t at which we want to compute the derivatives.
+        :param numpy.ndarray y: The current values of y.
+
+        :return: The derivatives of `y` at `t`.
+        :rtype: numpy.ndarray
+        """
+        logger = logging.getLogger(__name__)
+
+        # check that the solver is not crashed
+        y_isnan = np.isnan(y)
+        if y_isnan.any():
+            message = 'The solver did not manage to compute a compartment. See the logs. NaN found in y'
+            logger.exception(message)
+            raise SimulationRunError(message)
+
+        y_derivatives = np.zeros_like(y)
+        R_phloem = self.vectorized_respiration_functions['R_phloem']
+        R_Nnit_red = self.vectorized_respiration_functions['R_Nnit_red']
+        R_Nnit_upt = self.vectorized_respiration_functions['R_Nnit_upt']
+        R_residual = self.vectorized_respiration_functions['R_residual']
+
+        # Soils
+        packed_soils = self.packed_population[model.Soil]
+        soils_state = packed_soils['state']
+        soils = _PackedModelObjects(packed_soils['parameters'], volume=soils_state['volume'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            soils_Conc_Nitrates_Soil = model.Soil.calculate_Conc_Nitrates(soils, y[packed_soils['compartments']['nitrates']])
+        soils_T_effect_Vmax = model.Soil.calculate_temperature_effect_on_Vmax(soils_state['Tsoil'])
+        soils_T_effect_conductivity = model.Soil.calculate_temperature_effect_on_conductivity(soils_state['Tsoil'])
+
+        # Axes and phloems
+        packed_axes = self.packed_population[model.Axis]
+        axes_state = packed_axes['state']
+        axes_mstruct = axes_state['mstruct']
+        axes_parameters = packed_axes['parameters']
+        axes_soils = packed_axes['soils']
+        axes_T_effect_conductivity = model.Plant.calculate_temperature_effect_on_conductivity(axes_state['SAM_temperature'])
+        axes_T_effect_Vmax = model.Plant.calculate_temperature_effect_on_Vmax(axes_state['SAM_temperature'])
+        phloem_sucrose = y[packed_axes['phloem']['sucrose']]
+        phloem_amino_acids = y[packed_axes['phloem']['amino_acids']]
+        phloem_sucrose_derivative = np.zeros_like(phloem_sucrose)
+        phloem_amino_acids_derivative = np.zeros_like(phloem_amino_acids)
+        nb_axes = len(packed_axes['objects'])
+
+        # Endosperms: the axes which have not germinated yet are not computed
+        axes_computed = np.ones(nb_axes, dtype=bool)
+        axes_empty_endosperm = np.ones(nb_axes, dtype=bool)
+        packed_endosperms = self.packed_population[model.Endosperm]
+        endosperms_compartments = packed_endosperms['compartments']
+        for endosperm_position, (endosperm, axis_position) in enumerate(zip(packed_endosperms['objects'], packed_endosperms['axes'].tolist())):
+            endosperm.starch = y[endosperms_compartments['starch'][endosperm_position]]
+            endosperm.proteins = y[endosperms_compartments['proteins'][endosperm_position]]
+            if (endosperm.starch / endosperm.PARAMETERS.STARCH_MAX) <= 0.01 and (endosperm.proteins / endosperm.PARAMETERS.PROTEINS_MAX) <= 0.01:
+                continue
+            axes_empty_endosperm[axis_position] = False
+            endosperm.moistening = y[endosperms_compartments['moistening'][endosperm_position]]
+            if endosperm.moistening < 1:
+                y_derivatives[endosperms_compartments['moistening'][endosperm_position]] = endosperm.calculate_moistening()
+                axes_computed[axis_position] = False
+                continue
+            Tsoil = soils_state['Tsoil'][axes_soils[axis_position]]
+
+            # intermediate variables
+            T_effect_Vmax = endosperm.calculate_temperature_effect_on_growth(Tsoil)
+
+            # flows
+            endosperm.D_starch = endosperm.calculate_D_starch(endosperm.starch, T_effect_Vmax)
+            endosperm.D_proteins = endosperm.calculate_D_proteins(endosperm.proteins, T_effect_Vmax)
+            phloem_sucrose_derivative[axis_position] += endosperm.D_starch
+            phloem_amino_acids_derivative[axis_position] += endosperm.D_proteins
+
+            # compartments derivatives
+            endosperm.R_residual = self.respiration_model.RespirationModel.R_endosperm(endosperm.starch, endosperm.mstruct, Tsoil)
+            y_derivatives[endosperms_compartments['starch'][endosperm_position]] = endosperm.calculate_starch_derivative(endosperm.D_starch, endosperm.R_residual)
+            y_derivatives[endosperms_compartments['proteins'][endosperm_position]] = endosperm.calculate_proteins_derivative(endosperm.D_proteins)
+        axes_positions = np.flatnonzero(axes_computed)
+
+        packed_elements = self.packed_population[model.PhotosyntheticOrganElement]
+        elements_state = packed_elements['state']
+
+        # compute total transpiration at t_inf
+        transpiring_positions = np.flatnonzero((elements_state['green_area'] > 0) & axes_computed[packed_elements['axes']])
+        elements_Transpiration = model.PhotosyntheticOrganElement.calculate_Total_Transpiration(elements_state['Tr'][transpiring_positions], elements_state['green_area'][transpiring_positions])
+        axes_Total_Transpiration = np.bincount(packed_elements['axes'][transpiring_positions], weights=elements_Transpiration * elements_state['nb_replications'][transpiring_positions],
+                                               minlength=nb_axes)
+
+        # Roots: compute the flows from/to the roots to/from photosynthetic organs
+        packed_roots = self.packed_population[model.Roots]
+        roots = _PackedModelObjects(packed_roots['parameters'], mstruct=packed_roots['state']['mstruct']).take(axes_positions)
+        roots_soils = axes_soils[axes_positions]
+        roots_compartments = {compartment_name: y[compartment_indexes[axes_positions]] for compartment_name, compartment_indexes in packed_roots['compartments'].items()}
+        roots_sucrose = roots_compartments['sucrose']
+        roots_nitrates = roots_compartments['nitrates']
+        roots_amino_acids = roots_compartments['amino_acids']
+        roots_cytokinins = roots_compartments['cytokinins']
+        roots_mstruct_alpha = roots.mstruct * roots.PARAMETERS.ALPHA
+
+        roots_variables = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roots_variables['regul_transpiration'] = model.Roots.calculate_regul_transpiration(axes_Total_Transpiration[axes_positions])
+            roots_variables['Uptake_Nitrates'], roots_variables['HATS_LATS'] = model.Roots.calculate_Uptake_Nitrates(roots, soils_Conc_Nitrates_Soil[roots_soils], roots_nitrates, roots_sucrose,
+                                                                                                                    soils_T_effect_Vmax[roots_soils])
+            roots_variables['R_Nnit_upt'] = R_Nnit_upt(roots_variables['Uptake_Nitrates'], roots_sucrose)
+            roots_variables['Export_Nitrates'] = model.Roots.calculate_Export_Nitrates(roots, roots_nitrates, roots_variables['regul_transpiration'])
+            roots_variables['Export_Amino_Acids'] = model.Roots.calculate_Export_Amino_Acids(roots, roots_amino_acids, roots_variables['regul_transpiration'])
+            roots_variables['Export_cytokinins'] = model.Roots.calculate_Export_cytokinins(roots, roots_cytokinins, roots_variables['regul_transpiration'])
+
+        # the exports of the roots, per axis, for the photosynthetic organ elements
+        axes_roots_exports = {}
+        for export_name in ('Export_Nitrates', 'Export_Amino_Acids', 'Export_cytokinins'):
+            axes_roots_exports[export_name] = np.zeros(nb_axes)
+            axes_roots_exports[export_name][axes_positions] = roots_variables[export_name]
+
+        # Hidden zones
+        packed_hiddenzones = self.packed_population[model.HiddenZone]
+        hiddenzones_state = packed_hiddenzones['state']
+        all_hiddenzones_sucrose = y[packed_hiddenzones['compartments']['sucrose']]
+        all_hiddenzones_amino_acids = y[packed_hiddenzones['compartments']['amino_acids']]
+
+        # Photosynthetic organ elements
+        elements_positions = np.flatnonzero((elements_state['green_area'] > 0.25E-6) & (elements_state['mstruct'] > 0.0) & axes_computed[packed_elements['axes']])
+        elements = _PackedModelObjects(packed_elements['parameters'], mstruct=elements_state['mstruct']).take(elements_positions)
+        elements_axes = packed_elements['axes'][elements_positions]
+        elements_hiddenzones = packed_elements['hiddenzones'][elements_positions]
+        elements_mstruct_alpha = elements.mstruct * elements.PARAMETERS.ALPHA
+        elements_Ts = elements_state['Ts'][elements_positions]
+        elements_Transpiration_computed = model.PhotosyntheticOrganElement.calculate_Total_Transpiration(elements_state['Tr'][elements_positions], elements_state['green_area'][elements_positions])
+        elements_Total_Transpiration = axes_Total_Transpiration[elements_axes]
+        elements_compartments = {compartment_name: y[compartment_indexes[elements_positions]] for compartment_name, compartment_indexes in packed_elements['compartments'].items()}
+        elements_sucrose = elements_compartments['sucrose']
+        elements_triosesP = elements_compartments['triosesP']
+        elements_amino_acids = elements_compartments['amino_acids']
+        elements_cytokinins = elements_compartments['cytokinins']
+
+        Element = model.PhotosyntheticOrganElement
+        v = elements_variables = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v['T_effect_conductivity'] = T_effect_conductivity = model.Plant.calculate_temperature_effect_on_conductivity(elements_Ts)
+            v['T_effect_Vmax'] = T_effect_Vmax = model.Plant.calculate_temperature_effect_on_Vmax(elements_Ts)
+
+            # intermediate variables
+            v['Photosynthesis'] = Element.calculate_total_Photosynthesis(elements_state['Ag'][elements_positions], elements_state['green_area'][elements_positions])
+
+            # flows
+            #: Export of sucrose and amino acids towards the HZ, by the growing elements, or loading of sucrose and amino acids towards the phloem
+            exporting = elements_state['is_growing'][elements_positions] & (elements_hiddenzones >= 0)
+            exporting_elements = elements.take(exporting)
+            exporting_hiddenzones = elements_hiddenzones[exporting]
+            exporting_hiddenzones_mstruct = hiddenzones_state['mstruct'][exporting_hiddenzones]
+            exporting_hiddenzones_SIGMA = _PackedParameters.take(packed_hiddenzones['parameters'], exporting_hiddenzones).SIGMA
+            elements_axes_ALPHA = _PackedParameters.take(axes_parameters, elements_axes).ALPHA
+            Loading_Sucrose = Element.calculate_Loading_Sucrose(elements, elements_sucrose, phloem_sucrose[elements_axes], axes_mstruct[elements_axes], T_effect_conductivity,
+                                                                elements_axes_ALPHA)
+            Loading_Sucrose[exporting] = Element.calculate_export_sucrose(exporting_elements, elements_sucrose[exporting], all_hiddenzones_sucrose[exporting_hiddenzones],
+                                                                          exporting_hiddenzones_mstruct, T_effect_conductivity[exporting], exporting_hiddenzones_SIGMA)
+            Loading_Amino_Acids = Element.calculate_Loading_Amino_Acids(elements, elements_amino_acids, phloem_amino_acids[elements_axes], axes_mstruct[elements_axes], T_effect_conductivity,
+                                                                        elements_axes_ALPHA)
+            Loading_Amino_Acids[exporting] = Element.calculate_Export_Amino_Acids(exporting_elements, elements_amino_acids[exporting], all_hiddenzones_amino_acids[exporting_hiddenzones],
+                                                                                  exporting_hiddenzones_mstruct, T_effect_conductivity[exporting], exporting_hiddenzones_SIGMA)
+            v['Loading_Amino_Acids'] = Loading_Amino_Acids
+
+            v['Regul_S_Fructan'] = Element.calculate_Regul_S_Fructan(elements, Loading_Sucrose)
+            v['S_Fructan'] = Element.calculate_S_Fructan(elements, elements_sucrose, v['Regul_S_Fructan'], T_effect_Vmax)
+            v['D_Fructan'] = Element.calculate_D_Fructan(elements, elements_sucrose, elements_compartments['fructan'], T_effect_Vmax)
+            v['S_Starch'] = Element.calculate_S_Starch(elements, elements_triosesP, T_effect_Vmax)
+            v['D_Starch'] = Element.calculate_D_Starch(elements, elements_compartments['starch'], T_effect_Vmax)
+            v['S_Sucrose'] = Element.calculate_S_Sucrose(elements, elements_triosesP, T_effect_Vmax)
+
+            # the contributions of the elements to their hidden zone are computed before the respiration of phloem loading
+            hiddenzones_Loading_Sucrose_contribution = np.bincount(exporting_hiddenzones, weights=Loading_Sucrose[exporting], minlength=len(packed_hiddenzones['objects']))
+            hiddenzones_Loading_Amino_Acids_contribution = np.bincount(exporting_hiddenzones, weights=Loading_Amino_Acids[exporting], minlength=len(packed_hiddenzones['objects']))
+
+            v['R_phloem_loading'], v['Loading_Sucrose'] = R_phloem(Loading_Sucrose, elements_mstruct_alpha)
+            v['Nitrates_import'] = Element.calculate_Nitrates_import(axes_roots_exports['Export_Nitrates'][elements_axes], elements_Transpiration_computed, elements_Total_Transpiration)
+            v['Amino_Acids_import'] = Element.calculate_Amino_Acids_import(axes_roots_exports['Export_Amino_Acids'][elements_axes], elements_Transpiration_computed, elements_Total_Transpiration)
+            S_Amino_Acids = Element.calculate_S_amino_acids(elements, elements_compartments['nitrates'], elements_triosesP, T_effect_Vmax)
+            v['R_Nnit_red'], v['S_Amino_Acids'] = R_Nnit_red(S_Amino_Acids, elements_sucrose, elements_mstruct_alpha)
+            v['S_Proteins'] = Element.calculate_S_proteins(elements, elements_amino_acids, T_effect_Vmax)
+            v['D_Proteins'] = Element.calculate_D_Proteins(elements, elements_compartments['proteins'], elements_cytokinins, T_effect_Vmax)
+            v['cytokinins_import'] = Element.calculate_cytokinins_import(axes_roots_exports['Export_cytokinins'][elements_axes], elements_Transpiration_computed, elements_Total_Transpiration)
+            v['D_cytokinins'] = Element.calculate_D_cytokinins(elements, elements_cytokinins, T_effect_Vmax)
+
+            # compartments derivatives
+            v['R_residual'] = R_residual(elements_sucrose, elements_mstruct_alpha, elements_state['Total_Organic_Nitrogen'][elements_positions], elements_Ts)
+            elements_sum_respi = v['R_phloem_loading'] + v['R_Nnit_red'] + v['R_residual']
+            elements_derivatives = {'starch': Element.calculate_starch_derivative(elements, v['S_Starch'], v['D_Starch']),
+                                    'sucrose': Element.calculate_sucrose_derivative(elements, v['S_Sucrose'], v['D_Starch'], v['Loading_Sucrose'], v['S_Fructan'], v['D_Fructan'],
+                                                                                    elements_sum_respi),
+                                    'triosesP': Element.calculate_triosesP_derivative(elements, v['Photosynthesis'], v['S_Sucrose'], v['S_Starch'], v['S_Amino_Acids']),
+                                    'fructan': Element.calculate_fructan_derivative(elements, v['S_Fructan'], v['D_Fructan']),
+                                    'nitrates': Element.calculate_nitrates_derivative(elements, v['Nitrates_import'], v['S_Amino_Acids']),
+                                    'amino_acids': Element.calculate_amino_acids_derivative(elements, v['Amino_Acids_import'], v['S_Amino_Acids'], v['S_Proteins'], v['D_Proteins'],
+                                                                                            v['Loading_Amino_Acids']),
+                                    'proteins': Element.calculate_proteins_derivative(elements, v['S_Proteins'], v['D_Proteins']),
+                                    'cytokinins': Element.calculate_cytokinins_derivative(elements, v['cytokinins_import'], v['D_cytokinins'], packed_elements['phytomers'][elements_positions],
+                                                                                          elements_cytokinins)}
+        for compartment_name, compartment_derivatives in elements_derivatives.items():
+            y_derivatives[packed_elements['compartments'][compartment_name][elements_positions]] = compartment_derivatives
+
+        # the elements which do not export to a hidden zone load the phloem
+        loading = ~exporting
+        elements_nb_replications = elements_state['nb_replications'][elements_positions]
+        phloem_sucrose_derivative += np.bincount(elements_axes[loading], weights=(v['Loading_Sucrose'] * elements_nb_replications)[loading], minlength=nb_axes)
+        phloem_amino_acids_derivative += np.bincount(elements_axes[loading], weights=(v['Loading_Amino_Acids'] * elements_nb_replications)[loading], minlength=nb_axes)
+
+        # Hidden zones
+        hiddenzones_positions = np.flatnonzero(axes_computed[packed_hiddenzones['axes']])
+        hiddenzones_axes = packed_hiddenzones['axes'][hiddenzones_positions]
+        hiddenzones = _PackedModelObjects(packed_hiddenzones['parameters'], mstruct=hiddenzones_state['mstruct'], ratio_DZ=hiddenzones_state['ratio_DZ']).take(hiddenzones_positions)
+        hiddenzones_compartments = {compartment_name: y[compartment_indexes[hiddenzones_positions]] for compartment_name, compartment_indexes in packed_hiddenzones['compartments'].items()}
+        hiddenzones_sucrose = hiddenzones_compartments['sucrose']
+        hiddenzones_amino_acids = hiddenzones_compartments['amino_acids']
+        hiddenzones_T_effect_Vmax = axes_T_effect_Vmax[hiddenzones_axes]
+
+        HiddenZone = model.HiddenZone
+        v = hiddenzones_variables = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Unloading of sucrose and AA from phloem
+            v['Unloading_Sucrose'] = HiddenZone.calculate_Unloading_Sucrose(hiddenzones, hiddenzones_sucrose, phloem_sucrose[hiddenzones_axes], axes_mstruct[hiddenzones_axes],
+                                                                             axes_T_effect_conductivity[hiddenzones_axes])
+            v['Unloading_Amino_Acids'] = HiddenZone.calculate_Unloading_Amino_Acids(hiddenzones, hiddenzones_amino_acids, phloem_amino_acids[hiddenzones_axes], axes_mstruct[hiddenzones_axes],
+                                                                                     axes_T_effect_conductivity[hiddenzones_axes])
+
+            # Fructan synthesis and degradation
+            Regul_Sfructanes = HiddenZone.calculate_Regul_S_Fructan(hiddenzones, v['Unloading_Sucrose'])
+            v['S_Fructan'] = HiddenZone.calculate_S_Fructan(hiddenzones, hiddenzones_sucrose, Regul_Sfructanes, hiddenzones_T_effect_Vmax)
+            v['D_Fructan'] = HiddenZone.calculate_D_Fructan(hiddenzones, hiddenzones_sucrose, hiddenzones_compartments['fructan'], hiddenzones_T_effect_Vmax)
+
+            # Synthesis and degradation of proteins
+            v['S_Proteins'] = HiddenZone.calculate_S_proteins(hiddenzones, hiddenzones_amino_acids, hiddenzones_T_effect_Vmax)
+            v['D_Proteins'] = HiddenZone.calculate_D_Proteins(hiddenzones, hiddenzones_compartments['proteins'], hiddenzones_T_effect_Vmax)
+
+            # Residual respiration
+            v['R_residual'] = R_residual(hiddenzones_sucrose, hiddenzones.mstruct * hiddenzones.PARAMETERS.ALPHA, hiddenzones_state['Total_Organic_Nitrogen'][hiddenzones_positions],
+                                         axes_state['SAM_temperature'][hiddenzones_axes])
+
+            # compute the derivatives of the hidden zones
+            hiddenzones_derivatives = {'sucrose': HiddenZone.calculate_sucrose_derivative(hiddenzones, v['Unloading_Sucrose'], v['S_Fructan'], v['D_Fructan'],
+                                                                                          hiddenzones_Loading_Sucrose_contribution[hiddenzones_positions], v['R_residual']),
+                                       'amino_acids': HiddenZone.calculate_amino_acids_derivative(hiddenzones, v['Unloading_Amino_Acids'], v['S_Proteins'], v['D_Proteins'],
+                                                                                                  hiddenzones_Loading_Amino_Acids_contribution[hiddenzones_positions]),
+                                       'fructan': HiddenZone.calculate_fructan_derivative(hiddenzones, v['S_Fructan'], v['D_Fructan']),
+                                       'proteins': HiddenZone.calculate_proteins_derivative(hiddenzones, v['S_Proteins'], v['D_Proteins'])}
+        for compartment_name, compartment_derivatives in hiddenzones_derivatives.items():
+            y_derivatives[packed_hiddenzones['compartments'][compartment_name][hiddenzones_positions]] = compartment_derivatives
+        hiddenzones_nb_replications = hiddenzones_state['nb_replications'][hiddenzones_positions]
+        phloem_sucrose_derivative -= np.bincount(hiddenzones_axes, weights=v['Unloading_Sucrose'] * hiddenzones_nb_replications, minlength=nb_axes)
+        phloem_amino_acids_derivative -= np.bincount(hiddenzones_axes, weights=v['Unloading_Amino_Acids'] * hiddenzones_nb_replications, minlength=nb_axes)
+
+        # Grains
+        packed_grains = self.packed_population[model.Grains]
+        grains_compartments = packed_grains['compartments']
+        for grains_position, (grains, axis_position) in enumerate(zip(packed_grains['objects'], packed_grains['axes'].tolist())):
+            if not axes_computed[axis_position]:
+                continue
+            # compute the derivative of each compartment of grains
+            grains.structure = y[grains_compartments['structure'][grains_position]]
+            grains.starch = y[grains_compartments['starch'][grains_position]]
+            grains.proteins = y[grains_compartments['proteins'][grains_position]]
+            grains.age_from_flowering = y[grains_compartments['age_from_flowering'][grains_position]]
+
+            # intermediate variables
+            T_effect_growth = grains.calculate_temperature_effect_on_growth(axes_state['SAM_temperature'][axis_position])
+            grains.structural_dry_mass = grains.calculate_structural_dry_mass(grains.structure)
+
+            # flows
+            axis_ALPHA = packed_axes['objects'][axis_position].PARAMETERS.ALPHA
+            grains.S_grain_structure = grains.calculate_S_grain_structure(grains.structure, phloem_sucrose[axis_position], axes_mstruct[axis_position], T_effect_growth, axis_ALPHA)
+            grains.S_grain_starch = grains.calculate_S_grain_starch(phloem_sucrose[axis_position], axes_mstruct[axis_position], axes_T_effect_Vmax[axis_position], axis_ALPHA)
+            grains.S_Proteins = grains.calculate_S_proteins(grains.S_grain_structure, grains.S_grain_starch, phloem_amino_acids[axis_position], phloem_sucrose[axis_position],
+                                                            grains.structural_dry_mass)
+            phloem_sucrose_derivative[axis_position] -= grains.S_grain_structure + (grains.S_grain_starch * grains.structural_dry_mass)
+            phloem_amino_acids_derivative[axis_position] -= grains.S_Proteins
+
+            # compartments derivatives
+            grains.R_grain_growth_struct, grains.R_grain_growth_starch = self.respiration_model.RespirationModel.R_grain_growth(grains.S_grain_structure, grains.S_grain_starch,
+                                                                                                                              grains.structural_dry_mass)
+            y_derivatives[grains_compartments['structure'][grains_position]] = grains.calculate_structure_derivative(grains.S_grain_structure, grains.R_grain_growth_struct)
+            y_derivatives[grains_compartments['starch'][grains_position]] = grains.calculate_starch_derivative(grains.S_grain_starch, grains.structural_dry_mass, grains.R_grain_growth_starch)
+            y_derivatives[grains_compartments['proteins'][grains_position]] = grains.calculate_proteins_derivative(grains.S_Proteins)
+            y_derivatives[grains_compartments['age_from_flowering'][grains_position]] += (self.delta_t * T_effect_growth)  # TODO: create a function
+
+        # Roots: compute the derivative of each compartment of roots
+        roots_phloem_sucrose = phloem_sucrose[axes_positions]
+        roots_phloem_amino_acids = phloem_amino_acids[axes_positions]
+        roots_axes_mstruct = axes_mstruct[axes_positions]
+        roots_T_effect_conductivity = axes_T_effect_conductivity[axes_positions]
+        roots_nb_leaves = axes_state['nb_leaves'][axes_positions]
+        roots_axes_ALPHA = _PackedParameters.take(axes_parameters, axes_positions).ALPHA
+        roots_T_effect_Vmax = soils_T_effect_Vmax[roots_soils]
+        v = roots_variables
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # flows
+            v['Unloading_Sucrose'] = model.Roots.calculate_Unloading_Sucrose(roots, roots_sucrose, roots_phloem_sucrose, roots_axes_mstruct, roots_T_effect_conductivity, roots_nb_leaves,
+                                                                             roots_axes_ALPHA)
+            v['Unloading_Amino_Acids'] = model.Roots.calculate_Unloading_Amino_Acids(roots, roots_amino_acids, roots_phloem_amino_acids, roots_phloem_sucrose, v['Unloading_Sucrose'],
+                                                                                     roots_axes_mstruct, roots_T_effect_conductivity, roots_nb_leaves, roots_axes_ALPHA)
+            S_Amino_Acids = model.Roots.calculate_S_amino_acids(roots, roots_nitrates, roots_sucrose, roots_T_effect_Vmax)
+            v['R_Nnit_red'], v['S_Amino_Acids'] = R_Nnit_red(S_Amino_Acids, roots_sucrose, roots_mstruct_alpha, root=True)
+            v['C_exudation'], v['N_exudation'] = model.Roots.calculate_exudation(roots, v['Unloading_Sucrose'], roots_sucrose, roots_amino_acids, roots_phloem_amino_acids)
+            v['S_cytokinins'] = model.Roots.calculate_S_cytokinins(roots, roots_sucrose, roots_nitrates, roots_T_effect_Vmax)
+
+            # compartments derivatives
+            v['R_residual'] = R_residual(roots_sucrose, roots_mstruct_alpha, packed_roots['state']['Total_Organic_Nitrogen'][axes_positions], soils_state['Tsoil'][roots_soils])
+            v['sum_respi'] = v['R_Nnit_upt'] + v['R_Nnit_red'] + v['R_residual']
+            roots_derivatives = {'sucrose': model.Roots.calculate_sucrose_derivative(roots, v['Unloading_Sucrose'], v['S_Amino_Acids'], v['C_exudation'], v['sum_respi']),
+                                 'nitrates': model.Roots.calculate_nitrates_derivative(roots, v['Uptake_Nitrates'], v['Export_Nitrates'], v['S_Amino_Acids']),
+                                 'amino_acids': model.Roots.calculate_amino_acids_derivative(roots, v['Unloading_Amino_Acids'], v['S_Amino_Acids'], v['Export_Amino_Acids'], v['N_exudation']),
+                                 'cytokinins': model.Roots.calculate_cytokinins_derivative(roots, v['S_cytokinins'], v['Export_cytokinins'], roots_cytokinins,
+                                                                                           axes_empty_endosperm[axes_positions])}
+        for compartment_name, compartment_derivatives in roots_derivatives.items():
+            y_derivatives[packed_roots['compartments'][compartment_name][axes_positions]] = compartment_derivatives
+        phloem_sucrose_derivative[axes_positions] -= v['Unloading_Sucrose'] * roots_mstruct_alpha
+        phloem_amino_acids_derivative[axes_positions] -= v['Unloading_Amino_Acids'] * roots_mstruct_alpha
+
+        # compute the derivative of each compartment of phloem
+        y_derivatives[packed_axes['phloem']['sucrose'][axes_positions]] = phloem_sucrose_derivative[axes_positions]
+        y_derivatives[packed_axes['phloem']['amino_acids'][axes_positions]] = phloem_amino_acids_derivative[axes_positions]
+
+        soils_variables = {'Conc_Nitrates_Soil': soils_Conc_Nitrates_Soil, 'T_effect_Vmax': soils_T_effect_Vmax, 'T_effect_conductivity': soils_T_effect_conductivity}
+        if not self.external_soil_model:
+            # compute the derivative of each compartment of soil, from the uptake of the roots of each plant
+            soils_variables['mineralisation'] = model.Soil.calculate_mineralisation(soils_T_effect_Vmax)
+            axes_Uptake_Nitrates = np.zeros(nb_axes)
+            axes_Uptake_Nitrates[axes_positions] = roots_variables['Uptake_Nitrates']
+            soils_contributors = [(np.bincount(axes_soils[plant_axes], weights=axes_Uptake_Nitrates[plant_axes], minlength=len(packed_soils['objects'])), plant_index)
+                                  for plant_index, plant_axes in packed_axes['plants_axes']]
+            y_derivatives[packed_soils['compartments']['nitrates']] = model.Soil.calculate_nitrates_derivative(soils_variables['mineralisation'], soils_contributors, self.culm_density,
+                                                                                                               soils_state['constant_Conc_Nitrates'])
+
+        # keep the values computed at this call, to update the population at the end of the run
+        self.last_vectorized_evaluation = {
+            't': t, 'y': y.copy(),  # the solver may update `y` in place
+            model.PhotosyntheticOrganElement: {'positions': elements_positions, 'variables': elements_variables,
+                                               'transpiring_positions': transpiring_positions, 'Transpiration': elements_Transpiration},
+            model.HiddenZone: {'positions': hiddenzones_positions, 'variables': hiddenzones_variables},
+            model.Roots: {'positions': axes_positions, 'variables': roots_variables},
+            model.Axis: {'positions': np.arange(nb_axes), 'variables': {'T_effect_conductivity': axes_T_effect_conductivity, 'T_effect_Vmax': axes_T_effect_Vmax},
+                         'computed_positions': axes_positions, 'Total_Transpiration': axes_Total_Transpiration[axes_positions]},
+            model.Soil: {'positions': np.arange(len(packed_soils['objects'])), 'variables': soils_variables}}
+
+        return y_derivatives
+
+
+class EnsembleSimulation(object):
+    """
+    The EnsembleSimulation class permits to run together many independent simulations, e.g. the members of a parameter sweep
+    or of a Monte-Carlo ensemble.
+
+    The compartments of the members are stacked into one state vector, which is integrated by a single call to :func:`scipy.integrate.solve_ivp`.
+    The Jacobian of the ensemble is block-diagonal, one block per member (see :attr:`Simulation.jacobian_sparsity`), so the solver
+    approximates the Jacobian of all the members with the same number of evaluations of the derivatives as for the largest member.
+    The members which use the vectorized engine (see :attr:`Simulation.DERIVATIVES_ENGINES`) and share the same respiration model
+    and soil coupling are packed together into one set of arrays (see :meth:`_pack_members`), so that each evaluation of the derivatives
+    applies the vectorized engine once to all of them ; the values computed are split back into the population of each member at the end of the run.
+    The other members (Python engine, interpolated forcings, or debug logs of the compartments enabled) are computed on their own slice
+    of the state vector with their own engine.
+
+    Each member must be initialized (see :meth:`Simulation.initialize`) before calling :meth:`run`, and is re-initialized by the user
+    as usual when its forcings or its topology change. The members must share the same delta t.
+    Their own solver configurations are not used: the ensemble is integrated with :attr:`solver_configuration`.
+    The solver controls the error on the root mean square of the scaled errors of all the compartments of the ensemble,
+    so the tolerances may need to be tightened to get the accuracy of separate simulations for the stiffest members.
+
+    :param list members: the simulations to run together, as a list of :class:`Simulation`.
+    :param SolverConfiguration solver_configuration: the configuration of the solver (see :class:`SolverConfiguration`) ;
+           default is `None` (use the default configuration of :class:`SolverConfiguration`).
+           Options `jacobian_reuse` and `persistent_integrator` are not available for an ensemble.
+    """
+
+    def __init__(self, members, solver_configuration=None):
+
+        logger = logging.getLogger(__name__)
+
+        if len(members) == 0:
+            message = 'No member found in the ensemble.'
+            logger.exception(message)
+            raise SimulationConstructionError(message)
+        if len(set(member.delta_t for member in members)) != 1:
+            message = """The members passed to the EnsembleSimulation constructor do not share the same `delta_t`.
+        Please set the same `delta_t` to all the members."""
+            logger.exception(message)
+            raise SimulationConstructionError(message)
+
+        if solver_configuration is None:
+            solver_configuration = SolverConfiguration()
+        elif solver_configuration.method not in Simulation.SOLVER_METHODS:
+            message = """The method of the `solver_configuration` passed to the EnsembleSimulation constructor is `{}`.
+        Please set the method of the solver to one of {}.""".format(solver_configuration.method, Simulation.SOLVER_METHODS)
+            logger.exception(message)
+            raise SimulationConstructionError(message)
+        elif solver_configuration.jacobian_reuse or solver_configuration.persistent_integrator:
+            message = """The `solver_configuration` passed to the EnsembleSimulation constructor sets `jacobian_reuse` or `persistent_integrator`.
+        These options are not available for an ensemble."""
+            logger.exception(message)
+            raise SimulationConstructionError(message)
+
+        self.members = list(members)  #: the simulations run together
+        self.solver_configuration = solver_configuration  #: the configuration of the solver (see :class:`SolverConfiguration`)
+        self.time_grid = self.members[0].time_grid  #: the time grid of the members (in hours)
+
+        #: the statistics of the solver at the last run (see :attr:`Simulation.solver_statistics`)
+        self.solver_statistics = {'nfev': 0, 'njev': 0, 'nlu': 0, 'wall_time': 0.0}
+
+        self.members_slices = []  #: the slice of the compartments of each member in the state vector of the ensemble
+        self.jacobian_sparsity = None  #: the block-diagonal sparsity pattern of the Jacobian of the ensemble
+        self.members_jacobian_sparsities = ()  #: the sparsity patterns from which :attr:`jacobian_sparsity` was built
+
+        #: the simulations which compute the packed members at once, per group of members (see :meth:`_pack_members`)
+        self.packed_simulations = {}
+        #: the members merged in the packed population of each simulation of :attr:`packed_simulations`, as a dictionary
+        #: {group: ([member key, ...], [(member index, positions offsets per class), ...]), ...} (see :meth:`_packed_member_key`)
+        self.packed_members = {}
+
+    #: The keys of the values computed by the vectorized engine, aligned with the positions of the model objects
+    #: (see :attr:`Simulation.last_vectorized_evaluation`), as a tuple ((positions key, values key), ...)
+    VECTORIZED_EVALUATION_KEYS = (('positions', 'variables'), ('transpiring_positions', 'Transpiration'), ('computed_positions', 'Total_Transpiration'))
+
+    #: The keys of the positions of the parent model objects in :attr:`Simulation.packed_population`, with the class of the parents
+    PACKED_PARENTS_KEYS = (('soils', model.Soil), ('axes', model.Axis), ('hiddenzones', model.HiddenZone))
+
+    def _packed_member_key(self, member_index):
+        """Summarize what the packed population of a group depends on for the member at `member_index`: its position in the state vector
+        of the ensemble, its topology (see :attr:`Simulation.topology_fingerprint`), its packed model objects, their parameters sets and its culm density.
+
+        :param int member_index: the index of the member in :attr:`members`.
+
+        :return: The key of the member.
+        :rtype: tuple
+        """
+        member = self.members[member_index]
+        packed_population = member.packed_population
+        # the frozen parameters sets are compared by their values, and the others by identity (see :class:`parameters.Parameters`)
+        parameters_sets = tuple(None if model_object is None else model_object.PARAMETERS
+                                for class_ in Simulation.PACKED_PARAMETERS_CLASSES for model_object in packed_population[class_]['objects'])
+        return (member_index, self.members_slices[member_index], member.topology_fingerprint,
+                tuple(packed_objects['objects'] for packed_objects in packed_population.values()), parameters_sets, dict(member.culm_density))
+
+    def _pack_members(self):
+        """Group the members which can be computed at once by the vectorized engine, and merge the packed populations of the members of each group
+        into the packed population of a simulation of :attr:`packed_simulations`.
+
+        The indexes of the compartments are shifted to the slices of the members in the state vector of the ensemble (see :attr:`members_slices`),
+        and the positions of the parent objects (soils, axes, hidden zones) to the positions of the members in the merged arrays.
+        The plants are identified by (member index, plant index), with the culm density of their member.
+        The packed population of a group is merged again only when the key of one of its members changed since the previous run
+        (see :meth:`_packed_member_key`), e.g. after a change of its topology or of its parameters ; otherwise, only the state parameters are merged.
+
+        :return: The groups of packed members, as a list [(simulation, [(member index, positions offsets per class), ...]), ...],
+                 and the indexes of the members computed on their own.
+        :rtype: (list, list)
+        """
+        groups = {}
+        separate_members_indexes = []
+        compartments_logger = logging.getLogger('cnwheat.compartments')
+        derivatives_logger = logging.getLogger('cnwheat.derivatives')
+        for member_index, member in enumerate(self.members):
+            if member.derivatives_engine != 'vectorized' or member.interpolate_forcings or member.forcings_interpolator is not None or \
+                    compartments_logger.isEnabledFor(logging.DEBUG) or derivatives_logger.isEnabledFor(logging.DEBUG):
+                separate_members_indexes.append(member_index)
+            else:
+                groups.setdefault((member.respiration_model, member.external_soil_model), []).append(member_index)
+
+        packed_groups = []
+        for (respiration_model, external_soil_model), members_indexes in groups.items():
+            packed_simulation = self.packed_simulations.get((respiration_model, external_soil_model))
+            if packed_simulation is None:
+                packed_simulation = Simulation(respiration_model, delta_t=self.members[members_indexes[0]].delta_t, external_soil_model=external_soil_model,
+                                               derivatives_engine='vectorized')
+                self.packed_simulations[(respiration_model, external_soil_model)] = packed_simulation
+            members_keys = [self._packed_member_key(member_index) for member_index in members_indexes]
+            previous_members_keys, members_offsets = self.packed_members.get((respiration_model, external_soil_model), (None, None))
+            if members_keys == previous_members_keys:
+                # only the state parameters changed since the previous run
+                for class_, packed_objects in packed_simulation.packed_population.items():
+                    members_states = [self.members[member_index].packed_population[class_].get('state') for member_index in members_indexes]
+                    if members_states[0] is not None:
+                        packed_objects['state'] = {parameter_name: np.concatenate([member_state[parameter_name] for member_state in members_states])
+                                                   for parameter_name in members_states[0]}
+                packed_groups.append((packed_simulation, members_offsets))
+                continue
+            packed_population = {}
+            culm_density = {}
+            members_offsets = []
+            for member_index in members_indexes:
+                member = self.members[member_index]
+                member_start = self.members_slices[member_index].start
+                offsets = {class_: len(packed_population.get(class_, {}).get('objects', ())) for class_ in member.packed_population}
+                members_offsets.append((member_index, offsets))
+                for class_, member_packed_objects in member.packed_population.items():
+                    packed_objects = packed_population.setdefault(class_, {})
+                    for key, values in member_packed_objects.items():
+                        if key in ('objects', 'phytomers_objects'):
+                            packed_objects.setdefault(key, []).extend(values)
+                        elif key in ('compartments', 'phloem'):
+                            for compartment_name, compartments_indexes in values.items():
+                                packed_objects.setdefault(key, {}).setdefault(compartment_name, []).append(compartments_indexes + member_start)
+                        elif key == 'state':
+                            for parameter_name, parameter_values in values.items():
+                                packed_objects.setdefault(key, {}).setdefault(parameter_name, []).append(parameter_values)
+                        elif key == 'plants_axes':
+                            packed_objects.setdefault(key, []).extend(((member_index, plant_index), plant_axes + offsets[model.Axis]) for plant_index, plant_axes in values)
+                            if not external_soil_model:
+                                culm_density.update({(member_index, plant_index): member.culm_density[plant_index] for plant_index, _ in values})
+                        elif key == 'phytomers':
+                            packed_objects.setdefault(key, []).append(values)
+                        elif key != 'parameters':
+                            # the positions of the parents, -1 for the missing ones
+                            parent_class = dict(EnsembleSimulation.PACKED_PARENTS_KEYS)[key]
+                            packed_objects.setdefault(key, []).append(np.where(values >= 0, values + offsets[parent_class], values))
+            for class_, packed_objects in packed_population.items():
+                for key in ('compartments', 'phloem', 'state'):
+                    if key in packed_objects:
+                        packed_objects[key] = {name: np.concatenate(arrays) for name, arrays in packed_objects[key].items()}
+                for key in ('phytomers',) + tuple(key for key, _ in EnsembleSimulation.PACKED_PARENTS_KEYS):
+                    if key in packed_objects:
+                        packed_objects[key] = np.concatenate(packed_objects[key])
+                if class_ in Simulation.PACKED_PARAMETERS_CLASSES:
+                    packed_objects['parameters'] = _PackedParameters.pack(packed_objects['objects'], class_.PARAMETERS)
+            packed_simulation.packed_population = packed_population
+            packed_simulation.culm_density = culm_density
+            self.packed_members[(respiration_model, external_soil_model)] = (members_keys, members_offsets)
+            packed_groups.append((packed_simulation, members_offsets))
+        return packed_groups, separate_members_indexes
+
+    def _split_packed_evaluation(self, packed_simulation, members_offsets):
+        """Split the values computed at the last evaluation of a group of packed members (see :meth:`_pack_members`)
+        into :attr:`Simulation.last_vectorized_evaluation` of each member.
+
+        :param Simulation packed_simulation: the simulation which computed the members.
+        :param list members_offsets: the members of the group, as a list [(member index, positions offsets per class), ...].
+        """
+        packed_evaluation = packed_simulation.last_vectorized_evaluation
+        for member_index, offsets in members_offsets:
+            member = self.members[member_index]
+            member_evaluation = {'t': packed_evaluation['t'], 'y': packed_evaluation['y'][self.members_slices[member_index]]}
+            for class_, class_evaluation in packed_evaluation.items():
+                if class_ in ('t', 'y'):
+                    continue
+                offset = offsets[class_]
+                nb_objects = len(member.packed_population[class_]['objects'])
+                member_class_evaluation = member_evaluation[class_] = {}
+                for positions_key, values_key in EnsembleSimulation.VECTORIZED_EVALUATION_KEYS:
+                    if positions_key not in class_evaluation:
+                        continue
+                    positions = class_evaluation[positions_key]
+                    member_rows = (positions >= offset) & (positions < offset + nb_objects)
+                    member_class_evaluation[positions_key] = positions[member_rows] - offset
+                    values = class_evaluation[values_key]
+                    if isinstance(values, dict):
+                        member_class_evaluation[values_key] = {name: variable_values[member_rows] for name, variable_values in values.items()}
+                    else:
+                        member_class_evaluation[values_key] = values[member_rows]
+            member.last_vectorized_evaluation = member_evaluation
+
+    def run(self):
+        """
+        Compute CN exchanges which occurred in the populations and the soils of all the members over their delta t.
+        """
+        logger = logging.getLogger(__name__)
+        logger.info('Run of the CN-Wheat ensemble...')
+
+        derivatives_functions = [member._prepare_run() for member in self.members]
+
+        # stack the compartments of the members
+        self.members_slices = []
+        start = 0
+        for member in self.members:
+            nb_compartments = len(member.initial_conditions)
+            self.members_slices.append(slice(start, start + nb_compartments))
+            start += nb_compartments
+        initial_conditions = np.concatenate([np.asarray(member.initial_conditions, dtype=float) for member in self.members])
+        atol = np.concatenate([np.broadcast_to(np.asarray(member.atol, dtype=float), (len(member.initial_conditions),)) for member in self.members])
+
+        # the sparsity pattern is rebuilt only when the topology of a member changed (see :meth:`Simulation.initialize`)
+        members_jacobian_sparsities = tuple(member.jacobian_sparsity for member in self.members)
+        if len(members_jacobian_sparsities) != len(self.members_jacobian_sparsities) or \
+                any(sparsity is not previous_sparsity for sparsity, previous_sparsity in zip(members_jacobian_sparsities, self.members_jacobian_sparsities)):
+            self.jacobian_sparsity = sparse.block_diag(members_jacobian_sparsities, format='csc', dtype=bool)
+            self.members_jacobian_sparsities = members_jacobian_sparsities
+
+        members_slices = self.members_slices
+        packed_groups, separate_members_indexes = self._pack_members()
+
+        derivatives_evaluations = [0]
+
+        def calculate_all_derivatives(t, y):
+            derivatives_evaluations[0] += 1
+            # each group of packed members is computed at once on the whole state vector, and fills the compartments of its members only
+            y_derivatives = np.zeros_like(y)
+            for packed_simulation, _ in packed_groups:
+                y_derivatives += packed_simulation._calculate_packed_derivatives(t, y)
+            for member_index in separate_members_indexes:
+                member_slice = members_slices[member_index]
+                y_derivatives[member_slice] = derivatives_functions[member_index](t, y[member_slice])
+            return y_derivatives
+
+        solver_configuration = self.solver_configuration
+        solver_options = {'rtol': solver_configuration.rtol, 'atol': atol, 'max_step': solver_configuration.max_step, 'first_step': solver_configuration.first_step}
+        if solver_configuration.method != 'LSODA':  # LSODA only handles banded Jacobians
+            solver_options['jac_sparsity'] = self.jacobian_sparsity
+
+        wall_time_start = time.time()
+        sol = solve_ivp(fun=calculate_all_derivatives, t_span=self.time_grid, y0=initial_conditions,
+                        method=solver_configuration.method, t_eval=np.array([self.time_grid[-1]]), dense_output=False, **solver_options)
+
+        # the evaluations of the derivatives made to approximate the Jacobian are counted (see :attr:`Simulation.solver_statistics`)
+        nfev = derivatives_evaluations[0]
+        self.solver_statistics['nfev'] = nfev
+        self.solver_statistics['njev'] = int(sol.njev)
+        self.solver_statistics['nlu'] = int(sol.nlu)
+        self.solver_statistics['wall_time'] = time.time() - wall_time_start
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Run of the solver DONE: nfev = %s, njev = %s, nlu = %s, wall time = %s s", nfev, sol.njev, sol.nlu, self.solver_statistics['wall_time'])
+
+        # check the integration ; raise an exception if the integration failed
+        if not sol.success:
+            message = "Integration failed: {}".format(sol.message)
+            logger.exception(message)
+            raise SimulationRunError(message)
+
+        for packed_simulation, members_offsets in packed_groups:
+            self._split_packed_evaluation(packed_simulation, members_offsets)
+        for member in self.members:
+            member.nfev_total += nfev
+            member._finish_run()
+
+        logger.info('Run of the CN-Wheat ensemble DONE')
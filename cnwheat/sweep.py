@@ -0,0 +1,158 @@
+# -*- coding: latin-1 -*-
+
+from __future__ import division  # use "//" to do integer division
+import collections
+import concurrent.futures
+import logging
+import multiprocessing
+import traceback
+from concurrent.futures.process import BrokenProcessPool
+
+from cnwheat import converter
+
+"""
+    cnwheat.sweep
+    ~~~~~~~~~~~~~
+
+    The module :mod:`cnwheat.sweep` runs many scenarios of CN-Wheat in parallel, e.g. for parameter sweeps.
+
+    Each scenario is built from the same base inputs and its own parameters overrides (see :func:`converter.from_dataframes`),
+    and is run in a worker process. The overrides of a scenario are frozen parameters sets referenced by the objects of the scenario only
+    (see :meth:`cnwheat.parameters.Parameters.derive`), so that they never leak into another scenario run by the same worker process.
+
+    :copyright: Copyright 2014-2017 INRA-ECOSYS, see AUTHORS.
+    :license: CeCILL-C, see LICENSE for details.
+
+    **Acknowledgments**: The research leading these results has received funding through the
+    Investment for the Future programme managed by the Research National Agency
+    (BreedWheat project ANR-10-BTBR-03).
+
+    .. seealso:: Barillot et al. 2016.
+"""
+
+#: The result of a scenario:
+#:     * `index`: the index of the scenario in the list of the parameters overrides,
+#:     * `update_parameters`: the parameters overrides of the scenario,
+#:     * `outputs`: the outputs returned by the scenario function, or `None` if the scenario failed,
+#:     * `error`: the traceback of the exception raised by the scenario, or `None` if the scenario succeeded.
+ScenarioResult = collections.namedtuple('ScenarioResult', ['index', 'update_parameters', 'outputs', 'error'])
+
+#: The base inputs, the scenario function and the flags of the started scenarios, set once in each worker process by :func:`_init_worker`
+_worker_context = {}
+
+
+def _init_worker(base_inputs, scenario_function, scenarios_started):
+    """Store the context shared by all the scenarios run by a worker process, so that it is sent once per worker process and not once per scenario.
+
+    :param dict base_inputs: the inputs shared by all the scenarios.
+    :param function scenario_function: the function which runs a scenario.
+    :param multiprocessing.Array scenarios_started: the flags of the scenarios started by the worker processes, in shared memory.
+    """
+    _worker_context.update(base_inputs=base_inputs, scenario_function=scenario_function, scenarios_started=scenarios_started)
+
+
+def _run_scenario(index, update_parameters):
+    """Run a scenario in a worker process.
+
+    :param int index: the index of the scenario.
+    :param dict update_parameters: the parameters overrides of the scenario.
+
+    :return: The result of the scenario.
+    :rtype: ScenarioResult
+    """
+    _worker_context['scenarios_started'][index] = True
+    try:
+        population, soils = converter.from_dataframes(update_parameters=update_parameters, **_worker_context['base_inputs'])
+        outputs = _worker_context['scenario_function'](population, soils)
+    except Exception:
+        return ScenarioResult(index, update_parameters, None, traceback.format_exc())
+    return ScenarioResult(index, update_parameters, outputs, None)
+
+
+def _run_pools(pools_scenarios, processes, initargs, broken_scenarios):
+    """Run scenarios in pools of worker processes, and yield their results as soon as they complete.
+
+    :param list pools_scenarios: the scenarios to run in each pool, as lists of tuples (index, update_parameters).
+    :param int processes: the number of worker processes of each pool.
+    :param tuple initargs: the arguments of :func:`_init_worker`.
+    :param list broken_scenarios: the list to append the scenarios which did not complete because a worker process of their pool terminated abruptly.
+
+    :return: A generator of the results of the completed scenarios.
+    :rtype: generator of ScenarioResult
+    """
+    executors = []
+    futures = {}
+    try:
+        for pool_scenarios in pools_scenarios:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=initargs)
+            executors.append(executor)
+            for scenario in pool_scenarios:
+                futures[executor.submit(_run_scenario, *scenario)] = scenario
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                broken_scenarios.append(futures[future])
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run_scenarios(base_inputs, parameters_overrides, scenario_function, processes=None):
+    """Run a scenario for each parameters overrides of `parameters_overrides`, in parallel.
+
+    For each scenario, a worker process converts `base_inputs` to a population and soils with the parameters overrides of the scenario
+    (see :func:`converter.from_dataframes`), then calls `scenario_function` to run the simulation. `base_inputs` and `scenario_function`
+    are sent once to each worker process. The results are yielded as soon as the scenarios complete, thus not in the order of `parameters_overrides`.
+
+    The failures are isolated per scenario: an exception raised by a scenario is caught in its worker process and returned in its result.
+    If a worker process terminates abruptly (e.g. a crash or a kill), the scenarios which were running in the pool are run again,
+    each one in its own worker process, so that only the scenario which makes its worker process terminate is returned as failed,
+    and the scenarios which were not started yet are run in a new pool.
+
+    :param dict base_inputs: the inputs shared by all the scenarios, as the keyword arguments of :func:`converter.from_dataframes`
+           (`axes_inputs`, `organs_inputs`, `hiddenzones_inputs`, `elements_inputs` and `soils_inputs`).
+    :param list parameters_overrides: the parameters to update for each scenario, as a list of dictionaries
+           with the form of `update_parameters` in :func:`converter.from_dataframes`.
+    :param function scenario_function: the function `scenario_function(population, soils)` which runs a scenario and returns its outputs.
+           It must be defined at the top level of a module, and its outputs must be picklable, e.g. the dataframes
+           returned by :func:`converter.to_dataframes`.
+    :param int processes: the number of worker processes ; default is `None` (use the number of CPUs).
+
+    :return: A generator of the results of the scenarios.
+    :rtype: generator of ScenarioResult
+    """
+    logger = logging.getLogger(__name__)
+
+    pending_scenarios = list(enumerate(parameters_overrides))
+    if len(pending_scenarios) == 0:
+        return
+
+    logger.info('Run of %s scenarios...', len(pending_scenarios))
+
+    scenarios_started = multiprocessing.Array('b', len(pending_scenarios), lock=False)
+    initargs = (base_inputs, scenario_function, scenarios_started)
+    while pending_scenarios:
+        broken_scenarios = []
+        for result in _run_pools([pending_scenarios], processes, initargs, broken_scenarios):
+            if result.error is not None:
+                logger.warning('Scenario %s failed:\n%s', result.index, result.error)
+            yield result
+        interrupted_scenarios = [scenario for scenario in broken_scenarios if scenarios_started[scenario[0]]]
+        if broken_scenarios and not interrupted_scenarios:
+            raise BrokenProcessPool('The worker processes terminated abruptly before running any scenario.')
+
+        # run again each interrupted scenario in its own pool
+        crashed_scenarios = []
+        for result in _run_pools([[scenario] for scenario in interrupted_scenarios], 1, initargs, crashed_scenarios):
+            if result.error is not None:
+                logger.warning('Scenario %s failed:\n%s', result.index, result.error)
+            yield result
+        for index, update_parameters in crashed_scenarios:
+            error = 'The worker process running the scenario terminated abruptly.'
+            logger.warning('Scenario %s failed:\n%s', index, error)
+            yield ScenarioResult(index, update_parameters, None, error)
+
+        pending_scenarios = [scenario for scenario in broken_scenarios if not scenarios_started[scenario[0]]]
+
+    logger.info('Run of %s scenarios DONE', len(parameters_overrides))
@@ -1,5 +1,6 @@
 # -*- coding: latin-1 -*-
 
+import copy
 import os
 import sys
 from itertools import cycle
@@ -50,6 +51,64 @@ class DataWarning(UserWarning):
 warnings.simplefilter('always', DataWarning)
 
 
+def _filter_outputs(outputs, filters):
+    """Return the rows of `outputs` which satisfy `filters` (see :func:`plot_cnwheat_ouputs`)."""
+    for key, value in filters.items():
+        if key in outputs:
+            # convert to list if needed
+            try:
+                _ = iter(value)
+            except TypeError:
+                values = [value]
+            else:
+                values = value
+                # handle strings too
+                if isinstance(values, str):
+                    values = [values]
+            # select data from outputs
+            outputs = outputs[outputs[key].isin(values)]
+    return outputs
+
+
+class GroupedOutputs(object):
+    """
+    Outputs filtered and grouped by scale once, to plot several variables of the same rows with :func:`plot_cnwheat_ouputs`
+    without filtering and grouping the outputs for each variable.
+
+    :param pandas.DataFrame outputs: The outputs of CN-Wheat.
+    :param str x_name: x-axis of the plots.
+    :param dict filters: the filters to apply to `outputs` (see :func:`plot_cnwheat_ouputs`).
+    :param list excluded_keys: the indexes of `outputs` not to group by (e.g. the y-axis of the plots, if it is an index) ; default is `[]`.
+    """
+
+    def __init__(self, outputs, x_name, filters={}, excluded_keys=[]):
+        self.x_name = x_name  #: x-axis of the plots
+        #: the keys of the groups: the indexes of `outputs`, but `x_name` and `excluded_keys`
+        self.group_keys = [key for key in OUTPUTS_INDEXES if key in outputs and key != x_name and key not in excluded_keys]
+        self.outputs = _filter_outputs(outputs, filters)  #: the filtered outputs
+        #: the cardinality of each group key
+        self.cardinalities = {group_key: self.outputs[group_key].nunique() for group_key in self.group_keys}
+        #: the value of the group keys at the first row
+        self.first_values = {group_key: self.outputs[group_key].iloc[0] for group_key in self.group_keys} if len(self.outputs) != 0 else {}
+        #: the names of the groups, as tuples, and the positions of their rows in :attr:`outputs`
+        self.groups = []
+        if self.group_keys and len(self.outputs) != 0:
+            for group_name, group_positions in self.outputs.groupby(self.group_keys, observed=True).indices.items():
+                self.groups.append((group_name if isinstance(group_name, tuple) else (group_name,), group_positions))
+
+    def select(self, y_name):
+        """Return the same groups, with only the columns needed to plot `y_name` against :attr:`x_name`.
+
+        :param str y_name: y-axis of the plot.
+
+        :return: The same groups with less columns, e.g. to send them to another process.
+        :rtype: GroupedOutputs
+        """
+        selection = copy.copy(self)
+        selection.outputs = self.outputs[self.group_keys + [self.x_name, y_name]]
+        return selection
+
+
 def plot_cnwheat_ouputs(outputs, x_name, y_name, x_label='', y_label='', x_lim=None, title=None, meteo_data=None, filters={}, plot_filepath=None,
                         colors=[], linestyles=[], explicit_label=True, kwargs={}):
     """Plot `outputs`, with x=`x_name` and y=`y_name`.
@@ -61,7 +120,8 @@ def plot_cnwheat_ouputs(outputs, x_name, y_name, x_label='', y_label='', x_lim=N
         * plot each group as a new line,
         * save or display the plot.
 
-    :param pandas.DataFrame outputs: The outputs of CN-Wheat.
+    :param pandas.DataFrame or GroupedOutputs outputs: The outputs of CN-Wheat, or the outputs already filtered and grouped
+           for several variables (then `filters` is ignored, and `x_name` must be the x-axis of the groups).
     :param str x_name: x-axis of the plot.
     :param str y_name: y-axis of the plot.
     :param str x_label: The x label of the plot. Default is ''.
@@ -89,8 +149,13 @@ def plot_cnwheat_ouputs(outputs, x_name, y_name, x_label='', y_label='', x_lim=N
 
     """
 
-    # finds the scale of `outputs`
-    group_keys = [key for key in OUTPUTS_INDEXES if key in outputs and key != x_name and key != y_name]
+    # finds the scale of `outputs`, filters `outputs` and makes groups according to the scale
+    if not isinstance(outputs, GroupedOutputs):
+        # keep only the needed columns (to make the grouping faster)
+        outputs = outputs[[key for key in OUTPUTS_INDEXES if key in outputs and key != x_name and key != y_name] + [x_name, y_name]]
+        outputs = GroupedOutputs(outputs, x_name, filters, excluded_keys=[y_name])
+    group_keys = outputs.group_keys
+    outputs_grouped = outputs.groups
 
     # make a group_keys with first letter of each key in upper case
     group_keys_upper = [group_key[0].upper() + group_key[1:] for group_key in group_keys]
@@ -98,27 +163,8 @@ def plot_cnwheat_ouputs(outputs, x_name, y_name, x_label='', y_label='', x_lim=N
     # create a mapping to associate each key to its index in group_keys
     group_keys_mapping = dict([(key, index) for (index, key) in enumerate(group_keys)])
 
-    # keep only the needed columns (to make the grouping faster)
-    outputs = outputs[group_keys + [x_name, y_name]]
-
-    # apply filters to outputs
-    for key, value in filters.items():
-        if key in outputs:
-            # convert to list if needed
-            try:
-                _ = iter(value)
-            except TypeError:
-                values = [value]
-            else:
-                values = value
-                # handle strings too
-                if isinstance(values, str):
-                    values = [values]
-            # select data from outputs
-            outputs = outputs[outputs[key].isin(values)]
-
     # do not plot if there is nothing to plot
-    if outputs[y_name].isnull().all():
+    if outputs.outputs[y_name].isnull().all():
         return
 
     # compute the cardinality of each group keys and create the title if needed
@@ -126,17 +172,13 @@ def plot_cnwheat_ouputs(outputs, x_name, y_name, x_label='', y_label='', x_lim=N
     labels_groups = []
     for i in range(len(group_keys)):
         group_key = group_keys[i]
-        group_cardinality = outputs[group_key].nunique()
-        if group_cardinality == 1:
-            group_value = outputs[group_key][outputs.first_valid_index()]
-            subtitle_groups.append('{}: {}'.format(group_keys_upper[i], group_value))
+        if outputs.cardinalities[group_key] == 1:
+            subtitle_groups.append('{}: {}'.format(group_keys_upper[i], outputs.first_values[group_key]))
         else:
             labels_groups.append(group_key)
     if title is None:  # we need to create the title
         title = y_name + '\n' + ' - '.join(subtitle_groups)
-
-    # makes groups according to the scale
-    outputs_grouped = outputs.groupby(group_keys)
+    outputs = outputs.outputs
 
     # plots each group as a new line
     fig, ax = plt.subplots()
@@ -144,7 +186,8 @@ def plot_cnwheat_ouputs(outputs, x_name, y_name, x_label='', y_label='', x_lim=N
     matplot_colors_cycler = cycle(colors)
     matplot_linestyles_cycler = cycle(linestyles)
 
-    for outputs_group_name, outputs_group in outputs_grouped:
+    for outputs_group_name, outputs_group_positions in outputs_grouped:
+        outputs_group = outputs.iloc[outputs_group_positions]
         line_label_list = []
         if explicit_label:
             # concatenate the keys of the group name
@@ -289,7 +332,7 @@ def compare_actual_to_desired(data_dirpath, actual_data_df, desired_data_filenam
                 del actual_data_df[column]
 
         # convert the actual outputs to floats
-        actual_data_df = actual_data_df.astype(np.float)
+        actual_data_df = actual_data_df.astype(float)
 
         # compare actual data to desired data
         np.testing.assert_allclose(actual_data_df.values, desired_data_df.values, relative_tolerance, absolute_tolerance)
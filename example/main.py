@@ -9,7 +9,7 @@ import pandas as pd
 
 from respiwheat import model as respiwheat_model
 from cnwheat import simulation as cnwheat_simulation, converter as cnwheat_converter, \
-    tools as cnwheat_tools, postprocessing as cnwheat_postprocessing
+    tools as cnwheat_tools, postprocessing as cnwheat_postprocessing, io as cnwheat_io, forcings as cnwheat_forcings
 
 """
     main
@@ -57,27 +57,30 @@ METEO_INPUTS_FILENAME = 'meteo_test.csv'
 
 ### OUTPUTS CONFIGURATION ###
 
+# Format of the outputs and postprocessing files: '.csv', or a binary format '.parquet', '.feather' or '.h5' (see :mod:`cnwheat.io`)
+OUTPUTS_EXTENSION = '.csv'
+
 # Path of the directory where to write the outputs of the model
 OUTPUTS_DIRPATH = 'outputs'
 
-# Name of the CSV files which will contain the outputs of the model
-AXES_OUTPUTS_FILENAME = 'axes_outputs.csv'
-ORGANS_OUTPUTS_FILENAME = 'organs_outputs.csv'
-HIDDENZONES_OUTPUTS_FILENAME = 'hiddenzones_outputs.csv'
-ELEMENTS_OUTPUTS_FILENAME = 'elements_outputs.csv'
-SOILS_OUTPUTS_FILENAME = 'soils_outputs.csv'
+# Name of the files which will contain the outputs of the model
+AXES_OUTPUTS_FILENAME = 'axes_outputs' + OUTPUTS_EXTENSION
+ORGANS_OUTPUTS_FILENAME = 'organs_outputs' + OUTPUTS_EXTENSION
+HIDDENZONES_OUTPUTS_FILENAME = 'hiddenzones_outputs' + OUTPUTS_EXTENSION
+ELEMENTS_OUTPUTS_FILENAME = 'elements_outputs' + OUTPUTS_EXTENSION
+SOILS_OUTPUTS_FILENAME = 'soils_outputs' + OUTPUTS_EXTENSION
 
 # -- POSTPROCESSING CONFIGURATION --
 
 # Path of the directory where to write the postprocessing of the model
 POSTPROCESSING_DIRPATH = 'postprocessing'
 
-# Name of the CSV files which will contain the postprocessing of the model
-AXES_POSTPROCESSING_FILENAME = 'axes_postprocessing.csv'
-ORGANS_POSTPROCESSING_FILENAME = 'organs_postprocessing.csv'
-HIDDENZONES_POSTPROCESSING_FILENAME = 'hiddenzones_postprocessing.csv'
-ELEMENTS_POSTPROCESSING_FILENAME = 'elements_postprocessing.csv'
-SOILS_POSTPROCESSING_FILENAME = 'soils_postprocessing.csv'
+# Name of the files which will contain the postprocessing of the model
+AXES_POSTPROCESSING_FILENAME = 'axes_postprocessing' + OUTPUTS_EXTENSION
+ORGANS_POSTPROCESSING_FILENAME = 'organs_postprocessing' + OUTPUTS_EXTENSION
+HIDDENZONES_POSTPROCESSING_FILENAME = 'hiddenzones_postprocessing' + OUTPUTS_EXTENSION
+ELEMENTS_POSTPROCESSING_FILENAME = 'elements_postprocessing' + OUTPUTS_EXTENSION
+SOILS_POSTPROCESSING_FILENAME = 'soils_postprocessing' + OUTPUTS_EXTENSION
 
 # -- GRAPHS CONFIGURATION --
 
@@ -119,6 +122,9 @@ CULM_DENSITY = {1: 410}
 # precision of floats used to write and format the output CSV files
 OUTPUTS_PRECISION = 6
 
+# number of steps of the simulation stored in memory before writing the outputs to the files
+OUTPUTS_FLUSH_INTERVAL = 24
+
 # number of seconds in 1 hour  
 HOUR_TO_SECOND_CONVERSION_FACTOR = 3600
 
@@ -127,32 +133,6 @@ HOUR_TO_SECOND_CONVERSION_FACTOR = 3600
 # -----      RUN OF THE SIMULATION      -------
 # ---------------------------------------------
 
-def force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped):
-    """Force the senescence and photosynthesis data of the population at `t` from input grouped dataframes"""
-    for plant in population.plants:
-        for axis in plant.axes:
-            # Root growth and senescence
-            group = senescence_roots_data_grouped.get_group((t, plant.index, axis.label))
-            senescence_data_to_use = group.loc[group.first_valid_index(), group.columns.intersection(cnwheat_simulation.Simulation.ORGANS_STATE)].dropna().to_dict()
-            axis.roots.__dict__.update(senescence_data_to_use)
-            for phytomer in axis.phytomers:
-                for organ in (phytomer.chaff, phytomer.peduncle, phytomer.lamina, phytomer.internode, phytomer.sheath):
-                    if organ is None:
-                        continue
-                    for element in (organ.exposed_element, organ.enclosed_element):
-                        if element is None:
-                            continue
-                        # Element senescence
-                        group_senesc = senescence_elements_data_grouped.get_group((t, plant.index, axis.label, phytomer.index, organ.label, element.label))
-                        senescence_data_to_use = group_senesc.loc[group_senesc.first_valid_index(), group_senesc.columns.intersection(cnwheat_simulation.Simulation.ELEMENTS_STATE)].dropna().to_dict()
-                        element.__dict__.update(senescence_data_to_use)
-                        # Element photosynthesis
-                        group_photo = photosynthesis_elements_data_grouped.get_group((t, plant.index, axis.label, phytomer.index, organ.label, element.label))
-                        photosynthesis_elements_data_to_use = group_photo.loc[
-                            group_photo.first_valid_index(), group_photo.columns.intersection(cnwheat_simulation.Simulation.ELEMENTS_STATE)].dropna().to_dict()
-                        element.__dict__.update(photosynthesis_elements_data_to_use)
-
-
 if RUN_SIMU:
 
     print('Prepare the simulation...')
@@ -193,36 +173,38 @@ if RUN_SIMU:
     # Initialize the simulation from the population of plants and the dictionary of soils created previously
     simulation_.initialize(population, soils)
 
-    # get photosynthesis data
+    # get photosynthesis data ; the forcings tables are converted to a binary cache at the first run,
+    # and only the rows of the simulated time window are read
     photosynthesis_elements_data_filepath = os.path.join(INPUTS_DIRPATH, ELEMENTS_PHOTOSYNTHESIS_FORCINGS_FILENAME)
-    photosynthesis_elements_data_df = pd.read_csv(photosynthesis_elements_data_filepath)
-    photosynthesis_elements_data_grouped = photosynthesis_elements_data_df.groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    photosynthesis_elements_data_df = cnwheat_forcings.open_cached_table(photosynthesis_elements_data_filepath).window(START_TIME, SIMULATION_LENGTH)
 
     # get senescence and growth data
     senescence_roots_data_filepath = os.path.join(INPUTS_DIRPATH, ROOTS_SENESCENCE_FORCINGS_FILENAME)
-    senescence_roots_data_df = pd.read_csv(senescence_roots_data_filepath)
-    senescence_roots_data_grouped = senescence_roots_data_df.groupby(cnwheat_simulation.Simulation.AXES_T_INDEXES)
+    senescence_roots_data_df = cnwheat_forcings.open_cached_table(senescence_roots_data_filepath).window(START_TIME, SIMULATION_LENGTH)
     senescence_elements_data_filepath = os.path.join(INPUTS_DIRPATH, ELEMENTS_SENESCENCE_FORCINGS_FILENAME)
-    senescence_elements_data_df = pd.read_csv(senescence_elements_data_filepath)
-    senescence_elements_data_grouped = senescence_elements_data_df.groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    senescence_elements_data_df = cnwheat_forcings.open_cached_table(senescence_elements_data_filepath).window(START_TIME, SIMULATION_LENGTH)
+
+    # Store the senescence and photosynthesis forcings once, to apply them to the population at each step
+    forcings_store = cnwheat_forcings.ForcingsStore(senescence_roots_data_df, [senescence_elements_data_df, photosynthesis_elements_data_df])
 
     # Force the senescence and photosynthesis of the population
-    force_senescence_and_photosynthesis(0, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+    forcings_store.apply(0, population)
 
     # Define the time grid of the simulation
     time_grid = range(START_TIME, SIMULATION_LENGTH + TIME_STEP, TIME_STEP)
 
     # Reinitialize the simulation from forced population and soils
-    meteo = pd.read_csv(os.path.join(INPUTS_DIRPATH, METEO_INPUTS_FILENAME), index_col='t')
-    Tair, Tsoil = meteo.loc[time_grid[0], ['air_temperature', 'soil_temperature']]
+    meteo = cnwheat_forcings.open_cached_table(os.path.join(INPUTS_DIRPATH, METEO_INPUTS_FILENAME))
+    Tair, Tsoil = meteo.values_at(time_grid[0], ['air_temperature', 'soil_temperature'])
     simulation_.initialize(population, soils, Tair=Tair, Tsoil=Tsoil)
 
-    # Create empty lists of dataframes to store the outputs at each step of the simulation
-    axes_outputs_df_list = []
-    organs_outputs_df_list = []
-    hiddenzones_outputs_df_list = []
-    elements_outputs_df_list = []
-    soils_outputs_df_list = []
+    # Create the sink which writes the outputs to files at each step of the simulation
+    outputs_filepaths = {'axes': os.path.join(OUTPUTS_DIRPATH, AXES_OUTPUTS_FILENAME),
+                         'organs': os.path.join(OUTPUTS_DIRPATH, ORGANS_OUTPUTS_FILENAME),
+                         'hiddenzones': os.path.join(OUTPUTS_DIRPATH, HIDDENZONES_OUTPUTS_FILENAME),
+                         'elements': os.path.join(OUTPUTS_DIRPATH, ELEMENTS_OUTPUTS_FILENAME),
+                         'soils': os.path.join(OUTPUTS_DIRPATH, SOILS_OUTPUTS_FILENAME)}
+    outputs_sink = cnwheat_io.PopulationOutputsSink(outputs_filepaths, flush_interval=OUTPUTS_FLUSH_INTERVAL, precision=OUTPUTS_PRECISION)
 
     print('Prepare the simulation... DONE!')
 
@@ -236,21 +218,14 @@ if RUN_SIMU:
             print('\tt =', t)
             simulation_.run()
 
-        # Convert model outputs to dataframes
-        _, axes_outputs_df, _, organs_outputs_df, hiddenzones_outputs_df, elements_outputs_df, soils_outputs_df = cnwheat_converter.to_dataframes(simulation_.population, simulation_.soils)
-
-        # Append the outputs dataframes at current t to the global lists of dataframes
-        for df, list_ in ((axes_outputs_df, axes_outputs_df_list), (organs_outputs_df, organs_outputs_df_list),
-                          (hiddenzones_outputs_df, hiddenzones_outputs_df_list), (elements_outputs_df, elements_outputs_df_list),
-                          (soils_outputs_df, soils_outputs_df_list)):
-            df.insert(0, 't', t)
-            list_.append(df)
+        # Append the model outputs at current t to the sink ; the outputs are written to the files every OUTPUTS_FLUSH_INTERVAL steps
+        outputs_sink(t, simulation_.population, simulation_.soils)
 
         if 0 < t < SIMULATION_LENGTH:
             # Force the senescence and photosynthesis of the population
-            force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+            forcings_store.apply(t, population)
             # Reinitialize the simulation from forced population and soils
-            Tair, Tsoil = meteo.loc[t, ['air_temperature', 'soil_temperature']]
+            Tair, Tsoil = meteo.values_at(t, ['air_temperature', 'soil_temperature'])
             simulation_.initialize(population, soils, Tair=Tair, Tsoil=Tsoil)
 
     print('Run the simulation... DONE!')
@@ -258,21 +233,18 @@ if RUN_SIMU:
     execution_time = datetime.datetime.now() - current_time_of_the_system
     print('Simulation run in {}'.format(execution_time))
 
-    print('Write the outputs to CSV files...')
+    print('Write the outputs to files...')
+
+    # Write the last steps of the simulation
+    outputs_sink.close()
 
     outputs_df_dict = {}
-    for outputs_df_list, outputs_filename in ((axes_outputs_df_list, AXES_OUTPUTS_FILENAME),
-                                              (organs_outputs_df_list, ORGANS_OUTPUTS_FILENAME),
-                                              (hiddenzones_outputs_df_list, HIDDENZONES_OUTPUTS_FILENAME),
-                                              (elements_outputs_df_list, ELEMENTS_OUTPUTS_FILENAME),
-                                              (soils_outputs_df_list, SOILS_OUTPUTS_FILENAME)):
+    for outputs_filename in (AXES_OUTPUTS_FILENAME, ORGANS_OUTPUTS_FILENAME, HIDDENZONES_OUTPUTS_FILENAME, ELEMENTS_OUTPUTS_FILENAME, SOILS_OUTPUTS_FILENAME):
         outputs_filepath = os.path.join(OUTPUTS_DIRPATH, outputs_filename)
-        outputs_df = pd.concat(outputs_df_list, ignore_index=True)
-        outputs_df.to_csv(outputs_filepath, na_rep='NA', index=False, float_format='%.{}f'.format(OUTPUTS_PRECISION))
         outputs_file_basename = outputs_filename.split('.')[0]
-        outputs_df_dict[outputs_file_basename] = outputs_df
+        outputs_df_dict[outputs_file_basename] = cnwheat_io.read_outputs(outputs_filepath)
 
-    print('Write the outputs to CSV files... DONE!')
+    print('Write the outputs to files... DONE!')
 
 if RUN_POSTPROCESSING:
 
@@ -288,7 +260,7 @@ if RUN_POSTPROCESSING:
                                  ELEMENTS_OUTPUTS_FILENAME,
                                  SOILS_OUTPUTS_FILENAME):
             outputs_filepath = os.path.join(OUTPUTS_DIRPATH, outputs_filename)
-            outputs_df = pd.read_csv(outputs_filepath)
+            outputs_df = cnwheat_io.read_outputs(outputs_filepath)
             outputs_file_basename = outputs_filename.split('.')[0]
             outputs_df_dict[outputs_file_basename] = outputs_df
 
@@ -323,7 +295,7 @@ if RUN_POSTPROCESSING:
 
     print('Compute the post-processing... DONE!')
 
-    print('Write the postprocessing to CSV files...')
+    print('Write the postprocessing to files...')
 
     for postprocessing_file_basename, postprocessing_filename in ((axes_postprocessing_file_basename, AXES_POSTPROCESSING_FILENAME),
                                                                   (hiddenzones_postprocessing_file_basename, HIDDENZONES_POSTPROCESSING_FILENAME),
@@ -331,9 +303,9 @@ if RUN_POSTPROCESSING:
                                                                   (elements_postprocessing_file_basename, ELEMENTS_POSTPROCESSING_FILENAME),
                                                                   (soils_postprocessing_file_basename, SOILS_POSTPROCESSING_FILENAME)):
         postprocessing_filepath = os.path.join(POSTPROCESSING_DIRPATH, postprocessing_filename)
-        postprocessing_df_dict[postprocessing_file_basename].to_csv(postprocessing_filepath, na_rep='NA', index=False, float_format='%.{}f'.format(OUTPUTS_PRECISION))
+        cnwheat_io.write_outputs(postprocessing_df_dict[postprocessing_file_basename], postprocessing_filepath, precision=OUTPUTS_PRECISION)
 
-    print('Write the postprocessing to CSV files... DONE!')
+    print('Write the postprocessing to files... DONE!')
 
 if GENERATE_GRAPHS:
 
@@ -348,7 +320,7 @@ if GENERATE_GRAPHS:
                                         ELEMENTS_POSTPROCESSING_FILENAME,
                                         SOILS_POSTPROCESSING_FILENAME):
             postprocessing_filepath = os.path.join(POSTPROCESSING_DIRPATH, postprocessing_filename)
-            postprocessing_df = pd.read_csv(postprocessing_filepath)
+            postprocessing_df = cnwheat_io.read_outputs(postprocessing_filepath)
             postprocessing_file_basename = postprocessing_filename.split('.')[0]
             postprocessing_df_dict[postprocessing_file_basename] = postprocessing_df
 
@@ -3,12 +3,18 @@
 import glob
 import os
 import logging
+import shutil
+import signal
+import tempfile
 import warnings
 
+import numpy as np
 import pandas as pd
+import pytest
 
 from cnwheat import simulation as cnwheat_simulation, converter as cnwheat_converter, \
-    tools as cnwheat_tools, postprocessing as cnwheat_postprocessing
+    tools as cnwheat_tools, postprocessing as cnwheat_postprocessing, io as cnwheat_io, forcings as cnwheat_forcings, \
+    sweep as cnwheat_sweep, schema as cnwheat_schema
 from respiwheat import model as respiwheat_model
 
 """
@@ -17,9 +23,18 @@ from respiwheat import model as respiwheat_model
 
     Test:
 
-        * the run of a simulation with/without interpolation of the forcings,
+        * the run of a simulation with/without interpolation of the forcings, step by step, with `run_until` or with `run_adaptive`,
+        * the vectorized engine, against the desired outputs without interpolation of the forcings, and against the Python engine with interpolation of the forcings,
+        * the run of an ensemble of simulations, against separate simulations,
+        * the run of the scenarios of a parameters sweep in worker processes, with failing and crashing scenarios,
+        * the configurations of the solver and its statistics, and the runs warm-started from the previous run,
+        * the initialization of a simulation after a change of the parameters or of the topology,
+        * the parameters updated at the conversion of the inputs, used the same way by all the organs and by both engines,
+        * the writing of the outputs while the simulation runs,
+        * the dtypes of the outputs dataframes,
+        * the forcings applied from a store of forcings, interpolated by the kernels, and read from the cache of a forcings table,
         * the logging,
-        * the postprocessing,
+        * the postprocessing, of the whole outputs, in parallel, step by step or from the outputs files read in chunks,
         * and the graphs generation.
 
     You must first install model CN-Wheat before running this script with the command `python`. See `README.md` at the
@@ -83,17 +98,32 @@ def force_senescence_and_photosynthesis(t, population, senescence_roots_data_gro
                         element.__dict__.update(photosynthesis_elements_data_to_use)
 
 
-def test_simulation_run(overwrite_desired_data=False):
+def run_sweep_scenario(population, soils):
+    """The scenario of the parameters sweep test: return the maximal conductance of the roots to sucrose,
+    raise an exception if it is negative, and kill the worker process if the roots have parameter `KILL_WORKER`."""
+    roots_parameters = population.plants[0].axes[0].roots.PARAMETERS
+    if getattr(roots_parameters, 'KILL_WORKER', False):
+        os.kill(os.getpid(), signal.SIGKILL)
+    if roots_parameters.SIGMA_SUCROSE_MAX < 0:
+        raise ValueError('Negative conductance')
+    return roots_parameters.SIGMA_SUCROSE_MAX
+
+
+def read_inputs_dataframes(inputs_dirpath):
+    """Read the initial states of the axes, organs, hidden zones, elements and soils from the CSV files of directory `inputs_dirpath`,
+    and return them as the keyword arguments of :func:`cnwheat.converter.from_dataframes`"""
+    return {scale + '_inputs': pd.read_csv(os.path.join(inputs_dirpath, '{}_initial_state.csv'.format(scale)))
+            for scale in ('axes', 'organs', 'hiddenzones', 'elements', 'soils')}
+
+
+def test_simulation_run(overwrite_desired_data=False, derivatives_engine='python', use_run_until=False, use_outputs_sink=False, use_run_adaptive=False,
+                        outputs_sink_extension='.csv'):
     """Test the run of a simulation, without interpolation of the forcings."""
 
     TEST_DIR_PATH = 'simulation_run'
 
     # Inputs of the test
     INPUTS_DIRPATH = os.path.join(TEST_DIR_PATH, 'inputs')
-    ORGANS_INITIAL_STATE_FILENAME = 'organs_initial_state.csv'
-    HIDDENZONES_INITIAL_STATE_FILENAME = 'hiddenzones_initial_state.csv'
-    ELEMENTS_INITIAL_STATE_FILENAME = 'elements_initial_state.csv'
-    SOILS_INITIAL_STATE_FILENAME = 'soils_initial_state.csv'
     ELEMENTS_PHOTOSYNTHESIS_FORCINGS_FILENAME = 'elements_photosynthesis_forcings.csv'
     ROOTS_SENESCENCE_FORCINGS_FILENAME = 'roots_senescence_forcings.csv'
     ELEMENTS_SENESCENCE_FORCINGS_FILENAME = 'elements_senescence_forcings.csv'
@@ -120,20 +150,14 @@ def test_simulation_run(overwrite_desired_data=False):
     time_step_seconds = TIME_STEP * HOUR_TO_SECOND_CONVERSION_FACTOR
 
     # Read the inputs from CSV files and create inputs dataframes
-    inputs_dataframes = {}
-    for inputs_filename in (
-            ORGANS_INITIAL_STATE_FILENAME, HIDDENZONES_INITIAL_STATE_FILENAME, ELEMENTS_INITIAL_STATE_FILENAME,
-            SOILS_INITIAL_STATE_FILENAME):
-        inputs_dataframes[inputs_filename] = pd.read_csv(os.path.join(INPUTS_DIRPATH, inputs_filename))
+    inputs_dataframes = read_inputs_dataframes(INPUTS_DIRPATH)
 
     # Convert the inputs dataframes to a population of plants and a dictionary of soils
-    population, soils = cnwheat_converter.from_dataframes(inputs_dataframes[ORGANS_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[HIDDENZONES_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[ELEMENTS_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[SOILS_INITIAL_STATE_FILENAME])
+    population, soils = cnwheat_converter.from_dataframes(**inputs_dataframes)
 
     # Create the simulation
-    simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY)
+    simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY,
+                                                derivatives_engine=derivatives_engine)
 
     # Initialize the simulation from the population of plants and the dictionary of soils created previously
     simulation_.initialize(population, soils)
@@ -165,12 +189,7 @@ def test_simulation_run(overwrite_desired_data=False):
     elements_outputs_df_list = []
     soils_outputs_df_list = []
 
-    for t in time_grid:
-
-        if t > 0:
-            # Run the model of CN exchanges ; the population is internally updated by the model
-            simulation_.run()
-
+    def append_outputs(t):
         # Convert the model outputs to dataframes
         _, axes_outputs_df, _, organs_outputs_df, hiddenzones_outputs_df, elements_outputs_df, soils_outputs_df = cnwheat_converter.to_dataframes(simulation_.population, simulation_.soils)
 
@@ -181,11 +200,52 @@ def test_simulation_run(overwrite_desired_data=False):
             df.insert(0, 't', t)
             list_.append(df)
 
-        if 0 < t < SIMULATION_LENGTH:
-            # Force the senescence and photosynthesis of the population
-            force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
-            # Reinitialize the simulation from forced population and soils
-            simulation_.initialize(population, soils)
+    if use_run_until:
+        def forcings_provider(t, population_, soils_):
+            if t > 0:
+                # Force the senescence and photosynthesis of the population
+                force_senescence_and_photosynthesis(int(t), population_, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+
+        if use_outputs_sink:
+            # Write the outputs to files of a temporary directory while the simulation runs, then read them back
+            sink_dirpath = tempfile.mkdtemp()
+            try:
+                outputs_sink_filepaths = {scale: os.path.join(sink_dirpath, 'sink_{}_outputs{}'.format(scale, outputs_sink_extension)) for scale in ('axes', 'organs', 'hiddenzones', 'elements', 'soils')}
+                with cnwheat_io.PopulationOutputsSink(outputs_sink_filepaths, flush_interval=10) as outputs_sink:
+                    outputs_sink(START_TIME, population, soils)
+                    simulation_.run_until(SIMULATION_LENGTH, forcings_provider=forcings_provider, output_sink=outputs_sink)
+                for scale, list_ in (('axes', axes_outputs_df_list), ('organs', organs_outputs_df_list), ('hiddenzones', hiddenzones_outputs_df_list),
+                                     ('elements', elements_outputs_df_list), ('soils', soils_outputs_df_list)):
+                    list_.append(cnwheat_io.read_outputs(outputs_sink_filepaths[scale]))
+            finally:
+                shutil.rmtree(sink_dirpath)
+        else:
+            append_outputs(START_TIME)
+            if use_run_adaptive:
+                # Run the model with time steps bounded to TIME_STEP, which must give the same outputs as the fixed time steps
+                stepping = cnwheat_simulation.AdaptiveStepping(min_time_step=TIME_STEP, max_time_step=TIME_STEP)
+                simulation_.run_adaptive(SIMULATION_LENGTH, forcings_provider=forcings_provider, output_sink=lambda t, population_, soils_: append_outputs(int(t)),
+                                         stepping=stepping)
+            else:
+                # Run the model of CN exchanges over the whole simulation, without reinitializing the simulation between the steps
+                simulation_.run_until(SIMULATION_LENGTH, forcings_provider=forcings_provider, output_sink=lambda t, population_, soils_: append_outputs(int(t)))
+        # the simulation ends exactly at the requested time, and the outputs were written at each time step
+        assert simulation_.t == SIMULATION_LENGTH
+        assert len(pd.concat(axes_outputs_df_list).t.unique()) == len(time_grid)
+    else:
+        for t in time_grid:
+
+            if t > 0:
+                # Run the model of CN exchanges ; the population is internally updated by the model
+                simulation_.run()
+
+            append_outputs(t)
+
+            if 0 < t < SIMULATION_LENGTH:
+                # Force the senescence and photosynthesis of the population
+                force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+                # Reinitialize the simulation from forced population and soils
+                simulation_.initialize(population, soils)
 
     # compare actual to desired outputs at each scale level (an exception is raised if the test failed)
     for (outputs_df_list,
@@ -209,6 +269,386 @@ def test_simulation_run(overwrite_desired_data=False):
                                                 actual_outputs_filename, precision=PRECISION, overwrite_desired_data=overwrite_desired_data)
 
 
+def test_simulation_run_vectorized():
+    """Test the run of a simulation with the vectorized engine, without interpolation of the forcings."""
+    test_simulation_run(derivatives_engine='vectorized')
+
+
+def test_solver_configuration():
+    """Test the methods of the solver, the absolute tolerances per compartment type and the reuse of the Jacobian against the default configuration,
+    and that the statistics of the solver count all the evaluations of the derivatives."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+    TIME_STEP = 1
+    NB_STEPS = 2
+    CULM_DENSITY = {1: 410}
+    COMPARTMENTS_ATOL = {'soil': 1e-3, ('element', 'starch'): 1e-4}
+
+    time_step_seconds = TIME_STEP * HOUR_TO_SECOND_CONVERSION_FACTOR
+
+    photosynthesis_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_photosynthesis_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    senescence_roots_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'roots_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.AXES_T_INDEXES)
+    senescence_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+
+    def run_simulation(solver_configuration):
+        population, soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH))
+        simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY,
+                                                    solver_configuration=solver_configuration)
+        # count the evaluations of the derivatives
+        derivatives_evaluations = []
+        calculate_all_derivatives = simulation_._calculate_all_derivatives
+
+        def count_derivatives_evaluations(t, y):
+            derivatives_evaluations.append(t)
+            return calculate_all_derivatives(t, y)
+        simulation_._calculate_all_derivatives = count_derivatives_evaluations
+
+        nfev = 0
+        for t in range(0, NB_STEPS * TIME_STEP, TIME_STEP):
+            force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+            simulation_.initialize(population, soils)
+            simulation_.run()
+            solver_statistics = simulation_.solver_statistics
+            assert solver_statistics['nfev'] > 0 and solver_statistics['njev'] > 0 and solver_statistics['wall_time'] > 0
+            assert solver_statistics['nlu'] > 0 or solver_configuration.method == 'LSODA'  # LSODA does not report its LU decompositions
+            nfev += solver_statistics['nfev']
+        assert nfev == simulation_.nfev_total == len(derivatives_evaluations)
+        # gather the compartments at the end of the last step
+        simulation_._update_initial_conditions()
+        return simulation_
+
+    desired_simulation = run_simulation(cnwheat_simulation.SolverConfiguration())
+    desired_compartments = np.array(desired_simulation.initial_conditions, dtype=float)
+    for solver_configuration in (cnwheat_simulation.SolverConfiguration(method='LSODA'),
+                                 cnwheat_simulation.SolverConfiguration(method='Radau'),
+                                 cnwheat_simulation.SolverConfiguration(compartments_atol=COMPARTMENTS_ATOL),
+                                 cnwheat_simulation.SolverConfiguration(jacobian_reuse=True)):
+        simulation_ = run_simulation(solver_configuration)
+        np.testing.assert_allclose(np.array(simulation_.initial_conditions, dtype=float), desired_compartments, rtol=10 ** -2, atol=10 ** -4)
+        if solver_configuration.compartments_atol:
+            for (prefix, compartment_name), compartment_indexes in simulation_.compartments_indexes.items():
+                desired_atol = COMPARTMENTS_ATOL.get((prefix, compartment_name), COMPARTMENTS_ATOL.get(prefix, solver_configuration.atol))
+                np.testing.assert_array_equal(simulation_.atol[compartment_indexes], desired_atol)
+
+
+def test_persistent_integrator():
+    """Test that the runs warm-started with the Jacobian of the previous run give the same compartments as fresh runs, within the tolerances of the solver,
+    although the forcings change at each step."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+    TIME_STEP = 1
+    NB_STEPS = 3  # the fructan of the hidden zone then reaches a threshold, beyond which any change of the steps of the solver is amplified
+    CULM_DENSITY = {1: 410}
+
+    time_step_seconds = TIME_STEP * HOUR_TO_SECOND_CONVERSION_FACTOR
+
+    photosynthesis_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_photosynthesis_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    senescence_roots_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'roots_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.AXES_T_INDEXES)
+    senescence_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+
+    simulations = []
+    njev = []
+    for solver_configuration in (cnwheat_simulation.SolverConfiguration(), cnwheat_simulation.SolverConfiguration(persistent_integrator=True)):
+        population, soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH))
+        simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY,
+                                                    solver_configuration=solver_configuration)
+        for t in range(0, NB_STEPS * TIME_STEP, TIME_STEP):
+            force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+            simulation_.initialize(population, soils)
+            simulation_.run()
+            njev.append(simulation_.solver_statistics['njev'])
+        simulation_._update_initial_conditions()
+        simulations.append(simulation_)
+
+    fresh_simulation, persistent_simulation = simulations
+    solver_configuration = persistent_simulation.solver_configuration
+    np.testing.assert_allclose(np.array(persistent_simulation.initial_conditions, dtype=float), np.array(fresh_simulation.initial_conditions, dtype=float),
+                               rtol=10 * solver_configuration.rtol, atol=10 * solver_configuration.atol)
+    # the Jacobian of the previous run is reused
+    assert sum(njev[NB_STEPS:]) < sum(njev[:NB_STEPS])
+    assert persistent_simulation.nfev_total < fresh_simulation.nfev_total
+
+
+def test_simulation_reinitialization():
+    """Test that a new initialization packs the parameters replaced without changing the topology,
+    and patches the Jacobian sparsity as a new simulation would build it when the topology changes."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+    CULM_DENSITY = {1: 410, 2: 410}
+
+    population, soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH))
+    simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, culm_density=CULM_DENSITY, derivatives_engine='vectorized')
+    simulation_.initialize(population, soils)
+
+    # same topology, new parameters
+    roots = population.plants[0].axes[0].roots
+    roots.PARAMETERS = roots.PARAMETERS.derive({'SIGMA_SUCROSE_MAX': 2 * roots.PARAMETERS.SIGMA_SUCROSE_MAX})
+    topology_fingerprint = simulation_.topology_fingerprint
+    simulation_.initialize(population, soils)
+    assert simulation_.topology_fingerprint is topology_fingerprint
+    assert simulation_.packed_population[cnwheat_simulation.model.Roots]['parameters'] is roots.PARAMETERS
+
+    # new topology: a second plant
+    new_population, new_soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH))
+    new_plant = new_population.plants[0]
+    new_plant.index = 2
+    population.plants.append(new_plant)
+    soils.update({(new_plant.index, axis_label): soil for (_, axis_label), soil in new_soils.items()})
+    simulation_.initialize(population, soils)
+    desired_simulation = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, culm_density=CULM_DENSITY, derivatives_engine='vectorized')
+    desired_simulation.initialize(population, soils)
+    assert len(simulation_.plants_jacobian_patterns) == 2
+    assert (simulation_.jacobian_sparsity != desired_simulation.jacobian_sparsity).nnz == 0
+
+
+def test_parameters_overrides():
+    """Test that the parameters of the axes, of the hidden zones and of the endosperm updated with `update_parameters` are used by all the organs
+    exchanging with them, and the same way by the Python and the vectorized engines."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+    CULM_DENSITY = {1: 410}
+    UPDATE_PARAMETERS = {'axis': {'ALPHA': 0.5}, 'hiddenzone': {'SIGMA': 0.05}, 'endosperm': {'Arrhenius_ref': 2 * 1.7399e-11}}
+
+    photosynthesis_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_photosynthesis_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    senescence_roots_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'roots_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.AXES_T_INDEXES)
+    senescence_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+
+    derivatives = {}
+    for update_parameters in (None, UPDATE_PARAMETERS):
+        for derivatives_engine in ('python', 'vectorized'):
+            population, soils = cnwheat_converter.from_dataframes(update_parameters=update_parameters, **read_inputs_dataframes(INPUTS_DIRPATH))
+            force_senescence_and_photosynthesis(0, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+            simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, culm_density=CULM_DENSITY, derivatives_engine=derivatives_engine)
+            simulation_.initialize(population, soils)
+            derivatives_function = simulation_._prepare_run()
+            derivatives[(update_parameters is not None, derivatives_engine)] = np.array(derivatives_function(0, np.array(simulation_.initial_conditions, dtype=float)))
+
+    axis = population.plants[0].axes[0]
+    assert axis.PARAMETERS.ALPHA == 0.5
+    for updated in (False, True):
+        np.testing.assert_allclose(derivatives[(updated, 'vectorized')], derivatives[(updated, 'python')], rtol=1e-10, atol=1e-12)
+    phloem_sucrose_index = simulation_.compartments_indexes[('phloem', 'sucrose')]
+    assert not np.allclose(derivatives[(True, 'python')][phloem_sucrose_index], derivatives[(False, 'python')][phloem_sucrose_index])
+
+    # the endosperm reads its own reference of the effect of the temperature
+    endosperm = cnwheat_simulation.model.Endosperm()
+    T_effect_growth = endosperm.calculate_temperature_effect_on_growth(15)
+    endosperm.PARAMETERS = endosperm.PARAMETERS.derive(UPDATE_PARAMETERS['endosperm'])
+    assert endosperm.calculate_temperature_effect_on_growth(15) == T_effect_growth / 2
+
+
+def test_simulation_run_until():
+    """Test the run of a simulation with :meth:`Simulation.run_until`, without interpolation of the forcings."""
+    test_simulation_run(use_run_until=True)
+
+
+@pytest.mark.parametrize('outputs_sink_extension', ['.csv', '.parquet', '.feather', '.h5'])
+def test_simulation_run_with_outputs_sink(outputs_sink_extension):
+    """Test the run of a simulation with :meth:`Simulation.run_until`, writing the outputs with :class:`cnwheat.io.PopulationOutputsSink` in each format."""
+    test_simulation_run(use_run_until=True, use_outputs_sink=True, outputs_sink_extension=outputs_sink_extension)
+
+
+@pytest.mark.parametrize('outputs_extension', ['.csv', '.parquet', '.feather', '.h5'])
+def test_outputs_round_trip(outputs_extension):
+    """Test that the outputs written in chunks by :class:`cnwheat.io.OutputsSink` are read back by :func:`cnwheat.io.read_outputs`, and by :func:`cnwheat.io.iter_outputs`
+    in chunks which do not span two part files of the columnar formats."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+    NB_STEPS = 7
+    FLUSH_INTERVAL = 3
+
+    population, soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH))
+    elements_df = cnwheat_converter.to_dataframes(population, soils)[cnwheat_io.SCALES.index('elements')]
+    steps_dfs = []
+    for t in range(NB_STEPS):
+        step_df = elements_df.copy()
+        step_df['sucrose'] += t
+        step_df.insert(0, 't', t)
+        steps_dfs.append(step_df)
+    desired_outputs_df = pd.concat(steps_dfs, ignore_index=True)
+    nb_rows_per_step = len(elements_df)
+    chunk_rows = 2 * nb_rows_per_step + 1  # the chunks span several steps
+
+    def normalize(outputs_df):
+        # the indexes may be read back as strings, and the variables not computed yet as NaN instead of None
+        outputs_df = outputs_df.astype({column: object for column in cnwheat_simulation.Simulation.ELEMENTS_INDEXES})
+        return outputs_df.astype({column: float for column in outputs_df.columns if outputs_df[column].isna().all()})
+
+    tmp_dirpath = tempfile.mkdtemp()
+    try:
+        outputs_filepath = os.path.join(tmp_dirpath, 'elements_outputs' + outputs_extension)
+        with cnwheat_io.OutputsSink(outputs_filepath, flush_interval=FLUSH_INTERVAL) as outputs_sink:
+            for step_df in steps_dfs:
+                outputs_sink.append(step_df.t.iloc[0], step_df.drop(columns='t'))
+        nb_chunks = -(-NB_STEPS // FLUSH_INTERVAL)
+        if outputs_sink.format_ in cnwheat_io.COLUMNAR_FORMATS:
+            assert len(glob.glob(os.path.join(outputs_filepath, 'part-*' + outputs_extension))) == nb_chunks
+
+        outputs_df = cnwheat_io.read_outputs(outputs_filepath)
+        pd.testing.assert_frame_equal(normalize(outputs_df), normalize(desired_outputs_df), check_dtype=False, rtol=0, atol=10 ** -OUTPUTS_PRECISION)
+
+        outputs_chunks = list(cnwheat_io.iter_outputs(outputs_filepath, chunk_rows=chunk_rows))
+        assert all(len(outputs_chunk) <= chunk_rows for outputs_chunk in outputs_chunks)
+        if outputs_sink.format_ in cnwheat_io.COLUMNAR_FORMATS:
+            # each part file is read in chunks
+            parts_nb_rows = [min(FLUSH_INTERVAL, NB_STEPS - i * FLUSH_INTERVAL) * nb_rows_per_step for i in range(nb_chunks)]
+            assert [len(outputs_chunk) for outputs_chunk in outputs_chunks] == [min(chunk_rows, part_nb_rows - offset) for part_nb_rows in parts_nb_rows
+                                                                                for offset in range(0, part_nb_rows, chunk_rows)]
+        else:
+            assert len(outputs_chunks) == -(-len(desired_outputs_df) // chunk_rows)
+        pd.testing.assert_frame_equal(normalize(pd.concat(outputs_chunks, ignore_index=True)), normalize(outputs_df), check_dtype=False)
+    finally:
+        shutil.rmtree(tmp_dirpath)
+
+
+def test_schema():
+    """Test the conversion of the dataframes to the dtypes of :mod:`cnwheat.schema`."""
+
+    # the outputs of the converter have the dtypes of the schema
+    population, soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(os.path.join('simulation_run', 'inputs')))
+    elements_df = cnwheat_converter.to_dataframes(population, soils)[cnwheat_io.SCALES.index('elements')]
+    for column in ('plant', 'metamer', 'organ', 'element'):
+        assert elements_df[column].dtype == cnwheat_schema.INDEXES_DTYPES[column]
+    assert isinstance(elements_df['axis'].dtype, pd.CategoricalDtype)
+
+    dataframe = pd.DataFrame({'t': [0.0, 0.0, 1.0],
+                              'plant': [1, 1, 1],
+                              'axis': ['MS', 'T1', 'MS'],
+                              'metamer': [1.0, np.nan, 2.0],
+                              'organ': ['blade', 'new_organ', 'blade'],
+                              'element': ['LeafElement1', 'LeafElement1', 'HiddenElement'],
+                              'sucrose': [1.1, 2.2, 3.3],
+                              'nb_replications': [1, 1, 1]})
+    assert cnwheat_schema.apply_schema(dataframe) is dataframe
+
+    # the unknown labels extend the fixed categories, after them
+    assert list(dataframe['organ'].dtype.categories) == list(cnwheat_schema.ORGANS_LABELS) + ['new_organ']
+    assert list(dataframe['organ']) == ['blade', 'new_organ', 'blade']
+    assert dataframe['element'].dtype == cnwheat_schema.INDEXES_DTYPES['element']
+    assert list(dataframe['axis'].dtype.categories) == ['MS', 'T1']
+    assert dataframe['plant'].dtype == np.int32
+    # an integer index with missing values is left unchanged
+    assert dataframe['metamer'].dtype == np.float64
+    np.testing.assert_array_equal(dataframe['metamer'], [1.0, np.nan, 2.0])
+    # by default, the variables keep their dtypes
+    assert dataframe['sucrose'].dtype == np.float64
+
+    # the float variables are downcast, but neither the time nor the integer variables
+    cnwheat_schema.apply_schema(dataframe, variables_dtype='float32')
+    assert dataframe['sucrose'].dtype == np.float32
+    np.testing.assert_allclose(dataframe['sucrose'], [1.1, 2.2, 3.3], rtol=1e-7)
+    assert dataframe['t'].dtype == np.float64
+    assert dataframe['nb_replications'].dtype == np.int64
+    assert dataframe['metamer'].dtype == np.float64
+
+    for variables_dtype in ('float16', 'int32', 'object'):
+        with pytest.raises(ValueError):
+            cnwheat_schema.apply_schema(dataframe, variables_dtype=variables_dtype)
+    assert dataframe['sucrose'].dtype == np.float32
+
+
+def test_simulation_run_adaptive():
+    """Test the run of a simulation with :meth:`Simulation.run_adaptive`, with time steps bounded to the time step of the simulation."""
+    test_simulation_run(use_run_until=True, use_run_adaptive=True)
+
+
+def test_adaptive_stepping_tolerances():
+    """Test that :meth:`Simulation.run_adaptive` runs fewer steps with larger tolerances, and that the outputs resampled inside a step
+    are interpolated, including the floats held by the columns of dtype object."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+    SIMULATION_LENGTH = 24
+    CULM_DENSITY = {1: 410}
+
+    photosynthesis_elements_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_photosynthesis_forcings.csv'))
+    senescence_roots_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'roots_senescence_forcings.csv'))
+    senescence_elements_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_senescence_forcings.csv'))
+
+    time_steps_numbers = []
+    for tolerance in (0.01, 1):
+        population, soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH))
+        forcings_store = cnwheat_forcings.ForcingsStore(senescence_roots_data_df, [senescence_elements_data_df, photosynthesis_elements_data_df])
+        forcings_store.apply(0, population)
+        simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=HOUR_TO_SECOND_CONVERSION_FACTOR, culm_density=CULM_DENSITY)
+        simulation_.initialize(population, soils)
+        stepping = cnwheat_simulation.AdaptiveStepping(state_tolerance=tolerance, forcings_tolerance=tolerance)
+        time_steps = simulation_.run_adaptive(SIMULATION_LENGTH, forcings_provider=forcings_store, stepping=stepping)
+        np.testing.assert_allclose(sum(time_steps), SIMULATION_LENGTH)
+        time_steps_numbers.append(len(time_steps))
+    assert time_steps_numbers[1] <= time_steps_numbers[0]
+
+    previous_outputs_df = pd.DataFrame({'organ': ['roots', 'blade'], 'sucrose': [1.0, 2.0], 'Export_Nitrates': pd.Series([1.0, None], dtype=object)})
+    outputs_df = pd.DataFrame({'organ': ['roots', 'blade'], 'sucrose': [3.0, 4.0], 'Export_Nitrates': pd.Series([3.0, None], dtype=object)})
+    resampled_outputs_df, = cnwheat_simulation.Simulation._resample_outputs((previous_outputs_df,), (outputs_df,), 0.5)
+    np.testing.assert_allclose(resampled_outputs_df['sucrose'].values, [2.0, 3.0])
+    np.testing.assert_allclose(resampled_outputs_df['Export_Nitrates'].values.astype(float), [2.0, np.nan])
+    assert list(resampled_outputs_df['organ']) == ['roots', 'blade']
+
+
+def test_forcings_store():
+    """Test that the forcings applied from a :class:`cnwheat.forcings.ForcingsStore` are the same as the forcings applied from the grouped forcings dataframes."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+
+    inputs_dataframes = read_inputs_dataframes(INPUTS_DIRPATH)
+    photosynthesis_elements_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_photosynthesis_forcings.csv'))
+    senescence_roots_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'roots_senescence_forcings.csv'))
+    senescence_elements_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_senescence_forcings.csv'))
+
+    grouped_population, _ = cnwheat_converter.from_dataframes(**inputs_dataframes)
+    stored_population, _ = cnwheat_converter.from_dataframes(**inputs_dataframes)
+
+    forcings_store = cnwheat_forcings.ForcingsStore(senescence_roots_data_df, [senescence_elements_data_df, photosynthesis_elements_data_df])
+    photosynthesis_elements_data_grouped = photosynthesis_elements_data_df.groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    senescence_roots_data_grouped = senescence_roots_data_df.groupby(cnwheat_simulation.Simulation.AXES_T_INDEXES)
+    senescence_elements_data_grouped = senescence_elements_data_df.groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+
+    for t in sorted(photosynthesis_elements_data_df.t.unique()):
+        force_senescence_and_photosynthesis(t, grouped_population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+        forcings_store.apply(t, stored_population)
+        for grouped_outputs_df, stored_outputs_df in zip(cnwheat_converter.to_dataframes(grouped_population), cnwheat_converter.to_dataframes(stored_population)):
+            pd.testing.assert_frame_equal(stored_outputs_df, grouped_outputs_df)
+
+
+def test_interpolation_kernels():
+    """Test the kernels which interpolate the forcings between the time steps of the forcings tables."""
+
+    forcings_df = pd.read_csv(os.path.join('simulation_run', 'inputs', 'elements_photosynthesis_forcings.csv'))
+    Ag_df = forcings_df.pivot_table(index='t', columns=cnwheat_simulation.Simulation.ELEMENTS_INDEXES, values='Ag').dropna(axis=1)
+    times, values = Ag_df.index.values.astype(float), Ag_df.values
+
+    for t_position in range(len(times) - 1):
+        t = (times[t_position] + times[t_position + 1]) / 2
+        np.testing.assert_array_equal(cnwheat_forcings.PreviousKernel(times, values)(t_position, t), values[t_position])
+        np.testing.assert_allclose(cnwheat_forcings.LinearKernel(times, values)(t_position, t), (values[t_position] + values[t_position + 1]) / 2)
+        # the monotone cubic interpolation does not overshoot the values of the table
+        cubic_values = cnwheat_forcings.MonotoneCubicKernel(times, values)(t_position, t)
+        lower_values, upper_values = np.minimum(values[t_position], values[t_position + 1]), np.maximum(values[t_position], values[t_position + 1])
+        assert np.all((cubic_values >= lower_values - 10 ** -PRECISION) & (cubic_values <= upper_values + 10 ** -PRECISION))
+
+
+def test_cached_table():
+    """Test that the rows read from the cache of a forcings table are the same as the rows read from the CSV file."""
+
+    FORCINGS_FILEPATH = os.path.join('simulation_run', 'inputs', 'elements_photosynthesis_forcings.csv')
+
+    forcings_df = pd.read_csv(FORCINGS_FILEPATH)
+    tmp_dirpath = tempfile.mkdtemp()
+    try:
+        cache_dirpath = os.path.join(tmp_dirpath, 'elements_photosynthesis_forcings.csv.cache')
+        cnwheat_forcings.open_cached_table(FORCINGS_FILEPATH, cache_dirpath, chunk_rows=10)
+        # the second call opens the cache written by the first one
+        cached_table = cnwheat_forcings.open_cached_table(FORCINGS_FILEPATH, cache_dirpath)
+
+        t_start, t_end = forcings_df.t.iloc[len(forcings_df) // 3], forcings_df.t.iloc[2 * len(forcings_df) // 3]
+        desired_window_df = forcings_df[(forcings_df.t >= t_start) & (forcings_df.t <= t_end)].reset_index(drop=True)
+        pd.testing.assert_frame_equal(cached_table.window(t_start, t_end), desired_window_df, check_dtype=False)
+        pd.testing.assert_series_equal(cached_table.values_at(t_end, ['Ag', 'Tr']), forcings_df.set_index('t').loc[t_end, ['Ag', 'Tr']].iloc[0], check_dtype=False,
+                                       check_names=False)
+    finally:
+        shutil.rmtree(tmp_dirpath)
+
+
 def test_simulation_run_with_interpolation(overwrite_desired_data=False):
     """Test the run of a simulation, with interpolation of the forcings."""
 
@@ -216,10 +656,6 @@ def test_simulation_run_with_interpolation(overwrite_desired_data=False):
 
     # Inputs of the test
     INPUTS_DIRPATH = os.path.join(TEST_DIR_PATH, 'inputs')
-    ORGANS_INITIAL_STATE_FILENAME = 'organs_initial_state.csv'
-    HIDDENZONES_INITIAL_STATE_FILENAME = 'hiddenzones_initial_state.csv'
-    ELEMENTS_INITIAL_STATE_FILENAME = 'elements_initial_state.csv'
-    SOILS_INITIAL_STATE_FILENAME = 'soils_initial_state.csv'
     ELEMENTS_PHOTOSYNTHESIS_FORCINGS_FILENAME = 'elements_photosynthesis_forcings.csv'
     ROOTS_SENESCENCE_FORCINGS_FILENAME = 'roots_senescence_forcings.csv'
     ELEMENTS_SENESCENCE_FORCINGS_FILENAME = 'elements_senescence_forcings.csv'
@@ -246,17 +682,10 @@ def test_simulation_run_with_interpolation(overwrite_desired_data=False):
     time_step_seconds = TIME_STEP * HOUR_TO_SECOND_CONVERSION_FACTOR
 
     # Read the inputs from CSV files and create inputs dataframes
-    inputs_dataframes = {}
-    for inputs_filename in (
-            ORGANS_INITIAL_STATE_FILENAME, HIDDENZONES_INITIAL_STATE_FILENAME, ELEMENTS_INITIAL_STATE_FILENAME,
-            SOILS_INITIAL_STATE_FILENAME):
-        inputs_dataframes[inputs_filename] = pd.read_csv(os.path.join(INPUTS_DIRPATH, inputs_filename))
+    inputs_dataframes = read_inputs_dataframes(INPUTS_DIRPATH)
 
     # Convert the inputs dataframes to a population of plants and a dictionary of soils
-    population, soils = cnwheat_converter.from_dataframes(inputs_dataframes[ORGANS_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[HIDDENZONES_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[ELEMENTS_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[SOILS_INITIAL_STATE_FILENAME])
+    population, soils = cnwheat_converter.from_dataframes(**inputs_dataframes)
 
     # Create the simulation
     simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY,
@@ -339,6 +768,172 @@ def test_simulation_run_with_interpolation(overwrite_desired_data=False):
                                                 actual_outputs_filename, precision=PRECISION, overwrite_desired_data=overwrite_desired_data)
 
 
+def test_derivatives_with_interpolation():
+    """Test that, with interpolation of the forcings, the derivatives computed by the Python and the vectorized engines depend only on `t` and `y`,
+    and not on the previous evaluations: the Jacobian is approximated by perturbing groups of compartments together."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run_with_interpolation', 'inputs')
+    TIME_STEP = 1
+    CULM_DENSITY = {1: 410}
+
+    time_step_seconds = TIME_STEP * HOUR_TO_SECOND_CONVERSION_FACTOR
+
+    photosynthesis_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_photosynthesis_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    senescence_roots_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'roots_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.AXES_T_INDEXES)
+    senescence_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+
+    for derivatives_engine in ('python', 'vectorized'):
+        population, soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH))
+        simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY,
+                                                    interpolate_forcings=True,
+                                                    senescence_forcings_delta_t=time_step_seconds,
+                                                    photosynthesis_forcings_delta_t=time_step_seconds,
+                                                    derivatives_engine=derivatives_engine)
+        # run a first step, so that the forcings of the second step are interpolated between two different values
+        for t in (0, TIME_STEP):
+            force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+            simulation_.initialize(population, soils)
+            if t == 0:
+                simulation_.run()
+
+        derivatives_function = simulation_._prepare_run()
+        t = simulation_.time_grid[1] / 2
+        y = np.array(simulation_.initial_conditions, dtype=float)
+        desired_derivatives = np.array(derivatives_function(t, y))
+        derivatives_function(t, y * 1.1)
+        np.testing.assert_array_equal(derivatives_function(t, y), desired_derivatives)
+
+
+def test_vectorized_engine_with_interpolation():
+    """Test that, with interpolation of the forcings, the outputs of the vectorized engine are the same as the outputs of the Python engine,
+    the forcings being interpolated either by the simulation or by a :class:`cnwheat.forcings.ForcingsStore`."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run_with_interpolation', 'inputs')
+    TIME_STEP = 1
+    NB_STEPS = 4
+    CULM_DENSITY = {1: 410}
+
+    time_step_seconds = TIME_STEP * HOUR_TO_SECOND_CONVERSION_FACTOR
+
+    photosynthesis_elements_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_photosynthesis_forcings.csv'))
+    senescence_roots_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'roots_senescence_forcings.csv'))
+    senescence_elements_data_df = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_senescence_forcings.csv'))
+    photosynthesis_elements_data_grouped = photosynthesis_elements_data_df.groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    senescence_roots_data_grouped = senescence_roots_data_df.groupby(cnwheat_simulation.Simulation.AXES_T_INDEXES)
+    senescence_elements_data_grouped = senescence_elements_data_df.groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+
+    for use_forcings_store in (False, True):
+        engines_outputs = []
+        for derivatives_engine in ('python', 'vectorized'):
+            population, soils = cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH))
+            if use_forcings_store:
+                forcings_store = cnwheat_forcings.ForcingsStore(senescence_roots_data_df, [senescence_elements_data_df, photosynthesis_elements_data_df],
+                                                                interpolation='linear')
+                simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY,
+                                                            derivatives_engine=derivatives_engine, forcings_interpolator=forcings_store)
+            else:
+                simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY,
+                                                            interpolate_forcings=True,
+                                                            senescence_forcings_delta_t=time_step_seconds,
+                                                            photosynthesis_forcings_delta_t=time_step_seconds,
+                                                            derivatives_engine=derivatives_engine)
+            for t in range(0, NB_STEPS * TIME_STEP, TIME_STEP):
+                force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+                simulation_.initialize(population, soils)
+                simulation_.run()
+            engines_outputs.append(cnwheat_converter.to_dataframes(simulation_.population, simulation_.soils))
+
+        for python_outputs_df, vectorized_outputs_df in zip(*engines_outputs):
+            numeric_columns = python_outputs_df.select_dtypes(include=[np.number]).columns
+            np.testing.assert_allclose(vectorized_outputs_df[numeric_columns].values.astype(float), python_outputs_df[numeric_columns].values.astype(float),
+                                       rtol=10 ** -(PRECISION + 2), atol=10 ** -(PRECISION + 2))
+
+
+def test_ensemble_simulation():
+    """Test that the members of an ensemble give the same outputs as separate simulations, the vectorized members being computed at once."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+    TIME_STEP = 1
+    NB_STEPS = 3
+    MEMBERS_CONFIGURATIONS = (({1: 410}, 'vectorized'), ({1: 250}, 'vectorized'), ({1: 410}, 'python'))
+
+    time_step_seconds = TIME_STEP * HOUR_TO_SECOND_CONVERSION_FACTOR
+
+    photosynthesis_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_photosynthesis_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+    senescence_roots_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'roots_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.AXES_T_INDEXES)
+    senescence_elements_data_grouped = pd.read_csv(os.path.join(INPUTS_DIRPATH, 'elements_senescence_forcings.csv')).groupby(cnwheat_simulation.Simulation.ELEMENTS_T_INDEXES)
+
+    def create_members():
+        return [cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=culm_density, derivatives_engine=derivatives_engine)
+                for culm_density, derivatives_engine in MEMBERS_CONFIGURATIONS]
+
+    def initialize_members(members, members_inputs, t):
+        for member, (population, soils) in zip(members, members_inputs):
+            force_senescence_and_photosynthesis(t, population, senescence_roots_data_grouped, senescence_elements_data_grouped, photosynthesis_elements_data_grouped)
+            member.initialize(population, soils)
+
+    separate_members = create_members()
+    ensemble_members = create_members()
+    ensemble = cnwheat_simulation.EnsembleSimulation(ensemble_members)
+    separate_members_inputs = [cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH)) for _ in separate_members]
+    ensemble_members_inputs = [cnwheat_converter.from_dataframes(**read_inputs_dataframes(INPUTS_DIRPATH)) for _ in ensemble_members]
+    packed_populations = []
+    for t in range(0, NB_STEPS * TIME_STEP, TIME_STEP):
+        initialize_members(separate_members, separate_members_inputs, t)
+        for member in separate_members:
+            member.run()
+        initialize_members(ensemble_members, ensemble_members_inputs, t)
+        ensemble.run()
+        packed_populations.extend(packed_simulation.packed_population for packed_simulation in ensemble.packed_simulations.values())
+
+    # the two vectorized members are computed by a single packed simulation, whose packed population is merged once for all the steps
+    assert len(ensemble.packed_simulations) == 1
+    assert all(packed_population is packed_populations[0] for packed_population in packed_populations)
+
+    for separate_member, ensemble_member in zip(separate_members, ensemble_members):
+        for separate_outputs_df, ensemble_outputs_df in zip(cnwheat_converter.to_dataframes(separate_member.population, separate_member.soils),
+                                                            cnwheat_converter.to_dataframes(ensemble_member.population, ensemble_member.soils)):
+            numeric_columns = separate_outputs_df.select_dtypes(include=[np.number]).columns
+            np.testing.assert_allclose(ensemble_outputs_df[numeric_columns].values.astype(float), separate_outputs_df[numeric_columns].values.astype(float),
+                                       rtol=10 ** -PRECISION, atol=10 ** -PRECISION)
+
+    # the packed population is merged again after a change of the parameters of a member
+    ensemble_population, _ = ensemble_members_inputs[0]
+    roots = ensemble_population.plants[0].axes[0].roots
+    roots.PARAMETERS = roots.PARAMETERS.derive({'SIGMA_SUCROSE_MAX': 2 * roots.PARAMETERS.SIGMA_SUCROSE_MAX})
+    initialize_members(ensemble_members, ensemble_members_inputs, NB_STEPS * TIME_STEP)
+    ensemble.run()
+    packed_simulation, = ensemble.packed_simulations.values()
+    assert packed_simulation.packed_population is not packed_populations[0]
+    # the roots of the first axis of the first member, and of the last axis of the second member
+    packed_roots_parameters = packed_simulation.packed_population[cnwheat_simulation.model.Roots]['parameters']
+    np.testing.assert_array_equal(packed_roots_parameters.SIGMA_SUCROSE_MAX[[0, -1]], [roots.PARAMETERS.SIGMA_SUCROSE_MAX, roots.PARAMETERS.SIGMA_SUCROSE_MAX / 2])
+
+
+def test_parameters_sweep():
+    """Test that the scenarios of a parameters sweep are isolated: the overrides of a scenario are not used by the other scenarios,
+    and a scenario which raises an exception or kills its worker process fails without stopping the other scenarios."""
+
+    INPUTS_DIRPATH = os.path.join('simulation_run', 'inputs')
+
+    default_SIGMA_SUCROSE_MAX = cnwheat_simulation.model.Roots.PARAMETERS.SIGMA_SUCROSE_MAX
+    parameters_overrides = [{},
+                            {'roots': {'SIGMA_SUCROSE_MAX': 2 * default_SIGMA_SUCROSE_MAX}},
+                            {'roots': {'SIGMA_SUCROSE_MAX': -1}},
+                            {'roots': {'KILL_WORKER': True}},
+                            {}]
+    results = sorted(cnwheat_sweep.run_scenarios(read_inputs_dataframes(INPUTS_DIRPATH), parameters_overrides, run_sweep_scenario, processes=2))
+
+    assert [result.index for result in results] == list(range(len(parameters_overrides)))
+    assert [result.update_parameters for result in results] == parameters_overrides
+    for succeeding_result, desired_outputs in zip(results[:2] + results[4:], (default_SIGMA_SUCROSE_MAX, 2 * default_SIGMA_SUCROSE_MAX, default_SIGMA_SUCROSE_MAX)):
+        assert succeeding_result.error is None
+        assert succeeding_result.outputs == desired_outputs
+    assert results[2].outputs is None and 'Negative conductance' in results[2].error
+    assert results[3].outputs is None and 'terminated abruptly' in results[3].error
+    assert cnwheat_simulation.model.Roots.PARAMETERS.SIGMA_SUCROSE_MAX == default_SIGMA_SUCROSE_MAX
+
+
 def test_simulation_logging(overwrite_desired_data=False):
     """Test the logging of a simulation."""
 
@@ -346,10 +941,6 @@ def test_simulation_logging(overwrite_desired_data=False):
 
     # Inputs of the test
     INPUTS_DIRPATH = os.path.join(TEST_DIR_PATH, 'inputs')
-    ORGANS_INITIAL_STATE_FILENAME = 'organs_initial_state.csv'
-    HIDDENZONES_INITIAL_STATE_FILENAME = 'hiddenzones_initial_state.csv'
-    ELEMENTS_INITIAL_STATE_FILENAME = 'elements_initial_state.csv'
-    SOILS_INITIAL_STATE_FILENAME = 'soils_initial_state.csv'
     ELEMENTS_PHOTOSYNTHESIS_FORCINGS_FILENAME = 'elements_photosynthesis_forcings.csv'
     ROOTS_SENESCENCE_FORCINGS_FILENAME = 'roots_senescence_forcings.csv'
     ELEMENTS_SENESCENCE_FORCINGS_FILENAME = 'elements_senescence_forcings.csv'
@@ -397,17 +988,10 @@ def test_simulation_logging(overwrite_desired_data=False):
                                 log_model=True, log_compartments=True, log_derivatives=True, remove_old_logs=False)
 
     # Read the inputs from CSV files and create inputs dataframes
-    inputs_dataframes = {}
-    for inputs_filename in (
-            ORGANS_INITIAL_STATE_FILENAME, HIDDENZONES_INITIAL_STATE_FILENAME, ELEMENTS_INITIAL_STATE_FILENAME,
-            SOILS_INITIAL_STATE_FILENAME):
-        inputs_dataframes[inputs_filename] = pd.read_csv(os.path.join(INPUTS_DIRPATH, inputs_filename))
+    inputs_dataframes = read_inputs_dataframes(INPUTS_DIRPATH)
 
     # Convert the inputs dataframes to a population of plants and a dictionary of soils
-    population, soils = cnwheat_converter.from_dataframes(inputs_dataframes[ORGANS_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[HIDDENZONES_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[ELEMENTS_INITIAL_STATE_FILENAME],
-                                                          inputs_dataframes[SOILS_INITIAL_STATE_FILENAME])
+    population, soils = cnwheat_converter.from_dataframes(**inputs_dataframes)
 
     # Create the simulation
     simulation_ = cnwheat_simulation.Simulation(respiration_model=respiwheat_model, delta_t=time_step_seconds, culm_density=CULM_DENSITY)
@@ -546,10 +1130,11 @@ def test_postprocessing(overwrite_desired_data=False):
     postprocessing_df_dict = {}
 
     try:
-        (postprocessing_df_dict[axes_postprocessing_file_basename],
-         postprocessing_df_dict[hiddenzones_postprocessing_file_basename],
+        (_, _,
          postprocessing_df_dict[organs_postprocessing_file_basename],
          postprocessing_df_dict[elements_postprocessing_file_basename],
+         postprocessing_df_dict[hiddenzones_postprocessing_file_basename],
+         postprocessing_df_dict[axes_postprocessing_file_basename],
          postprocessing_df_dict[soils_postprocessing_file_basename]) \
             = cnwheat_postprocessing.postprocessing(axes_df=outputs_df_dict[AXES_OUTPUTS_FILENAME.split('.')[0]],
                                                     hiddenzones_df=outputs_df_dict[HIDDENZONES_OUTPUTS_FILENAME.split('.')[0]],
@@ -586,49 +1171,145 @@ def test_postprocessing(overwrite_desired_data=False):
                 (soils_postprocessing_file_basename, DESIRED_SOILS_POSTPROCESSING_FILENAME, ACTUAL_SOILS_POSTPROCESSING_FILENAME,
                  cnwheat_postprocessing.SOILS_T_INDEXES + cnwheat_postprocessing.SOILS_POSTPROCESSING_VARIABLES)):
         actual_postprocessing_df = postprocessing_df_dict[postprocessing_file_basename]
-        actual_postprocessing_df = actual_postprocessing_df.loc[:, actual_postprocessing_df.columns.intersection(postprocessing_variables_names)]  # compare only the postprocessing values
+        # compare only the postprocessing values, in the order of the postprocessing variables
+        actual_postprocessing_df = actual_postprocessing_df.loc[:, [variable_name for variable_name in postprocessing_variables_names if variable_name in actual_postprocessing_df.columns]]
         cnwheat_tools.compare_actual_to_desired(POSTPROCESSING_DIRPATH, actual_postprocessing_df, desired_postprocessing_filename,
                                                 actual_postprocessing_filename, precision=PRECISION, overwrite_desired_data=overwrite_desired_data)
 
 
-def test_graphs_generation():
-    """Test the graphs generation."""
+def test_streaming_postprocessing():
+    """Test that the post-processing computed step by step are the same as the post-processing of the whole outputs."""
 
-    TEST_DIR_PATH = 'graphs_generation'
+    OUTPUTS_DIRPATH = os.path.join('postprocessing', 'outputs')
 
-    # Inputs of the test
-    POSTPROCESSING_DIRPATH = os.path.join(TEST_DIR_PATH, 'postprocessing')
-    ORGANS_POSTPROCESSING_FILENAME = 'organs_postprocessing.csv'
-    HIDDENZONES_POSTPROCESSING_FILENAME = 'hiddenzones_postprocessing.csv'
-    ELEMENTS_POSTPROCESSING_FILENAME = 'elements_postprocessing.csv'
-    SOILS_POSTPROCESSING_FILENAME = 'soils_postprocessing.csv'
+    outputs_df_dict = {}
+    for scale in ('axes', 'organs', 'hiddenzones', 'elements', 'soils'):
+        outputs_df_dict[scale] = pd.read_csv(os.path.join(OUTPUTS_DIRPATH, '{}_outputs.csv'.format(scale)))
 
-    # Outputs of the test
-    GRAPHS_DIRPATH = os.path.join(TEST_DIR_PATH, 'graphs')
+    time_grid = outputs_df_dict['axes'].t
+    delta_t = (time_grid.loc[1] - time_grid.loc[0]) * HOUR_TO_SECOND_CONVERSION_FACTOR
 
-    # Retrieve post-processing dataframes
-    postprocessing_df_dict = {}
+    whole_postprocessing = cnwheat_postprocessing.postprocessing(delta_t=delta_t, **{scale + '_df': outputs_df.copy() for scale, outputs_df in outputs_df_dict.items()})
+    streaming_postprocessing = cnwheat_postprocessing.StreamingPostprocessing(delta_t=delta_t)
+    steps_postprocessing = {}
+    for t in time_grid.unique():
+        step_postprocessing = streaming_postprocessing.postprocess(t, **{scale + '_df': outputs_df[outputs_df.t == t] for scale, outputs_df in outputs_df_dict.items()})
+        for scale, postprocessing_df in step_postprocessing.items():
+            steps_postprocessing.setdefault(scale, []).append(postprocessing_df)
 
-    for postprocessing_filename in (ORGANS_POSTPROCESSING_FILENAME,
-                                    HIDDENZONES_POSTPROCESSING_FILENAME,
-                                    ELEMENTS_POSTPROCESSING_FILENAME,
-                                    SOILS_POSTPROCESSING_FILENAME):
-        postprocessing_filepath = os.path.join(POSTPROCESSING_DIRPATH, postprocessing_filename)
-        postprocessing_df = pd.read_csv(postprocessing_filepath)
-        postprocessing_file_basename = postprocessing_filename.split('.')[0]
-        postprocessing_df_dict[postprocessing_file_basename] = postprocessing_df
+    for scale, postprocessing_df in zip(cnwheat_postprocessing.POSTPROCESSING_SCALES, whole_postprocessing):
+        if scale not in steps_postprocessing:
+            continue
+        actual_postprocessing_df = pd.concat(steps_postprocessing[scale], ignore_index=True)[postprocessing_df.columns]
+        numeric_columns = postprocessing_df.select_dtypes('number').columns
+        np.testing.assert_allclose(actual_postprocessing_df[numeric_columns].values.astype(float), postprocessing_df[numeric_columns].values.astype(float))
+
+
+def test_parallel_postprocessing():
+    """Test that the post-processing computed in parallel are the same as the post-processing computed serially."""
+
+    OUTPUTS_DIRPATH = os.path.join('postprocessing', 'outputs')
+
+    outputs_df_dict = {}
+    for scale in ('axes', 'organs', 'hiddenzones', 'elements', 'soils'):
+        outputs_df_dict[scale] = pd.read_csv(os.path.join(OUTPUTS_DIRPATH, '{}_outputs.csv'.format(scale)))
 
+    time_grid = outputs_df_dict['axes'].t
+    delta_t = (time_grid.loc[1] - time_grid.loc[0]) * HOUR_TO_SECOND_CONVERSION_FACTOR
+
+    serial_postprocessing = cnwheat_postprocessing.postprocessing(delta_t=delta_t, **{scale + '_df': outputs_df.copy() for scale, outputs_df in outputs_df_dict.items()})
+    parallel_postprocessing = cnwheat_postprocessing.parallel_postprocessing(delta_t=delta_t, processes=2, nb_chunks=3,
+                                                                             **{scale + '_df': outputs_df for scale, outputs_df in outputs_df_dict.items()})
+
+    assert len(parallel_postprocessing) == len(serial_postprocessing)
+    for serial_postprocessing_df, parallel_postprocessing_df in zip(serial_postprocessing, parallel_postprocessing):
+        pd.testing.assert_frame_equal(parallel_postprocessing_df, serial_postprocessing_df)
+
+
+def test_postprocessing_from_files():
+    """Test that the post-processing of outputs files read in chunks are the same as the post-processing of the whole outputs."""
+
+    OUTPUTS_DIRPATH = os.path.join('postprocessing', 'outputs')
+
+    outputs_filepaths = {scale: os.path.join(OUTPUTS_DIRPATH, '{}_outputs.csv'.format(scale)) for scale in ('axes', 'organs', 'hiddenzones', 'elements', 'soils')}
+
+    time_grid = pd.read_csv(outputs_filepaths['axes']).t
+    delta_t = (time_grid.loc[1] - time_grid.loc[0]) * HOUR_TO_SECOND_CONVERSION_FACTOR
+
+    whole_postprocessing = cnwheat_postprocessing.postprocessing(delta_t=delta_t, **{scale + '_df': cnwheat_io.read_outputs(filepath) for scale, filepath in outputs_filepaths.items()})
+
+    # write the post-processing to a temporary directory
+    postprocessing_dirpath = tempfile.mkdtemp()
     try:
-        # Generate graphs for validation
-        cnwheat_postprocessing.generate_graphs(hiddenzones_df=postprocessing_df_dict[HIDDENZONES_POSTPROCESSING_FILENAME.split('.')[0]],
-                                               organs_df=postprocessing_df_dict[ORGANS_POSTPROCESSING_FILENAME.split('.')[0]],
-                                               elements_df=postprocessing_df_dict[ELEMENTS_POSTPROCESSING_FILENAME.split('.')[0]],
-                                               soils_df=postprocessing_df_dict[SOILS_POSTPROCESSING_FILENAME.split('.')[0]],
-                                               graphs_dirpath=GRAPHS_DIRPATH)
+        postprocessing_filepaths = {scale: os.path.join(postprocessing_dirpath, '{}_postprocessing.csv'.format(scale)) for scale in ('axes', 'organs', 'hiddenzones', 'elements', 'soils')}
+        cnwheat_postprocessing.postprocessing_from_files(outputs_filepaths, postprocessing_filepaths, delta_t=delta_t, steps_per_chunk=2, chunk_rows=10, precision=OUTPUTS_PRECISION)
 
-    except KeyError as ke:
-        warnings.warn(str(ke))
-        return
+        for scale, postprocessing_df in zip(cnwheat_postprocessing.POSTPROCESSING_SCALES, whole_postprocessing):
+            if scale not in postprocessing_filepaths:
+                continue
+            actual_postprocessing_df = cnwheat_io.read_outputs(postprocessing_filepaths[scale])[postprocessing_df.columns]
+            numeric_columns = postprocessing_df.select_dtypes('number').columns
+            np.testing.assert_allclose(actual_postprocessing_df[numeric_columns].values.astype(float), postprocessing_df[numeric_columns].values.astype(float),
+                                       rtol=10 ** -PRECISION, atol=10 ** -PRECISION)
+    finally:
+        shutil.rmtree(postprocessing_dirpath)
+
+
+def test_graphs_generation():
+    """Test the graphs generation from the post-processing of the outputs, in worker processes,
+    and that a new generation renders only the graphs which data changed."""
+
+    # Inputs of the test
+    OUTPUTS_DIRPATH = os.path.join('postprocessing', 'outputs')
+    AXES_OUTPUTS_FILENAME = 'axes_outputs.csv'
+    ORGANS_OUTPUTS_FILENAME = 'organs_outputs.csv'
+    HIDDENZONES_OUTPUTS_FILENAME = 'hiddenzones_outputs.csv'
+    ELEMENTS_OUTPUTS_FILENAME = 'elements_outputs.csv'
+    SOILS_OUTPUTS_FILENAME = 'soils_outputs.csv'
+
+    # Retrieve outputs dataframes
+    outputs_df_dict = {}
+    for outputs_filename in (AXES_OUTPUTS_FILENAME,
+                             ORGANS_OUTPUTS_FILENAME,
+                             HIDDENZONES_OUTPUTS_FILENAME,
+                             ELEMENTS_OUTPUTS_FILENAME,
+                             SOILS_OUTPUTS_FILENAME):
+        outputs_df_dict[outputs_filename.split('.')[0]] = pd.read_csv(os.path.join(OUTPUTS_DIRPATH, outputs_filename))
+
+    time_grid = outputs_df_dict[AXES_OUTPUTS_FILENAME.split('.')[0]].t
+    delta_t = (time_grid.loc[1] - time_grid.loc[0]) * HOUR_TO_SECOND_CONVERSION_FACTOR
+
+    # Compute the post-processing, which gives the variables plotted
+    _, _, organs_postprocessing_df, elements_postprocessing_df, hiddenzones_postprocessing_df, axes_postprocessing_df, soils_postprocessing_df = \
+        cnwheat_postprocessing.postprocessing(axes_df=outputs_df_dict[AXES_OUTPUTS_FILENAME.split('.')[0]],
+                                              hiddenzones_df=outputs_df_dict[HIDDENZONES_OUTPUTS_FILENAME.split('.')[0]],
+                                              organs_df=outputs_df_dict[ORGANS_OUTPUTS_FILENAME.split('.')[0]],
+                                              elements_df=outputs_df_dict[ELEMENTS_OUTPUTS_FILENAME.split('.')[0]],
+                                              soils_df=outputs_df_dict[SOILS_OUTPUTS_FILENAME.split('.')[0]],
+                                              delta_t=delta_t)
+
+    graphs_dirpath = tempfile.mkdtemp()
+    try:
+        # Generate graphs for validation, in 2 worker processes
+        cnwheat_postprocessing.generate_graphs(axes_df=axes_postprocessing_df, hiddenzones_df=hiddenzones_postprocessing_df, organs_df=organs_postprocessing_df,
+                                               elements_df=elements_postprocessing_df, soils_df=soils_postprocessing_df, graphs_dirpath=graphs_dirpath,
+                                               processes=2, use_cache=True)
+        graphs_filenames = sorted(filename for filename in os.listdir(graphs_dirpath) if filename.endswith('.PNG'))
+        assert 'mstruct_hz.PNG' in graphs_filenames and 'Cont_Fructan_DM_hz.PNG' in graphs_filenames
+        assert os.path.isfile(os.path.join(graphs_dirpath, cnwheat_postprocessing.GRAPHS_CACHE_FILENAME))
+
+        # Generate the graphs again, after a change of the data of one graph: only this graph is rendered again
+        for graph_filename in graphs_filenames:
+            os.utime(os.path.join(graphs_dirpath, graph_filename), (0, 0))
+        hiddenzones_postprocessing_df['mstruct'] *= 2
+        cnwheat_postprocessing.generate_graphs(axes_df=axes_postprocessing_df, hiddenzones_df=hiddenzones_postprocessing_df, organs_df=organs_postprocessing_df,
+                                               elements_df=elements_postprocessing_df, soils_df=soils_postprocessing_df, graphs_dirpath=graphs_dirpath,
+                                               processes=2, use_cache=True)
+        assert sorted(filename for filename in os.listdir(graphs_dirpath) if filename.endswith('.PNG')) == graphs_filenames
+        rendered_graphs = [graph_filename for graph_filename in graphs_filenames if os.stat(os.path.join(graphs_dirpath, graph_filename)).st_mtime != 0]
+        assert rendered_graphs == ['mstruct_hz.PNG']
+    finally:
+        shutil.rmtree(graphs_dirpath)
 
 
 if __name__ == '__main__':